@@ -2,13 +2,20 @@
 H.I.V.E. Conversation Agent
 Gemini-powered conversation agent with persona — no fallbacks
 """
-from google import genai
-from google.genai import types
+import asyncio
 import os
-from dotenv import load_dotenv
-from app.core.persona_manager import get_persona_system_prompt
-
-load_dotenv()
+import re
+import threading
+import time
+from app.core.env import load_env
+from app.core.persona_manager import get_cached_system_prompt
+from app.core.metrics import GEMINI_FALLBACKS, GEMINI_SECONDS
+from app.core.rate_limiter import chat_limiter, model_limiter
+from app.core.history_window import (
+    HistoryWindow,
+    HistoryWindowRegistry,
+    estimate_tokens,
+)
 
 # Models to try in order (some may be quota-limited on free tier)
 GEMINI_MODELS = [
@@ -18,66 +25,377 @@ GEMINI_MODELS = [
     "gemini-2.0-flash-lite",
 ]
 
+REPLY_INSTRUCTIONS = """Write your reply as the victim character. Remember:
+- Maximum 2-3 sentences only
+- Sound emotional and human, not robotic
+- Follow your character's speech style
+- Try to extract scammer's contact details
+- Stay completely in character
+- Do NOT reveal you are AI"""
 
-def generate_reply(persona: dict, scammer_message: str, conversation_history: list = None) -> str:
-    """
-    Generate a reply as the persona to the scammer's message using Gemini AI.
-    Raises on failure — no fallback responses.
-    """
+# Per-chat history windows, maintained incrementally across replies
+history_windows = HistoryWindowRegistry()
+
+_client = None
+_client_key = None
+
+_stats_lock = threading.Lock()
+_prompt_stats = {
+    "replies": 0,
+    "build_seconds": 0.0,
+    "prompt_tokens": 0,
+    "history_tokens": 0,
+    "history_turns_dropped": 0,
+}
 
+
+def set_client(client):
+    """Swap the Gemini client (e.g. for app.core.fake_llm fakes in tests)."""
+    global _client, _client_key
+    _client = client
+    _client_key = "__injected__"
+
+
+def _get_client():
+    """One Gemini client per API key instead of one per reply."""
+    global _client, _client_key
+    if _client_key == "__injected__":
+        return _client
+
+    load_env()
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key or api_key == "your_gemini_api_key_here":
         raise RuntimeError("GEMINI_API_KEY is not set. Add it to your .env file.")
 
-    client = genai.Client(api_key=api_key)
+    if _client is None or _client_key != api_key:
+        from google import genai
+        _client = genai.Client(api_key=api_key)
+        _client_key = api_key
+    return _client
 
-    # Build system + user prompts
-    system_prompt = get_persona_system_prompt(persona)
 
-    history_text = ""
-    if conversation_history:
-        recent = conversation_history[-6:]
-        history_text = "\n".join(
-            f"Scammer: {msg['text']}" if msg.get("sender") == "scammer" else f"You: {msg['text']}"
-            for msg in recent
-        )
+def warm_up():
+    """Import the google-genai SDK ahead of the first reply (backend.warmup)."""
+    load_env()
+    from google.genai import types    # noqa: F401  (pulls in google.genai)
 
-    user_prompt = f"""
-{'RECENT CONVERSATION:\n' + history_text if history_text else 'This is the first message.'}
+
+def build_user_prompt(history_text: str, scammer_message: str) -> str:
+    """Assemble the per-turn user prompt from an already-rendered history window."""
+    if history_text:
+        context = "RECENT CONVERSATION:\n" + history_text
+    else:
+        context = "This is the first message."
+    return f"""
+{context}
 
 SCAMMER JUST SAID: "{scammer_message}"
 
-Write your reply as the victim character. Remember:
-- Maximum 2-3 sentences only
-- Sound emotional and human, not robotic
-- Follow your character's speech style
-- Try to extract scammer's contact details
-- Stay completely in character
-- Do NOT reveal you are AI"""
+{REPLY_INSTRUCTIONS}"""
+
+
+def build_prompts(
+    persona: dict,
+    scammer_message: str,
+    conversation_history: list = None,
+    chat_id: str = None,
+    history_offset: int = 0,
+):
+    """
+    Return (system_prompt, user_prompt) for a reply.
+
+    With a chat_id the history window for that chat is kept between calls and
+    only new turns are appended; without one a window is cut from the tail of
+    `conversation_history` for this call only. `history_offset` is the
+    absolute turn number of conversation_history[0] when the caller only
+    keeps a bounded tail (see session_store.history_offset).
+    """
+    started = time.perf_counter()
+    system_prompt = get_cached_system_prompt(persona)
+
+    if chat_id is not None:
+        with history_windows.lock:
+            window = history_windows.get(chat_id)
+            dropped_before = window.dropped_turns
+            window.sync(conversation_history, history_offset)
+            history_text = window.render()
+            history_tokens = window.tokens
+            dropped = window.dropped_turns - dropped_before
+    else:
+        window = HistoryWindow.from_history(conversation_history)
+        history_text = window.render()
+        history_tokens = window.tokens
+        dropped = window.dropped_turns
+
+    user_prompt = build_user_prompt(history_text, scammer_message)
+    elapsed = time.perf_counter() - started
+
+    with _stats_lock:
+        _prompt_stats["replies"] += 1
+        _prompt_stats["build_seconds"] += elapsed
+        _prompt_stats["prompt_tokens"] += estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+        _prompt_stats["history_tokens"] += history_tokens
+        _prompt_stats["history_turns_dropped"] += dropped
+
+    return system_prompt, user_prompt
+
+
+def get_prompt_stats() -> dict:
+    """Per-reply prompt assembly cost and size."""
+    with _stats_lock:
+        stats = dict(_prompt_stats)
+    replies = stats["replies"] or 1
+    return {
+        "replies": stats["replies"],
+        "avg_build_ms": round(stats["build_seconds"] / replies * 1000, 4),
+        "avg_prompt_tokens": round(stats["prompt_tokens"] / replies, 1),
+        "avg_history_tokens": round(stats["history_tokens"] / replies, 1),
+        "history_turns_dropped": stats["history_turns_dropped"],
+        "history_token_budget": history_windows.token_budget,
+        "tracked_chats": len(history_windows),
+    }
+
+
+def clean_reply(text: str) -> str:
+    reply = text.strip()
+    # Strip surrounding quotes if present
+    if reply.startswith('"') and reply.endswith('"'):
+        reply = reply[1:-1]
+    return reply
+
+
+def _reply_request(persona, scammer_message, conversation_history, chat_id, history_offset):
+    """(user_prompt, config) for one reply."""
+    system_prompt, user_prompt = build_prompts(
+        persona, scammer_message, conversation_history, chat_id, history_offset
+    )
+    from google.genai import types
 
     config = types.GenerateContentConfig(
         system_instruction=system_prompt,
         temperature=0.9,
     )
+    return user_prompt, config
+
+
+def generate_reply(
+    persona: dict,
+    scammer_message: str,
+    conversation_history: list = None,
+    chat_id: str = None,
+    history_offset: int = 0,
+) -> str:
+    """
+    Generate a reply as the persona to the scammer's message using Gemini AI.
+    Raises on failure — no fallback responses.
+
+    Calls are paced per chat and per model (app.core.rate_limiter): over
+    budget, this waits for a slot; a model whose wait is too long is skipped.
+    The wait blocks the calling thread, so request handlers use
+    generate_reply_async() instead.
+    """
+
+    client = _get_client()
+    if chat_id is not None:
+        chat_limiter.acquire(chat_id)
+
+    user_prompt, config = _reply_request(
+        persona, scammer_message, conversation_history, chat_id, history_offset
+    )
 
     # Try each model until one succeeds
     last_error = None
     for model_name in GEMINI_MODELS:
         try:
-            response = client.models.generate_content(
+            model_limiter.acquire(model_name)
+            with GEMINI_SECONDS.time_outcome(model_name, "reply"):
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=user_prompt,
+                    config=config,
+                )
+            return clean_reply(response.text)
+        except Exception as e:
+            last_error = e
+            print(f"⚠️  Model {model_name} failed: {e}")
+            GEMINI_FALLBACKS.inc(model_name)
+            continue
+
+    # All models exhausted — propagate error instead of falling back
+    raise RuntimeError(f"All Gemini models failed. Last error: {last_error}")
+
+
+async def generate_reply_async(
+    persona: dict,
+    scammer_message: str,
+    conversation_history: list = None,
+    chat_id: str = None,
+    history_offset: int = 0,
+) -> str:
+    """
+    generate_reply() for the event loop. Rate-limit deferrals are awaited,
+    so a worker thread is only held for the Gemini call itself.
+    """
+    client = _get_client()
+    if chat_id is not None:
+        await chat_limiter.acquire_async(chat_id)
+
+    user_prompt, config = _reply_request(
+        persona, scammer_message, conversation_history, chat_id, history_offset
+    )
+
+    last_error = None
+    for model_name in GEMINI_MODELS:
+        try:
+            await model_limiter.acquire_async(model_name)
+            with GEMINI_SECONDS.time_outcome(model_name, "reply"):
+                response = await asyncio.to_thread(
+                    client.models.generate_content,
+                    model=model_name,
+                    contents=user_prompt,
+                    config=config,
+                )
+            return clean_reply(response.text)
+        except Exception as e:
+            last_error = e
+            print(f"⚠️  Model {model_name} failed: {e}")
+            GEMINI_FALLBACKS.inc(model_name)
+            continue
+
+    raise RuntimeError(f"All Gemini models failed. Last error: {last_error}")
+
+
+class QuoteStripper:
+    """
+    Incremental version of clean_reply() for streamed text.
+
+    Leading whitespace and an opening quote are dropped as soon as they are
+    seen; trailing whitespace and quotes are held back until more text
+    arrives, so a closing quote never reaches the client. The full cleaned
+    reply is always available from finish().
+    """
+
+    def __init__(self):
+        self._started = False
+        self._opened_with_quote = False
+        self._held = ""
+        self._emitted = []
+
+    def feed(self, chunk: str) -> str:
+        if not self._started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                return ""
+            self._started = True
+            if chunk.startswith('"'):
+                self._opened_with_quote = True
+                chunk = chunk[1:]
+
+        text = self._held + chunk
+        body = text.rstrip('" \t\r\n')
+        self._held = text[len(body):]
+        if body:
+            self._emitted.append(body)
+        return body
+
+    def finish(self) -> str:
+        """Flush the held-back tail; returns any text still to emit."""
+        tail = self._held.rstrip()
+        self._held = ""
+        if self._opened_with_quote and tail.endswith('"'):
+            tail = tail[:-1]
+        if tail:
+            self._emitted.append(tail)
+        return tail
+
+    @property
+    def text(self) -> str:
+        return "".join(self._emitted)
+
+
+_SENTENCE_END = re.compile(r"[.!?]+[\"')]*\s+")
+
+
+class SentenceBuffer:
+    """Accumulates streamed text and hands back complete sentences."""
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> list:
+        self._buffer += text
+        sentences = []
+        while True:
+            match = _SENTENCE_END.search(self._buffer)
+            if not match:
+                break
+            sentences.append(self._buffer[:match.end()].strip())
+            self._buffer = self._buffer[match.end():]
+        return sentences
+
+    def finish(self) -> list:
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+
+async def generate_reply_stream(
+    persona: dict,
+    scammer_message: str,
+    conversation_history: list = None,
+    chat_id: str = None,
+    history_offset: int = 0,
+):
+    """
+    Streaming variant of generate_reply(): yields reply text as Gemini
+    produces it, already quote-stripped.
+
+    An async generator: rate-limit deferrals are awaited and each chunk is
+    read from Gemini in a worker thread, so no thread waits out a deferral.
+    Falls through GEMINI_MODELS only while nothing has been sent yet; a
+    failure mid-stream is raised since the client already has partial text.
+    """
+    client = _get_client()
+    if chat_id is not None:
+        await chat_limiter.acquire_async(chat_id)
+    user_prompt, config = _reply_request(
+        persona, scammer_message, conversation_history, chat_id, history_offset
+    )
+
+    last_error = None
+    for model_name in GEMINI_MODELS:
+        stripper = QuoteStripper()
+        sent_any = False
+        call_started = None
+        try:
+            await model_limiter.acquire_async(model_name)
+            call_started = time.perf_counter()
+            chunks = iter(await asyncio.to_thread(
+                client.models.generate_content_stream,
                 model=model_name,
                 contents=user_prompt,
                 config=config,
-            )
-            reply = response.text.strip()
-            # Strip surrounding quotes if present
-            if reply.startswith('"') and reply.endswith('"'):
-                reply = reply[1:-1]
-            return reply
+            ))
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                piece = stripper.feed(chunk.text or "")
+                if piece:
+                    sent_any = True
+                    yield piece
+            GEMINI_SECONDS.observe(time.perf_counter() - call_started, model_name, "reply_stream", "ok")
+            tail = stripper.finish()
+            if tail:
+                yield tail
+            return
         except Exception as e:
+            if call_started:
+                GEMINI_SECONDS.observe(time.perf_counter() - call_started, model_name, "reply_stream", "error")
+            if sent_any:
+                raise
             last_error = e
             print(f"⚠️  Model {model_name} failed: {e}")
+            GEMINI_FALLBACKS.inc(model_name)
             continue
 
-    # All models exhausted — propagate error instead of falling back
     raise RuntimeError(f"All Gemini models failed. Last error: {last_error}")
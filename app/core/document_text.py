@@ -0,0 +1,58 @@
+"""
+H.I.V.E. Document Text
+Text of forwarded documents (PDF "KYC forms", long .txt pastes) as a stream of pieces, never the whole file
+"""
+import codecs
+import os
+
+# Largest document accepted by POST /honeypot/extract/document
+MAX_DOCUMENT_BYTES = int(os.getenv("MAX_DOCUMENT_BYTES", str(100 * 1024 * 1024)))
+READ_CHUNK_BYTES = 64 * 1024
+
+
+class DocumentUnreadable(Exception):
+    """The document isn't a format we can read, or pdfminer is not installed."""
+
+
+def is_pdf(head: bytes) -> bool:
+    return head.lstrip()[:5] == b"%PDF-"
+
+
+def iter_text(fileobj, encoding: str = "utf-8"):
+    """Decoded text of a binary file object, READ_CHUNK_BYTES at a time (split characters are kept whole)."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    while True:
+        data = fileobj.read(READ_CHUNK_BYTES)
+        if not data:
+            break
+        yield decoder.decode(data)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_pdf_text(fileobj):
+    """Text of a PDF, one page at a time; pdfminer only keeps the current page's layout."""
+    try:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+        from pdfminer.psparser import PSException
+    except ImportError as e:
+        raise DocumentUnreadable("PDF support needs pdfminer.six (pip install -r requirements.txt)") from e
+    try:
+        for page in extract_pages(fileobj):
+            yield "\n".join(element.get_text() for element in page if isinstance(element, LTTextContainer)) + "\n"
+    except PSException as e:    # every pdfminer parse error
+        raise DocumentUnreadable(f"Not a readable PDF: {e}") from e
+
+
+def iter_document(fileobj):
+    """Text pieces of a PDF or plain-text file object, sniffed from its first bytes."""
+    head = fileobj.read(1024)
+    fileobj.seek(0)
+    return iter_pdf_text(fileobj) if is_pdf(head) else iter_text(fileobj)
+
+
+def iter_document_path(path: str):
+    with open(path, "rb") as f:
+        yield from iter_document(f)
@@ -0,0 +1,251 @@
+"""
+H.I.V.E. Domain Reputation
+Known-bad domains in a reversed-label trie: a link's host and every parent domain are checked in one walk
+"""
+import ipaddress
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from typing import Optional
+from urllib.parse import urlsplit
+
+# Comma-separated blocklist files loaded with the fingerprint DB's link identifiers
+DOMAIN_BLOCKLISTS = [p for p in os.getenv("DOMAIN_BLOCKLISTS", "").split(",") if p.strip()]
+
+# Hosts shared by everyone (link shorteners, big platforms): a scammer's link
+# on one of these says nothing about the domain, so stored links never list them
+SHARED_DOMAINS = {
+    "bit.ly", "tinyurl.com", "t.co", "goo.gl", "ow.ly", "is.gd", "cutt.ly", "rb.gy",
+    "google.com", "youtube.com", "facebook.com", "instagram.com", "whatsapp.com", "wa.me",
+    "t.me", "telegram.me", "linkedin.com", "twitter.com", "x.com", "github.com",
+} | {d.strip().lower() for d in os.getenv("SHARED_DOMAINS", "").split(",") if d.strip()}
+
+# Where a domain came from: "fingerprint_db" (with the scammer's fingerprint) or a blocklist path
+DomainEntry = namedtuple("DomainEntry", ("source", "fingerprint"))
+
+_PLAIN_HOST = re.compile(r"[A-Za-z0-9.-]+\Z")
+_TERMINAL = ""    # key of a node's own entry; never a real label
+
+
+def host_of(link: str) -> str:
+    """Lower-cased host of a URL or bare domain, without www., port or trailing dot."""
+    text = link.strip()
+    if _PLAIN_HOST.match(text):    # bare domains (most blocklist lines) skip urlsplit
+        host = text.lower().rstrip(".")
+        return host[4:] if host.startswith("www.") else host
+    if "://" not in text:
+        text = "http://" + text
+    try:
+        host = urlsplit(text).hostname or ""
+    except ValueError:
+        return ""
+    host = host.rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+
+def _labels(host: str) -> list:
+    """Trie path of a host: TLD first. IP addresses are one opaque label."""
+    return [host] if _is_ip(host) else host.split(".")[::-1]
+
+
+class DomainTrie:
+    """
+    Nested dicts keyed by domain label, TLD first ("com" -> "example" ->
+    "evil"). A node is a dict, or just a DomainEntry while it has no
+    children (most domains are leaves; entries from one blocklist share a
+    single tuple), so a few hundred thousand domains stay compact.
+
+    Lookups never lock: a writer only ever adds keys, and replacing a leaf
+    entry with a dict installs the finished dict in one assignment.
+    """
+
+    def __init__(self):
+        self.root = {}
+        self.size = 0
+
+    def add(self, domain: str, entry: DomainEntry) -> bool:
+        """Insert a domain (or replace its entry). Single-label names (TLDs) are refused."""
+        labels = _labels(domain.lower().strip().rstrip("."))
+        if len(labels) < 2 and not _is_ip(domain.strip()):
+            return False
+        node = self.root
+        for label in labels[:-1]:
+            child = node.get(label)
+            if child is None:
+                child = {}
+                node[label] = child
+            elif not isinstance(child, dict):    # a leaf gaining children
+                child = {_TERMINAL: child}
+                node[label] = child
+            node = child
+        last = labels[-1]
+        existing = node.get(last)
+        if isinstance(existing, dict):
+            is_new = _TERMINAL not in existing
+            existing[_TERMINAL] = entry
+        else:
+            is_new = existing is None
+            node[last] = entry
+        self.size += is_new
+        return is_new
+
+    def match(self, host: str) -> Optional[tuple]:
+        """
+        Most specific listed domain that is `host` or one of its parents:
+        (domain, entry), or None. Costs one dict lookup per label.
+        """
+        labels = _labels(host)
+        node = self.root
+        found = None
+        for depth, label in enumerate(labels, 1):
+            child = node.get(label)
+            if child is None:
+                break
+            if not isinstance(child, dict):
+                found = (depth, child)
+                break
+            entry = child.get(_TERMINAL)
+            if entry is not None:
+                found = (depth, entry)
+            node = child
+        if found is None:
+            return None
+        depth, entry = found
+        return ".".join(reversed(labels[:depth])), entry
+
+
+def is_shared(host: str) -> bool:
+    """True if the host is, or is under, one of SHARED_DOMAINS."""
+    labels = host.split(".")
+    return any(".".join(labels[i:]) in SHARED_DOMAINS for i in range(len(labels) - 1))
+
+
+def _is_ip(label: str) -> bool:
+    if not label or not (label[-1].isdigit() or ":" in label):    # skip the slow parse for names
+        return False
+    try:
+        ipaddress.ip_address(label)
+        return True
+    except ValueError:
+        return False
+
+
+def read_blocklist(path: str):
+    """
+    Domains of a local blocklist: one domain or URL per line, or hosts-file
+    lines ("0.0.0.0 bad.example"); blank lines and # comments are skipped.
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            host = host_of(parts[-1] if len(parts) > 1 else parts[0])
+            if host:
+                yield host
+
+
+class DomainReputation:
+    """
+    The process-wide index: link identifiers from the fingerprint DB plus
+    any blocklists. Stored links are added as they arrive; reload() builds
+    a complete new trie on the side and swaps it in, replaying links added
+    meanwhile, so checks carry on against the old trie throughout.
+    """
+
+    def __init__(self, blocklists: list = None):
+        self.blocklists = list(DOMAIN_BLOCKLISTS if blocklists is None else blocklists)
+        self.trie = DomainTrie()
+        self._write_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._added_during_reload = None    # list while a reload is building
+        self._stats = {"reloads": 0, "last_reload_seconds": None, "incremental_adds": 0, "checks": 0}
+
+    def add_link(self, link: str, fingerprint: str = None) -> bool:
+        """Incremental update for one newly stored link identifier."""
+        host = host_of(link)
+        if not host or is_shared(host):
+            return False
+        entry = DomainEntry("fingerprint_db", fingerprint)
+        with self._write_lock:
+            added = self.trie.add(host, entry)
+            if self._added_during_reload is not None:
+                self._added_during_reload.append((host, entry))
+            self._stats["incremental_adds"] += 1
+        return added
+
+    def reload(self) -> dict:
+        """Rebuild from the fingerprint DB and blocklists without blocking check()."""
+        with self._reload_lock:
+            started = time.perf_counter()
+            with self._write_lock:
+                self._added_during_reload = []
+            try:
+                trie = DomainTrie()
+                counts = {"fingerprint_db": _load_from_db(trie)}
+                for path in self.blocklists:
+                    entry = DomainEntry(path, None)
+                    counts[path] = sum(trie.add(host, entry) for host in read_blocklist(path))
+                with self._write_lock:
+                    for host, entry in self._added_during_reload:
+                        trie.add(host, entry)
+                    self.trie = trie
+            finally:
+                with self._write_lock:
+                    self._added_during_reload = None
+            seconds = time.perf_counter() - started
+            self._stats["reloads"] += 1
+            self._stats["last_reload_seconds"] = round(seconds, 3)
+            return {"domains": trie.size, "sources": counts, "seconds": round(seconds, 3)}
+
+    def check(self, links: list) -> list:
+        """Verdict per link: the most specific listed domain covering its host, if any."""
+        trie = self.trie    # one trie for the whole batch, even if a reload swaps mid-way
+        results = []
+        for link in links:
+            host = host_of(link)
+            hit = trie.match(host) if host else None
+            result = {"link": link, "host": host, "malicious": hit is not None}
+            if hit:
+                domain, entry = hit
+                result.update(matched_domain=domain, source=entry.source, fingerprint=entry.fingerprint)
+            results.append(result)
+        self._stats["checks"] += len(links)
+        return results
+
+    def stats(self) -> dict:
+        return {"domains": self.trie.size, "blocklists": self.blocklists, **self._stats}
+
+
+def _load_from_db(trie: DomainTrie) -> int:
+    from app.core.fingerprint_db import iter_link_identifiers
+    return sum(trie.add(host, DomainEntry("fingerprint_db", fingerprint))
+               for link, fingerprint in iter_link_identifiers()
+               for host in [host_of(link)] if host and not is_shared(host))
+
+
+_reputation = None
+_building = None    # the index during its first load, so stored links aren't missed
+_reputation_lock = threading.Lock()
+
+
+def get_domain_reputation() -> DomainReputation:
+    """Process-wide index, loaded on first use and kept current by fingerprint_db."""
+    global _reputation, _building
+    if _reputation is None:
+        with _reputation_lock:
+            if _reputation is None:
+                _building = DomainReputation()
+                _building.reload()
+                _reputation, _building = _building, None
+    return _reputation
+
+
+def record_link(link: str, fingerprint: str = None):
+    """fingerprint_db hook: index a stored link, if the index exists (or is loading)."""
+    reputation = _reputation or _building
+    if reputation is not None:
+        reputation.add_link(link, fingerprint)
@@ -0,0 +1,20 @@
+"""
+H.I.V.E. Environment
+Loads .env once, on first use by a module that needs a secret
+"""
+import threading
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_env():
+    """Read .env into os.environ (existing variables win); later calls are no-ops."""
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _loaded = True
@@ -0,0 +1,262 @@
+"""
+H.I.V.E. Event Bus
+SQLite-journaled fingerprint / intel / detection events for SSE subscribers, raw or coalesced per chat
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "hive_events.db")
+
+EVENT_TYPES = ("detection", "intel", "fingerprint")
+# Seconds a digest subscriber collects a chat's events before sending one summary
+EVENT_DIGEST_WINDOW = float(os.getenv("EVENT_DIGEST_WINDOW", "30"))
+# Events are kept this long for subscribers resuming with Last-Event-ID
+EVENT_RETENTION_SECONDS = float(os.getenv("EVENT_RETENTION_SECONDS", "3600"))
+# How often a subscriber looks for events published by other worker processes
+EVENT_POLL_INTERVAL = float(os.getenv("EVENT_POLL_INTERVAL", "0.5"))
+# An idle stream sends an SSE comment this often so dead connections are noticed
+EVENT_KEEPALIVE_SECONDS = 15.0
+PURGE_EVERY = 1000    # publishes between purges of expired events
+
+
+def _get_conn(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class EventBus:
+    """
+    publish() appends an event to the journal and wakes this process's
+    subscribers at once; subscribers in other worker processes (only the
+    ingest consumer runs turns in a multi-worker deployment) see it on their
+    next poll. Event ids are the journal's row ids, so they are ordered
+    across processes and a reconnecting client resumes after the last one.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, retention: float = EVENT_RETENTION_SECONDS):
+        self.db_path = db_path
+        self.retention = retention
+        self._conn = _get_conn(db_path)
+        self._db_lock = threading.Lock()    # publish() runs on the event loop and in to_thread workers
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                type        TEXT NOT NULL,             -- detection | intel | fingerprint
+                chat_id     TEXT,
+                data        TEXT NOT NULL,             -- JSON
+                at          REAL NOT NULL
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_events_at ON events(at);
+        """)
+        self._conn.commit()
+        self._waiters = set()    # (loop, asyncio.Event) of this process's subscribers
+        self._counts = {event_type: 0 for event_type in EVENT_TYPES}
+        self._published = 0
+
+    # ── Producer side ──
+
+    def publish(self, event_type: str, chat_id: Optional[str], data: dict) -> int:
+        """Journal one event; returns its id."""
+        if event_type not in EVENT_TYPES:
+            raise ValueError(f"event type must be one of {EVENT_TYPES}, got {event_type!r}")
+        now = time.time()
+        with self._db_lock:
+            cur = self._conn.execute(
+                "INSERT INTO events (type, chat_id, data, at) VALUES (?, ?, ?, ?)",
+                (event_type, chat_id, json.dumps(data), now),
+            )
+            self._published += 1
+            if self._published % PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM events WHERE at < ?", (now - self.retention,))
+            self._conn.commit()
+            self._counts[event_type] += 1
+            waiters = list(self._waiters)
+        for loop, wake in waiters:
+            loop.call_soon_threadsafe(wake.set)
+        return cur.lastrowid
+
+    # ── Consumer side ──
+
+    def last_id(self) -> int:
+        with self._db_lock:
+            return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def read_since(self, after_id: int, types=None, chat_id: str = None, limit: int = 500) -> list:
+        """Events with id > after_id, oldest first."""
+        query, params = "SELECT * FROM events WHERE id > ?", [after_id]
+        if types:
+            query += f" AND type IN ({','.join('?' * len(types))})"
+            params.extend(types)
+        if chat_id:
+            query += " AND chat_id = ?"
+            params.append(chat_id)
+        with self._db_lock:
+            rows = self._conn.execute(query + " ORDER BY id LIMIT ?", (*params, limit)).fetchall()
+        return [
+            {"id": row["id"], "type": row["type"], "chat_id": row["chat_id"], "at": row["at"],
+             "data": json.loads(row["data"])}
+            for row in rows
+        ]
+
+    async def wait(self, after_id: int, timeout: float, types=None, chat_id: str = None) -> list:
+        """
+        Events after `after_id`, waiting up to `timeout` for the first one.
+        Returns [] on timeout. Must be awaited on the subscriber's event loop.
+        """
+        deadline = time.monotonic() + timeout
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._db_lock:
+            self._waiters.add(waiter)
+        try:
+            while True:
+                waiter[1].clear()
+                events = await asyncio.to_thread(self.read_since, after_id, types, chat_id)
+                remaining = deadline - time.monotonic()
+                if events or remaining <= 0:
+                    return events
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), min(remaining, EVENT_POLL_INTERVAL))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._db_lock:
+                self._waiters.discard(waiter)
+
+    def stats(self) -> dict:
+        with self._db_lock:
+            journaled = self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+            subscribers = len(self._waiters)
+        return {
+            "published": dict(self._counts),
+            "journaled": journaled,
+            "waiting_subscribers": subscribers,
+            "digest_window_seconds": EVENT_DIGEST_WINDOW,
+        }
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = EventBus()
+        return _bus
+
+
+def emit(event_type: str, chat_id: Optional[str], data: dict):
+    """publish() for hot paths: a failed publish is logged, never raised into the turn."""
+    try:
+        return get_event_bus().publish(event_type, chat_id, data)
+    except Exception as e:
+        print(f"⚠️ Event publish failed ({event_type}): {e}")
+        return None
+
+
+# ───────────────────────────────────────────────
+# Per-chat digests
+# ───────────────────────────────────────────────
+
+class Digest:
+    """
+    Coalesces events per chat: a chat's first event opens a `window`-second
+    window, and every event until it closes folds into one summary (new intel
+    is the union of the per-turn deltas; intel, fingerprint and detection
+    are the latest). due() returns the summaries whose window has closed.
+    """
+
+    def __init__(self, window: float = EVENT_DIGEST_WINDOW):
+        self.window = window
+        self._open = {}    # chat_id -> (deadline, summary)
+
+    def add(self, event: dict, now: float = None):
+        now = time.monotonic() if now is None else now
+        chat_id = event["chat_id"]
+        if chat_id not in self._open:
+            self._open[chat_id] = (now + self.window, {
+                "chat_id": chat_id,
+                "first_event_id": event["id"],
+                "last_event_id": event["id"],
+                "started_at": event["at"],
+                "ended_at": event["at"],
+                "events": 0,
+                "counts": {},
+                "new_intel": {},
+                "intel": None,
+                "fingerprint": None,
+                "new_scammer": False,
+                "detection": None,
+            })
+        summary = self._open[chat_id][1]
+        data = event["data"]
+        summary["last_event_id"] = event["id"]
+        summary["ended_at"] = event["at"]
+        summary["events"] += 1
+        summary["counts"][event["type"]] = summary["counts"].get(event["type"], 0) + 1
+        if event["type"] == "intel":
+            for key, values in data.get("delta", {}).items():
+                known = summary["new_intel"].setdefault(key, [])
+                known.extend(value for value in values if value not in known)
+            summary["intel"] = data.get("intel")
+        elif event["type"] == "fingerprint":
+            summary["fingerprint"] = data
+            summary["new_scammer"] = summary["new_scammer"] or bool(data.get("is_new_scammer"))
+        elif event["type"] == "detection":
+            summary["detection"] = data
+
+    def next_deadline(self) -> Optional[float]:
+        return min((deadline for deadline, _ in self._open.values()), default=None)
+
+    def due(self, now: float = None) -> list:
+        now = time.monotonic() if now is None else now
+        closed = [chat_id for chat_id, (deadline, _) in self._open.items() if deadline <= now]
+        return [self._open.pop(chat_id)[1] for chat_id in closed]
+
+    def resume_id(self, consumed_id: int) -> int:
+        """
+        The id a client may resume from after the digests sent so far: the
+        last consumed event, or just before the oldest one still waiting in
+        an open window (those would otherwise be lost on reconnect).
+        """
+        pending = [summary["first_event_id"] for _, summary in self._open.values()]
+        return min(pending) - 1 if pending else consumed_id
+
+
+async def stream(bus: EventBus, after_id: int, digest: Digest = None, types=None, chat_id: str = None):
+    """
+    Subscription loop behind GET /events: yields (event name, data, id) for
+    each event, or each closed digest with digest mode on, and
+    (None, None, None) when a keepalive is due.
+    """
+    while True:
+        timeout = EVENT_KEEPALIVE_SECONDS
+        deadline = digest.next_deadline() if digest else None
+        if deadline is not None:
+            timeout = min(timeout, max(0.0, deadline - time.monotonic()))
+        events = await bus.wait(after_id, timeout, types, chat_id)
+        sent = False
+        for event in events:
+            after_id = event["id"]
+            if digest is None:
+                yield event["type"], event, event["id"]
+                sent = True
+            else:
+                digest.add(event)
+        if digest is not None:
+            for summary in digest.due():
+                yield "digest", summary, digest.resume_id(after_id)
+                sent = True
+        if not sent and not events:
+            yield None, None, None
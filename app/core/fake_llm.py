@@ -0,0 +1,147 @@
+"""
+H.I.V.E. Fake LLM
+Deterministic, offline stand-ins for Gemini used by tests and benchmarks
+"""
+import json
+import re
+import threading
+import time
+
+from app.core.scam_detector import check_keywords, determine_scam_type
+
+_BATCH_RE = re.compile(r"^MESSAGES:\n(\[.*\])$", re.MULTILINE)
+_SINGLE_RE = re.compile(r"^Message: '(.*)'$", re.MULTILINE | re.DOTALL)
+
+
+class _FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+def fake_verdict(message: str) -> dict:
+    """Keyword-derived verdict in the same shape Gemini is asked to return."""
+    matched, confidence, total = check_keywords(message)
+    is_scam = total >= 1
+    return {
+        "is_scam": is_scam,
+        "confidence": round(max(confidence, 0.6) if is_scam else 0.7, 2),
+        "scam_type": determine_scam_type(matched) if is_scam else "none",
+        "reasoning": f"fake: {total} indicator(s)",
+    }
+
+
+class FakeGenerativeModel:
+    """
+    Mimics google.generativeai.GenerativeModel.generate_content() for the
+    single and batched scam-detection prompts.
+
+    latency:   seconds to sleep per call (simulates network round trip)
+    drop_ids:  message ids to leave out of batched answers (partial parse)
+    malformed: return text that is not JSON at all
+    """
+
+    def __init__(self, latency: float = 0.0, drop_ids=(), malformed: bool = False):
+        self.latency = latency
+        self.drop_ids = set(drop_ids)
+        self.malformed = malformed
+        self.calls = 0
+        self.batch_calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str) -> _FakeResponse:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.malformed:
+            return _FakeResponse("Sorry, I can't help with that.")
+
+        batch = _BATCH_RE.search(prompt)
+        if batch:
+            with self._lock:
+                self.batch_calls += 1
+            items = json.loads(batch.group(1))
+            verdicts = [
+                {"id": item["id"], **fake_verdict(item["message"])}
+                for item in items
+                if item["id"] not in self.drop_ids
+            ]
+            return _FakeResponse("```json\n" + json.dumps(verdicts) + "\n```")
+
+        single = _SINGLE_RE.search(prompt)
+        message = single.group(1) if single else prompt
+        return _FakeResponse(json.dumps(fake_verdict(message)))
+
+
+FAKE_REPLIES = [
+    '"Oh dear, I am not very good with these things. Can you please tell me your number again so I can write it down?"',
+    '"Wait, which app do I use for this? My husband usually does the payments. What is your UPI ID again?"',
+    '"Hmm okay, is this for real though? Can you send me the official link so I can check it first?"',
+    '"Sorry, my phone is acting up. Can you type the account number again slowly? I want to keep a record."',
+]
+
+
+class _FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _FakeModels:
+    def __init__(self, owner: "FakeGenaiClient"):
+        self._owner = owner
+
+    def _reply_for(self, contents: str) -> str:
+        return FAKE_REPLIES[sum(map(ord, contents)) % len(FAKE_REPLIES)]
+
+    def generate_content(self, model: str, contents: str, config=None) -> _FakeResponse:
+        owner = self._owner
+        owner._record(model)
+        if owner.latency:
+            time.sleep(owner.latency)
+        return _FakeResponse(self._reply_for(contents))
+
+    def generate_content_stream(self, model: str, contents: str, config=None):
+        owner = self._owner
+        owner._record(model)
+        reply = self._reply_for(contents)
+        if owner.first_token_latency:
+            time.sleep(owner.first_token_latency)
+        for start in range(0, len(reply), owner.chunk_chars):
+            if start and owner.chunk_latency:
+                time.sleep(owner.chunk_latency)
+            yield _FakeChunk(reply[start:start + owner.chunk_chars])
+
+
+class FakeGenaiClient:
+    """
+    Mimics google.genai.Client for conversation_agent: both
+    models.generate_content() and models.generate_content_stream().
+
+    latency:             seconds before a non-streamed reply returns
+    first_token_latency: seconds before the first streamed chunk
+    chunk_latency:       seconds between streamed chunks
+    failing_models:      model names that raise (to exercise fallback)
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        first_token_latency: float = 0.0,
+        chunk_latency: float = 0.0,
+        chunk_chars: int = 12,
+        failing_models=(),
+    ):
+        self.latency = latency
+        self.first_token_latency = first_token_latency
+        self.chunk_latency = chunk_latency
+        self.chunk_chars = max(1, chunk_chars)
+        self.failing_models = set(failing_models)
+        self.calls = []
+        self._lock = threading.Lock()
+        self.models = _FakeModels(self)
+
+    def _record(self, model: str):
+        with self._lock:
+            self.calls.append(model)
+        if model in self.failing_models:
+            raise RuntimeError(f"fake quota exceeded for {model}")
@@ -6,25 +6,75 @@ import sqlite3
 import hashlib
 import json
 import os
+import threading
 from datetime import datetime, timezone
 from typing import Optional
 
+from app.core import domain_reputation
+from app.core.identifier_normalizer import INTEL_TYPES, canonical, candidate_keys
+from app.core.metrics import SQLITE_SECONDS, timed
+
 DB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "hive_fingerprints.db")
+# A checkpointed WAL is cut back to this size instead of staying at its high-water mark
+JOURNAL_SIZE_LIMIT = 4 * 1024 * 1024
+# >1 splits storage into this many hash-partitioned files (app.core.fingerprint_shards)
+FINGERPRINT_SHARDS = int(os.getenv("FINGERPRINT_SHARDS", "1"))
+
 
+# DB_PATH whose schema is known to exist (init_db runs once per path, not per import)
+_initialized_path = None
+_init_lock = threading.Lock()
 
-def _get_conn() -> sqlite3.Connection:
-    """Get a connection to the fingerprint database."""
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+
+def _connect(path: str = None) -> sqlite3.Connection:
+    path = path or DB_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute(f"PRAGMA journal_size_limit={JOURNAL_SIZE_LIMIT}")
     return conn
 
 
+def _get_conn(path: str = None) -> sqlite3.Connection:
+    """Get a connection to the fingerprint database, or one of db_paths() (creating the schema on first use)."""
+    if _initialized_path != DB_PATH:
+        init_db()
+    return _connect(path)
+
+
 def init_db():
-    """Create all tables if they don't exist."""
-    conn = _get_conn()
+    """
+    Create all tables if they don't exist. Called from the app's startup hook;
+    _get_conn() also runs it lazily the first time a DB_PATH is used.
+    """
+    global _initialized_path
+    if FINGERPRINT_SHARDS > 1:
+        _sharded()    # creates every shard's schema
+        return
+    with _init_lock:
+        path = DB_PATH
+        conn = _connect()
+        try:
+            _create_schema(conn)
+            _migrate(conn)
+        finally:
+            conn.close()
+        _initialized_path = path
+
+
+def db_paths() -> list:
+    """Every file holding scammer profiles and sessions: DB_PATH, or each shard."""
+    return _sharded().paths if FINGERPRINT_SHARDS > 1 else [DB_PATH]
+
+
+def _sharded():
+    from app.core.fingerprint_shards import get_sharded_db
+    return get_sharded_db(DB_PATH, FINGERPRINT_SHARDS)
+
+
+def _create_schema(conn: sqlite3.Connection):
     conn.executescript("""
         CREATE TABLE IF NOT EXISTS scammers (
             id              TEXT PRIMARY KEY,          -- SHA-256 fingerprint
@@ -34,7 +84,9 @@ def init_db():
             scam_types      TEXT DEFAULT '[]',         -- JSON array
             threat_score    REAL DEFAULT 0.0,
             status          TEXT DEFAULT 'active',     -- active | flagged | reported
-            notes           TEXT DEFAULT ''
+            notes           TEXT DEFAULT '',
+            archived_sessions INTEGER DEFAULT 0,       -- sessions moved to the archive DB
+            archived_messages INTEGER DEFAULT 0        -- their message_count total
         );
 
         CREATE TABLE IF NOT EXISTS identifiers (
@@ -59,12 +111,139 @@ def init_db():
             FOREIGN KEY (scammer_id) REFERENCES scammers(id)
         );
 
+        -- Per-bucket session totals by scam type, scammer status and identifier type,
+        -- kept up to date by every store (app.core.fingerprint_trends reads them)
+        CREATE TABLE IF NOT EXISTS rollup_hourly (
+            bucket_start    TEXT NOT NULL,             -- UTC hour, 2026-01-31T14:00
+            scam_type       TEXT NOT NULL,
+            status          TEXT NOT NULL,             -- the scammer's status when the session was stored
+            id_type         TEXT NOT NULL,             -- sessions carrying this identifier type; '' = all sessions
+            sessions        INTEGER DEFAULT 0,
+            messages        INTEGER DEFAULT 0,
+            identifiers     INTEGER DEFAULT 0,
+            new_scammers    INTEGER DEFAULT 0,
+            PRIMARY KEY (bucket_start, scam_type, status, id_type)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS rollup_daily (
+            bucket_start    TEXT NOT NULL,             -- UTC day, 2026-01-31
+            scam_type       TEXT NOT NULL,
+            status          TEXT NOT NULL,
+            id_type         TEXT NOT NULL,
+            sessions        INTEGER DEFAULT 0,
+            messages        INTEGER DEFAULT 0,
+            identifiers     INTEGER DEFAULT 0,
+            new_scammers    INTEGER DEFAULT 0,
+            PRIMARY KEY (bucket_start, scam_type, status, id_type)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS meta (
+            key     TEXT PRIMARY KEY,
+            value   INTEGER
+        );
+
         CREATE INDEX IF NOT EXISTS idx_identifiers_value ON identifiers(value);
         CREATE INDEX IF NOT EXISTS idx_identifiers_scammer ON identifiers(scammer_id);
         CREATE INDEX IF NOT EXISTS idx_sessions_scammer ON sessions(scammer_id);
+        CREATE INDEX IF NOT EXISTS idx_sessions_activity ON sessions(last_activity);
     """)
     conn.commit()
-    conn.close()
+
+
+# ───────────────────────────────────────────────
+# Migrations (PRAGMA user_version)
+# ───────────────────────────────────────────────
+
+SCHEMA_VERSION = 3
+
+
+def _migrate(conn: sqlite3.Connection):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < 2:
+        _add_archive_counters(conn)    # first: v1's merges already carry the counters
+    if version < 1:
+        merged = _canonicalize_identifiers(conn)
+        if merged:
+            print(f"✅ Canonicalized identifiers: merged {merged} duplicate scammer profile(s)")
+    if version < 3:
+        _start_rollups(conn)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+    if version < 2:
+        _enable_incremental_vacuum(conn)
+
+
+def _add_archive_counters(conn: sqlite3.Connection):
+    """v2: per-scammer totals of the sessions app.core.fingerprint_retention moved out."""
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(scammers)")}
+    for column in ("archived_sessions", "archived_messages"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE scammers ADD COLUMN {column} INTEGER DEFAULT 0")
+
+
+def _enable_incremental_vacuum(conn: sqlite3.Connection):
+    """
+    v2: switch to auto_vacuum=INCREMENTAL so retention can hand freed pages
+    back to the filesystem a few at a time. Existing files (and new ones, as
+    WAL mode writes the header first) only take the setting on a VACUUM,
+    which runs once here and rewrites the whole file.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    conn.executescript("PRAGMA auto_vacuum = INCREMENTAL; VACUUM;")
+    if conn.execute("SELECT COUNT(*) FROM scammers").fetchone()[0]:
+        print("✅ Fingerprint DB rebuilt with incremental auto-vacuum")
+
+
+def _start_rollups(conn: sqlite3.Connection):
+    """
+    v3: stores keep the rollup tables current from now on; sessions up to
+    the highest id ever issued (archived ones included) are left for
+    app.core.fingerprint_trends.backfill_rollups().
+    """
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'sessions'").fetchone()
+    conn.executemany(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+        [("rollup_backfill_through", row["seq"] if row else 0), ("rollup_backfill_done", 0)],
+    )
+
+
+def _canonicalize_identifiers(conn: sqlite3.Connection) -> int:
+    """
+    v1: rewrite every identifier to its canonical key (identifier_normalizer).
+    Variants of one identifier collapse into the oldest row; when they
+    belonged to different scammers, those profiles are merged. Returns the
+    number of profiles merged away.
+    """
+    rows = conn.execute("SELECT id, scammer_id, type, value FROM identifiers ORDER BY id").fetchall()
+    kept = {}          # (type, canonical value) -> (row id, scammer id, stored value)
+    renamed = {}       # scammer id -> the profile it was merged into
+    merged = 0
+
+    def resolve(scammer_id):
+        while scammer_id in renamed:
+            scammer_id = renamed[scammer_id]
+        return scammer_id
+
+    for row in rows:
+        key = (row["type"], canonical(row["type"], row["value"]))
+        owner = resolve(row["scammer_id"])
+        if key not in kept:
+            kept[key] = (row["id"], owner, row["value"])
+            continue
+        # A duplicate of an earlier row: drop it, merging the two scammers if they differ
+        conn.execute("DELETE FROM identifiers WHERE id = ?", (row["id"],))
+        survivor = resolve(kept[key][1])
+        if owner != survivor and _merge_into(conn, survivor, owner):
+            renamed[owner] = survivor
+            merged += 1
+
+    # Keys are distinct and canonical() is idempotent, so no rewrite can hit another row's value
+    conn.executemany(
+        "UPDATE identifiers SET value = ? WHERE id = ?",
+        [(value, row_id) for (_, value), (row_id, _, stored) in kept.items() if value != stored],
+    )
+    return merged
 
 
 # ───────────────────────────────────────────────
@@ -82,12 +261,17 @@ def _generate_fingerprint(identifiers: list[str]) -> str:
 # Core operations
 # ───────────────────────────────────────────────
 
+@timed(SQLITE_SECONDS, "find_scammer_by_identifier")
 def find_scammer_by_identifier(identifier_value: str) -> Optional[dict]:
     """Look up a scammer by any known identifier (phone, UPI, bank account, etc.)."""
+    if FINGERPRINT_SHARDS > 1:
+        return _sharded().find(identifier_value)
     conn = _get_conn()
+    # Values are stored canonical, so an indexed IN over the possible keys replaces LOWER() scans
+    keys = candidate_keys(identifier_value)
     row = conn.execute(
-        "SELECT scammer_id FROM identifiers WHERE LOWER(value) = LOWER(?)",
-        (identifier_value,)
+        f"SELECT scammer_id FROM identifiers WHERE value IN ({','.join('?' * len(keys))}) ORDER BY id LIMIT 1",
+        keys,
     ).fetchone()
     if not row:
         conn.close()
@@ -112,7 +296,11 @@ def _load_scammer(conn: sqlite3.Connection, scammer_id: str) -> dict:
         "SELECT COUNT(*) as cnt FROM sessions WHERE scammer_id = ?",
         (scammer_id,)
     ).fetchone()["cnt"]
+    return _profile(row, identifiers, session_count)
 
+
+def _profile(row: sqlite3.Row, identifiers: list, session_count: int) -> dict:
+    """A scammer profile from its scammers row, identifier rows and live session count."""
     return {
         "fingerprint": row["id"],
         "first_seen": row["first_seen"],
@@ -122,7 +310,8 @@ def _load_scammer(conn: sqlite3.Connection, scammer_id: str) -> dict:
         "threat_score": row["threat_score"],
         "status": row["status"],
         "notes": row["notes"],
-        "session_count": session_count,
+        "session_count": session_count + row["archived_sessions"],
+        "archived_sessions": row["archived_sessions"],
         "identifiers": [
             {"type": i["type"], "value": i["value"], "first_seen": i["first_seen"]}
             for i in identifiers
@@ -130,6 +319,7 @@ def _load_scammer(conn: sqlite3.Connection, scammer_id: str) -> dict:
     }
 
 
+@timed(SQLITE_SECONDS, "store_fingerprint")
 def store_fingerprint(
     intel: dict,
     scam_type: str = "unknown",
@@ -144,70 +334,78 @@ def store_fingerprint(
 
     Returns the scammer profile (new or updated).
     """
-    now = datetime.now(timezone.utc).isoformat()
+    if FINGERPRINT_SHARDS > 1:
+        return _sharded().store_fingerprint(intel, scam_type, chat_id, message_count)
     conn = _get_conn()
+    stored = _store(conn, intel, scam_type, chat_id, message_count, datetime.now(timezone.utc).isoformat())
+    if stored is None:
+        conn.close()
+        return {"status": "no_identifiers", "message": "No identifiers found to fingerprint."}
+    scammer_id, is_new = stored
 
-    # Collect all identifiers from intel
-    id_pairs = []  # (type, value)
-    for upi in intel.get("upiIds", []):
-        id_pairs.append(("upi", upi))
-    for phone in intel.get("phoneNumbers", []):
-        id_pairs.append(("phone", phone))
-    for acct in intel.get("bankAccounts", []):
-        id_pairs.append(("bank_account", acct))
-    for link in intel.get("phishingLinks", []):
-        id_pairs.append(("link", link))
-    if chat_id:
-        id_pairs.append(("chat_id", chat_id))
+    conn.commit()
 
-    if not id_pairs:
+    # Load and return full profile
+    profile = _load_scammer(conn, scammer_id)
+    profile["is_new_scammer"] = is_new
+    conn.close()
+    return profile
+
+
+@timed(SQLITE_SECONDS, "store_fingerprints")
+def store_fingerprints(items, batch_size: int = 1000) -> list:
+    """
+    Bulk store_fingerprint(): `items` yields (intel, scam_type, chat_id,
+    message_count) tuples, written in transactions of `batch_size`. Later
+    items see earlier ones, so identifiers shared across items link up
+    exactly as with one call each. Returns [(scammer_id, is_new) or None].
+    """
+    if FINGERPRINT_SHARDS > 1:
+        return _sharded().store_many(items)
+    conn = _get_conn()
+    results = []
+    try:
+        now = datetime.now(timezone.utc).isoformat()
+        for n, (intel, scam_type, chat_id, message_count) in enumerate(items, 1):
+            results.append(_store(conn, intel, scam_type, chat_id, message_count, now))
+            if n % batch_size == 0:
+                conn.commit()
+        conn.commit()
+    finally:
         conn.close()
-        return {"status": "no_identifiers", "message": "No identifiers found to fingerprint."}
+    return results
 
-    # Check if any identifier already maps to an existing scammer
-    existing_scammer_id = None
-    for _, value in id_pairs:
-        row = conn.execute(
-            "SELECT scammer_id FROM identifiers WHERE LOWER(value) = LOWER(?)",
-            (value,)
-        ).fetchone()
-        if row:
-            existing_scammer_id = row["scammer_id"]
-            break
+
+def _store(conn: sqlite3.Connection, intel: dict, scam_type: str, chat_id, message_count: int, now: str):
+    """One fingerprint write inside the caller's transaction; (scammer_id, is_new), or None without identifiers."""
+    id_pairs = _identifier_pairs(intel, chat_id)
+    if not id_pairs:
+        return None
+
+    # One indexed probe for all identifiers; the earliest-known match owns the message
+    values = sorted({value for _, value in id_pairs})
+    known = conn.execute(
+        f"SELECT type, value, scammer_id FROM identifiers WHERE value IN ({','.join('?' * len(values))}) ORDER BY id",
+        values,
+    ).fetchall()
+    wanted = set(id_pairs)
+    known = [row for row in known if (row["type"], row["value"]) in wanted]
+    existing_scammer_id = known[0]["scammer_id"] if known else None
+    already_stored = {(row["type"], row["value"]) for row in known}
 
     if existing_scammer_id:
         # ── Update existing scammer ──
         scammer_id = existing_scammer_id
 
         # Update last_seen and encounter count
-        scammer_row = conn.execute("SELECT * FROM scammers WHERE id = ?", (scammer_id,)).fetchone()
-        existing_types = json.loads(scammer_row["scam_types"])
-        if scam_type and scam_type not in existing_types:
-            existing_types.append(scam_type)
-
-        new_score = _calculate_threat_score(
-            encounter_count=scammer_row["encounter_count"] + 1,
-            scam_types=existing_types,
-            identifier_count=len(id_pairs),
-        )
-
-        conn.execute(
-            """UPDATE scammers
-               SET last_seen = ?, encounter_count = encounter_count + 1,
-                   scam_types = ?, threat_score = ?
-               WHERE id = ?""",
-            (now, json.dumps(existing_types), new_score, scammer_id),
-        )
+        status = _touch_scammer(conn, scammer_id, scam_type, len(id_pairs), now)["status"]
 
         # Add any new identifiers
-        for id_type, id_value in id_pairs:
-            try:
-                conn.execute(
-                    "INSERT INTO identifiers (scammer_id, type, value, first_seen) VALUES (?, ?, ?, ?)",
-                    (scammer_id, id_type, id_value, now),
-                )
-            except sqlite3.IntegrityError:
-                pass  # Already exists
+        conn.executemany(
+            "INSERT OR IGNORE INTO identifiers (scammer_id, type, value, first_seen) VALUES (?, ?, ?, ?)",
+            [(scammer_id, id_type, id_value, now) for id_type, id_value in id_pairs
+             if (id_type, id_value) not in already_stored],
+        )
 
         is_new = False
     else:
@@ -215,44 +413,121 @@ def store_fingerprint(
         all_values = [v for _, v in id_pairs]
         scammer_id = _generate_fingerprint(all_values)
 
-        types_list = [scam_type] if scam_type else []
-        score = _calculate_threat_score(
-            encounter_count=1,
-            scam_types=types_list,
-            identifier_count=len(id_pairs),
-        )
+        _insert_scammer(conn, scammer_id, scam_type, len(id_pairs), now)
+        status = "active"
 
-        conn.execute(
-            """INSERT INTO scammers (id, first_seen, last_seen, encounter_count, scam_types, threat_score)
-               VALUES (?, ?, ?, 1, ?, ?)""",
-            (scammer_id, now, now, json.dumps(types_list), score),
+        conn.executemany(
+            "INSERT OR IGNORE INTO identifiers (scammer_id, type, value, first_seen) VALUES (?, ?, ?, ?)",
+            [(scammer_id, id_type, id_value, now) for id_type, id_value in id_pairs],
         )
 
-        for id_type, id_value in id_pairs:
-            try:
-                conn.execute(
-                    "INSERT INTO identifiers (scammer_id, type, value, first_seen) VALUES (?, ?, ?, ?)",
-                    (scammer_id, id_type, id_value, now),
-                )
-            except sqlite3.IntegrityError:
-                pass
-
         is_new = True
 
+    for id_type, id_value in id_pairs:
+        if id_type == "link":
+            domain_reputation.record_link(id_value, scammer_id)
+
     # ── Log session ──
+    _log_session(conn, scammer_id, intel, scam_type, chat_id, message_count, now)
+    _roll_up(conn, _rollup_rows(id_pairs, scam_type, status, message_count, is_new, now))
+    return scammer_id, is_new
+
+
+def _identifier_pairs(intel: dict, chat_id) -> list:
+    """All identifiers in intel (plus the chat id) as distinct (type, canonical value) pairs; variants collapse here."""
+    id_pairs = []
+    for key, id_type in INTEL_TYPES.items():
+        for value in intel.get(key, []):
+            id_pairs.append((id_type, canonical(id_type, value)))
+    if chat_id:
+        id_pairs.append(("chat_id", canonical("chat_id", chat_id)))
+    return list(dict.fromkeys(pair for pair in id_pairs if pair[1]))
+
+
+def _touch_scammer(conn: sqlite3.Connection, scammer_id: str, scam_type: str, identifier_count: int, now: str):
+    """Count one more encounter for an existing scammer; returns its row as it was, or None if missing."""
+    scammer_row = conn.execute("SELECT * FROM scammers WHERE id = ?", (scammer_id,)).fetchone()
+    if not scammer_row:
+        return None
+    existing_types = json.loads(scammer_row["scam_types"])
+    if scam_type and scam_type not in existing_types:
+        existing_types.append(scam_type)
+
+    new_score = _calculate_threat_score(
+        encounter_count=scammer_row["encounter_count"] + 1,
+        scam_types=existing_types,
+        identifier_count=identifier_count,
+    )
+
+    conn.execute(
+        """UPDATE scammers
+           SET last_seen = ?, encounter_count = encounter_count + 1,
+               scam_types = ?, threat_score = ?
+           WHERE id = ?""",
+        (now, json.dumps(existing_types), new_score, scammer_id),
+    )
+    return scammer_row
+
+
+def _insert_scammer(conn: sqlite3.Connection, scammer_id: str, scam_type: str, identifier_count: int, now: str):
+    types_list = [scam_type] if scam_type else []
+    score = _calculate_threat_score(
+        encounter_count=1,
+        scam_types=types_list,
+        identifier_count=identifier_count,
+    )
+
+    conn.execute(
+        """INSERT INTO scammers (id, first_seen, last_seen, encounter_count, scam_types, threat_score)
+           VALUES (?, ?, ?, 1, ?, ?)""",
+        (scammer_id, now, now, json.dumps(types_list), score),
+    )
+
+
+def _log_session(conn: sqlite3.Connection, scammer_id: str, intel: dict, scam_type: str, chat_id,
+                 message_count: int, now: str):
     conn.execute(
         """INSERT INTO sessions (scammer_id, chat_id, scam_type, started_at, last_activity, message_count, intel_snapshot)
            VALUES (?, ?, ?, ?, ?, ?, ?)""",
         (scammer_id, chat_id, scam_type, now, now, message_count, json.dumps(intel)),
     )
 
-    conn.commit()
 
-    # Load and return full profile
-    profile = _load_scammer(conn, scammer_id)
-    profile["is_new_scammer"] = is_new
-    conn.close()
-    return profile
+def _rollup_rows(id_pairs: list, scam_type: str, status: str, message_count: int, is_new: bool,
+                 started_at: str) -> dict:
+    """
+    One session's contribution to the rollups: (bucket, bucket_start,
+    scam_type, status, id_type) -> [sessions, messages, identifiers,
+    new_scammers], for all sessions ('') and for each identifier type it
+    carried (chat ids excluded).
+    """
+    per_type = {}
+    for id_type, _ in id_pairs:
+        if id_type != "chat_id":
+            per_type[id_type] = per_type.get(id_type, 0) + 1
+    rows = {}
+    for bucket, bucket_start in (("hourly", started_at[:13] + ":00"), ("daily", started_at[:10])):
+        key = (bucket, bucket_start, scam_type or "unknown", status)
+        rows[(*key, "")] = [1, message_count or 0, sum(per_type.values()), int(is_new)]
+        for id_type, count in per_type.items():
+            rows[(*key, id_type)] = [1, message_count or 0, count, int(is_new)]
+    return rows
+
+
+def _roll_up(conn: sqlite3.Connection, rows: dict):
+    """Add _rollup_rows() output (possibly summed over many sessions) to the rollup tables."""
+    for bucket in ("hourly", "daily"):
+        conn.executemany(
+            f"""INSERT INTO rollup_{bucket} (bucket_start, scam_type, status, id_type,
+                   sessions, messages, identifiers, new_scammers)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (bucket_start, scam_type, status, id_type) DO UPDATE SET
+                   sessions = sessions + excluded.sessions,
+                   messages = messages + excluded.messages,
+                   identifiers = identifiers + excluded.identifiers,
+                   new_scammers = new_scammers + excluded.new_scammers""",
+            [(*key[1:], *totals) for key, totals in rows.items() if key[0] == bucket],
+        )
 
 
 # ───────────────────────────────────────────────
@@ -282,8 +557,24 @@ def _calculate_threat_score(encounter_count: int, scam_types: list, identifier_c
 # Query helpers
 # ───────────────────────────────────────────────
 
+def iter_link_identifiers():
+    """(link, fingerprint) for every stored link identifier (seeds app.core.domain_reputation)."""
+    if FINGERPRINT_SHARDS > 1:
+        yield from _sharded().iter_link_identifiers()
+        return
+    conn = _get_conn()
+    try:
+        yield from ((row["value"], row["scammer_id"]) for row in
+                    conn.execute("SELECT value, scammer_id FROM identifiers WHERE type = 'link'"))
+    finally:
+        conn.close()
+
+
+@timed(SQLITE_SECONDS, "get_all_scammers")
 def get_all_scammers(limit: int = 50) -> list[dict]:
     """Return all scammer profiles, ordered by threat score descending."""
+    if FINGERPRINT_SHARDS > 1:
+        return _sharded().get_all(limit)
     conn = _get_conn()
     rows = conn.execute(
         "SELECT id FROM scammers ORDER BY threat_score DESC LIMIT ?", (limit,)
@@ -293,23 +584,37 @@ def get_all_scammers(limit: int = 50) -> list[dict]:
     return scammers
 
 
+@timed(SQLITE_SECONDS, "get_scammer_by_fingerprint")
 def get_scammer_by_fingerprint(fingerprint: str) -> Optional[dict]:
     """Load a scammer profile by their fingerprint ID."""
+    if FINGERPRINT_SHARDS > 1:
+        return _sharded().load(fingerprint)
     conn = _get_conn()
     profile = _load_scammer(conn, fingerprint)
     conn.close()
     return profile
 
 
+@timed(SQLITE_SECONDS, "get_stats")
 def get_stats() -> dict:
     """Dashboard statistics."""
+    if FINGERPRINT_SHARDS > 1:
+        return _sharded().get_stats()
     conn = _get_conn()
+    try:
+        return _stats(conn)
+    finally:
+        conn.close()
+
+
+def _stats(conn: sqlite3.Connection) -> dict:
     total = conn.execute("SELECT COUNT(*) as c FROM scammers").fetchone()["c"]
     active = conn.execute("SELECT COUNT(*) as c FROM scammers WHERE status='active'").fetchone()["c"]
     flagged = conn.execute("SELECT COUNT(*) as c FROM scammers WHERE status='flagged'").fetchone()["c"]
     reported = conn.execute("SELECT COUNT(*) as c FROM scammers WHERE status='reported'").fetchone()["c"]
 
-    total_sessions = conn.execute("SELECT COUNT(*) as c FROM sessions").fetchone()["c"]
+    archived_sessions = conn.execute("SELECT COALESCE(SUM(archived_sessions), 0) as c FROM scammers").fetchone()["c"]
+    total_sessions = conn.execute("SELECT COUNT(*) as c FROM sessions").fetchone()["c"] + archived_sessions
     total_identifiers = conn.execute("SELECT COUNT(*) as c FROM identifiers").fetchone()["c"]
 
     top_threat = conn.execute(
@@ -329,13 +634,13 @@ def get_stats() -> dict:
     for t in all_types:
         type_dist[t] = type_dist.get(t, 0) + 1
 
-    conn.close()
     return {
         "total_scammers": total,
         "active": active,
         "flagged": flagged,
         "reported": reported,
         "total_sessions": total_sessions,
+        "archived_sessions": archived_sessions,
         "total_identifiers": total_identifiers,
         "identifier_breakdown": id_breakdown,
         "scam_type_distribution": type_dist,
@@ -346,10 +651,13 @@ def get_stats() -> dict:
     }
 
 
+@timed(SQLITE_SECONDS, "update_scammer_status")
 def update_scammer_status(fingerprint: str, status: str, notes: str = "") -> bool:
     """Update scammer status to 'active', 'flagged', or 'reported'."""
     if status not in ("active", "flagged", "reported"):
         return False
+    if FINGERPRINT_SHARDS > 1:
+        return _sharded().update_status(fingerprint, status, notes)
     conn = _get_conn()
     cur = conn.execute(
         "UPDATE scammers SET status = ?, notes = ? WHERE id = ?",
@@ -361,8 +669,11 @@ def update_scammer_status(fingerprint: str, status: str, notes: str = "") -> boo
     return updated
 
 
+@timed(SQLITE_SECONDS, "search_scammers")
 def search_scammers(query: str) -> list[dict]:
     """Search scammers by any identifier value (partial match)."""
+    if FINGERPRINT_SHARDS > 1:
+        return _sharded().search(query)
     conn = _get_conn()
     rows = conn.execute(
         "SELECT DISTINCT scammer_id FROM identifiers WHERE LOWER(value) LIKE LOWER(?)",
@@ -373,17 +684,32 @@ def search_scammers(query: str) -> list[dict]:
     return results
 
 
+@timed(SQLITE_SECONDS, "merge_scammers")
 def merge_scammers(fingerprint_a: str, fingerprint_b: str) -> Optional[dict]:
     """
     Merge two scammer profiles when they are discovered to be the same person.
     All identifiers and sessions from B are moved to A. B is deleted.
     """
+    if FINGERPRINT_SHARDS > 1:
+        return _sharded().merge(fingerprint_a, fingerprint_b)
     conn = _get_conn()
+    if not _merge_into(conn, fingerprint_a, fingerprint_b):
+        conn.close()
+        return None
+    conn.commit()
+    from app.core.fingerprint_retention import reassign_archived
+    reassign_archived(fingerprint_b, fingerprint_a)
+    profile = _load_scammer(conn, fingerprint_a)
+    conn.close()
+    return profile
+
+
+def _merge_into(conn: sqlite3.Connection, fingerprint_a: str, fingerprint_b: str) -> bool:
+    """merge_scammers() inside the caller's transaction; False if either profile is missing."""
     a = conn.execute("SELECT * FROM scammers WHERE id = ?", (fingerprint_a,)).fetchone()
     b = conn.execute("SELECT * FROM scammers WHERE id = ?", (fingerprint_b,)).fetchone()
     if not a or not b:
-        conn.close()
-        return None
+        return False
 
     # Merge scam types
     types_a = json.loads(a["scam_types"])
@@ -407,18 +733,14 @@ def merge_scammers(fingerprint_a: str, fingerprint_b: str) -> Optional[dict]:
 
     conn.execute(
         """UPDATE scammers SET first_seen = ?, encounter_count = ?,
-           scam_types = ?, threat_score = ? WHERE id = ?""",
-        (first_seen, total_encounters, json.dumps(merged_types), new_score, fingerprint_a),
+           scam_types = ?, threat_score = ?,
+           archived_sessions = archived_sessions + ?, archived_messages = archived_messages + ?
+           WHERE id = ?""",
+        (first_seen, total_encounters, json.dumps(merged_types), new_score,
+         b["archived_sessions"], b["archived_messages"], fingerprint_a),
     )
 
     # Delete B
     conn.execute("DELETE FROM scammers WHERE id = ?", (fingerprint_b,))
+    return True
 
-    conn.commit()
-    profile = _load_scammer(conn, fingerprint_a)
-    conn.close()
-    return profile
-
-
-# Initialize DB on import
-init_db()
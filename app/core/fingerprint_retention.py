@@ -0,0 +1,286 @@
+"""
+H.I.V.E. Fingerprint Retention
+Moves old sessions out of the fingerprint DB into an archive file and compacts the hot file in small steps
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.core import fingerprint_db
+
+FINGERPRINT_RETENTION = os.getenv("FINGERPRINT_RETENTION", "1").lower() in ("1", "true", "yes")
+# Sessions whose last activity is older than this move to the archive
+RETENTION_DAYS = float(os.getenv("RETENTION_DAYS", "90"))
+# Sessions moved per transaction; writers wait at most one batch
+RETENTION_BATCH = int(os.getenv("RETENTION_BATCH", "500"))
+# Seconds between retention passes
+RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", "3600"))
+# Free pages handed back per incremental_vacuum step
+RETENTION_VACUUM_PAGES = int(os.getenv("RETENTION_VACUUM_PAGES", "256"))
+# Minimum seconds between incremental_vacuum steps
+VACUUM_PAUSE = 0.05
+# Defaults to <fingerprint DB>_archive.db next to the hot file (one archive per shard file)
+ARCHIVE_DB_PATH = os.getenv("ARCHIVE_DB_PATH", "")
+
+
+def archive_path(db_path: str = None) -> str:
+    """The archive of `db_path`, one of fingerprint_db.db_paths() (default: DB_PATH)."""
+    db_path = db_path or fingerprint_db.DB_PATH
+    root, ext = os.path.splitext(db_path)
+    if not ARCHIVE_DB_PATH:
+        return f"{root}_archive{ext or '.db'}"
+    if db_path == fingerprint_db.DB_PATH:
+        return ARCHIVE_DB_PATH
+    archive_root, archive_ext = os.path.splitext(ARCHIVE_DB_PATH)
+    return f"{archive_root}_{os.path.basename(root)}{archive_ext or '.db'}"
+
+
+def _archive_paths() -> list:
+    return [archive_path(db_path) for db_path in fingerprint_db.db_paths()]
+
+
+def _connect_archive(path: str = None) -> sqlite3.Connection:
+    path = path or archive_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            id              INTEGER PRIMARY KEY,       -- the session's id in the hot DB
+            scammer_id      TEXT NOT NULL,
+            chat_id         TEXT,
+            scam_type       TEXT,
+            started_at      TEXT NOT NULL,
+            last_activity   TEXT NOT NULL,
+            message_count   INTEGER DEFAULT 0,
+            intel_snapshot  TEXT DEFAULT '{}',
+            archived_at     TEXT NOT NULL
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_sessions_scammer ON sessions(scammer_id);
+    """)
+    return conn
+
+
+def _file_bytes(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _total_bytes(paths: list, suffix: str = "") -> int:
+    return sum(_file_bytes(path + suffix) for path in paths)
+
+
+def reassign_archived(old_fingerprint: str, new_fingerprint: str):
+    """Point archived sessions of a merged-away profile at the profile they were merged into."""
+    for path in _archive_paths():
+        if not os.path.exists(path):
+            continue
+        conn = _connect_archive(path)
+        try:
+            conn.execute("UPDATE sessions SET scammer_id = ? WHERE scammer_id = ?", (new_fingerprint, old_fingerprint))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def get_archived_sessions(fingerprint: str, limit: int = 50) -> list[dict]:
+    """A scammer's archived sessions, most recent first."""
+    rows = []
+    for path in _archive_paths():
+        if not os.path.exists(path):
+            continue
+        conn = _connect_archive(path)
+        try:
+            rows.extend(conn.execute(
+                "SELECT * FROM sessions WHERE scammer_id = ? ORDER BY last_activity DESC LIMIT ?",
+                (fingerprint, limit),
+            ).fetchall())
+        finally:
+            conn.close()
+    rows.sort(key=lambda row: row["last_activity"], reverse=True)
+    return [dict(row) for row in rows[:limit]]
+
+
+# ───────────────────────────────────────────────
+# Retention passes
+# ───────────────────────────────────────────────
+
+class FingerprintRetention:
+    """
+    One pass (run_once()) archives sessions older than `days` in batches,
+    shard by shard when the fingerprint DB is partitioned,
+    then compacts: PRAGMA incremental_vacuum a few pages at a time and a
+    PASSIVE WAL checkpoint, neither of which holds the write lock for long.
+    Scammer rows keep archived_sessions / archived_messages so profiles and
+    stats still count what moved. start() repeats it every `interval`.
+    """
+
+    def __init__(self, days: float = RETENTION_DAYS, batch_size: int = RETENTION_BATCH,
+                 vacuum_pages: int = RETENTION_VACUUM_PAGES, interval: float = RETENTION_INTERVAL):
+        self.days = days
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.interval = interval
+        self._run_lock = threading.Lock()    # one pass at a time (scheduler vs. admin endpoint)
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {
+            "runs": 0, "errors": 0, "sessions_archived": 0, "bytes_reclaimed": 0, "last_run": None,
+        }
+
+    def run_once(self, days: float = None) -> dict:
+        """Archive, vacuum and checkpoint once; returns what the pass did."""
+        with self._run_lock:
+            started = time.perf_counter()
+            db_paths = fingerprint_db.db_paths()
+            db_before, wal_before = _total_bytes(db_paths), _total_bytes(db_paths, "-wal")
+            days = self.days if days is None else days
+            cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+            archived = batches = pages = reclaimed = frames = 0
+            complete = True
+            for db_path in db_paths:
+                moved, steps = self.archive_sessions(cutoff, db_path)
+                conn = fingerprint_db._get_conn(db_path)
+                try:
+                    freed, page_size = self.incremental_vacuum(conn)
+                    checkpoint = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+                finally:
+                    conn.close()
+                archived, batches, pages = archived + moved, batches + steps, pages + freed
+                reclaimed += freed * page_size
+                frames += checkpoint[2]
+                complete = complete and checkpoint[0] == 0 and checkpoint[1] == checkpoint[2]
+
+            result = {
+                "cutoff": cutoff,
+                "sessions_archived": archived,
+                "batches": batches,
+                "pages_freed": pages,
+                "bytes_reclaimed": reclaimed,
+                "wal_frames_checkpointed": frames,
+                "wal_checkpoint_complete": complete,
+                "db_bytes": {"before": db_before, "after": _total_bytes(db_paths)},
+                "wal_bytes": {"before": wal_before, "after": _total_bytes(db_paths, "-wal")},
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+            self._stats["runs"] += 1
+            self._stats["sessions_archived"] += archived
+            self._stats["bytes_reclaimed"] += result["bytes_reclaimed"]
+            self._stats["last_run"] = result
+            return result
+
+    def archive_sessions(self, cutoff: str, db_path: str = None) -> tuple:
+        """Move sessions of `db_path` last active before `cutoff` to its archive; (sessions moved, batches)."""
+        moved = batches = 0
+        conn = fingerprint_db._get_conn(db_path)
+        archive = None
+        try:
+            while not self._stop.is_set():
+                rows = conn.execute(
+                    "SELECT * FROM sessions WHERE last_activity < ? ORDER BY last_activity LIMIT ?",
+                    (cutoff, self.batch_size),
+                ).fetchall()
+                if not rows:
+                    break
+                if archive is None:
+                    archive = _connect_archive(archive_path(db_path))
+                now = datetime.now(timezone.utc).isoformat()
+                # Durable in the archive before it leaves the hot DB; a retry after a crash is ignored by id
+                archive.executemany(
+                    """INSERT OR IGNORE INTO sessions (id, scammer_id, chat_id, scam_type, started_at,
+                       last_activity, message_count, intel_snapshot, archived_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    [(row["id"], row["scammer_id"], row["chat_id"], row["scam_type"], row["started_at"],
+                      row["last_activity"], row["message_count"], row["intel_snapshot"], now)
+                     for row in sorted(rows, key=lambda row: row["id"])],
+                )
+                archive.commit()
+
+                totals = {}    # scammer id -> [sessions, messages]
+                for row in rows:
+                    total = totals.setdefault(row["scammer_id"], [0, 0])
+                    total[0] += 1
+                    total[1] += row["message_count"] or 0
+                ids = [row["id"] for row in rows]
+                conn.execute(f"DELETE FROM sessions WHERE id IN ({','.join('?' * len(ids))})", ids)
+                conn.executemany(
+                    """UPDATE scammers SET archived_sessions = archived_sessions + ?,
+                       archived_messages = archived_messages + ? WHERE id = ?""",
+                    [(sessions, messages, scammer_id) for scammer_id, (sessions, messages) in totals.items()],
+                )
+                conn.commit()
+                moved += len(rows)
+                batches += 1
+        finally:
+            conn.close()
+            if archive is not None:
+                archive.close()
+        return moved, batches
+
+    def incremental_vacuum(self, conn: sqlite3.Connection) -> tuple:
+        """Release free pages `vacuum_pages` per write transaction; (pages freed, page size)."""
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        freed = 0
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        while free and not self._stop.is_set():
+            started = time.perf_counter()
+            # executescript steps the pragma to completion; execute() would free a single page
+            conn.executescript(f"PRAGMA incremental_vacuum({self.vacuum_pages})")
+            remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if remaining >= free:
+                break
+            freed += free - remaining
+            free = remaining
+            # Leave the write lock free for a while: a writer backing off in SQLite's
+            # busy handler sleeps up to 100 ms and would otherwise keep missing it
+            self._stop.wait(max(time.perf_counter() - started, VACUUM_PAUSE))
+        return freed, page_size
+
+    # ── Scheduling ──
+
+    def run(self):
+        """Background loop: a pass every `interval` seconds until stop()."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"⚠️ Fingerprint retention pass failed: {e}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="fingerprint-retention", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+    # ── Reporting ──
+
+    def stats(self) -> dict:
+        db_paths = fingerprint_db.db_paths()
+        return {
+            "enabled": FINGERPRINT_RETENTION,
+            "retention_days": self.days,
+            "interval_seconds": self.interval,
+            **self._stats,
+            "db_bytes": _total_bytes(db_paths),
+            "wal_bytes": _total_bytes(db_paths, "-wal"),
+            "archive_bytes": _total_bytes(_archive_paths()),
+        }
+
+
+_retention = None
+
+
+def get_retention() -> FingerprintRetention:
+    global _retention
+    if _retention is None:
+        _retention = FingerprintRetention()
+    return _retention
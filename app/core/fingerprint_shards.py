@@ -0,0 +1,388 @@
+"""
+H.I.V.E. Fingerprint Shards
+Hash-partitioned fingerprint storage: N SQLite files written in parallel, linked by a small routing index
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core import domain_reputation, fingerprint_db
+from app.core.identifier_normalizer import candidate_keys
+
+
+def shard_of(key: str, shards: int) -> int:
+    """Stable shard of a canonical identifier value or fingerprint (hash() is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big") % shards
+
+
+class ShardedFingerprintDB:
+    """
+    fingerprint_db's storage split over `shards` files with the same schema:
+
+    - an identifier row lives in the shard of its canonical value, so
+      lookups and claims of one identifier touch one file;
+    - a scammer row and its sessions live in the shard of its fingerprint;
+    - the routing index (<root>_routes.db) maps merged-away fingerprints to
+      the profile they now belong to, so a merge never has to rewrite
+      identifier rows scattered over the other shards.
+
+    Every write commits one shard at a time and no store holds two shard
+    locks at once, so writers on different shards never wait for each
+    other. Identifier claims are INSERT OR IGNORE against the UNIQUE
+    (type, value) index; a writer that loses a claim joins the profile of
+    the writer that won, which is the outcome a serial write would give.
+
+    A store touches several files, so connections are kept per thread
+    instead of opened per call as in fingerprint_db.
+    """
+
+    def __init__(self, db_path: str, shards: int):
+        root, ext = os.path.splitext(db_path)
+        ext = ext or ".db"
+        self.shards = shards
+        self.paths = [f"{root}_shard{i}{ext}" for i in range(shards)]
+        self.routes_path = f"{root}_routes{ext}"
+        for path in self.paths:
+            conn = fingerprint_db._connect(path)
+            try:
+                fingerprint_db._create_schema(conn)
+                fingerprint_db._migrate(conn)
+            finally:
+                conn.close()
+        self._local = threading.local()
+        with self._conn(None) as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS aliases (
+                    merged_id   TEXT PRIMARY KEY,          -- fingerprint merged away
+                    into_id     TEXT NOT NULL,             -- live profile it resolves to
+                    merged_at   TEXT NOT NULL
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_aliases_into ON aliases(into_id);
+            """)
+
+    # ── Connections and routing ──
+
+    def shard_of(self, key: str) -> int:
+        return shard_of(key, self.shards)
+
+    def _connect(self, shard: int) -> sqlite3.Connection:
+        conn = fingerprint_db._connect(self.paths[shard])
+        # Identifiers point at scammers in other files, which SQLite cannot check
+        conn.execute("PRAGMA foreign_keys=OFF")
+        return conn
+
+    def _routes(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.routes_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @contextmanager
+    def _conn(self, shard: Optional[int]):
+        """
+        This thread's connection to a shard (None: the routing index). A
+        transaction begun inside the block and left open is rolled back.
+        """
+        if getattr(self._local, "pid", None) != os.getpid():    # never reuse connections across fork()
+            self._local.pid, self._local.conns = os.getpid(), {}
+        conn = self._local.conns.get(shard)
+        if conn is None:
+            conn = self._local.conns[shard] = self._routes() if shard is None else self._connect(shard)
+        outer = conn.in_transaction
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction and not outer:
+                conn.rollback()
+
+    def _by_shard(self, keys) -> dict:
+        grouped = {}
+        for key in keys:
+            grouped.setdefault(self.shard_of(key[1] if isinstance(key, tuple) else key), []).append(key)
+        return dict(sorted(grouped.items()))
+
+    def _known(self, values) -> list:
+        """Identifier rows for canonical `values`, oldest first: (first_seen, shard, id, type, value, scammer_id)."""
+        rows = []
+        for shard, keys in self._by_shard(set(values)).items():
+            with self._conn(shard) as conn:
+                rows.extend(
+                    (row["first_seen"], shard, row["id"], row["type"], row["value"], row["scammer_id"])
+                    for row in conn.execute(
+                        f"SELECT * FROM identifiers WHERE value IN ({','.join('?' * len(keys))})", keys,
+                    )
+                )
+        return sorted(rows)
+
+    def _resolve(self, scammer_ids) -> dict:
+        """Fingerprint -> the live profile it belongs to (itself unless merged away)."""
+        ids = sorted(set(scammer_ids))
+        resolved = {scammer_id: scammer_id for scammer_id in ids}
+        if ids:
+            with self._conn(None) as conn:
+                resolved.update(conn.execute(
+                    f"SELECT merged_id, into_id FROM aliases WHERE merged_id IN ({','.join('?' * len(ids))})", ids,
+                ).fetchall())
+        return resolved
+
+    def _owned_by(self, scammer_id: str) -> list:
+        """The fingerprint plus every fingerprint merged into it."""
+        with self._conn(None) as conn:
+            merged = [row[0] for row in conn.execute("SELECT merged_id FROM aliases WHERE into_id = ?", (scammer_id,))]
+        return [scammer_id, *merged]
+
+    def _identifiers(self, scammer_id: str) -> list:
+        owners = self._owned_by(scammer_id)
+        rows = []
+        for shard in range(self.shards):
+            with self._conn(shard) as conn:
+                rows.extend(
+                    ((row["first_seen"], shard, row["id"]), row) for row in conn.execute(
+                        f"SELECT * FROM identifiers WHERE scammer_id IN ({','.join('?' * len(owners))})", owners,
+                    )
+                )
+        return [row for _, row in sorted(rows, key=lambda item: item[0])]
+
+    # ── Reads ──
+
+    def load(self, scammer_id: str) -> Optional[dict]:
+        with self._conn(self.shard_of(scammer_id)) as conn:
+            row = conn.execute("SELECT * FROM scammers WHERE id = ?", (scammer_id,)).fetchone()
+            if not row:
+                return None
+            sessions = conn.execute("SELECT COUNT(*) FROM sessions WHERE scammer_id = ?", (scammer_id,)).fetchone()[0]
+        return fingerprint_db._profile(row, self._identifiers(scammer_id), sessions)
+
+    def find(self, identifier_value: str) -> Optional[dict]:
+        known = self._known(candidate_keys(identifier_value))
+        if not known:
+            return None
+        owner = known[0][5]
+        return self.load(self._resolve([owner])[owner])
+
+    def get_all(self, limit: int = 50) -> list[dict]:
+        """Each shard's top `limit` by threat score, merged."""
+        tops = []
+        for shard in range(self.shards):
+            with self._conn(shard) as conn:
+                tops.append(conn.execute(
+                    "SELECT id, threat_score FROM scammers ORDER BY threat_score DESC LIMIT ?", (limit,)
+                ).fetchall())
+        merged = heapq.merge(*tops, key=lambda row: -row["threat_score"])
+        return [self.load(row["id"]) for row in itertools.islice(merged, limit)]
+
+    def get_stats(self) -> dict:
+        totals = None
+        for shard in range(self.shards):
+            with self._conn(shard) as conn:
+                stats = fingerprint_db._stats(conn)
+            if totals is None:
+                totals = stats
+                continue
+            for key, value in stats.items():
+                if isinstance(value, int):
+                    totals[key] += value
+                elif isinstance(value, dict) and key != "highest_threat":
+                    for name, count in value.items():
+                        totals[key][name] = totals[key].get(name, 0) + count
+            top = stats["highest_threat"]
+            if top and (totals["highest_threat"] is None or top["score"] > totals["highest_threat"]["score"]):
+                totals["highest_threat"] = top
+        return totals
+
+    def search(self, query: str) -> list[dict]:
+        owners = []
+        for shard in range(self.shards):
+            with self._conn(shard) as conn:
+                owners.extend(row[0] for row in conn.execute(
+                    "SELECT DISTINCT scammer_id FROM identifiers WHERE LOWER(value) LIKE LOWER(?)", (f"%{query}%",)
+                ))
+        resolved = self._resolve(owners)
+        profiles = (self.load(scammer_id) for scammer_id in dict.fromkeys(resolved[owner] for owner in owners))
+        return [profile for profile in profiles if profile]
+
+    def iter_link_identifiers(self):
+        for shard in range(self.shards):
+            with self._conn(shard) as conn:
+                rows = conn.execute("SELECT value, scammer_id FROM identifiers WHERE type = 'link'").fetchall()
+            resolved = self._resolve(row["scammer_id"] for row in rows)
+            yield from ((row["value"], resolved[row["scammer_id"]]) for row in rows)
+
+    # ── Writes ──
+
+    def store_fingerprint(self, intel: dict, scam_type: str, chat_id, message_count: int) -> dict:
+        stored = self.store(intel, scam_type, chat_id, message_count, datetime.now(timezone.utc).isoformat())
+        if stored is None:
+            return {"status": "no_identifiers", "message": "No identifiers found to fingerprint."}
+        scammer_id, is_new = stored
+        profile = self.load(self._resolve([scammer_id])[scammer_id])
+        profile["is_new_scammer"] = is_new
+        return profile
+
+    def store_many(self, items) -> list:
+        now = datetime.now(timezone.utc).isoformat()
+        return [self.store(intel, scam_type, chat_id, message_count, now)
+                for intel, scam_type, chat_id, message_count in items]
+
+    def store(self, intel: dict, scam_type: str, chat_id, message_count: int, now: str):
+        """fingerprint_db._store() across shards; (scammer_id, is_new), or None without identifiers."""
+        id_pairs = fingerprint_db._identifier_pairs(intel, chat_id)
+        if not id_pairs:
+            return None
+
+        # The earliest-known identifier's profile owns the message, as in the single-file store
+        wanted = set(id_pairs)
+        known = [row for row in self._known(value for _, value in id_pairs) if (row[3], row[4]) in wanted]
+        owner = self._resolve([known[0][5]])[known[0][5]] if known else None
+        scammer_id = owner or fingerprint_db._generate_fingerprint([value for _, value in id_pairs])
+
+        already_stored = {(row[3], row[4]) for row in known}
+        claimed, lost = self._claim([pair for pair in id_pairs if pair not in already_stored], scammer_id, now)
+        if lost and owner is None:
+            # A concurrent writer created a profile for one of these identifiers first: join it
+            rivals = [row for row in self._known(value for _, value in lost) if (row[3], row[4]) in set(lost)]
+            owner = self._resolve([rivals[0][5]])[rivals[0][5]]
+            self._reassign(claimed, scammer_id, owner)
+            scammer_id = owner
+
+        scammer_id, is_new = self._write_home(scammer_id, intel, scam_type, chat_id, message_count, id_pairs, now)
+        for id_type, id_value in id_pairs:
+            if id_type == "link":
+                domain_reputation.record_link(id_value, scammer_id)
+        return scammer_id, is_new
+
+    def _claim(self, pairs: list, scammer_id: str, now: str) -> tuple:
+        """INSERT OR IGNORE each identifier in its shard; (pairs claimed, pairs another profile already holds)."""
+        claimed, lost = [], []
+        for shard, group in self._by_shard(pairs).items():
+            with self._conn(shard) as conn:
+                for id_type, id_value in group:
+                    cur = conn.execute(
+                        "INSERT OR IGNORE INTO identifiers (scammer_id, type, value, first_seen) VALUES (?, ?, ?, ?)",
+                        (scammer_id, id_type, id_value, now),
+                    )
+                    (claimed if cur.rowcount else lost).append((id_type, id_value))
+                conn.commit()
+        return claimed, lost
+
+    def _reassign(self, pairs: list, old_id: str, new_id: str):
+        for shard, group in self._by_shard(pairs).items():
+            with self._conn(shard) as conn:
+                conn.executemany(
+                    "UPDATE identifiers SET scammer_id = ? WHERE scammer_id = ? AND type = ? AND value = ?",
+                    [(new_id, old_id, id_type, id_value) for id_type, id_value in group],
+                )
+                conn.commit()
+
+    def _write_home(self, scammer_id: str, intel: dict, scam_type: str, chat_id, message_count: int,
+                    id_pairs: list, now: str) -> tuple:
+        """Update or create the profile in its shard, log the session and roll it up there; (scammer_id, is_new)."""
+        while True:
+            with self._conn(self.shard_of(scammer_id)) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                row = fingerprint_db._touch_scammer(conn, scammer_id, scam_type, len(id_pairs), now)
+                is_new = row is None
+                if is_new:
+                    merged_into = self._resolve([scammer_id])[scammer_id]
+                    if merged_into != scammer_id:
+                        # Merged away since we looked it up: the session belongs to the survivor
+                        conn.rollback()
+                        scammer_id = merged_into
+                        continue
+                    # New, or owned by a concurrent writer that claimed first but has not written it yet
+                    fingerprint_db._insert_scammer(conn, scammer_id, scam_type, len(id_pairs), now)
+                fingerprint_db._log_session(conn, scammer_id, intel, scam_type, chat_id, message_count, now)
+                fingerprint_db._roll_up(conn, fingerprint_db._rollup_rows(
+                    id_pairs, scam_type, "active" if is_new else row["status"], message_count, is_new, now,
+                ))
+                conn.commit()
+                return scammer_id, is_new
+
+    def update_status(self, fingerprint: str, status: str, notes: str) -> bool:
+        with self._conn(self.shard_of(fingerprint)) as conn:
+            cur = conn.execute("UPDATE scammers SET status = ?, notes = ? WHERE id = ?", (status, notes, fingerprint))
+            conn.commit()
+            return cur.rowcount > 0
+
+    def merge(self, fingerprint_a: str, fingerprint_b: str) -> Optional[dict]:
+        """
+        fingerprint_db.merge_scammers(): B's identifiers stay where they are
+        and resolve to A through the routing index; B's sessions and counters
+        move into A's shard and B's row is deleted.
+        """
+        if fingerprint_a == fingerprint_b or not self.load(fingerprint_a) or not self.load(fingerprint_b):
+            return None
+
+        # Route first, so writes racing the merge re-resolve to A instead of recreating B
+        now = datetime.now(timezone.utc).isoformat()
+        with self._conn(None) as routes:
+            routes.execute("UPDATE aliases SET into_id = ? WHERE into_id = ?", (fingerprint_a, fingerprint_b))
+            routes.execute("INSERT OR REPLACE INTO aliases (merged_id, into_id, merged_at) VALUES (?, ?, ?)",
+                           (fingerprint_b, fingerprint_a, now))
+            routes.commit()
+
+        # One connection when both live in the same shard
+        with self._conn(self.shard_of(fingerprint_b)) as conn_b, self._conn(self.shard_of(fingerprint_a)) as conn_a:
+            # B's shard stays locked until its sessions are safely in A's, so none are lost or added meanwhile
+            conn_b.execute("BEGIN IMMEDIATE")
+            b = conn_b.execute("SELECT * FROM scammers WHERE id = ?", (fingerprint_b,)).fetchone()
+            if b is None:    # a concurrent merge got there first
+                return None
+            if conn_a is conn_b:
+                conn_b.execute("UPDATE sessions SET scammer_id = ? WHERE scammer_id = ?", (fingerprint_a, fingerprint_b))
+            else:
+                sessions = conn_b.execute("SELECT * FROM sessions WHERE scammer_id = ? ORDER BY id",
+                                          (fingerprint_b,)).fetchall()
+                conn_a.execute("BEGIN IMMEDIATE")
+                conn_a.executemany(
+                    """INSERT INTO sessions (scammer_id, chat_id, scam_type, started_at, last_activity,
+                       message_count, intel_snapshot) VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    [(fingerprint_a, row["chat_id"], row["scam_type"], row["started_at"], row["last_activity"],
+                      row["message_count"], row["intel_snapshot"]) for row in sessions],
+                )
+            self._fold(conn_a, fingerprint_a, b)
+            if conn_a is not conn_b:
+                conn_a.commit()
+                conn_b.execute("DELETE FROM sessions WHERE scammer_id = ?", (fingerprint_b,))
+            conn_b.execute("DELETE FROM scammers WHERE id = ?", (fingerprint_b,))
+            conn_b.commit()
+
+        from app.core.fingerprint_retention import reassign_archived
+        reassign_archived(fingerprint_b, fingerprint_a)
+        return self.load(fingerprint_a)
+
+    def _fold(self, conn: sqlite3.Connection, fingerprint_a: str, b: sqlite3.Row):
+        """Add B's counters and scam types to A's row (fingerprint_db._merge_into's update)."""
+        a = conn.execute("SELECT * FROM scammers WHERE id = ?", (fingerprint_a,)).fetchone()
+        merged_types = list(set(json.loads(a["scam_types"]) + json.loads(b["scam_types"])))
+        total_encounters = a["encounter_count"] + b["encounter_count"]
+        new_score = fingerprint_db._calculate_threat_score(
+            total_encounters, merged_types, len(self._identifiers(fingerprint_a)),
+        )
+        conn.execute(
+            """UPDATE scammers SET first_seen = ?, encounter_count = ?,
+               scam_types = ?, threat_score = ?,
+               archived_sessions = archived_sessions + ?, archived_messages = archived_messages + ?
+               WHERE id = ?""",
+            (min(a["first_seen"], b["first_seen"]), total_encounters, json.dumps(merged_types), new_score,
+             b["archived_sessions"], b["archived_messages"], fingerprint_a),
+        )
+
+
+_dbs = {}    # (DB_PATH, shards) -> ShardedFingerprintDB
+_dbs_lock = threading.Lock()
+
+
+def get_sharded_db(db_path: str, shards: int) -> ShardedFingerprintDB:
+    with _dbs_lock:
+        if (db_path, shards) not in _dbs:
+            _dbs[(db_path, shards)] = ShardedFingerprintDB(db_path, shards)
+        return _dbs[(db_path, shards)]
@@ -0,0 +1,234 @@
+"""
+H.I.V.E. Fingerprint Trends
+Hourly / daily session counts by scam type, status and identifier type, answered from rollup tables
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.core import fingerprint_db
+
+# Sessions folded into the rollups per backfill transaction
+ROLLUP_BACKFILL_BATCH = int(os.getenv("ROLLUP_BACKFILL_BATCH", "2000"))
+# Seconds the backfill sleeps between batches so stores keep the write lock
+BACKFILL_PAUSE = 0.01
+BUCKETS = {"hour": ("hourly", "%Y-%m-%dT%H:00"), "day": ("daily", "%Y-%m-%d")}
+DEFAULT_RANGE = timedelta(days=7)
+
+
+def parse_time(value: str) -> datetime:
+    """An ISO date or datetime as an aware UTC datetime (naive values are taken as UTC); ValueError if malformed."""
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+# ───────────────────────────────────────────────
+# Range queries
+# ───────────────────────────────────────────────
+
+def get_trends(start: datetime = None, end: datetime = None, bucket: str = "hour",
+               scam_type: str = None, status: str = None, identifier_type: str = None) -> dict:
+    """
+    Per-bucket totals for buckets overlapping [start, end) (default: the
+    last week), optionally narrowed to one scam type, scammer status or
+    identifier type. Reads only the rollup tables, so the cost follows the
+    number of buckets in range, not the number of sessions stored.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of {list(BUCKETS)}")
+    end = end or datetime.now(timezone.utc)
+    start = start or end - DEFAULT_RANGE
+    if start >= end:
+        raise ValueError("from must be before to")
+    table, key_format = BUCKETS[bucket]
+    first_key = start.strftime(key_format)
+    last_key = (end - timedelta(microseconds=1)).strftime(key_format)
+
+    query = f"SELECT * FROM rollup_{table} WHERE bucket_start BETWEEN ? AND ?"
+    params = [first_key, last_key]
+    if scam_type:
+        query += " AND scam_type = ?"
+        params.append(scam_type)
+    if status:
+        query += " AND status = ?"
+        params.append(status)
+    if identifier_type:
+        query += " AND id_type = ?"
+        params.append(identifier_type)
+
+    series = {}
+    totals = _empty_point(None)
+    for db_path in fingerprint_db.db_paths():    # one file, or every shard's share
+        conn = fingerprint_db._get_conn(db_path)
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        for row in rows:
+            point = series.setdefault(row["bucket_start"], _empty_point(row["bucket_start"]))
+            if row["id_type"] == (identifier_type or ""):
+                for target in (point, totals):
+                    for field in ("sessions", "messages", "new_scammers"):
+                        target[field] += row[field]
+                    target["scam_types"][row["scam_type"]] = target["scam_types"].get(row["scam_type"], 0) + row["sessions"]
+                    target["statuses"][row["status"]] = target["statuses"].get(row["status"], 0) + row["sessions"]
+            if row["id_type"]:
+                for target in (point, totals):
+                    counts = target["identifier_types"].setdefault(row["id_type"], {"sessions": 0, "identifiers": 0})
+                    counts["sessions"] += row["sessions"]
+                    counts["identifiers"] += row["identifiers"]
+    del totals["start"]
+
+    return {
+        "bucket": bucket,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "filters": {"scam_type": scam_type, "status": status, "identifier_type": identifier_type},
+        "series": [series[key] for key in sorted(series)],
+        "totals": totals,
+        "backfill_pending": backfill_status()["pending_sessions"],
+    }
+
+
+def _empty_point(bucket_start) -> dict:
+    return {"start": bucket_start, "sessions": 0, "messages": 0, "new_scammers": 0,
+            "scam_types": {}, "statuses": {}, "identifier_types": {}}
+
+
+# ───────────────────────────────────────────────
+# Backfill of sessions stored before the rollups existed
+# ───────────────────────────────────────────────
+
+_backfill_lock = threading.Lock()
+_backfill_thread = None
+
+
+def _progress(conn) -> tuple:
+    meta = dict(conn.execute(
+        "SELECT key, value FROM meta WHERE key IN ('rollup_backfill_through', 'rollup_backfill_done')"
+    ).fetchall())
+    return meta.get("rollup_backfill_through", 0), meta.get("rollup_backfill_done", 0)
+
+
+def backfill_status() -> dict:
+    """Session ids still to be folded into the rollups (an upper bound on sessions: ids have gaps)."""
+    pending = 0
+    for db_path in fingerprint_db.db_paths():
+        conn = fingerprint_db._get_conn(db_path)
+        try:
+            through, done = _progress(conn)
+        finally:
+            conn.close()
+        pending += max(0, through - done)
+    return {"pending_sessions": pending, "complete": pending == 0, "running": _backfill_lock.locked()}
+
+
+def backfill_rollups(batch_size: int = ROLLUP_BACKFILL_BATCH) -> dict:
+    """
+    Fold sessions stored before the rollups existed (schema v3) into them,
+    live and archived alike, oldest id first. Each batch and its progress
+    marker commit together, so the job can stop anywhere and resume;
+    sessions stored since v3 were rolled up when written and are skipped.
+    """
+    from app.core.fingerprint_retention import _connect_archive, archive_path
+
+    with _backfill_lock:
+        started = time.perf_counter()
+        sessions = batches = 0
+        for db_path in fingerprint_db.db_paths():
+            conn = fingerprint_db._get_conn(db_path)
+            archive = _connect_archive(archive_path(db_path)) if os.path.exists(archive_path(db_path)) else None
+            try:
+                through, done = _progress(conn)
+                while done < through:
+                    rows = _next_batch([conn, archive], done, through, batch_size)
+                    upper = rows[-1]["id"] if rows else through
+                    first_ids = _first_session_ids([conn, archive], {row["scammer_id"] for row in rows})
+                    statuses = _statuses(conn, {row["scammer_id"] for row in rows})
+                    totals = {}
+                    for row in rows:
+                        id_pairs = fingerprint_db._identifier_pairs(json.loads(row["intel_snapshot"] or "{}"), None)
+                        contribution = fingerprint_db._rollup_rows(
+                            id_pairs, row["scam_type"], statuses.get(row["scammer_id"], "active"),
+                            row["message_count"], first_ids.get(row["scammer_id"]) == row["id"], row["started_at"],
+                        )
+                        for key, values in contribution.items():
+                            total = totals.setdefault(key, [0, 0, 0, 0])
+                            for i, value in enumerate(values):
+                                total[i] += value
+                    fingerprint_db._roll_up(conn, totals)
+                    conn.execute("UPDATE meta SET value = ? WHERE key = 'rollup_backfill_done'", (upper,))
+                    conn.commit()
+                    done = upper
+                    sessions += len(rows)
+                    batches += 1
+                    time.sleep(BACKFILL_PAUSE)
+            finally:
+                conn.close()
+                if archive is not None:
+                    archive.close()
+        return {"sessions": sessions, "batches": batches, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def _next_batch(sources: list, done: int, through: int, batch_size: int) -> list:
+    """
+    The next `batch_size` sessions by id in (done, through] from the hot
+    file and its archive. Hot is read first: a session archived in between
+    then shows up in both reads (deduplicated by id), never in neither.
+    """
+    by_id = {}
+    for source in sources:
+        if source is None:
+            continue
+        for row in source.execute(
+            "SELECT * FROM sessions WHERE id > ? AND id <= ? ORDER BY id LIMIT ?", (done, through, batch_size)
+        ):
+            by_id.setdefault(row["id"], row)
+    return [by_id[session_id] for session_id in sorted(by_id)[:batch_size]]
+
+
+def _first_session_ids(sources: list, scammer_ids: set) -> dict:
+    """Each scammer's oldest session id, live or archived: that session counts as a new scammer."""
+    first = {}
+    ids = sorted(scammer_ids)
+    for source in sources:
+        if source is None or not ids:
+            continue
+        for row in source.execute(
+            f"SELECT scammer_id, MIN(id) FROM sessions WHERE scammer_id IN ({','.join('?' * len(ids))}) "
+            "GROUP BY scammer_id", ids,
+        ):
+            first[row[0]] = min(row[1], first.get(row[0], row[1]))
+    return first
+
+
+def _statuses(conn, scammer_ids: set) -> dict:
+    # Status history is not kept, so backfilled sessions take the scammer's current status
+    ids = sorted(scammer_ids)
+    if not ids:
+        return {}
+    return dict(conn.execute(
+        f"SELECT id, status FROM scammers WHERE id IN ({','.join('?' * len(ids))})", ids
+    ).fetchall())
+
+
+def start_backfill():
+    """Run backfill_rollups() on a background thread if any sessions are pending."""
+    global _backfill_thread
+    if backfill_status()["complete"] or (_backfill_thread is not None and _backfill_thread.is_alive()):
+        return _backfill_thread
+
+    def run():
+        try:
+            result = backfill_rollups()
+            print(f"✅ Rolled up {result['sessions']} existing session(s) in {result['seconds']}s")
+        except Exception as e:
+            print(f"⚠️ Rollup backfill failed: {e}")
+
+    _backfill_thread = threading.Thread(target=run, name="rollup-backfill", daemon=True)
+    _backfill_thread.start()
+    return _backfill_thread
@@ -0,0 +1,137 @@
+"""
+H.I.V.E. History Window
+Token-budgeted, incrementally maintained conversation window for prompts
+"""
+import os
+import threading
+from collections import OrderedDict, deque
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "300"))
+MAX_TRACKED_CHATS = int(os.getenv("HISTORY_MAX_TRACKED_CHATS", "2000"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return max(1, (len(text) + 3) // 4)
+
+
+def format_history_line(msg: dict) -> str:
+    """Render one history entry the way the prompt expects it."""
+    if msg.get("sender") == "scammer":
+        return f"Scammer: {msg['text']}"
+    return f"You: {msg['text']}"
+
+
+class HistoryWindow:
+    """
+    Keeps as many of the most recent turns as fit in `token_budget`.
+
+    Turns are appended one at a time; the oldest ones fall off the front when
+    the budget is exceeded, so nothing is re-joined from scratch per reply.
+    """
+
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET):
+        self.token_budget = max(1, token_budget)
+        self.consumed = 0          # history entries seen so far
+        self.dropped_turns = 0
+        self.dropped_tokens = 0
+        self._lines = deque()      # (line, tokens)
+        self._tokens = 0
+        self._rendered = ""
+        self._dirty = False
+
+    @classmethod
+    def from_history(cls, history: list, token_budget: int = HISTORY_TOKEN_BUDGET) -> "HistoryWindow":
+        """Build a window for a stateless call, walking back from the newest turn."""
+        window = cls(token_budget)
+        newest_first = []
+        used = 0
+        for msg in reversed(history or []):
+            line = window._fit(format_history_line(msg))
+            tokens = estimate_tokens(line) + 1
+            if newest_first and used + tokens > window.token_budget:
+                break
+            newest_first.append((line, tokens))
+            used += tokens
+        window._lines.extend(reversed(newest_first))
+        window._tokens = used
+        window.consumed = len(history or [])
+        window.dropped_turns = window.consumed - len(newest_first)
+        window._dirty = True
+        return window
+
+    def _fit(self, line: str) -> str:
+        # A single turn larger than the whole budget is truncated, not dropped
+        max_chars = self.token_budget * 4
+        return line if len(line) <= max_chars else line[:max_chars - 3] + "..."
+
+    def append(self, msg: dict):
+        line = self._fit(format_history_line(msg))
+        tokens = estimate_tokens(line) + 1  # +1 for the joining newline
+        self._lines.append((line, tokens))
+        self._tokens += tokens
+        self.consumed += 1
+
+        while self._tokens > self.token_budget and len(self._lines) > 1:
+            _, old_tokens = self._lines.popleft()
+            self._tokens -= old_tokens
+            self.dropped_turns += 1
+            self.dropped_tokens += old_tokens
+        self._dirty = True
+
+    def sync(self, history: list, offset: int = 0):
+        """
+        Append only the entries of `history` this window hasn't seen yet.
+        `offset` is the absolute turn number of history[0], for callers that
+        keep only a bounded tail of the conversation.
+        """
+        history = history or []
+        if offset + len(history) < self.consumed:
+            # History was reset by the caller — start over
+            self.__init__(self.token_budget)
+        start = max(0, self.consumed - offset)
+        for msg in history[start:]:
+            self.append(msg)
+        self.consumed = offset + len(history)
+
+    def render(self) -> str:
+        if self._dirty:
+            self._rendered = "\n".join(line for line, _ in self._lines)
+            self._dirty = False
+        return self._rendered
+
+    @property
+    def tokens(self) -> int:
+        return self._tokens
+
+    @property
+    def turns(self) -> int:
+        return len(self._lines)
+
+
+class HistoryWindowRegistry:
+    """Per-chat windows, least-recently-used chats evicted past `max_chats`."""
+
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET, max_chats: int = MAX_TRACKED_CHATS):
+        self.token_budget = token_budget
+        self.max_chats = max_chats
+        self._windows = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, chat_id: str) -> HistoryWindow:
+        window = self._windows.get(chat_id)
+        if window is None:
+            window = HistoryWindow(self.token_budget)
+            self._windows[chat_id] = window
+            while len(self._windows) > self.max_chats:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(chat_id)
+        return window
+
+    def drop(self, chat_id: str):
+        with self.lock:
+            self._windows.pop(chat_id, None)
+
+    def __len__(self):
+        return len(self._windows)
@@ -0,0 +1,98 @@
+"""
+H.I.V.E. Identifier Normalizer
+Canonical keys for extracted identifiers, so every spelling of one number, handle or link is one value
+"""
+import re
+from urllib.parse import urlsplit
+
+DEFAULT_COUNTRY_CODE = "91"
+
+# Punctuation that ends a sentence rather than a URL
+_URL_TRAILING = ".,;:!?)]}'\""
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(value: str) -> str:
+    """
+    E.164: "+91 98765-43210", "919876543210", "09876543210" and
+    "9876543210" all become "+919876543210".
+    """
+    digits = _NON_DIGITS.sub("", value)
+    if len(digits) == 11 and digits.startswith("0"):    # trunk prefix
+        digits = digits[1:]
+    if len(digits) == 10:
+        digits = DEFAULT_COUNTRY_CODE + digits
+    return "+" + digits if digits else value.strip()
+
+
+def normalize_upi(value: str) -> str:
+    return value.strip().lower()
+
+
+def normalize_bank_account(value: str) -> str:
+    return _NON_DIGITS.sub("", value) or value.strip()
+
+
+def normalize_url(value: str) -> str:
+    """
+    scheme + host + path: "http://www.Fake-Bank.com/kyc/?a=1", "www.fake-bank.com/kyc"
+    and "https://fake-bank.com/kyc." all become "https://fake-bank.com/kyc".
+    http and https collapse to https; the host is lower-cased and loses
+    "www." and its port; query, fragment and trailing punctuation are
+    dropped. Path case is kept (short-link codes are case-sensitive).
+    """
+    text = value.strip().rstrip(_URL_TRAILING)
+    if "://" not in text:
+        text = "https://" + text
+    parts = urlsplit(text)
+    host = (parts.hostname or "").rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip(_URL_TRAILING).rstrip("/")
+    return f"https://{host}{path}" if host else value.strip().lower()
+
+
+def normalize_chat_id(value: str) -> str:
+    return str(value).strip()
+
+
+# identifiers.type -> normalizer
+NORMALIZERS = {
+    "phone": normalize_phone,
+    "upi": normalize_upi,
+    "bank_account": normalize_bank_account,
+    "link": normalize_url,
+    "chat_id": normalize_chat_id,
+}
+
+# extract_all_intelligence() key -> identifiers.type
+INTEL_TYPES = {
+    "upiIds": "upi",
+    "phoneNumbers": "phone",
+    "bankAccounts": "bank_account",
+    "phishingLinks": "link",
+}
+
+
+def canonical(id_type: str, value: str) -> str:
+    """Canonical key of one identifier (unknown types are only trimmed)."""
+    normalize = NORMALIZERS.get(id_type)
+    return normalize(value) if normalize else value.strip()
+
+
+def candidate_keys(value: str) -> list:
+    """
+    Canonical keys a free-form lookup value could be stored under, for
+    callers that don't know its type (GET /fingerprint/lookup/{identifier}).
+    """
+    value = value.strip()
+    keys = {value, value.lower()}
+    if "@" in value:
+        keys.add(normalize_upi(value))
+    digits = _NON_DIGITS.sub("", value)
+    if digits and len(digits) >= 9 and not re.search(r"[A-Za-z@/]", value):
+        keys.add(normalize_phone(value))
+        keys.add(digits)
+    if "." in value and "@" not in value:
+        keys.add(normalize_url(value))
+    return sorted(keys)
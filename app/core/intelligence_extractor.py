@@ -4,6 +4,10 @@ Extract scammer intelligence using regex patterns
 """
 import re
 
+from app.core import metrics
+from app.core.identifier_normalizer import normalize_phone, normalize_url
+from app.core.metrics import EXTRACTOR_SECONDS
+
 # Known UPI handles for filtering
 KNOWN_UPI_HANDLES = [
     "okhdfc", "okhdfcbank", "okaxis", "oksbi", "paytm",
@@ -11,11 +15,22 @@ KNOWN_UPI_HANDLES = [
     "pingpay", "icici", "axl", "indianbank", "okicici"
 ]
 
+# Every quantifier is bounded (and the domain pattern only starts at a label
+# boundary) so a long run of letters or digits can't make a pattern backtrack
+# quadratically; see extract_stream() for documents of any size.
+UPI_PATTERN = re.compile(r'\b[a-zA-Z0-9._+-]{1,64}@[a-zA-Z0-9.-]{1,64}\b')
+ACCOUNT_CONTEXT_PATTERN = re.compile(r'(?:account|a/c|ac|acct|savings|current)[\s:.-]{0,10}(\d{9,18})')
+URL_PATTERN = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]{1,2048}')
+SHORT_URL_PATTERN = re.compile(r'\b(?:bit\.ly|tinyurl\.com|t\.co|goo\.gl|ow\.ly)/[^\s]{1,256}', re.IGNORECASE)
+# Any "label.tld"; the keyword is checked on the label afterwards, which is
+# linear, where a keyword inside the pattern backtracks on every word
+DOMAIN_PATTERN = re.compile(r'(?<![a-zA-Z0-9-])(?:www\.)?([a-zA-Z0-9-]{2,63})(?=(\.[a-zA-Z]{2,24})\b)')
+SUSPICIOUS_LABEL_PATTERN = re.compile(r'bank|sbi|hdfc|icici|verify|kyc|update', re.IGNORECASE)
+
 def extract_upi_ids(text: str) -> list:
     """Extract UPI IDs from text"""
     # Pattern for email-like UPI format
-    pattern = r'\b[a-zA-Z0-9._+-]+@[a-zA-Z0-9.-]+\b'
-    matches = re.findall(pattern, text.lower())
+    matches = UPI_PATTERN.findall(text.lower())
     
     # Filter to keep only UPI-like IDs
     upi_ids = []
@@ -46,12 +61,10 @@ def extract_phone_numbers(text: str) -> list:
     pattern3 = r'\b[6-9]\d{9}\b'
     matches3 = re.findall(pattern3, text)
     
-    # Combine and clean
+    # Combine and canonicalize: every spelling of a number becomes one E.164 value
     all_matches = matches1 + matches2 + matches3
     for match in all_matches:
-        # Remove dashes and spaces
-        cleaned = match.replace('-', '').replace(' ', '')
-        phone_numbers.append(cleaned)
+        phone_numbers.append(normalize_phone(match))
     
     return list(set(phone_numbers))  # Remove duplicates
 
@@ -60,8 +73,7 @@ def extract_bank_accounts(text: str) -> list:
     accounts = []
     
     # Pattern 1: Contextual (with keywords)
-    pattern1 = r'(?:account|a/c|ac|acct|savings|current)[\s:.-]*(\d{9,18})'
-    matches1 = re.findall(pattern1, text.lower())
+    matches1 = ACCOUNT_CONTEXT_PATTERN.findall(text.lower())
     
     # Pattern 2: Standalone long numbers
     pattern2 = r'\b(\d{11,18})\b'
@@ -77,21 +89,23 @@ def extract_phishing_links(text: str) -> list:
     links = []
     
     # Pattern 1: Standard URLs
-    pattern1 = r'https?://[^\s<>"{}|\\^`\[\]]+'
-    matches1 = re.findall(pattern1, text)
+    matches1 = URL_PATTERN.findall(text)
     
-    # Pattern 2: Short URLs
-    pattern2 = r'\b(?:bit\.ly|tinyurl\.com|t\.co|goo\.gl|ow\.ly)/[^\s]+'
-    matches2 = re.findall(pattern2, text.lower())
+    # Pattern 2: Short URLs (matched on the original text: their codes are case-sensitive)
+    matches2 = SHORT_URL_PATTERN.findall(text)
     
     # Pattern 3: Suspicious domains
-    pattern3 = r'\b(?:www\.)?[a-zA-Z0-9-]+(?:bank|sbi|hdfc|icici|verify|kyc|update)[a-zA-Z0-9-]*\.[a-zA-Z]{2,}\b'
-    matches3 = re.findall(pattern3, text.lower())
+    matches3 = [match.group(0) + match.group(2) for match in DOMAIN_PATTERN.finditer(text)
+                if SUSPICIOUS_LABEL_PATTERN.search(match.group(1), 1)]
     
-    # Combine all
-    links = list(set(matches1 + matches2 + matches3))
-    
-    return links
+    # Canonicalize (scheme + host + path) so http/www/trailing-dot variants collapse
+    links = {normalize_url(match) for match in matches1 + matches2 + matches3}
+    return drop_bare_domains(links)
+
+def drop_bare_domains(links) -> list:
+    """A bare domain adds nothing when a full link on the same host was found"""
+    with_path = {link.split("/", 3)[2] for link in links if link.count("/") > 2}
+    return [link for link in links if link.count("/") > 2 or link.split("/", 3)[2] not in with_path]
 
 def extract_suspicious_keywords(text: str) -> list:
     """Extract suspicious keywords found in text"""
@@ -106,15 +120,24 @@ def extract_suspicious_keywords(text: str) -> list:
     
     return found
 
+# Result key -> extractor; extract_all_intelligence() times each one
+EXTRACTORS = {
+    "upiIds": extract_upi_ids,
+    "phoneNumbers": extract_phone_numbers,
+    "bankAccounts": extract_bank_accounts,
+    "phishingLinks": extract_phishing_links,
+    "suspiciousKeywords": extract_suspicious_keywords,
+}
+
 def extract_all_intelligence(text: str) -> dict:
     """Extract all intelligence from a message"""
-    return {
-        "upiIds": extract_upi_ids(text),
-        "phoneNumbers": extract_phone_numbers(text),
-        "bankAccounts": extract_bank_accounts(text),
-        "phishingLinks": extract_phishing_links(text),
-        "suspiciousKeywords": extract_suspicious_keywords(text)
-    }
+    if not metrics.enabled:
+        return {key: extract(text) for key, extract in EXTRACTORS.items()}
+    found = {}
+    for key, extract in EXTRACTORS.items():
+        with EXTRACTOR_SECONDS.time(key):
+            found[key] = extract(text)
+    return found
 
 def merge_intelligence(existing: dict, new: dict) -> dict:
     """Merge new intelligence with existing intelligence"""
@@ -126,3 +149,84 @@ def merge_intelligence(existing: dict, new: dict) -> dict:
         merged[key] = combined
     
     return merged
+
+# ───────────────────────────────────────────────
+# Streaming extraction (documents, attachments)
+# ───────────────────────────────────────────────
+
+# Text scanned per pass; memory stays about this size whatever the input
+WINDOW_CHARS = 256 * 1024
+# Re-read at the start of the next window: longer than any identifier that
+# can contain whitespace ("+91 98765...", "account: 1234..."), so one that
+# straddles a window edge is found whole in the next window
+OVERLAP_CHARS = 256
+# Distinct values kept per identifier type; past this the result is marked truncated
+MAX_VALUES_PER_TYPE = 10_000
+
+_WHITESPACE = re.compile(r"\s")
+
+
+class StreamExtractor:
+    """
+    Incremental extract_all_intelligence() for text that arrives in pieces
+    of any size: feed() pieces, then finish() for the merged result.
+
+    Windows are cut at whitespace, so no identifier is split, and the next
+    window starts at whitespace OVERLAP_CHARS before the cut. A run with no
+    whitespace for a whole window is cut mid-token (nothing real is that
+    long; the bounded patterns keep it cheap).
+    """
+
+    def __init__(self, window_chars: int = WINDOW_CHARS, overlap_chars: int = OVERLAP_CHARS):
+        self.window_chars = window_chars
+        self.overlap_chars = overlap_chars
+        self.chars = 0
+        self.windows = 0
+        self.truncated = False
+        self._pending = ""
+        self._found = {key: set() for key in EXTRACTORS}
+
+    def feed(self, text: str):
+        self.chars += len(text)
+        # Slice big inputs so `_pending` never grows past about two windows
+        for start in range(0, len(text), self.window_chars):
+            self._pending += text[start:start + self.window_chars]
+            while len(self._pending) >= self.window_chars:
+                self._scan_window()
+
+    def finish(self) -> dict:
+        if self._pending:
+            self._scan(self._pending)
+            self._pending = ""
+        found = {key: sorted(values) for key, values in self._found.items()}
+        found["phishingLinks"] = sorted(drop_bare_domains(found["phishingLinks"]))
+        return found
+
+    def _scan_window(self):
+        pending = self._pending
+        end = self.window_chars
+        # Cut in the second half so every window moves on by at least half a window
+        cut = max(pending.rfind(c, end // 2, end) for c in " \n\t\r")
+        if cut < 0:
+            cut = end
+        self._scan(pending[:cut])
+        space = _WHITESPACE.search(pending, cut - self.overlap_chars, cut)
+        self._pending = pending[space.start() if space else cut:]
+
+    def _scan(self, text: str):
+        self.windows += 1
+        for key, values in extract_all_intelligence(text).items():
+            found = self._found[key]
+            for value in values:
+                if len(found) >= MAX_VALUES_PER_TYPE:
+                    self.truncated = True
+                    break
+                found.add(value)
+
+
+def extract_stream(chunks) -> dict:
+    """Intelligence from an iterable of text pieces (file chunks, PDF pages) in bounded memory."""
+    extractor = StreamExtractor()
+    for chunk in chunks:
+        extractor.feed(chunk)
+    return extractor.finish()
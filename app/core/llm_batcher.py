@@ -0,0 +1,201 @@
+"""
+H.I.V.E. LLM Micro-Batcher
+Coalesces uncertain scam-classification calls into one batched LLM prompt
+"""
+import asyncio
+import os
+import time
+from typing import Callable, Optional
+
+from app.core.rate_limiter import RateLimitExceeded, model_limiter
+
+DEFAULT_MAX_ITEMS = int(os.getenv("LLM_BATCH_MAX_ITEMS", "16"))
+DEFAULT_MAX_WAIT_MS = float(os.getenv("LLM_BATCH_MAX_WAIT_MS", "25"))
+# A batch call that errors (quota, network) is retried as a whole, never split up
+DEFAULT_BATCH_RETRIES = int(os.getenv("LLM_BATCH_RETRIES", "2"))
+DEFAULT_RETRY_BACKOFF_MS = float(os.getenv("LLM_BATCH_RETRY_BACKOFF_MS", "500"))
+
+
+class LLMMicroBatcher:
+    """
+    Collects messages for up to `max_wait_ms` or `max_items` (whichever comes
+    first), classifies them with a single `batch_fn` call and fans the
+    verdicts back out to each waiting caller.
+
+    batch_fn:    list[str] -> list[Optional[dict]]   (None = unparseable item)
+    fallback_fn: str -> dict                         (per-item retry)
+
+    Only items the batch answer missed or garbled fall back to single
+    calls. If batch_fn itself raises, the whole batch is retried with
+    exponential backoff and, once retries run out, every waiting caller gets
+    the error: fanning a failed batch out into N single calls would hit the
+    quota N times harder exactly when it is already exhausted.
+
+    With a `rate_limiter`, every LLM call first awaits a slot for
+    `rate_limit_key` on the event loop; worker threads only run the calls.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list], list],
+        fallback_fn: Callable[[str], dict],
+        max_items: int = DEFAULT_MAX_ITEMS,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        retries: int = DEFAULT_BATCH_RETRIES,
+        retry_backoff_ms: float = DEFAULT_RETRY_BACKOFF_MS,
+        rate_limiter=None,
+        rate_limit_key: str = None,
+    ):
+        self.batch_fn = batch_fn
+        self.fallback_fn = fallback_fn
+        self.max_items = max(1, max_items)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.retries = max(0, retries)
+        self.retry_backoff_ms = max(0.0, retry_backoff_ms)
+        self.rate_limiter = rate_limiter
+        self.rate_limit_key = rate_limit_key
+
+        self._pending = []        # [(message, future, enqueued_at)]
+        self._timer = None
+        self._tasks = set()
+
+        self._batches = 0
+        self._items = 0
+        self._fallbacks = 0
+        self._batch_errors = 0
+        self._batch_retries = 0
+        self._max_batch_size = 0
+        self._wait_total = 0.0    # seconds callers spent queued before dispatch
+        self._wait_max = 0.0
+        self._llm_total = 0.0     # seconds spent inside batch_fn
+
+    async def submit(self, message: str) -> dict:
+        """Queue a message for the next batch and wait for its verdict."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((message, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000.0, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Dispatch everything currently pending as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _call(self, fn, arg):
+        """Run one LLM call in a worker thread once the rate limiter admits it."""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(self.rate_limit_key)
+        return await asyncio.to_thread(fn, arg)
+
+    async def _run_batch(self, batch: list):
+        dispatched_at = time.perf_counter()
+        messages = [message for message, _, _ in batch]
+
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._batch_retries += 1
+                await asyncio.sleep(self.retry_backoff_ms / 1000.0 * 2 ** (attempt - 1))
+            try:
+                verdicts = await self._call(self.batch_fn, messages)
+                error = None
+                break
+            except RateLimitExceeded as e:
+                # Retrying within the backoff would only be refused again
+                error = e
+                break
+            except Exception as e:
+                print(f"⚠️ LLM batch of {len(messages)} failed (attempt {attempt + 1}): {e}")
+                error = e
+        self._llm_total += time.perf_counter() - dispatched_at
+
+        self._batches += 1
+        self._items += len(batch)
+        self._max_batch_size = max(self._max_batch_size, len(batch))
+        for _, _, enqueued_at in batch:
+            waited = dispatched_at - enqueued_at
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        if error is not None:
+            self._batch_errors += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        # Pad / trim so every caller gets exactly one slot
+        verdicts = list(verdicts)[:len(batch)]
+        verdicts += [None] * (len(batch) - len(verdicts))
+
+        # Items the batch response didn't cover fall back to single calls
+        missing = [i for i, verdict in enumerate(verdicts) if verdict is None]
+        if missing:
+            self._fallbacks += len(missing)
+            retried = await asyncio.gather(
+                *(self._call(self.fallback_fn, messages[i]) for i in missing),
+                return_exceptions=True,
+            )
+            for i, result in zip(missing, retried):
+                verdicts[i] = result
+
+        for (_, future, _), verdict in zip(batch, verdicts):
+            if future.done():
+                continue
+            if isinstance(verdict, BaseException):
+                future.set_exception(verdict)
+            else:
+                future.set_result(verdict)
+
+    def stats(self) -> dict:
+        """Batch sizes, calls saved and latency added by queueing."""
+        llm_calls = self._batches + self._batch_retries + self._fallbacks
+        return {
+            "max_items": self.max_items,
+            "max_wait_ms": self.max_wait_ms,
+            "pending": len(self._pending),
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "max_batch_size": self._max_batch_size,
+            "fallback_calls": self._fallbacks,
+            "batch_errors": self._batch_errors,
+            "batch_retries": self._batch_retries,
+            "llm_calls": llm_calls,
+            "calls_saved": self._items - llm_calls,
+            "avg_added_latency_ms": round(self._wait_total / self._items * 1000, 2) if self._items else 0.0,
+            "max_added_latency_ms": round(self._wait_max * 1000, 2),
+            "avg_batch_llm_ms": round(self._llm_total / self._batches * 1000, 2) if self._batches else 0.0,
+        }
+
+
+_batcher: Optional[LLMMicroBatcher] = None
+
+
+def get_llm_batcher() -> LLMMicroBatcher:
+    """Process-wide batcher wired to the Gemini scam detector."""
+    global _batcher
+    if _batcher is None:
+        from app.core.scam_detector import LLM_MODEL, llm_detect, llm_detect_batch
+        # One token per batch: batching is what keeps detection inside the model quota
+        _batcher = LLMMicroBatcher(
+            batch_fn=llm_detect_batch,
+            fallback_fn=llm_detect,
+            rate_limiter=model_limiter,
+            rate_limit_key=LLM_MODEL,
+        )
+    return _batcher
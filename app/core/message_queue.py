@@ -0,0 +1,324 @@
+"""
+H.I.V.E. Inbound Message Queue
+SQLite-journaled queue with an async worker pool: per-chat FIFO, chats in parallel.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "hive_queue.db")
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "8"))
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "6"))
+INGEST_RETRY_BASE_SECONDS = float(os.getenv("INGEST_RETRY_BASE_SECONDS", "1"))
+INGEST_RETRY_MAX_SECONDS = float(os.getenv("INGEST_RETRY_MAX_SECONDS", "60"))
+# Finished rows are kept this long for inspection, then purged
+INGEST_DONE_RETENTION_SECONDS = float(os.getenv("INGEST_DONE_RETENTION_SECONDS", "3600"))
+
+
+def _get_conn(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class Job:
+    """One claimed message. `state` is persisted with save_state() and survives retries."""
+
+    def __init__(self, row: sqlite3.Row):
+        self.id = row["id"]
+        self.chat_id = row["chat_id"]
+        self.payload = json.loads(row["payload"])
+        self.state = json.loads(row["state"] or "{}")
+        self.attempts = row["attempts"]
+        self.enqueued_at = row["enqueued_at"]
+
+
+class MessageQueue:
+    """
+    Every message is journaled before enqueue() returns. Workers only ever
+    claim the oldest unfinished message of a chat, so a chat's messages are
+    handled strictly in order (a message waiting for a retry holds back the
+    rest of its chat) while different chats are processed in parallel.
+
+    handler(job) is awaited for each message; raising schedules a retry
+    with exponential backoff, up to `max_attempts`, after which the message
+    is parked as 'failed' and the chat moves on.
+
+    SQLite reads and commits run in worker threads (asyncio.to_thread), so
+    the event loop never waits on the journal; handlers checkpoint with
+    `await asyncio.to_thread(queue.save_state, job)`.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[["Job"], Awaitable[None]],
+        db_path: str = DB_PATH,
+        workers: int = INGEST_WORKERS,
+        max_attempts: int = INGEST_MAX_ATTEMPTS,
+        retry_base: float = INGEST_RETRY_BASE_SECONDS,
+        retry_max: float = INGEST_RETRY_MAX_SECONDS,
+        poll_interval: float = 0.5,
+        recover: bool = True,
+    ):
+        self.handler = handler
+        self.db_path = db_path
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.poll_interval = poll_interval
+
+        self._conn = _get_conn(db_path)
+        self._db_lock = threading.Lock()    # enqueue() may be called from request threads
+        self._init_db(recover)
+        self._tasks = []
+        self._workers = []
+        self._stopping = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._in_flight = 0
+        self._counters = {"processed": 0, "retries": 0, "failed": 0, "lag_seconds": 0.0, "max_lag_seconds": 0.0}
+
+    def _init_db(self, recover: bool):
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS inbound_messages (
+                id            INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id       TEXT NOT NULL,
+                payload       TEXT NOT NULL,             -- JSON
+                state         TEXT DEFAULT '{}',         -- JSON checkpoint kept across retries
+                status        TEXT NOT NULL DEFAULT 'pending',  -- pending | processing | done | failed
+                attempts      INTEGER DEFAULT 0,
+                enqueued_at   REAL NOT NULL,
+                available_at  REAL NOT NULL,
+                finished_at   REAL,
+                last_error    TEXT
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_inbound_open ON inbound_messages(status, chat_id, id);
+            CREATE INDEX IF NOT EXISTS idx_inbound_finished ON inbound_messages(finished_at);
+        """)
+        if recover:
+            # Anything left 'processing' belongs to a worker that died with the old process.
+            # Enqueue-only processes (recover=False) must not touch the consumer's rows.
+            self._conn.execute("UPDATE inbound_messages SET status = 'pending' WHERE status = 'processing'")
+        self._conn.commit()
+
+    # ───────────────────────────────────────────────
+    # Producer side
+    # ───────────────────────────────────────────────
+
+    def enqueue(self, chat_id: str, payload: dict) -> int:
+        """Durably append a message; returns its queue id."""
+        now = time.time()
+        with self._db_lock:
+            cur = self._conn.execute(
+                "INSERT INTO inbound_messages (chat_id, payload, enqueued_at, available_at) VALUES (?, ?, ?, ?)",
+                (chat_id, json.dumps(payload), now, now),
+            )
+            self._conn.commit()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return cur.lastrowid
+
+    # ───────────────────────────────────────────────
+    # Worker side
+    # ───────────────────────────────────────────────
+
+    def _claim(self) -> Optional[Job]:
+        now = time.time()
+        with self._db_lock:
+            return self._claim_locked(now)
+
+    def _claim_locked(self, now: float) -> Optional[Job]:
+        row = self._conn.execute(
+            """SELECT m.* FROM inbound_messages m
+               JOIN (SELECT chat_id, MIN(id) AS head FROM inbound_messages
+                     WHERE status IN ('pending', 'processing') GROUP BY chat_id) h
+                 ON m.id = h.head
+               WHERE m.status = 'pending' AND m.available_at <= ?
+               ORDER BY m.available_at, m.id
+               LIMIT 1""",
+            (now,),
+        ).fetchone()
+        if not row:
+            return None
+        self._conn.execute(
+            "UPDATE inbound_messages SET status = 'processing', attempts = attempts + 1 WHERE id = ?",
+            (row["id"],),
+        )
+        self._conn.commit()
+        job = Job(row)
+        job.attempts += 1
+        return job
+
+    def save_state(self, job: Job):
+        """Checkpoint job.state so a retry can skip work that already succeeded."""
+        with self._db_lock:
+            self._conn.execute(
+                "UPDATE inbound_messages SET state = ? WHERE id = ?", (json.dumps(job.state), job.id)
+            )
+            self._conn.commit()
+
+    def _complete(self, job: Job):
+        now = time.time()
+        with self._db_lock:
+            self._conn.execute(
+                "UPDATE inbound_messages SET status = 'done', finished_at = ?, last_error = NULL WHERE id = ?",
+                (now, job.id),
+            )
+            self._conn.commit()
+            lag = now - job.enqueued_at
+            self._counters["processed"] += 1
+            self._counters["lag_seconds"] += lag
+            self._counters["max_lag_seconds"] = max(self._counters["max_lag_seconds"], lag)
+
+    def _fail(self, job: Job, error: Exception):
+        with self._db_lock:
+            self._fail_locked(job, error)
+
+    def _fail_locked(self, job: Job, error: Exception):
+        now = time.time()
+        if job.attempts >= self.max_attempts:
+            self._conn.execute(
+                "UPDATE inbound_messages SET status = 'failed', finished_at = ?, last_error = ? WHERE id = ?",
+                (now, str(error), job.id),
+            )
+            self._counters["failed"] += 1
+            print(f"⚠️ Message {job.id} for {job.chat_id} failed after {job.attempts} attempts: {error}")
+        else:
+            delay = min(self.retry_base * 2 ** (job.attempts - 1), self.retry_max)
+            self._conn.execute(
+                "UPDATE inbound_messages SET status = 'pending', available_at = ?, last_error = ? WHERE id = ?",
+                (now + delay, str(error), job.id),
+            )
+            self._counters["retries"] += 1
+        self._conn.commit()
+
+    async def _idle(self):
+        """Sleep until woken or poll_interval passes, without leaving a waiter behind."""
+        waiter = self._loop.create_task(self._wakeup.wait())
+        try:
+            await asyncio.wait({waiter}, timeout=self.poll_interval)
+        finally:
+            waiter.cancel()
+
+    async def _worker(self):
+        while not self._stopping:
+            # Clear before claiming so an enqueue that races the claim is not missed
+            self._wakeup.clear()
+            job = await asyncio.to_thread(self._claim)
+            if job is None:
+                await self._idle()
+                continue
+
+            self._in_flight += 1
+            try:
+                await self.handler(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await asyncio.to_thread(self._fail, job, e)
+            else:
+                await asyncio.to_thread(self._complete, job)
+            finally:
+                self._in_flight -= 1
+            # Finishing a message may unblock the next one in the same chat
+            self._wakeup.set()
+
+    def start(self):
+        """Start the worker pool on the running event loop."""
+        if self._tasks:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._workers = [self._loop.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks = self._workers + [self._loop.create_task(self._housekeeping())]
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Let workers finish their current message and exit; anything still
+        running after `timeout` is cancelled and goes back to pending.
+        """
+        if not self._tasks:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        _, still_running = await asyncio.wait(self._workers, timeout=timeout)
+        for task in still_running | set(self._tasks) - set(self._workers):
+            task.cancel()
+        await asyncio.wait(self._tasks, timeout=1.0)
+        self._tasks = []
+        self._workers = []
+        self._loop = None
+        # Interrupted messages go back to pending and are picked up on restart
+        with self._db_lock:
+            self._conn.execute("UPDATE inbound_messages SET status = 'pending' WHERE status = 'processing'")
+            self._conn.commit()
+
+    async def _housekeeping(self):
+        while True:
+            await asyncio.sleep(60)
+            await asyncio.to_thread(self.purge_finished)
+
+    def purge_finished(self, older_than: float = INGEST_DONE_RETENTION_SECONDS) -> int:
+        with self._db_lock:
+            cur = self._conn.execute(
+                "DELETE FROM inbound_messages WHERE status = 'done' AND finished_at < ?",
+                (time.time() - older_than,),
+            )
+            self._conn.commit()
+        return cur.rowcount
+
+    async def drain(self, timeout: float = 30.0):
+        """Wait until nothing is pending or processing (tests / graceful shutdown)."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._db_lock:
+                open_count = self._conn.execute(
+                    "SELECT COUNT(*) AS c FROM inbound_messages WHERE status IN ('pending', 'processing')"
+                ).fetchone()["c"]
+            if not open_count:
+                return True
+            await asyncio.sleep(0.02)
+        return False
+
+    # ───────────────────────────────────────────────
+    # Metrics
+    # ───────────────────────────────────────────────
+
+    def metrics(self) -> dict:
+        """Queue depth, in-flight work, lag and retry/failure counters."""
+        now = time.time()
+        with self._db_lock:
+            row = self._conn.execute(
+                """SELECT
+                     SUM(status = 'pending')  AS pending,
+                     SUM(status = 'failed')   AS failed,
+                     COUNT(DISTINCT CASE WHEN status IN ('pending', 'processing') THEN chat_id END) AS busy_chats,
+                     MIN(CASE WHEN status = 'pending' THEN enqueued_at END) AS oldest_pending
+                   FROM inbound_messages"""
+            ).fetchone()
+        c = self._counters
+        processed = c["processed"] or 1
+        return {
+            "workers": self.workers,
+            "depth": row["pending"] or 0,
+            "in_flight": self._in_flight,
+            "chats_waiting": row["busy_chats"] or 0,
+            "failed_total": row["failed"] or 0,
+            "oldest_pending_lag_seconds": round(now - row["oldest_pending"], 3) if row["oldest_pending"] else 0.0,
+            "processed": c["processed"],
+            "retries": c["retries"],
+            "failed": c["failed"],
+            "avg_lag_ms": round(c["lag_seconds"] / processed * 1000, 1),
+            "max_lag_ms": round(c["max_lag_seconds"] * 1000, 1),
+        }
@@ -0,0 +1,312 @@
+"""
+H.I.V.E. Metrics
+In-process counters and latency histograms, exported in Prometheus text format
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# METRICS_ENABLED=0 turns every timer into a shared no-op object
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+
+# Seconds; spans regex extraction (~50us) up to slow Gemini replies
+DEFAULT_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+enabled = METRICS_ENABLED
+
+
+def set_enabled(value: bool):
+    """Switch collection on or off at runtime (existing values are kept)."""
+    global enabled
+    enabled = bool(value)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class _OutcomeTimer(_Timer):
+    __slots__ = ()
+
+    def __exit__(self, exc_type, *exc):
+        outcome = "ok" if exc_type is None else "error"
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels, outcome)
+        return False
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        if not enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def collect(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}" for labels, v in items]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label set (values in seconds)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}    # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        if not enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, *labels):
+        """Context manager timing a block into this histogram."""
+        if not enabled:
+            return NULL_TIMER
+        return _Timer(self, labels)
+
+    def time_outcome(self, *labels):
+        """Like time(), with a final "ok"/"error" label set by whether the block raised."""
+        if not enabled:
+            return NULL_TIMER
+        return _OutcomeTimer(self, labels)
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def collect(self) -> list:
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        lines = []
+        for labels, series in items:
+            cumulative = 0
+            for bound, hits in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += hits
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Point-in-time value read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, read, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.read = read    # () -> number, or {label tuple: number}
+
+    def collect(self) -> list:
+        try:
+            values = self.read()
+        except Exception as e:
+            print(f"⚠️ Metrics gauge {self.name} failed: {e}")
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}"
+                for labels, v in sorted(values.items())]
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _register(metric):
+    with _registry_lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name: str, help: str, labelnames: tuple = ()) -> Counter:
+    return _register(Counter(name, help, labelnames))
+
+
+def histogram(name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help, labelnames, buckets))
+
+
+def gauge(name: str, help: str, read, labelnames: tuple = ()) -> Gauge:
+    """Register (or replace) a callback gauge."""
+    with _registry_lock:
+        _registry[name] = Gauge(name, help, read, labelnames)
+        return _registry[name]
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text exposition format (0.0.4)."""
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+# ───────────────────────────────────────────────
+# Hot-path metrics shared across modules
+# ───────────────────────────────────────────────
+
+HTTP_REQUEST_SECONDS = histogram(
+    "hive_http_request_seconds", "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_FLIGHT = 0
+
+MODEL_SECONDS = histogram(
+    "hive_model_seconds", "Scam classifier stages (vectorize, predict, predict_proba)", ("stage",),
+)
+EXTRACTOR_SECONDS = histogram(
+    "hive_extractor_seconds", "Intelligence extractor time per extractor", ("extractor",),
+)
+SQLITE_SECONDS = histogram(
+    "hive_sqlite_seconds", "Fingerprint DB time per operation", ("operation",),
+)
+GEMINI_FALLBACKS = counter(
+    "hive_gemini_fallbacks_total", "Reply attempts that failed over to the next model", ("model",),
+)
+GEMINI_SECONDS = histogram(
+    "hive_gemini_seconds", "Gemini round trip per model (streams: until the last chunk)",
+    ("model", "call", "outcome"),
+)
+
+
+def timed(metric: Histogram, *labels):
+    """Decorator: time every call of the function into `metric`."""
+    def decorate(fn):
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metric.observe(time.perf_counter() - started, *labels)
+        wrapper.__name__ = fn.__name__
+        wrapper.__qualname__ = fn.__qualname__
+        wrapper.__doc__ = fn.__doc__
+        wrapper.__wrapped__ = fn
+        return wrapper
+    return decorate
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing each HTTP request into hive_http_request_seconds.
+    The route label is the path template (/fingerprint/{fingerprint_id}), so
+    identifiers never become label values. Streaming responses are timed
+    until their last body chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        global HTTP_REQUESTS_IN_FLIGHT
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT -= 1
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, scope["method"], path, str(status["code"]),
+            )
+
+
+gauge("hive_http_requests_in_flight", "HTTP requests currently being served", lambda: HTTP_REQUESTS_IN_FLIGHT)
@@ -167,3 +167,15 @@ You are talking to a SCAMMER. Your job is to waste their time and subtly extract
 """
     
     return prompt
+
+
+# Five personas, five prompts — build them once at import instead of per reply
+SYSTEM_PROMPTS = {key: get_persona_system_prompt(persona) for key, persona in PERSONAS.items()}
+_PROMPTS_BY_NAME = {PERSONAS[key]["name"]: prompt for key, prompt in SYSTEM_PROMPTS.items()}
+
+def get_cached_system_prompt(persona: dict) -> str:
+    """Precomputed system prompt for a known persona; builds one for custom personas"""
+    prompt = _PROMPTS_BY_NAME.get(persona.get("name"))
+    if prompt is None:
+        prompt = get_persona_system_prompt(persona)
+    return prompt
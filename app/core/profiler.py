@@ -0,0 +1,184 @@
+"""
+H.I.V.E. Profiler
+On-demand stack sampling of a live worker, plus opt-in cProfile of single requests
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+# Hard caps so a profile request can never turn into a load problem itself
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+PROFILE_MIN_INTERVAL_MS = 1.0
+PROFILE_MAX_DEPTH = 128
+# cProfile reports kept for GET /debug/profile/requests/{id}
+REQUEST_PROFILES_KEPT = 20
+
+
+class ProfilerBusy(Exception):
+    """Only one sampling profile runs per process at a time."""
+
+
+class SamplingProfiler:
+    """
+    Samples every thread's stack with sys._current_frames() every
+    `interval_ms` from a background thread and counts identical stacks.
+    The sampled code is never instrumented; the cost is one stack walk per
+    thread per sample, paid by the sampler thread (holding the GIL).
+    """
+
+    def __init__(self, interval_ms: float = 5.0, include_idle: bool = False):
+        self.interval = max(PROFILE_MIN_INTERVAL_MS, interval_ms) / 1000.0
+        self.include_idle = include_idle
+        self.stacks = Counter()
+        self.samples = 0
+        self.sampling_seconds = 0.0    # time spent walking stacks (the overhead)
+
+    def _sample(self, own_ident: int, names: dict):
+        started = time.perf_counter()
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            frames = []
+            while frame is not None and len(frames) < PROFILE_MAX_DEPTH:
+                code = frame.f_code
+                frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if not self.include_idle and frames and _is_idle(frames[0]):
+                continue
+            frames.append(names.get(ident, f"thread-{ident}"))
+            self.stacks[";".join(reversed(frames))] += 1
+        self.samples += 1
+        self.sampling_seconds += time.perf_counter() - started
+
+    def run(self, seconds: float) -> dict:
+        """Sample for `seconds` (capped at PROFILE_MAX_SECONDS) in the calling thread."""
+        seconds = max(0.0, min(seconds, PROFILE_MAX_SECONDS))
+        own_ident = threading.get_ident()
+        started = time.perf_counter()
+        deadline = started + seconds
+        next_names = 0.0
+        names = {}
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now >= next_names:    # thread names rarely change; refresh once a second
+                names = {t.ident: t.name for t in threading.enumerate()}
+                next_names = now + 1.0
+            self._sample(own_ident, names)
+            time.sleep(self.interval)
+        wall = time.perf_counter() - started
+        return {
+            "seconds": round(wall, 3),
+            "interval_ms": round(self.interval * 1000, 2),
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "overhead_pct": round(self.sampling_seconds / wall * 100, 2) if wall else 0.0,
+        }
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack format, ready for flamegraph.pl / speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# Innermost frames of threads that are just waiting for work
+_IDLE_FRAMES = {
+    "threading.py:wait", "queue.py:get", "selectors.py:select", "thread.py:_worker",
+    "threading.py:_wait_for_tstate_lock", "base_events.py:_run_once",
+}
+
+
+def _is_idle(innermost: str) -> bool:
+    return innermost in _IDLE_FRAMES
+
+
+_profile_lock = threading.Lock()
+
+
+def sample_process(seconds: float, interval_ms: float = 5.0, include_idle: bool = False) -> tuple:
+    """Run one sampling profile of this process; returns (summary, collapsed stacks)."""
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this worker")
+    try:
+        profiler = SamplingProfiler(interval_ms, include_idle)
+        summary = profiler.run(seconds)
+        summary["pid"] = os.getpid()
+        return summary, profiler.collapsed()
+    finally:
+        _profile_lock.release()
+
+
+# ───────────────────────────────────────────────
+# Per-request cProfile
+# ───────────────────────────────────────────────
+
+_request_profiles = OrderedDict()    # id -> pstats report text
+_request_profiles_lock = threading.Lock()
+
+
+def get_request_profile(profile_id: str):
+    with _request_profiles_lock:
+        return _request_profiles.get(profile_id)
+
+
+def _store_request_profile(profile_id: str, profile: cProfile.Profile, label: str, limit: int = 40):
+    out = io.StringIO()
+    out.write(f"{label}\n\n")
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(limit)
+    with _request_profiles_lock:
+        _request_profiles[profile_id] = out.getvalue()
+        while len(_request_profiles) > REQUEST_PROFILES_KEPT:
+            _request_profiles.popitem(last=False)
+
+
+class RequestProfileMiddleware:
+    """
+    ASGI middleware: a request carrying `X-Profile: 1` that passes
+    `authorize(scope)` is run under cProfile. The response gets an
+    X-Profile-Id header; the report is at /debug/profile/requests/{id}.
+
+    cProfile only sees the event-loop thread: it covers async endpoints and
+    what they await, plus any other coroutine that ran on the loop meanwhile.
+    For threadpool endpoints use the sampling profiler. A profiled request
+    typically runs 1.5-3x slower; unflagged requests pay one header lookup.
+    """
+
+    def __init__(self, app, authorize):
+        self.app = app
+        self.authorize = authorize
+        self._active = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (b"x-profile", b"1") not in scope["headers"]:
+            return await self.app(scope, receive, send)
+        # One cProfile per thread at a time; overlapping flagged requests run unprofiled
+        if self._active or not self.authorize(scope):
+            return await self.app(scope, receive, send)
+
+        profile_id = uuid.uuid4().hex[:12]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode()),
+                ]
+            await send(message)
+
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        self._active = True
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.disable()
+            self._active = False
+            label = f"{scope['method']} {scope['path']} in {(time.perf_counter() - started) * 1000:.1f} ms"
+            _store_request_profile(profile_id, profile, label)
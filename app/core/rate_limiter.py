@@ -0,0 +1,196 @@
+"""
+H.I.V.E. Rate Limiter
+Token buckets per chat and per Gemini model: over-budget calls wait their turn
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CHAT_RATE_PER_MINUTE = float(os.getenv("CHAT_RATE_PER_MINUTE", "6"))
+CHAT_BURST = float(os.getenv("CHAT_BURST", "3"))
+# Free-tier Gemini quota is 15 requests/minute per model
+MODEL_RATE_PER_MINUTE = float(os.getenv("MODEL_RATE_PER_MINUTE", "15"))
+MODEL_BURST = float(os.getenv("MODEL_BURST", "5"))
+# A call that would have to wait longer than this is refused instead
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "60"))
+MAX_TRACKED_KEYS = 5000
+
+
+class RateLimitExceeded(Exception):
+    """The deferral needed for this call is longer than the limiter's max_wait."""
+
+    def __init__(self, limiter: str, key: str, retry_after: float):
+        super().__init__(f"{limiter} rate limit for {key!r}: retry in {retry_after:.1f}s")
+        self.limiter = limiter
+        self.key = key
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Reservation-style bucket. Each call takes a token even when none are
+    left: the balance goes negative and the caller is told how long to wait,
+    so deferred calls are served in arrival order instead of being dropped.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float, max_wait: float) -> float:
+        """Take one token; returns the seconds to wait before using it."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        wait = (1 - self.tokens) / self.rate
+        if wait <= max_wait:
+            self.tokens -= 1
+        return wait
+
+
+class RateLimiter:
+    """Token bucket per key (chat id or model name), tunable at runtime."""
+
+    def __init__(self, name: str, rate_per_minute: float, burst: float, max_wait: float = RATE_LIMIT_MAX_WAIT_SECONDS):
+        self.name = name
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.max_wait = max_wait
+        self.enabled = True
+        self.overrides = {}    # key -> (rate_per_minute, burst)
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "deferred": 0, "rejected": 0, "waiting": 0,
+                       "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+
+    def _limits_for(self, key: str):
+        return self.overrides.get(key, (self.rate_per_minute, self.burst))
+
+    def reserve(self, key: str) -> float:
+        """Reserve a slot for `key`; returns the delay, raises RateLimitExceeded past max_wait."""
+        with self._lock:
+            self._stats["calls"] += 1
+            if not self.enabled:
+                return 0.0
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(*self._limits_for(key))
+                if len(self._buckets) > MAX_TRACKED_KEYS:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+
+            wait = bucket.reserve(time.monotonic(), self.max_wait)
+            if wait > self.max_wait:
+                self._stats["rejected"] += 1
+                raise RateLimitExceeded(self.name, key, wait)
+            if wait > 0:
+                self._stats["deferred"] += 1
+                self._stats["wait_seconds"] += wait
+                self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], wait)
+            return wait
+
+    def _track_waiting(self, delta: int):
+        with self._lock:
+            self._stats["waiting"] += delta
+
+    def acquire(self, key: str) -> float:
+        """
+        Blocking acquire; returns seconds waited. The deferral sleeps in the
+        calling thread, so it is for scripts and CLI tools only; request
+        paths await acquire_async() and keep threads free.
+        """
+        wait = self.reserve(key)
+        if wait > 0:
+            self._track_waiting(1)
+            try:
+                time.sleep(wait)
+            finally:
+                self._track_waiting(-1)
+        return wait
+
+    async def acquire_async(self, key: str) -> float:
+        wait = self.reserve(key)
+        if wait > 0:
+            self._track_waiting(1)
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._track_waiting(-1)
+        return wait
+
+    def configure(self, rate_per_minute: float = None, burst: float = None, max_wait: float = None,
+                  enabled: bool = None, key: str = None):
+        """Change limits live. With `key`, only that chat/model gets the override."""
+        with self._lock:
+            if max_wait is not None:
+                self.max_wait = max_wait
+            if enabled is not None:
+                self.enabled = enabled
+            if key is not None:
+                rate, cap = self._limits_for(key)
+                self.overrides[key] = (
+                    rate if rate_per_minute is None else rate_per_minute,
+                    cap if burst is None else burst,
+                )
+            else:
+                if rate_per_minute is not None:
+                    self.rate_per_minute = rate_per_minute
+                if burst is not None:
+                    self.burst = burst
+            # Existing buckets pick up the new limits but keep their balance
+            for bucket_key, bucket in self._buckets.items():
+                if key is not None and bucket_key != key:
+                    continue
+                rate, cap = self._limits_for(bucket_key)
+                bucket.rate = rate / 60.0
+                bucket.capacity = max(1.0, cap)
+                bucket.tokens = min(bucket.tokens, bucket.capacity)
+
+    def limits(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "rate_per_minute": self.rate_per_minute,
+                "burst": self.burst,
+                "max_wait_seconds": self.max_wait,
+                "overrides": {k: {"rate_per_minute": r, "burst": b} for k, (r, b) in self.overrides.items()},
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            tracked = len(self._buckets)
+        deferred = s["deferred"] or 1
+        return {
+            "calls": s["calls"],
+            "deferred": s["deferred"],
+            "rejected": s["rejected"],
+            "waiting_now": s["waiting"],
+            "avg_deferral_ms": round(s["wait_seconds"] / deferred * 1000, 1),
+            "max_deferral_ms": round(s["max_wait_seconds"] * 1000, 1),
+            "tracked_keys": tracked,
+        }
+
+
+# Process-wide limiters used around every Gemini call
+chat_limiter = RateLimiter("chat", CHAT_RATE_PER_MINUTE, CHAT_BURST)
+model_limiter = RateLimiter("model", MODEL_RATE_PER_MINUTE, MODEL_BURST)
+
+LIMITERS = {"chat": chat_limiter, "model": model_limiter}
+
+
+def get_rate_limits() -> dict:
+    return {name: limiter.limits() for name, limiter in LIMITERS.items()}
+
+
+def get_rate_limit_stats() -> dict:
+    return {name: limiter.stats() for name, limiter in LIMITERS.items()}
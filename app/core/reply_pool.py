@@ -0,0 +1,317 @@
+"""
+H.I.V.E. Reply Pool
+Pre-generated opening replies per (persona, opening template) so a new engagement's first turn needs no Gemini call
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+from app.core.persona_manager import PERSONAS
+
+REPLY_POOL = os.getenv("REPLY_POOL", "1").lower() in ("1", "true", "yes")
+# Replies kept ready per (persona, template); a refill starts below half of this
+REPLY_POOL_SIZE = int(os.getenv("REPLY_POOL_SIZE", "4"))
+# New chats one pooled reply may open before it is retired
+REPLY_POOL_MAX_USES = int(os.getenv("REPLY_POOL_MAX_USES", "3"))
+# Seconds between top-ups when no take() has asked for one (and the back-off after a failed refill)
+REPLY_POOL_INTERVAL = float(os.getenv("REPLY_POOL_INTERVAL", "30"))
+# Chats whose served openings are remembered, so a re-engaged chat never gets the same one twice
+REMEMBERED_CHATS = 10_000
+
+# Opening scam messages fall into a few recognisable templates:
+# template -> (keywords that identify it, sample openings the pooled replies answer).
+# A pooled reply opens chats whose real first message differs in every detail,
+# so the samples stay generic: no amounts, bank or brand names, times or numbers
+OPENING_TEMPLATES = {
+    "account_blocked": (
+        ("blocked", "block", "suspend", "freeze", "frozen", "deactivat", "closed"),
+        ["Dear customer, your bank account will be blocked today. Call us immediately to avoid suspension.",
+         "Your account has been temporarily frozen due to suspicious activity. Verify now to restore access.",
+         "Alert: your account is suspended. Contact the bank officer right now."],
+    ),
+    "kyc_update": (
+        ("kyc", "pan card", "aadhaar", "update your", "re-verify"),
+        ["Your KYC has expired. Update your KYC today or your account will be closed.",
+         "Dear customer, complete your KYC immediately to continue banking services.",
+         "KYC verification pending for your account. Please update your details soon."],
+    ),
+    "otp_request": (
+        ("otp", "one time password", "pin", "code"),
+        ["Sir, I am calling from your bank. Please share the OTP you just received to stop the fraud transaction.",
+         "To reverse the unauthorised debit, tell me the code sent to your phone.",
+         "Your details need to be re-verified. Share the OTP to complete the process."],
+    ),
+    "refund": (
+        ("refund", "cashback", "credited", "reversal", "pending"),
+        ["Madam, a refund is pending for you. Approve the request on your UPI app to receive it.",
+         "You have received cashback. Accept the request to get it credited.",
+         "You were charged twice. We will return the amount, please share your UPI ID."],
+    ),
+    "payment_request": (
+        ("collect request", "approve", "upi pin", "scan", "qr", "transfer rs"),
+        ["I have sent a request on your UPI, just enter your PIN to verify your account.",
+         "Scan this QR code to receive the payment.",
+         "Please approve the small verification request so we can send your money."],
+    ),
+    "verify_link": (
+        ("link", "click", "login", "download", "website", "app"),
+        ["Your account needs verification. Click the link below and log in to avoid restrictions.",
+         "Congratulations! Verify your details at the link to claim your reward.",
+         "Your request is on hold. Update your details using this link to continue."],
+    ),
+    "job_offer": (
+        ("job", "hiring", "salary", "work from home", "part time", "interview"),
+        ["Hello, we are hiring for a part time work from home job with good daily earnings. Interested?",
+         "Your profile is shortlisted for a remote role. Complete the registration to book your interview.",
+         "Earn money online from home. Daily salary guaranteed, reply YES to start."],
+    ),
+    "prize_won": (
+        ("won", "winner", "prize", "lottery", "lucky draw", "congratulations", "subsidy", "approved"),
+        ["Congratulations! Your number has won a big prize in our lucky draw.",
+         "You are the lucky winner of our lottery. Reply to claim your prize.",
+         "A reward has been approved in your name. Reply to receive it."],
+    ),
+    "processing_fee": (
+        ("fee", "tax", "charges", "claim", "processing"),
+        ["To release your prize money you must first pay a small processing fee.",
+         "Pay the tax on your winning amount today and the money will be transferred.",
+         "Your claim is approved. Only the registration fee is pending before we send it."],
+    ),
+    "legal_threat": (
+        ("police", "legal action", "arrest", "case", "court", "fine", "rbi", "cyber cell"),
+        ["This is the cyber crime cell. A case is filed against your number, pay the fine or face arrest.",
+         "Your account has been flagged. Call back now or face legal action.",
+         "A police complaint is registered against you. Settle it today to avoid court proceedings."],
+    ),
+    "bill_disconnection": (
+        ("disconnect", "electricity", "bill", "connection", "gas"),
+        ["Your connection will be disconnected tonight. Pay the pending bill now.",
+         "Dear consumer, your connection will be cut today due to an unpaid bill.",
+         "Your service is on hold. Clear the dues immediately to continue supply."],
+    ),
+    "urgent_request": (
+        ("urgent", "immediately", "help", "sir", "madam", "hello", "important"),
+        ["Hello sir, this is very urgent. Please call me back immediately.",
+         "Madam, I need your help with an important matter regarding your account.",
+         "Hi, are you available? I have something urgent to discuss with you."],
+    ),
+}
+
+# A generated reply that names any of these (amounts, numbers, times, banks,
+# brands, agencies) is not pooled: the real scammer may never have said it
+SPECIFIC_DETAIL = re.compile(
+    r"\d|₹|\b(rs|inr|rupees?|lakhs?|crores?|sbi|hdfc|icici|axis|kotak|pnb|rbi|kbc|gst|paytm|phonepe"
+    r"|gpay|google pay|bhim|amazon|flipkart|aadhaar|pan|electricity|gas|parcel|courier|car)\b",
+    re.IGNORECASE,
+)
+
+# Templates each persona's pools are filled for at startup; other
+# (persona, template) pairs start filling the first time a chat needs one
+HOME_TEMPLATES = {
+    "bank_fraud": ("account_blocked", "kyc_update", "otp_request", "legal_threat"),
+    "upi_fraud": ("refund", "payment_request", "bill_disconnection", "account_blocked"),
+    "phishing": ("verify_link", "job_offer", "kyc_update", "otp_request"),
+    "lottery": ("prize_won", "processing_fee"),
+    "default": ("urgent_request", "legal_threat"),
+}
+
+
+def persona_key(scam_type: str) -> str:
+    """The PERSONAS key select_persona() uses for this scam type."""
+    return scam_type if scam_type in PERSONAS else "default"
+
+
+def classify_opening(message: str):
+    """The opening template a first message matches best, or None if no keyword matches."""
+    text = message.lower()
+    best, best_score = None, 0
+    for template, (keywords, _) in OPENING_TEMPLATES.items():
+        score = sum(1 for keyword in keywords if keyword in text)
+        if score > best_score:
+            best, best_score = template, score
+    return best
+
+
+class _Entry:
+    __slots__ = ("reply", "uses")
+
+    def __init__(self, reply: str):
+        self.reply = reply
+        self.uses = 0
+
+
+class ReplyPool:
+    """
+    Rotating pools of ready opening replies. take() serves the first reply
+    the chat hasn't been sent before and moves it to the back; after
+    REPLY_POOL_MAX_USES chats it is retired. A refill thread (start())
+    generates replacements with generate_reply(), off the request path.
+    """
+
+    def __init__(self, size: int = REPLY_POOL_SIZE, max_uses: int = REPLY_POOL_MAX_USES, generate=None):
+        self.size = size
+        self.max_uses = max_uses
+        self._generate = generate
+        self._pools = {
+            (persona, template): deque()
+            for persona, templates in HOME_TEMPLATES.items() for template in templates
+        }
+        self._samples_used = {}
+        self._served = OrderedDict()    # chat_id -> replies already sent to it
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {
+            "hits": 0, "misses_no_template": 0, "misses_empty": 0, "take_seconds": 0.0,
+            "generated": 0, "duplicates": 0, "too_specific": 0, "retired": 0, "refill_errors": 0,
+            "last_refill_seconds": None,
+        }
+
+    # ── Serving ──
+
+    def take(self, scam_type: str, message: str, chat_id: str = None):
+        """A pooled opening reply for this first message, or None (the caller generates one)."""
+        started = time.perf_counter()
+        template = classify_opening(message)
+        with self._lock:
+            reply = None
+            if template is None:
+                self._stats["misses_no_template"] += 1
+            else:
+                reply = self._take_locked((persona_key(scam_type), template), chat_id)
+                self._stats["hits" if reply else "misses_empty"] += 1
+            self._stats["take_seconds"] += time.perf_counter() - started
+        return reply
+
+    def _take_locked(self, key: tuple, chat_id):
+        pool = self._pools.get(key)
+        if pool is None:    # first chat needing this pair: start keeping a pool for it
+            pool = self._pools[key] = deque()
+            self._wake.set()
+            return None
+        served = self._served.get(chat_id, ()) if chat_id is not None else ()
+        reply = None
+        for _ in range(len(pool)):
+            entry = pool.popleft()
+            if entry.reply in served:
+                pool.append(entry)
+                continue
+            entry.uses += 1
+            if entry.uses < self.max_uses:
+                pool.append(entry)    # rotate: the next chat gets a different reply first
+            else:
+                self._stats["retired"] += 1
+            reply = entry.reply
+            break
+        if reply and chat_id is not None:
+            self._served.setdefault(chat_id, set()).add(reply)
+            self._served.move_to_end(chat_id)
+            while len(self._served) > REMEMBERED_CHATS:
+                self._served.popitem(last=False)
+        if len(pool) * 2 < self.size:
+            self._wake.set()
+        return reply
+
+    # ── Refilling ──
+
+    def _generate_reply(self, persona: str, sample: str) -> str:
+        if self._generate is not None:
+            return self._generate(PERSONAS[persona], sample)
+        from app.core.conversation_agent import generate_reply
+        return generate_reply(persona=PERSONAS[persona], scammer_message=sample)
+
+    def refill(self) -> int:
+        """Top every pool up to `size`, one reply per pool per pass; returns replies added."""
+        started = time.perf_counter()
+        added = 0
+        attempts = {}
+        while not self._stop.is_set():
+            with self._lock:
+                wanted = [key for key, pool in self._pools.items()
+                          if len(pool) < self.size and attempts.get(key, 0) < self.size * 2]
+            if not wanted:
+                break
+            for key in wanted:
+                persona, template = key
+                samples = OPENING_TEMPLATES[template][1]
+                used = self._samples_used.get(key, 0)
+                sample = samples[used % len(samples)]
+                self._samples_used[key] = used + 1
+                attempts[key] = attempts.get(key, 0) + 1
+                reply = self._generate_reply(persona, sample)    # outside the lock: takes carry on
+                with self._lock:
+                    pool = self._pools[key]
+                    if reply and SPECIFIC_DETAIL.search(reply):
+                        self._stats["too_specific"] += 1
+                        continue
+                    if not reply or any(entry.reply == reply for entry in pool):
+                        self._stats["duplicates"] += 1
+                        continue
+                    pool.append(_Entry(reply))
+                    self._stats["generated"] += 1
+                    added += 1
+        self._stats["last_refill_seconds"] = round(time.perf_counter() - started, 3)
+        return added
+
+    def run(self, interval: float = REPLY_POOL_INTERVAL):
+        """Background loop: refill, then wait until a take() runs a pool low or `interval` passes."""
+        while not self._stop.is_set():
+            try:
+                self.refill()
+            except Exception as e:
+                self._stats["refill_errors"] += 1
+                print(f"⚠️ Reply pool refill failed: {e}")
+            self._wake.wait(interval)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="reply-pool", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    # ── Reporting ──
+
+    def sizes(self) -> dict:
+        with self._lock:
+            return {f"{persona}/{template}": len(pool) for (persona, template), pool in self._pools.items()}
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        take_seconds = stats.pop("take_seconds")
+        takes = stats["hits"] + stats["misses_no_template"] + stats["misses_empty"]
+        return {
+            "enabled": REPLY_POOL,
+            "first_turns": takes,
+            "hit_rate": round(stats["hits"] / takes, 4) if takes else None,
+            "avg_take_us": round(take_seconds / takes * 1e6, 2) if takes else None,
+            **stats,
+            "target_size": self.size,
+            "pools": self.sizes(),
+        }
+
+
+_pool = None
+
+
+def get_reply_pool() -> ReplyPool:
+    global _pool
+    if _pool is None:
+        _pool = ReplyPool()
+    return _pool
+
+
+def pooled_opening(scam_type: str, message: str, chat_id: str = None):
+    """First-turn hook for the honeypot: a pooled reply, or None when disabled or missed."""
+    if not REPLY_POOL:
+        return None
+    return get_reply_pool().take(scam_type, message, chat_id)
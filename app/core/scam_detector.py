@@ -2,14 +2,13 @@
 H.I.V.E. Enhanced Scam Detector
 Hybrid approach: Rule-based keywords + LLM detection
 """
-import google.generativeai as genai
 import os
 import json
 import re
-from dotenv import load_dotenv
-
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+import threading
+from app.core.env import load_env
+from app.core.metrics import GEMINI_SECONDS
+from app.core.rate_limiter import model_limiter
 
 # Keyword categories for rule-based detection
 URGENCY_KEYWORDS = ["immediately", "urgent", "today", "right now", "blocked", "suspended", "expire", "24 hours"]
@@ -48,11 +47,58 @@ def check_keywords(message):
     
     return matched, confidence, total_matches
 
+LLM_MODEL = "gemini-2.0-flash-exp"
+
+# Overridable for tests / offline runs (see app.core.fake_llm)
+_llm_model = None
+
+def set_llm_model(model):
+    """Swap the model used for LLM detection (anything with generate_content())."""
+    global _llm_model
+    _llm_model = model
+
+_sdk = None
+_sdk_lock = threading.Lock()
+
+def _configured_sdk():
+    """Import and configure google.generativeai on first use (~0.5s of imports)."""
+    global _sdk
+    if _sdk is None:
+        with _sdk_lock:
+            if _sdk is None:
+                import google.generativeai as genai
+                load_env()
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                _sdk = genai
+    return _sdk
+
+def warm_up():
+    """Load the SDK ahead of the first uncertain message (backend.warmup)."""
+    _configured_sdk()
+
+def _get_llm_model():
+    global _llm_model
+    if _llm_model is None:
+        _llm_model = _configured_sdk().GenerativeModel(LLM_MODEL)
+    return _llm_model
+
+def _strip_code_fences(text):
+    """Remove markdown code blocks if present"""
+    text = re.sub(r'```json\n?', '', text)
+    text = re.sub(r'```\n?', '', text)
+    return text.strip()
+
+def _llm_error_result(error):
+    return {
+        "is_scam": False,
+        "confidence": 0.0,
+        "scam_type": "none",
+        "reasoning": f"Error in LLM detection: {str(error)}"
+    }
+
 def llm_detect(message):
     """Step 2: Gemini LLM-based detection for uncertain cases"""
     try:
-        model = genai.GenerativeModel("gemini-2.0-flash-exp")
-        
         prompt = f"""Analyze if this message is a scam/fraud attempt targeting Indian users. 
 Message: '{message}'
 
@@ -68,25 +114,116 @@ Respond ONLY in this exact JSON format with no extra text:
   "reasoning": "one line explanation"
 }}"""
 
-        response = model.generate_content(prompt)
-        result_text = response.text.strip()
-        
-        # Remove markdown code blocks if present
-        result_text = re.sub(r'```json\n?', '', result_text)
-        result_text = re.sub(r'```\n?', '', result_text)
-        
-        result = json.loads(result_text)
+        with GEMINI_SECONDS.time_outcome(LLM_MODEL, "detect"):
+            response = _get_llm_model().generate_content(prompt)
+        result = json.loads(_strip_code_fences(response.text))
         return result
         
     except Exception as e:
         print(f"⚠️ LLM detection error: {e}")
+        return _llm_error_result(e)
+
+def build_batch_prompt(messages):
+    """One prompt asking for a JSON array of verdicts, one per message id."""
+    numbered = json.dumps([{"id": i, "message": m} for i, m in enumerate(messages)], ensure_ascii=False)
+    return f"""Analyze each of the following messages and decide if it is a scam/fraud attempt targeting Indian users.
+
+Look for: urgency tactics, authority impersonation (bank/police/government), 
+payment requests (UPI/bank transfer), threats (account blocked/legal action), 
+phishing (OTP/KYC/password).
+
+MESSAGES:
+{numbered}
+
+Respond ONLY with a JSON array containing exactly one object per message, no extra text:
+[
+  {{
+    "id": <message id>,
+    "is_scam": true/false,
+    "confidence": 0.0 to 1.0,
+    "scam_type": "bank_fraud/upi_fraud/phishing/lottery/job_scam/other/none",
+    "reasoning": "one line explanation"
+  }}
+]"""
+
+def parse_batch_verdicts(text, count):
+    """
+    Parse a batched LLM response into `count` slots.
+    Slots that are missing or malformed are left as None so the caller can
+    fall back to a single-message call for just those items.
+    """
+    verdicts = [None] * count
+    try:
+        items = json.loads(_strip_code_fences(text))
+    except (ValueError, TypeError):
+        return verdicts
+    if not isinstance(items, list):
+        return verdicts
+
+    for position, item in enumerate(items):
+        if not isinstance(item, dict) or "is_scam" not in item:
+            continue
+        try:
+            idx = int(item.pop("id", position))
+        except (TypeError, ValueError):
+            continue
+        if 0 <= idx < count and verdicts[idx] is None:
+            verdicts[idx] = item
+    return verdicts
+
+def llm_detect_batch(messages):
+    """Classify several uncertain messages with a single Gemini call."""
+    if not messages:
+        return []
+    with GEMINI_SECONDS.time_outcome(LLM_MODEL, "detect_batch"):
+        response = _get_llm_model().generate_content(build_batch_prompt(messages))
+    return parse_batch_verdicts(response.text, len(messages))
+
+def _rule_based_verdict(message):
+    """Step 1: rule-based verdict, or None when the message needs the LLM"""
+    matched_categories, confidence, total_matches = check_keywords(message)
+    
+    # High confidence scam - return immediately
+    if confidence >= 0.5:
+        scam_type = determine_scam_type(matched_categories)
+        return {
+            "is_scam": True,
+            "confidence": round(confidence, 2),
+            "scam_type": scam_type,
+            "reasoning": f"High keyword match: {total_matches} scam indicators detected",
+            "method": "rule_based"
+        }
+    
+    # Low confidence - probably not a scam
+    elif confidence < 0.2:
         return {
             "is_scam": False,
-            "confidence": 0.0,
+            "confidence": round(1.0 - confidence, 2),
             "scam_type": "none",
-            "reasoning": f"Error in LLM detection: {str(e)}"
+            "reasoning": "No significant scam indicators found",
+            "method": "rule_based"
         }
 
+    return None
+
+def _llm_verdict(llm_result):
+    return {
+        "is_scam": llm_result.get("is_scam", False),
+        "confidence": round(llm_result.get("confidence", 0.0), 2),
+        "scam_type": llm_result.get("scam_type", "none"),
+        "reasoning": llm_result.get("reasoning", "LLM analysis completed"),
+        "method": "llm_based"
+    }
+
+def _detection_error(e):
+    return {
+        "is_scam": False,
+        "confidence": 0.0,
+        "scam_type": "error",
+        "reasoning": f"Detection error: {str(e)}",
+        "method": "error"
+    }
+
 def detect_scam(message: str) -> dict:
     """
     Main scam detection function
@@ -94,45 +231,31 @@ def detect_scam(message: str) -> dict:
     """
     try:
         # Step 1: Rule-based keyword detection
-        matched_categories, confidence, total_matches = check_keywords(message)
+        verdict = _rule_based_verdict(message)
+        if verdict:
+            return verdict
         
-        # High confidence scam - return immediately
-        if confidence >= 0.5:
-            scam_type = determine_scam_type(matched_categories)
-            return {
-                "is_scam": True,
-                "confidence": round(confidence, 2),
-                "scam_type": scam_type,
-                "reasoning": f"High keyword match: {total_matches} scam indicators detected",
-                "method": "rule_based"
-            }
-        
-        # Low confidence - probably not a scam
-        elif confidence < 0.2:
-            return {
-                "is_scam": False,
-                "confidence": round(1.0 - confidence, 2),
-                "scam_type": "none",
-                "reasoning": "No significant scam indicators found",
-                "method": "rule_based"
-            }
-        
-        # Uncertain - use LLM detection
-        else:
-            llm_result = llm_detect(message)
-            return {
-                "is_scam": llm_result.get("is_scam", False),
-                "confidence": round(llm_result.get("confidence", 0.0), 2),
-                "scam_type": llm_result.get("scam_type", "none"),
-                "reasoning": llm_result.get("reasoning", "LLM analysis completed"),
-                "method": "llm_based"
-            }
+        # Uncertain - use LLM detection (blocking wait for a model slot)
+        model_limiter.acquire(LLM_MODEL)
+        return _llm_verdict(llm_detect(message))
             
     except Exception as e:
-        return {
-            "is_scam": False,
-            "confidence": 0.0,
-            "scam_type": "error",
-            "reasoning": f"Detection error: {str(e)}",
-            "method": "error"
-        }
+        return _detection_error(e)
+
+async def detect_scam_async(message: str, batcher=None) -> dict:
+    """
+    Same as detect_scam(), but uncertain messages go through the LLM
+    micro-batcher so concurrent callers share one Gemini request.
+    """
+    try:
+        verdict = _rule_based_verdict(message)
+        if verdict:
+            return verdict
+
+        if batcher is None:
+            from app.core.llm_batcher import get_llm_batcher
+            batcher = get_llm_batcher()
+        return _llm_verdict(await batcher.submit(message))
+
+    except Exception as e:
+        return _detection_error(e)
@@ -0,0 +1,370 @@
+"""
+H.I.V.E. Honeypot Session Store
+SQLite-backed per-chat honeypot sessions with an in-memory write-back cache
+(or write-through, when several worker processes serve the same chats).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "hive_sessions.db")
+
+# Idle sessions are dropped after this long (default 24h)
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", str(24 * 3600)))
+# Dirty sessions are written back at least this often
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "2"))
+# ...or as soon as this many sessions are dirty
+SESSION_FLUSH_BATCH = int(os.getenv("SESSION_FLUSH_BATCH", "50"))
+# Only this many recent turns are kept (the prompt window never needs more),
+# so a long engagement costs the same to flush as a short one
+SESSION_HISTORY_LIMIT = int(os.getenv("SESSION_HISTORY_LIMIT", "40"))
+# Every read goes to disk and every change commits at once, inside a locked
+# transaction; required when more than one process serves session endpoints
+# (backend.serve turns it on for --workers > 1)
+SESSION_WRITE_THROUGH = os.getenv("SESSION_WRITE_THROUGH", "0").lower() in ("1", "true", "yes")
+
+# Fields kept in the JSON `state` column; everything else is a real column
+_STATE_FIELDS = ("history", "turns", "intel", "fingerprint", "threat_score", "encounter_count", "scammer_status")
+
+
+def _get_conn(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _new_session(chat_id: str, scam_type: str, now: float) -> dict:
+    return {
+        "chat_id": chat_id,
+        "active": True,
+        "scam_type": scam_type,
+        "started_at": now,
+        "updated_at": now,
+        "history": [],     # most recent SESSION_HISTORY_LIMIT turns
+        "turns": 0,        # all turns ever, including ones trimmed from history
+        "intel": None,
+        "fingerprint": None,
+        "threat_score": None,
+        "encounter_count": None,
+        "scammer_status": None,
+    }
+
+
+class SessionStore:
+    """
+    Sessions are read through and written back: every change lands in the
+    in-memory cache immediately and is persisted by flush(), which runs on a
+    timer, once SESSION_FLUSH_BATCH sessions are dirty, and on shutdown.
+
+    With write_through the cache is bypassed: each read loads the row and
+    each change is a read-modify-write in one BEGIN IMMEDIATE transaction,
+    so processes sharing the file never see stale turns or overwrite each
+    other's.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        ttl_seconds: float = SESSION_TTL_SECONDS,
+        flush_batch: int = SESSION_FLUSH_BATCH,
+        history_limit: int = SESSION_HISTORY_LIMIT,
+        write_through: bool = SESSION_WRITE_THROUGH,
+    ):
+        self.db_path = db_path
+        self.write_through = write_through
+        self.ttl_seconds = ttl_seconds
+        self.flush_batch = flush_batch
+        self.history_limit = max(1, history_limit)
+        self._cache = {}
+        self._dirty = set()
+        self._deleted = set()
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._init_db()
+
+    def _init_db(self):
+        conn = _get_conn(self.db_path)
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS honeypot_sessions (
+                chat_id     TEXT PRIMARY KEY,
+                active      INTEGER NOT NULL DEFAULT 1,
+                scam_type   TEXT,
+                started_at  REAL NOT NULL,
+                updated_at  REAL NOT NULL,
+                state       TEXT DEFAULT '{}'          -- JSON: history, intel, fingerprint info
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_honeypot_sessions_updated ON honeypot_sessions(updated_at);
+        """)
+        conn.commit()
+        conn.close()
+
+    def configure(self, write_through: bool):
+        """Switch caching mode; cached changes are written back first."""
+        with self._lock:
+            self.flush()
+            self._cache.clear()
+            self.write_through = write_through
+
+    # ───────────────────────────────────────────────
+    # Reads
+    # ───────────────────────────────────────────────
+
+    def _is_expired(self, session: dict, now: float) -> bool:
+        return now - session["updated_at"] > self.ttl_seconds
+
+    def get(self, chat_id: str) -> Optional[dict]:
+        """Return the live session for a chat, loading it from disk on a cache miss."""
+        now = time.time()
+        if self.write_through:
+            session = self._load(chat_id)
+            if session is not None and self._is_expired(session, now):
+                self.delete(chat_id)
+                return None
+            return session
+        with self._lock:
+            session = self._cache.get(chat_id)
+            if session is None and chat_id not in self._deleted:
+                session = self._load(chat_id)
+                if session is not None:
+                    self._cache[chat_id] = session
+            if session is not None and self._is_expired(session, now):
+                self._drop(chat_id)
+                return None
+            return session
+
+    def _load(self, chat_id: str, conn: sqlite3.Connection = None) -> Optional[dict]:
+        own = conn is None
+        conn = conn or _get_conn(self.db_path)
+        row = conn.execute("SELECT * FROM honeypot_sessions WHERE chat_id = ?", (chat_id,)).fetchone()
+        if own:
+            conn.close()
+        if not row:
+            return None
+        session = _new_session(row["chat_id"], row["scam_type"], row["started_at"])
+        session["active"] = bool(row["active"])
+        session["updated_at"] = row["updated_at"]
+        session.update(json.loads(row["state"] or "{}"))
+        session.setdefault("turns", len(session["history"]))
+        if not session["turns"]:
+            session["turns"] = len(session["history"])
+        return session
+
+    def list_sessions(self) -> list[dict]:
+        """Summaries of every non-expired session (flushes first so disk is current)."""
+        self.flush()
+        now = time.time()
+        conn = _get_conn(self.db_path)
+        rows = conn.execute(
+            "SELECT chat_id FROM honeypot_sessions WHERE updated_at >= ? ORDER BY updated_at DESC",
+            (now - self.ttl_seconds,),
+        ).fetchall()
+        conn.close()
+        return [summarize(s) for s in (self.get(r["chat_id"]) for r in rows) if s]
+
+    # ───────────────────────────────────────────────
+    # Writes (cached and written back by flush, or written through)
+    # ───────────────────────────────────────────────
+
+    def _touch(self, session: dict):
+        session["updated_at"] = time.time()
+        self._dirty.add(session["chat_id"])
+        if len(self._dirty) >= self.flush_batch:
+            self.flush()
+
+    def _modify(self, chat_id: str, change) -> Optional[dict]:
+        """
+        Apply change(session or None) -> (session or None, changed) and
+        persist the result: in the cache, or at once with write_through.
+        """
+        if self.write_through:
+            return self._modify_on_disk(chat_id, change)
+        with self._lock:
+            session, changed = change(self.get(chat_id))
+            if session is not None and changed:
+                self._cache[chat_id] = session
+                self._deleted.discard(chat_id)
+                self._touch(session)
+            return session
+
+    def _modify_on_disk(self, chat_id: str, change) -> Optional[dict]:
+        conn = _get_conn(self.db_path)
+        try:
+            # Holding the write lock from the read on, so no other process interleaves a change
+            conn.execute("BEGIN IMMEDIATE")
+            session = self._load(chat_id, conn)
+            if session is not None and self._is_expired(session, time.time()):
+                session = None
+            session, changed = change(session)
+            if session is not None and changed:
+                session["updated_at"] = time.time()
+                _upsert(conn, [_row(session)])
+            conn.commit()
+            return session
+        finally:
+            conn.close()
+
+    def get_or_create(self, chat_id: str, scam_type: str = "default") -> dict:
+        def change(session):
+            if session is None:
+                return _new_session(chat_id, scam_type, time.time()), True
+            return session, False
+        return self._modify(chat_id, change)
+
+    def append_turn(self, chat_id: str, sender: str, text: str) -> dict:
+        return self.append_turns(chat_id, [(sender, text)])
+
+    def append_turns(self, chat_id: str, turns: list) -> dict:
+        """Append [(sender, text), ...] in one step, e.g. a scammer message and its reply."""
+        def change(session):
+            session = session or _new_session(chat_id, "default", time.time())
+            history = session["history"]
+            history.extend({"sender": sender, "text": text} for sender, text in turns)
+            if len(history) > self.history_limit:
+                del history[:len(history) - self.history_limit]
+            session["turns"] += len(turns)
+            return session, True
+        return self._modify(chat_id, change)
+
+    def update(self, chat_id: str, **fields) -> Optional[dict]:
+        def change(session):
+            if session is None:
+                return None, False
+            session.update(fields)
+            return session, True
+        return self._modify(chat_id, change)
+
+    def delete(self, chat_id: str) -> bool:
+        if self.write_through:
+            conn = _get_conn(self.db_path)
+            with conn:
+                cur = conn.execute("DELETE FROM honeypot_sessions WHERE chat_id = ?", (chat_id,))
+            conn.close()
+            return cur.rowcount > 0
+        with self._lock:
+            existed = self.get(chat_id) is not None
+            self._drop(chat_id)
+            return existed
+
+    def _drop(self, chat_id: str):
+        self._cache.pop(chat_id, None)
+        self._dirty.discard(chat_id)
+        self._deleted.add(chat_id)
+
+    def flush(self) -> int:
+        """Persist dirty sessions and pending deletes in one transaction."""
+        with self._lock:
+            rows = [_row(self._cache[chat_id]) for chat_id in self._dirty]
+            deleted = [(chat_id,) for chat_id in self._deleted]
+            self._dirty.clear()
+            self._deleted.clear()
+
+            if not rows and not deleted:
+                return 0
+
+            conn = _get_conn(self.db_path)
+            with conn:
+                conn.executemany("DELETE FROM honeypot_sessions WHERE chat_id = ?", deleted)
+                _upsert(conn, rows)
+            conn.close()
+            return len(rows) + len(deleted)
+
+    def evict_idle(self) -> int:
+        """Remove sessions idle for longer than the TTL from cache and disk."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            stale = [cid for cid, s in self._cache.items() if s["updated_at"] < cutoff]
+            for chat_id in stale:
+                self._cache.pop(chat_id, None)
+                self._dirty.discard(chat_id)
+            self.flush()
+            conn = _get_conn(self.db_path)
+            with conn:
+                cur = conn.execute("DELETE FROM honeypot_sessions WHERE updated_at < ?", (cutoff,))
+            conn.close()
+            return max(len(stale), cur.rowcount)
+
+    # ───────────────────────────────────────────────
+    # Background maintenance
+    # ───────────────────────────────────────────────
+
+    def start(self, flush_interval: float = SESSION_FLUSH_INTERVAL):
+        """Start the write-back / TTL eviction thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            last_eviction = time.time()
+            while not self._stop.wait(flush_interval):
+                try:
+                    self.flush()
+                    if time.time() - last_eviction >= 60:
+                        self.evict_idle()
+                        last_eviction = time.time()
+                except Exception as e:
+                    print(f"⚠️ Session store maintenance error: {e}")
+
+        self._thread = threading.Thread(target=loop, name="session-store", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the maintenance thread and write back everything still cached."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+
+
+def _row(session: dict) -> tuple:
+    state = {field: session[field] for field in _STATE_FIELDS}
+    return (session["chat_id"], int(session["active"]), session["scam_type"], session["started_at"],
+            session["updated_at"], json.dumps(state))
+
+
+def _upsert(conn: sqlite3.Connection, rows: list):
+    conn.executemany(
+        """INSERT INTO honeypot_sessions (chat_id, active, scam_type, started_at, updated_at, state)
+           VALUES (?, ?, ?, ?, ?, ?)
+           ON CONFLICT(chat_id) DO UPDATE SET
+               active = excluded.active, scam_type = excluded.scam_type,
+               updated_at = excluded.updated_at, state = excluded.state""",
+        rows,
+    )
+
+
+def summarize(session: dict) -> dict:
+    """Compact view of a session (no full history)."""
+    return {
+        "chat_id": session["chat_id"],
+        "active": session["active"],
+        "scam_type": session["scam_type"],
+        "turns": session["turns"],
+        "intel": session["intel"],
+        "fingerprint": session["fingerprint"],
+        "threat_score": session["threat_score"],
+        "duration_seconds": round(session["updated_at"] - session["started_at"], 1),
+        "idle_seconds": round(time.time() - session["updated_at"], 1),
+    }
+
+
+def history_offset(session: dict) -> int:
+    """Absolute turn number of session["history"][0] (turns before it were trimmed)."""
+    return session["turns"] - len(session["history"])
+
+
+_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    """Process-wide session store."""
+    global _store
+    if _store is None:
+        _store = SessionStore()
+    return _store
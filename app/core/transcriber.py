@@ -0,0 +1,273 @@
+"""
+H.I.V.E. Transcription Service
+Long-lived worker pool for voice-note transcription (model loaded once per worker)
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+TRANSCRIBE_BACKEND = os.getenv("TRANSCRIBE_BACKEND", "whisper")    # whisper | stub
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "2"))
+# Jobs allowed to wait for a worker before new ones are rejected
+TRANSCRIBE_QUEUE_SIZE = int(os.getenv("TRANSCRIBE_QUEUE_SIZE", "16"))
+TRANSCRIBE_TIMEOUT = float(os.getenv("TRANSCRIBE_TIMEOUT", "120"))
+SAMPLE_RATE = 16000
+
+
+class TranscriptionQueueFull(Exception):
+    """Raised when the job queue is at capacity; callers should retry later."""
+
+
+class TranscriptionUnavailable(Exception):
+    """The worker pool died (e.g. a worker crashed or whisper failed to load); it is rebuilt for the next job."""
+
+
+# ───────────────────────────────────────────────
+# Worker process side
+# ───────────────────────────────────────────────
+
+class StubTranscriber:
+    """
+    Deterministic offline model. UTF-8 payloads are returned as-is (handy for
+    feeding scripted "voice notes" through the pipeline); anything else
+    yields a stable hash-based placeholder.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def transcribe(self, data: bytes) -> str:
+        if self.delay:
+            time.sleep(self.delay)
+        try:
+            return data.decode("utf-8").strip()
+        except UnicodeDecodeError:
+            return f"[audio {hashlib.sha256(data).hexdigest()[:12]} {len(data)} bytes]"
+
+
+class WhisperTranscriber:
+    def __init__(self, model_name: str):
+        import whisper
+        self.model = whisper.load_model(model_name)
+
+    def transcribe(self, data: bytes) -> str:
+        return self.model.transcribe(decode_audio(data), fp16=False)["text"].strip()
+
+
+def decode_audio(data: bytes):
+    """Decode any ffmpeg-readable audio bytes to 16 kHz mono float32, via pipes only."""
+    import numpy as np
+
+    proc = subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+        input=data,
+        capture_output=True,
+        check=True,
+    )
+    return np.frombuffer(proc.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+_worker_model = None
+
+
+def _init_worker(backend: str, model_name: str, stub_delay: float):
+    global _worker_model
+    if backend == "stub":
+        _worker_model = StubTranscriber(stub_delay)
+    else:
+        _worker_model = WhisperTranscriber(model_name)
+
+
+def _warm():
+    return os.getpid()
+
+
+def _transcribe_job(data: bytes):
+    started = time.perf_counter()
+    text = _worker_model.transcribe(data)
+    return text, time.perf_counter() - started
+
+
+# ───────────────────────────────────────────────
+# API process side
+# ───────────────────────────────────────────────
+
+class TranscriptionService:
+    """
+    Bounded process pool + admission queue.
+
+    At most `workers` jobs run at once; up to `queue_size` more may wait.
+    Beyond that transcribe() raises TranscriptionQueueFull immediately so a
+    burst of voice notes turns into backpressure instead of a CPU spike.
+
+    A job that times out keeps its worker slot until the worker actually
+    finishes it: the process can't be interrupted mid-job, and releasing the
+    slot early would let new jobs pile up behind it and time out too.
+    """
+
+    def __init__(
+        self,
+        backend: str = TRANSCRIBE_BACKEND,
+        workers: int = TRANSCRIBE_WORKERS,
+        queue_size: int = TRANSCRIBE_QUEUE_SIZE,
+        timeout: float = TRANSCRIBE_TIMEOUT,
+        model_name: str = WHISPER_MODEL,
+        stub_delay: float = 0.0,
+    ):
+        self.backend = backend
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.timeout = timeout
+        self._initargs = (backend, model_name, stub_delay)
+        self._pool = self._new_pool()
+        self._slots = None       # asyncio.Semaphore, bound to the serving loop
+        self._admitted = 0       # queued + running (including abandoned)
+        self._running = 0        # jobs occupying a worker
+        self._abandoned = 0      # timed out, but the worker is still busy with them
+        self._stats = {
+            "completed": 0, "failed": 0, "rejected": 0, "timeouts": 0, "pool_restarts": 0,
+            "queue_seconds": 0.0, "transcribe_seconds": 0.0, "max_queue_seconds": 0.0,
+        }
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=self._initargs,
+        )
+
+    def _restart_pool(self, broken: ProcessPoolExecutor):
+        """Replace a broken pool once, however many of its jobs report it."""
+        if self._pool is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+            self._stats["pool_restarts"] += 1
+
+    def warm_up(self):
+        """Start every worker now so the model load isn't paid by the first voice note."""
+        for future in [self._pool.submit(_warm) for _ in range(self.workers)]:
+            future.result()
+
+    async def transcribe(self, data: bytes) -> dict:
+        if self._admitted >= self.workers + self.queue_size:
+            self._stats["rejected"] += 1
+            raise TranscriptionQueueFull(
+                f"{self._admitted} transcription jobs in flight (limit {self.workers + self.queue_size})"
+            )
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        self._admitted += 1
+        enqueued = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            self._admitted -= 1
+            raise
+        waited = time.perf_counter() - enqueued
+        self._running += 1
+
+        pool = self._pool
+        try:
+            job = asyncio.wrap_future(pool.submit(_transcribe_job, data))
+        except BrokenProcessPool as e:
+            self._job_finished(abandoned=False)
+            self._stats["failed"] += 1
+            self._restart_pool(pool)
+            raise TranscriptionUnavailable(f"transcription workers crashed: {e}") from e
+        except BaseException:
+            self._job_finished(abandoned=False)
+            raise
+        timed_out = False
+
+        def finished(_):
+            self._job_finished(abandoned=timed_out)
+
+        # The slot is released when the worker is done with the job, not
+        # when this caller stops waiting for it
+        job.add_done_callback(finished)
+        try:
+            text, took = await asyncio.wait_for(asyncio.shield(job), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            self._abandoned += 1
+            self._stats["timeouts"] += 1
+            self._stats["failed"] += 1
+            raise
+        except BrokenProcessPool as e:
+            self._stats["failed"] += 1
+            self._restart_pool(pool)
+            raise TranscriptionUnavailable(f"transcription workers crashed: {e}") from e
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+
+        self._stats["completed"] += 1
+        self._stats["queue_seconds"] += waited
+        self._stats["transcribe_seconds"] += took
+        self._stats["max_queue_seconds"] = max(self._stats["max_queue_seconds"], waited)
+        return {
+            "text": text,
+            "bytes": len(data),
+            "queue_ms": round(waited * 1000, 1),
+            "transcribe_ms": round(took * 1000, 1),
+            "total_ms": round((time.perf_counter() - enqueued) * 1000, 1),
+        }
+
+    def _job_finished(self, abandoned: bool):
+        """Free the worker slot (runs when the pool is done with the job)."""
+        self._running -= 1
+        self._admitted -= 1
+        if abandoned:
+            self._abandoned -= 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        s = self._stats
+        done = s["completed"] or 1
+        return {
+            "backend": self.backend,
+            "workers": self.workers,
+            "queue_limit": self.queue_size,
+            "running": self._running,
+            "abandoned": self._abandoned,
+            "queued": self._admitted - self._running,
+            "completed": s["completed"],
+            "failed": s["failed"],
+            "timeouts": s["timeouts"],
+            "rejected": s["rejected"],
+            "pool_restarts": s["pool_restarts"],
+            "avg_queue_ms": round(s["queue_seconds"] / done * 1000, 1),
+            "max_queue_ms": round(s["max_queue_seconds"] * 1000, 1),
+            "avg_transcribe_ms": round(s["transcribe_seconds"] / done * 1000, 1),
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_service: Optional[TranscriptionService] = None
+
+
+def get_transcription_service() -> TranscriptionService:
+    """Process-wide transcription service (workers start on first use)."""
+    global _service
+    if _service is None:
+        _service = TranscriptionService()
+    return _service
+
+
+def shutdown_transcription_service():
+    global _service
+    if _service is not None:
+        _service.shutdown()
+        _service = None
@@ -0,0 +1,272 @@
+# backend/bulk_scan.py
+"""
+Offline bulk scanner for WhatsApp chat exports and message archives.
+
+Streams every message of the given files (WhatsApp .txt exports, CSV dumps,
+or directories of them) in batches to a process pool that classifies them
+with the scam model and extracts intelligence. Only as many batches as
+2 x workers are in flight, so memory stays flat however large the archive.
+Identifiers found in scam messages are bulk-loaded into the fingerprint DB
+(one fingerprint per chat) in large transactions, and a per-chat summary is
+written as CSV.
+
+    python -m backend.bulk_scan exports/ dump.csv --report scan_report.csv
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+IDENTIFIER_KEYS = ("upiIds", "phoneNumbers", "bankAccounts", "phishingLinks")
+SCAM_LABELS = {"high", "scam", "fraud"}
+# Continuation lines past this are dropped (a pasted document is not one message)
+MAX_MESSAGE_CHARS = 4000
+
+# "12/03/2024, 10:15 - Sender: text" (Android) / "[12/03/24, 10:15:22 AM] Sender: text" (iOS)
+_WHATSAPP_LINE = re.compile(
+    r"^\u200e?\[?(\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}),?\s+"
+    r"(\d{1,2}:\d{2}(?::\d{2})?(?:\s?[AaPp]\.?\s?[Mm]\.?)?)\]?\s*(?:-\s*)?"
+    r"(?:([^:]{1,80}?):\s)?(.*)$"
+)
+_PHONE_SENDER = re.compile(r"^\+?[\d\s()-]{10,18}$")
+_CSV_TEXT_COLUMNS = ("message", "text", "body", "content")
+_CSV_CHAT_COLUMNS = ("chat_id", "chat", "conversation", "thread")
+_CSV_SENDER_COLUMNS = ("sender", "from", "author", "phone")
+
+
+# ───────────────────────────────────────────────
+# Readers: each yields (chat, sender, text) lazily
+# ───────────────────────────────────────────────
+
+def read_whatsapp(path: str):
+    """One WhatsApp export; multi-line messages are joined, system notices skipped."""
+    chat = os.path.splitext(os.path.basename(path))[0]
+    sender, parts = None, []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            match = _WHATSAPP_LINE.match(line)
+            if match is None:
+                if sender is not None and sum(map(len, parts)) < MAX_MESSAGE_CHARS:
+                    parts.append(line)
+                continue
+            if sender is not None:
+                yield chat, sender, "\n".join(parts)
+            sender, parts = match.group(3), [match.group(4)]
+            if sender is None:    # "Messages and calls are end-to-end encrypted", joins, etc.
+                parts = []
+    if sender is not None:
+        yield chat, sender, "\n".join(parts)
+
+
+def read_csv(path: str):
+    """A CSV dump with a message column; chat and sender columns are optional."""
+    default_chat = os.path.splitext(os.path.basename(path))[0]
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.DictReader(f)
+        columns = {name.lower().strip(): name for name in reader.fieldnames or []}
+
+        def pick(candidates):
+            return next((columns[c] for c in candidates if c in columns), None)
+
+        text_col, chat_col, sender_col = pick(_CSV_TEXT_COLUMNS), pick(_CSV_CHAT_COLUMNS), pick(_CSV_SENDER_COLUMNS)
+        if text_col is None:
+            raise ValueError(f"{path}: no message column (expected one of {', '.join(_CSV_TEXT_COLUMNS)})")
+        for row in reader:
+            text = (row.get(text_col) or "")[:MAX_MESSAGE_CHARS]
+            chat = (row.get(chat_col) if chat_col else None) or default_chat
+            yield chat, (row.get(sender_col) if sender_col else None) or "", text
+
+
+def iter_messages(paths: list):
+    """Every message of every file (directories are walked); CSV by extension, else WhatsApp text."""
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+        else:
+            files = [path]
+        for file in files:
+            reader = read_csv if file.lower().endswith(".csv") else read_whatsapp
+            for chat, sender, text in reader(file):
+                if text.strip():
+                    yield chat, sender, text
+
+
+def batched(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+# ───────────────────────────────────────────────
+# Pool worker side
+# ───────────────────────────────────────────────
+
+def _init_worker():
+    from backend.model import load_model
+    load_model()
+
+
+def scan_batch(batch: list) -> list:
+    """
+    Classify and extract one batch; returns (chat, is_scam, confidence,
+    scam_type, identifiers) per message, identifiers only for scam messages.
+    """
+    from app.core.identifier_normalizer import normalize_phone
+    from app.core.intelligence_extractor import EXTRACTORS
+    from app.core.scam_detector import check_keywords, determine_scam_type
+    from backend.model import predict_messages
+
+    predictions = predict_messages([text for _, _, text in batch])
+    results = []
+    for (chat, sender, text), prediction in zip(batch, predictions):
+        is_scam = str(prediction["risk"]).lower() in SCAM_LABELS
+        identifiers, scam_type = None, None
+        if is_scam:
+            identifiers = {key: EXTRACTORS[key](text) for key in IDENTIFIER_KEYS}
+            # An unsaved contact shows up as their number ("+91 98765 43210")
+            if sender and _PHONE_SENDER.match(sender):
+                identifiers["phoneNumbers"].append(normalize_phone(sender))
+            scam_type = determine_scam_type(check_keywords(text)[0])
+        results.append((chat, is_scam, float(prediction["confidence"]), scam_type, identifiers))
+    return results
+
+
+# ───────────────────────────────────────────────
+# Aggregation
+# ───────────────────────────────────────────────
+
+class ChatSummary:
+    __slots__ = ("messages", "scam_messages", "max_confidence", "scam_types", "identifiers")
+
+    def __init__(self):
+        self.messages = 0
+        self.scam_messages = 0
+        self.max_confidence = 0.0
+        self.scam_types = {}
+        self.identifiers = {key: set() for key in IDENTIFIER_KEYS}
+
+    def add(self, is_scam: bool, confidence: float, scam_type, identifiers):
+        self.messages += 1
+        if not is_scam:
+            return
+        self.scam_messages += 1
+        self.max_confidence = max(self.max_confidence, confidence)
+        self.scam_types[scam_type] = self.scam_types.get(scam_type, 0) + 1
+        for key, values in identifiers.items():
+            self.identifiers[key].update(values)
+
+    def main_scam_type(self):
+        return max(self.scam_types, key=self.scam_types.get) if self.scam_types else None
+
+    def identifier_count(self) -> int:
+        return sum(len(values) for values in self.identifiers.values())
+
+
+def scan(paths: list, workers: int = None, batch_size: int = 500, progress_every: float = 5.0,
+         out=sys.stdout) -> tuple:
+    """Scan every message; returns ({chat: ChatSummary}, messages, seconds)."""
+    workers = workers or os.cpu_count() or 1
+    summaries = {}
+    scanned = 0
+    started = last_report = time.perf_counter()
+
+    def collect(results):
+        nonlocal scanned, last_report
+        for chat, is_scam, confidence, scam_type, identifiers in results:
+            summary = summaries.get(chat)
+            if summary is None:
+                summary = summaries[chat] = ChatSummary()
+            summary.add(is_scam, confidence, scam_type, identifiers)
+        scanned += len(results)
+        now = time.perf_counter()
+        if out and now - last_report >= progress_every:
+            last_report = now
+            print(f"… {scanned:,} messages, {len(summaries):,} chats, "
+                  f"{scanned / (now - started):,.0f} msg/s", file=out)
+
+    batches = batched(iter_messages(paths), batch_size)
+    if workers == 1:
+        _init_worker()
+        for batch in batches:
+            collect(scan_batch(batch))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            pending = set()
+            for batch in batches:
+                pending.add(pool.submit(scan_batch, batch))
+                if len(pending) >= workers * 2:    # bounded: don't read ahead of the pool
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future.result())
+            for future in pending:
+                collect(future.result())
+    return summaries, scanned, time.perf_counter() - started
+
+
+def store_summaries(summaries: dict) -> dict:
+    """One fingerprint per chat with identifiers, in bulk transactions; returns {chat: fingerprint}."""
+    from app.core.fingerprint_db import store_fingerprints
+
+    chats = [chat for chat, summary in summaries.items() if summary.identifier_count()]
+    items = (
+        (
+            {key: sorted(values) for key, values in summaries[chat].identifiers.items()},
+            summaries[chat].main_scam_type() or "unknown",
+            None,    # chat names from exports are not identifiers of the scammer
+            summaries[chat].scam_messages,
+        )
+        for chat in chats
+    )
+    stored = store_fingerprints(items)
+    return {chat: result[0] for chat, result in zip(chats, stored) if result}
+
+
+def write_report(path: str, summaries: dict, fingerprints: dict):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["chat", "messages", "scam_messages", "scam_ratio", "max_confidence",
+                         "scam_type", "identifiers", "fingerprint", *IDENTIFIER_KEYS])
+        ordered = sorted(summaries.items(), key=lambda item: (-item[1].scam_messages, item[0]))
+        for chat, s in ordered:
+            writer.writerow([
+                chat, s.messages, s.scam_messages, round(s.scam_messages / s.messages, 3) if s.messages else 0,
+                round(s.max_confidence, 2), s.main_scam_type() or "", s.identifier_count(),
+                fingerprints.get(chat, ""), *(" ".join(sorted(s.identifiers[key])) for key in IDENTIFIER_KEYS),
+            ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="WhatsApp .txt exports, .csv dumps or directories")
+    parser.add_argument("--workers", type=int, default=None, help="pool size (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--report", default="scan_report.csv")
+    parser.add_argument("--no-store", action="store_true", help="don't write fingerprints to the DB")
+    args = parser.parse_args(argv)
+
+    summaries, scanned, seconds = scan(args.paths, args.workers, args.batch_size)
+    scam_chats = sum(1 for s in summaries.values() if s.scam_messages)
+    print(f"✅ Scanned {scanned:,} messages in {len(summaries):,} chats in {seconds:.1f}s "
+          f"({scanned / seconds if seconds else 0:,.0f} msg/s); {scam_chats:,} chats with scam messages")
+
+    fingerprints = {}
+    if not args.no_store:
+        started = time.perf_counter()
+        fingerprints = store_summaries(summaries)
+        print(f"✅ Stored {len(fingerprints):,} fingerprints in {time.perf_counter() - started:.1f}s")
+
+    write_report(args.report, summaries, fingerprints)
+    print(f"Report saved to {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
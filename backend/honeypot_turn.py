@@ -0,0 +1,221 @@
+# backend/honeypot_turn.py
+"""
+One honeypot turn in a single request: persona reply, intelligence
+extraction and fingerprinting of the incoming scammer message.
+
+The LLM reply is by far the slowest stage, so extraction + fingerprinting
+run concurrently with it instead of as separate round trips afterwards.
+"""
+import asyncio
+import json
+import time
+
+from app.core.conversation_agent import SentenceBuffer, generate_reply_async, generate_reply_stream
+from app.core.event_bus import emit
+from app.core.fingerprint_db import store_fingerprint
+from app.core.intelligence_extractor import extract_all_intelligence, merge_intelligence
+from app.core.persona_manager import select_persona
+from app.core.reply_pool import pooled_opening
+from app.core.session_store import get_session_store, history_offset
+from backend.online_train import ONLINE_SELF_LABELS, ONLINE_TRAINING, record_label
+
+# Intel keys that identify a scammer (keywords alone never trigger a store)
+IDENTIFIER_KEYS = ("upiIds", "phoneNumbers", "bankAccounts", "phishingLinks")
+
+def sse_event(event: str, data: dict, event_id: int = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# Response headers for every SSE endpoint (no proxy buffering of tokens)
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def relay_reply(pieces, started: float, finish):
+    """
+    Relay a streamed reply as SSE: `token` events as text arrives, `sentence`
+    events for each completed sentence, then one `done` event carrying
+    `await finish(reply, first_token_ms)`, or `error` if the reply failed.
+    """
+    sentences = SentenceBuffer()
+    parts = []
+    first_token_ms = None
+    try:
+        async for piece in pieces:
+            if first_token_ms is None:
+                first_token_ms = _ms(started)
+            parts.append(piece)
+            yield sse_event("token", {"text": piece})
+            for sentence in sentences.feed(piece):
+                yield sse_event("sentence", {"text": sentence})
+        for sentence in sentences.finish():
+            yield sse_event("sentence", {"text": sentence})
+    except Exception as e:
+        yield sse_event("error", {"message": str(e)})
+        return
+
+    yield sse_event("done", await finish("".join(parts), first_token_ms))
+
+
+def opening_reply(history: list, scam_type: str, scammer_message: str, chat_id: str = None):
+    """A pre-generated reply (app.core.reply_pool) if this is an engagement's first turn, else None."""
+    if history:
+        return None
+    return pooled_opening(scam_type, scammer_message, chat_id)
+
+
+async def as_pieces(reply: str):
+    """A finished reply in the shape relay_reply() takes."""
+    yield reply
+
+
+def _ms(since: float) -> float:
+    return round((time.perf_counter() - since) * 1000, 1)
+
+
+def _start_turn(session_id: str, scam_type: str):
+    # The scammer message is only recorded with its reply (_finish_turn), so a
+    # failed or retried turn never leaves an unanswered duplicate in history
+    session = get_session_store().get_or_create(session_id, scam_type)
+    return session, select_persona(session["scam_type"])
+
+
+def _collect_intel(session: dict, scammer_message: str, timings: dict):
+    """Extract from the new message only, diff against the session, store if new."""
+    started = time.perf_counter()
+    found = extract_all_intelligence(scammer_message)
+    timings["extract_ms"] = _ms(started)
+
+    previous = session["intel"] or {key: [] for key in found}
+    delta = {key: sorted(set(values) - set(previous.get(key, []))) for key, values in found.items()}
+    merged = merge_intelligence(previous, found)
+
+    profile = None
+    if any(delta[key] for key in IDENTIFIER_KEYS):
+        started = time.perf_counter()
+        profile = store_fingerprint(
+            intel=merged,
+            scam_type=session["scam_type"],
+            chat_id=session["chat_id"],
+            message_count=session["turns"] + 1,    # + the message being handled
+        )
+        timings["fingerprint_ms"] = _ms(started)
+        if not profile.get("fingerprint"):
+            profile = None
+    else:
+        timings["fingerprint_ms"] = 0.0
+
+    _publish_intel(session, delta, merged, profile)
+    return delta, merged, profile
+
+
+def _publish_intel(session: dict, delta: dict, merged: dict, profile):
+    """Owner-facing events for this message (app.core.event_bus); the bot digests them per chat."""
+    new = {key: delta[key] for key in IDENTIFIER_KEYS if delta.get(key)}
+    if not new:
+        return
+    chat_id = session["chat_id"]
+    emit("intel", chat_id, {"delta": new, "intel": merged, "turn": session["turns"] + 1})
+    if profile:
+        emit("fingerprint", chat_id, {
+            key: profile.get(key) for key in
+            ("fingerprint", "is_new_scammer", "threat_score", "encounter_count", "scam_types", "status")
+        })
+
+
+def _finish_turn(session_id: str, persona: dict, scammer_message: str, reply: str,
+                 delta: dict, merged: dict, profile, timings: dict) -> dict:
+    store = get_session_store()
+    store.append_turns(session_id, [("scammer", scammer_message), ("victim", reply)])
+    if ONLINE_TRAINING and ONLINE_SELF_LABELS:
+        # The model's own detection, not a review: trained at reduced weight
+        record_label(scammer_message, "scam", source="honeypot")
+    fields = {"intel": merged}
+    if profile:
+        fields.update(
+            fingerprint=profile["fingerprint"],
+            threat_score=profile["threat_score"],
+            encounter_count=profile["encounter_count"],
+            scammer_status=profile["status"],
+        )
+    # update() is None only if the session was deleted mid-turn (!reset)
+    session = store.update(session_id, **fields) or store.get_or_create(session_id)
+
+    return {
+        "reply": reply,
+        "persona_name": persona["name"],
+        "scam_type": session["scam_type"],
+        "session_id": session_id,
+        "turn": session["turns"],
+        "intel": merged,
+        "intel_delta": delta,
+        "fingerprint": profile,
+        "timings": timings,
+    }
+
+
+async def run_turn(session_id: str, scammer_message: str, scam_type: str = "default") -> dict:
+    """Reply + extract + fingerprint, with the reply generated concurrently."""
+    started = time.perf_counter()
+    timings = {}
+    session, persona = _start_turn(session_id, scam_type)
+
+    async def reply_stage():
+        stage_start = time.perf_counter()
+        reply = opening_reply(session["history"], session["scam_type"], scammer_message, session_id)
+        timings["reply_source"] = "pool" if reply else "llm"
+        if reply:
+            timings["reply_ms"] = _ms(stage_start)
+            return reply
+        reply = await generate_reply_async(
+            persona=persona,
+            scammer_message=scammer_message,
+            conversation_history=session["history"],
+            chat_id=session_id,
+            history_offset=history_offset(session),
+        )
+        timings["reply_ms"] = _ms(stage_start)
+        return reply
+
+    reply, (delta, merged, profile) = await asyncio.gather(
+        reply_stage(),
+        asyncio.to_thread(_collect_intel, session, scammer_message, timings),
+    )
+    timings["total_ms"] = _ms(started)
+    return _finish_turn(session_id, persona, scammer_message, reply, delta, merged, profile, timings)
+
+
+async def stream_turn(session_id: str, scammer_message: str, scam_type: str = "default"):
+    """
+    SSE version of run_turn(): `token` / `sentence` events while the reply is
+    generated, then one `done` event with the same payload run_turn() returns.
+    """
+    started = time.perf_counter()
+    timings = {}
+    session, persona = _start_turn(session_id, scam_type)
+    intel_task = asyncio.ensure_future(asyncio.to_thread(_collect_intel, session, scammer_message, timings))
+
+    async def finish(reply: str, first_token_ms: float) -> dict:
+        timings["first_token_ms"] = first_token_ms
+        timings["reply_ms"] = _ms(started)
+        try:
+            delta, merged, profile = await intel_task
+        except Exception as e:
+            # The reply has already been sent, so it is recorded regardless
+            print(f"⚠️ Intel extraction failed for {session_id}: {e}")
+            timings["intel_error"] = str(e)
+            delta, merged, profile = {key: [] for key in IDENTIFIER_KEYS}, session["intel"], None
+        timings["total_ms"] = _ms(started)
+        return _finish_turn(session_id, persona, scammer_message, reply, delta, merged, profile, timings)
+
+    pooled = opening_reply(session["history"], session["scam_type"], scammer_message, session_id)
+    timings["reply_source"] = "pool" if pooled else "llm"
+    pieces = as_pieces(pooled) if pooled else generate_reply_stream(
+        persona=persona,
+        scammer_message=scammer_message,
+        conversation_history=session["history"],
+        chat_id=session_id,
+        history_offset=history_offset(session),
+    )
+    async for event in relay_reply(pieces, started, finish):
+        yield event
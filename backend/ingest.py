@@ -0,0 +1,110 @@
+# backend/ingest.py
+"""
+Inbound message pipeline behind the durable queue.
+
+The bot enqueues every scammer-side text message and returns immediately;
+a worker then runs detection, starts or continues the honeypot session and
+posts the outcome back to the bot (BOT_CALLBACK_URL), which sends the
+WhatsApp messages. The computed outcome is checkpointed before delivery, so
+a bot that is briefly down gets the same result redelivered on retry
+instead of a second Gemini turn.
+"""
+import asyncio
+import os
+from typing import Optional
+
+import requests
+
+from app.core.event_bus import emit
+from app.core.message_queue import Job, MessageQueue
+from app.core.session_store import get_session_store
+from backend.honeypot_turn import run_turn
+from backend.model import predict_message
+
+BOT_CALLBACK_URL = os.getenv("BOT_CALLBACK_URL", "http://localhost:3000/ingest/result")
+BOT_CALLBACK_TIMEOUT = float(os.getenv("BOT_CALLBACK_TIMEOUT", "15"))
+
+
+def guess_scam_type(text: str) -> str:
+    """Persona key for a freshly detected scam (mirrors the bot's guessScamType)."""
+    lower = text.lower()
+    if "upi" in lower or "@" in lower:
+        return "upi_fraud"
+    if any(word in lower for word in ("bank", "account", "otp")):
+        return "bank_fraud"
+    if any(word in lower for word in ("lottery", "prize", "winner")):
+        return "lottery"
+    if any(word in lower for word in ("click", "link", "http")):
+        return "phishing"
+    return "default"
+
+
+async def process_message(chat_id: str, text: str, honeypot_enabled: bool = True) -> dict:
+    """
+    Decide what to do with one inbound message. Returns the outcome the bot acts on:
+
+    - honeypot_turn:    session already active, `turn` holds the /honeypot/turn result
+    - honeypot_started: new scam, session created, `detection` + `turn`
+    - alert:            scam but honeypot disabled, `detection` only
+    - ignored:          legitimate message
+    """
+    session = get_session_store().get(chat_id)
+    if session and session["active"]:
+        turn = await run_turn(chat_id, text, session["scam_type"])
+        return {"action": "honeypot_turn", "turn": turn}
+
+    detection = await asyncio.to_thread(predict_message, text)
+    is_scam = "scam" in str(detection.get("risk", "")).lower()
+    if not is_scam:
+        return {"action": "ignored", "detection": detection}
+    scam_type = guess_scam_type(text)
+    await asyncio.to_thread(emit, "detection", chat_id, {
+        **detection, "action": "honeypot_started" if honeypot_enabled else "alert", "scam_type": scam_type,
+    })
+    if not honeypot_enabled:
+        return {"action": "alert", "detection": detection}
+
+    turn = await run_turn(chat_id, text, scam_type)
+    return {"action": "honeypot_started", "detection": detection, "scam_type": scam_type, "turn": turn}
+
+
+def deliver(chat_id: str, text: str, outcome: dict, queue_id: int):
+    response = requests.post(
+        BOT_CALLBACK_URL,
+        json={"chat_id": chat_id, "text": text, "queue_id": queue_id, **outcome},
+        timeout=BOT_CALLBACK_TIMEOUT,
+    )
+    response.raise_for_status()
+
+
+async def handle_inbound(job: Job):
+    payload = job.payload
+    if "outcome" not in job.state:
+        job.state["outcome"] = await process_message(
+            job.chat_id, payload["text"], payload.get("honeypot_enabled", True)
+        )
+        await asyncio.to_thread(get_ingest_queue().save_state, job)
+
+    outcome = job.state["outcome"]
+    if outcome["action"] == "ignored":
+        return
+    await asyncio.to_thread(deliver, job.chat_id, payload["text"], outcome, job.id)
+
+
+_queue: Optional[MessageQueue] = None
+
+
+def is_ingest_consumer() -> bool:
+    """
+    Whether this process runs the queue workers. backend/serve.py sets
+    INGEST_CONSUMER=0 in all but one forked worker; the others only enqueue.
+    """
+    return os.getenv("INGEST_CONSUMER", "1") != "0"
+
+
+def get_ingest_queue() -> MessageQueue:
+    """Process-wide inbound queue (workers start with the app)."""
+    global _queue
+    if _queue is None:
+        _queue = MessageQueue(handle_inbound, recover=is_ingest_consumer())
+    return _queue
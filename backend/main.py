@@ -1,14 +1,67 @@
 # backend/main.py
-from fastapi import FastAPI
+import os
+import time
+import asyncio
+import tempfile
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from backend.schemas import TextInput, TextOutput
 from backend.model import predict_message
+from backend.warmup import readiness, start_warm_up
+from backend.online_train import (
+    CLASSES as LABEL_CLASSES,
+    ONLINE_TRAINING,
+    get_online_trainer,
+    record_label,
+    start_online_training,
+    stop_online_training,
+)
+from backend.honeypot_turn import (
+    SSE_HEADERS,
+    as_pieces,
+    opening_reply,
+    relay_reply,
+    run_turn,
+    sse_event,
+    stream_turn,
+)
+from backend.ingest import get_ingest_queue, is_ingest_consumer
 
 # Import AI Honeypot modules
 from app.core.persona_manager import select_persona
-from app.core.intelligence_extractor import extract_all_intelligence
-from app.core.conversation_agent import generate_reply
+from app.core.intelligence_extractor import extract_all_intelligence, StreamExtractor
+from app.core.document_text import MAX_DOCUMENT_BYTES, DocumentUnreadable, iter_document
+from app.core.conversation_agent import (
+    generate_reply_async,
+    generate_reply_stream,
+    get_prompt_stats,
+    history_windows,
+)
+from app.core.env import load_env
+from app.core.session_store import get_session_store, history_offset, summarize as summarize_session
+from app.core import event_bus, metrics, transcriber
+from app.core.domain_reputation import get_domain_reputation
+from app.core.fingerprint_retention import FINGERPRINT_RETENTION, get_retention
+from app.core.fingerprint_trends import backfill_rollups, backfill_status, get_trends, parse_time, start_backfill
+from app.core.reply_pool import REPLY_POOL, get_reply_pool
+from app.core.metrics import MetricsMiddleware
+from app.core.profiler import ProfilerBusy, RequestProfileMiddleware, get_request_profile, sample_process
+from app.core.transcriber import (
+    TranscriptionQueueFull,
+    TranscriptionUnavailable,
+    get_transcription_service,
+    shutdown_transcription_service,
+)
+from app.core.scam_detector import detect_scam_async
+from app.core.llm_batcher import get_llm_batcher
+from app.core.rate_limiter import (
+    LIMITERS,
+    RateLimitExceeded,
+    get_rate_limit_stats,
+    get_rate_limits,
+)
 
 # Import Fingerprint DB
 from app.core.fingerprint_db import (
@@ -23,13 +76,161 @@ from app.core.fingerprint_db import (
 )
 
 app = FastAPI(title="SafeTalk-AI with AI Honeypot")
+app.add_middleware(MetricsMiddleware)
+
+
+@app.on_event("startup")
+async def warm_up_dependencies():
+    # Model, fingerprint schema and Gemini SDKs load in the background; see /ready
+    start_warm_up()
+
+
+@app.on_event("startup")
+def start_session_store():
+    get_session_store().start()
+
+
+@app.on_event("startup")
+async def start_ingest_workers():
+    if is_ingest_consumer():
+        get_ingest_queue().start()
+
+
+@app.on_event("startup")
+def start_online_trainer():
+    # The ingest consumer trains; other workers swap in the model it saves
+    if ONLINE_TRAINING:
+        start_online_training(trains=is_ingest_consumer())
+
+
+@app.on_event("shutdown")
+def stop_online_trainer():
+    stop_online_training()
+
+
+@app.on_event("startup")
+def start_reply_pool():
+    # Opening replies are generated in the background, never on a request; only
+    # the ingest consumer runs turns in queue mode, so only it pays for the pools
+    if REPLY_POOL and is_ingest_consumer():
+        get_reply_pool().start()
+
+
+@app.on_event("shutdown")
+def stop_reply_pool():
+    get_reply_pool().stop()
+
+
+@app.on_event("startup")
+def start_fingerprint_retention():
+    # One process archives and compacts the fingerprint DB: the ingest consumer
+    if FINGERPRINT_RETENTION and is_ingest_consumer():
+        get_retention().start()
+
+
+@app.on_event("shutdown")
+def stop_fingerprint_retention():
+    get_retention().stop()
+
+
+@app.on_event("startup")
+def start_rollup_backfill():
+    # Sessions stored before the trend rollups existed are folded in once, by the ingest consumer
+    if is_ingest_consumer():
+        start_backfill()
+
+
+@app.on_event("shutdown")
+async def stop_ingest_workers():
+    await get_ingest_queue().stop()
+
+
+@app.on_event("shutdown")
+def stop_session_store():
+    get_session_store().stop()
+    shutdown_transcription_service()
+
+# Voice notes larger than this are rejected outright
+MAX_AUDIO_BYTES = 25 * 1024 * 1024
+
+load_env()
+
+# Admin endpoints need this in X-API-Key; without it they are closed
+API_KEY = os.getenv("API_KEY")
+# Opt-in for local development only: lets localhost use admin endpoints without API_KEY.
+# Never set it behind a reverse proxy on the same host, where every request is from localhost
+ADMIN_ALLOW_LOCALHOST = os.getenv("ADMIN_ALLOW_LOCALHOST", "0").lower() in ("1", "true", "yes")
+LOCAL_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+def _admin_allowed(client_host: Optional[str], api_key: Optional[str]) -> bool:
+    if API_KEY:
+        return api_key == API_KEY
+    return ADMIN_ALLOW_LOCALHOST and client_host in LOCAL_HOSTS
+
+
+def require_admin(request: Request, api_key: Optional[str]):
+    if _admin_allowed(request.client.host if request.client else None, api_key):
+        return
+    if API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid or missing X-API-Key")
+    raise HTTPException(status_code=403, detail="Set API_KEY to use admin endpoints")
+
+
+def _admin_scope(scope) -> bool:
+    """require_admin() for ASGI middleware: True if the request may use admin features."""
+    client = scope.get("client")
+    api_key = dict(scope["headers"]).get(b"x-api-key", b"").decode()
+    return _admin_allowed(client[0] if client else None, api_key)
+
+
+app.add_middleware(RequestProfileMiddleware, authorize=_admin_scope)
+
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded(request: Request, exc: RateLimitExceeded):
+    retry_after = max(1, round(exc.retry_after))
+    return JSONResponse(
+        status_code=429,
+        content={"error": str(exc), "limiter": exc.limiter, "retry_after": retry_after},
+        headers={"Retry-After": str(retry_after)},
+    )
 
 # New request/response models
 class HoneypotReplyRequest(BaseModel):
     scammer_message: str
     scam_type: str = "default"
+    # With a session_id the server keeps the history; conversation_history is
+    # only used by stateless callers.
+    session_id: Optional[str] = None
     conversation_history: Optional[List[dict]] = []
 
+class HoneypotTurnRequest(BaseModel):
+    session_id: str
+    scammer_message: str
+    scam_type: str = "default"
+    stream: bool = False
+
+class IngestRequest(BaseModel):
+    chat_id: str
+    text: str
+    honeypot_enabled: bool = True
+
+class RateLimitUpdate(BaseModel):
+    rate_per_minute: Optional[float] = None
+    burst: Optional[float] = None
+    max_wait_seconds: Optional[float] = None
+    enabled: Optional[bool] = None
+    # Limit a single chat id / model name instead of the default for all keys
+    key: Optional[str] = None
+
+class LabelledMessage(BaseModel):
+    message: str
+    label: str    # "legitimate" or "scam"
+
+class LabelBatch(BaseModel):
+    items: List[LabelledMessage]
+
 class IntelligenceRequest(BaseModel):
     message: str
 
@@ -39,6 +240,9 @@ class FingerprintStoreRequest(BaseModel):
     chat_id: Optional[str] = None
     message_count: int = 0
 
+class LinkCheckRequest(BaseModel):
+    links: List[str]
+
 class FingerprintSearchRequest(BaseModel):
     query: str
 
@@ -60,25 +264,46 @@ def analyze_text(input_data: TextInput):
     result = predict_message(input_data.message)
     return result
 
+@app.post("/detect-scam")
+async def detect_scam_hybrid(input_data: TextInput):
+    """
+    Hybrid rule-based + Gemini detection.
+    Uncertain messages are micro-batched into shared LLM calls.
+    """
+    return await detect_scam_async(input_data.message)
+
+@app.get("/detect-scam/batch-stats")
+def detect_scam_batch_stats():
+    """Micro-batcher stats: batch sizes, LLM calls saved, queueing latency added"""
+    return get_llm_batcher().stats()
+
 # ==========================================
 # AI HONEYPOT FEATURES
 # ==========================================
 
 @app.post("/honeypot/reply")
-def honeypot_reply(request: HoneypotReplyRequest):
+async def honeypot_reply(request: HoneypotReplyRequest):
     """
     Generate AI honeypot reply to engage scammer
     Uses AI personas to waste scammer's time and extract intelligence
+
+    Pass session_id (the chat id) to let the server keep the conversation;
+    then only the new scammer message needs to be sent each turn.
     """
+    if request.session_id:
+        return await _session_reply(request)
+
     # Select persona based on scam type
     persona = select_persona(request.scam_type)
     
-    # Generate reply
-    reply = generate_reply(
-        persona=persona,
-        scammer_message=request.scammer_message,
-        conversation_history=request.conversation_history
-    )
+    # Generate reply (an opening message can be answered from the reply pool)
+    reply = opening_reply(request.conversation_history, request.scam_type, request.scammer_message)
+    if reply is None:
+        reply = await generate_reply_async(
+            persona=persona,
+            scammer_message=request.scammer_message,
+            conversation_history=request.conversation_history
+        )
     
     return {
         "reply": reply,
@@ -86,6 +311,154 @@ def honeypot_reply(request: HoneypotReplyRequest):
         "scam_type": request.scam_type
     }
 
+
+async def _session_reply(request: HoneypotReplyRequest) -> dict:
+    store = get_session_store()
+    session = store.get_or_create(request.session_id, request.scam_type)
+
+    persona = select_persona(session["scam_type"])
+    reply = opening_reply(session["history"], session["scam_type"], request.scammer_message, request.session_id)
+    if reply is None:
+        reply = await generate_reply_async(
+            persona=persona,
+            scammer_message=request.scammer_message,
+            conversation_history=session["history"],
+            chat_id=request.session_id,
+            history_offset=history_offset(session),
+        )
+    # Both sides are recorded only once the reply exists, so a failed or
+    # rate-limited call can be retried without duplicating the scammer turn
+    session = store.append_turns(
+        request.session_id, [("scammer", request.scammer_message), ("victim", reply)]
+    )
+
+    return {
+        "reply": reply,
+        "persona_name": persona["name"],
+        "scam_type": session["scam_type"],
+        "session_id": request.session_id,
+        "turn": session["turns"],
+    }
+
+
+@app.post("/honeypot/reply/stream")
+async def honeypot_reply_stream(request: HoneypotReplyRequest):
+    """
+    Streaming variant of /honeypot/reply over Server-Sent Events.
+
+    Events: `token` (text as generated), `sentence` (each completed sentence,
+    ready to send), `done` (full reply + timings) or `error`.
+    """
+    store = get_session_store()
+    if request.session_id:
+        session = store.get_or_create(request.session_id, request.scam_type)
+        scam_type = session["scam_type"]
+        history = session["history"]
+        offset = history_offset(session)
+    else:
+        scam_type = request.scam_type
+        history = request.conversation_history
+        offset = 0
+
+    persona = select_persona(scam_type)
+
+    started = time.perf_counter()
+
+    async def finish(reply: str, first_token_ms: float) -> dict:
+        turn = None
+        if request.session_id:
+            turn = store.append_turns(
+                request.session_id, [("scammer", request.scammer_message), ("victim", reply)]
+            )["turns"]
+        return {
+            "reply": reply,
+            "persona_name": persona["name"],
+            "scam_type": scam_type,
+            "session_id": request.session_id,
+            "turn": turn,
+            "first_token_ms": first_token_ms,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    pooled = opening_reply(history, scam_type, request.scammer_message, request.session_id)
+    pieces = as_pieces(pooled) if pooled else generate_reply_stream(
+        persona=persona,
+        scammer_message=request.scammer_message,
+        conversation_history=history,
+        chat_id=request.session_id,
+        history_offset=offset,
+    )
+    return StreamingResponse(
+        relay_reply(pieces, started, finish),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@app.post("/honeypot/turn")
+async def honeypot_turn(request: HoneypotTurnRequest):
+    """
+    Full honeypot turn in one call: persona reply, intel extracted from the
+    new message (plus the delta vs. the session) and the fingerprint profile.
+    Extraction and fingerprinting run concurrently with reply generation;
+    per-stage timings are returned under `timings`.
+
+    With stream=true the reply is streamed as SSE (same events as
+    /honeypot/reply/stream) and the `done` event carries the full result.
+    """
+    if request.stream:
+        return StreamingResponse(
+            stream_turn(request.session_id, request.scammer_message, request.scam_type),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
+        )
+    return await run_turn(request.session_id, request.scammer_message, request.scam_type)
+
+
+@app.get("/honeypot/sessions")
+def honeypot_sessions():
+    """Summaries of all live honeypot sessions"""
+    sessions = get_session_store().list_sessions()
+    return {"count": len(sessions), "sessions": sessions}
+
+
+@app.get("/honeypot/session/{session_id}")
+def honeypot_session(session_id: str, include_history: bool = False):
+    """Look up a honeypot session (e.g. to resume it after a bot restart)"""
+    session = get_session_store().get(session_id)
+    if not session:
+        return {"found": False, "message": "No live session for this chat."}
+    result = {"found": True, "session": summarize_session(session)}
+    if include_history:
+        result["session"]["history"] = session["history"]
+    return result
+
+
+@app.post("/honeypot/session/{session_id}/close")
+def honeypot_session_close(session_id: str):
+    """Mark a session inactive (e.g. after the scammer was blocked)"""
+    session = get_session_store().update(session_id, active=False)
+    return {"success": session is not None}
+
+
+@app.delete("/honeypot/session/{session_id}")
+def honeypot_session_delete(session_id: str):
+    """Forget a session and its history window"""
+    deleted = get_session_store().delete(session_id)
+    history_windows.drop(session_id)
+    return {"success": deleted}
+
+@app.get("/honeypot/reply-pool/stats")
+def honeypot_reply_pool_stats():
+    """First-turn pool hit rate, pool sizes and refill counts"""
+    return get_reply_pool().stats()
+
+
+@app.get("/honeypot/prompt-stats")
+def honeypot_prompt_stats():
+    """Prompt assembly cost per reply and history window usage"""
+    return get_prompt_stats()
+
 @app.post("/honeypot/extract")
 def honeypot_extract_intelligence(request: IntelligenceRequest):
     """
@@ -95,6 +468,206 @@ def honeypot_extract_intelligence(request: IntelligenceRequest):
     intelligence = extract_all_intelligence(request.message)
     return intelligence
 
+
+def _extract_document(document) -> dict:
+    extractor = StreamExtractor()
+    for text in iter_document(document):
+        extractor.feed(text)
+    intelligence = extractor.finish()
+    return {**intelligence, "chars": extractor.chars, "truncated": extractor.truncated}
+
+
+@app.post("/honeypot/extract/document")
+async def extract_document_intelligence(request: Request):
+    """
+    Extract intelligence from a forwarded document sent as the raw request
+    body: a PDF or plain text of any length. The upload is spooled to a
+    temp file and scanned in overlapping windows, so memory stays flat.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as document:
+        size = 0
+        async for data in request.stream():
+            size += len(data)
+            if size > MAX_DOCUMENT_BYTES:
+                return JSONResponse(status_code=413, content={"error": "Document too large."})
+            document.write(data)
+        if not size:
+            return JSONResponse(status_code=400, content={"error": "Empty document."})
+        document.seek(0)
+        try:
+            return await asyncio.to_thread(_extract_document, document)
+        except DocumentUnreadable as e:
+            return JSONResponse(status_code=422, content={"error": str(e)})
+
+# ==========================================
+# VOICE NOTE TRANSCRIPTION
+# ==========================================
+
+@app.post("/transcribe")
+async def transcribe_audio(request: Request):
+    """
+    Transcribe a voice note sent as the raw request body (any ffmpeg-readable
+    format, e.g. audio/ogg from WhatsApp). No temp files are written; the
+    speech model stays loaded in a bounded pool of worker processes.
+    Returns 503 with Retry-After when the transcription queue is full or the
+    worker pool had to be restarted.
+    """
+    data = await request.body()
+    if not data:
+        return JSONResponse(status_code=400, content={"error": "Empty audio payload."})
+    if len(data) > MAX_AUDIO_BYTES:
+        return JSONResponse(status_code=413, content={"error": "Audio payload too large."})
+
+    try:
+        return await get_transcription_service().transcribe(data)
+    except TranscriptionQueueFull as e:
+        return JSONResponse(status_code=503, headers={"Retry-After": "2"}, content={"error": str(e)})
+    except asyncio.TimeoutError:
+        return JSONResponse(status_code=504, content={"error": "Transcription timed out."})
+    except TranscriptionUnavailable as e:
+        return JSONResponse(status_code=503, headers={"Retry-After": "5"}, content={"error": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=422, content={"error": f"Transcription failed: {e}"})
+
+
+@app.get("/transcribe/stats")
+def transcribe_stats():
+    """Transcription pool state: running/queued jobs, rejections, per-job timing"""
+    return get_transcription_service().stats()
+
+# ==========================================
+# INBOUND MESSAGE QUEUE
+# ==========================================
+
+@app.post("/ingest/enqueue")
+def ingest_enqueue(request: IngestRequest):
+    """
+    Durably queue an inbound chat message and return immediately. Workers
+    handle each chat's messages in order (chats in parallel) and post the
+    outcome to the bot's BOT_CALLBACK_URL.
+    """
+    queue = get_ingest_queue()
+    queue_id = queue.enqueue(
+        request.chat_id,
+        {"text": request.text, "honeypot_enabled": request.honeypot_enabled},
+    )
+    return {"queued": True, "id": queue_id, "depth": queue.metrics()["depth"]}
+
+
+@app.get("/ingest/metrics")
+def ingest_metrics():
+    """Queue depth, lag, in-flight work and retry/failure counts"""
+    return get_ingest_queue().metrics()
+
+# ==========================================
+# EVENTS (SSE)
+# ==========================================
+
+@app.get("/events")
+async def events_stream(
+    digest: bool = False,
+    window: Optional[float] = None,
+    types: Optional[str] = None,
+    chat_id: Optional[str] = None,
+    last_event_id: Optional[int] = Header(None),
+):
+    """
+    Server-sent detection / intel / fingerprint events. With digest=true a
+    chat's events are coalesced for `window` seconds (EVENT_DIGEST_WINDOW)
+    into one `digest` event. Reconnect with Last-Event-ID to resume;
+    delivery is at-least-once.
+    """
+    wanted = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    if wanted and set(wanted) - set(event_bus.EVENT_TYPES):
+        raise HTTPException(status_code=400, detail=f"types must be among {list(event_bus.EVENT_TYPES)}")
+    bus = event_bus.get_event_bus()
+    # A fresh subscriber starts at the present; a resuming one replays what it missed
+    after_id = last_event_id if last_event_id is not None else await asyncio.to_thread(bus.last_id)
+    coalesce = event_bus.Digest(window if window is not None else event_bus.EVENT_DIGEST_WINDOW) if digest else None
+
+    async def stream():
+        yield ": connected\n\n"
+        async for name, data, event_id in event_bus.stream(bus, after_id, coalesce, wanted, chat_id):
+            yield sse_event(name, data, event_id) if name else ": keepalive\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.get("/events/stats")
+def events_stats():
+    """Events published per type, journal size and live subscribers"""
+    return event_bus.get_event_bus().stats()
+
+# ==========================================
+# ADMIN: LLM RATE LIMITS
+# ==========================================
+
+@app.get("/rate-limits/stats")
+def rate_limit_stats():
+    """Per-limiter call, deferral and rejection counts"""
+    return get_rate_limit_stats()
+
+
+@app.get("/admin/rate-limits")
+def admin_rate_limits(request: Request, x_api_key: Optional[str] = Header(None)):
+    """Current per-chat and per-model token bucket settings"""
+    require_admin(request, x_api_key)
+    return {"limits": get_rate_limits(), "stats": get_rate_limit_stats()}
+
+
+@app.put("/admin/rate-limits/{limiter}")
+def admin_update_rate_limit(
+    limiter: str,
+    update: RateLimitUpdate,
+    request: Request,
+    x_api_key: Optional[str] = Header(None),
+):
+    """
+    Change a limiter ("chat" or "model") at runtime. Existing buckets keep
+    their balance and adopt the new rate/burst immediately.
+    """
+    require_admin(request, x_api_key)
+    if limiter not in LIMITERS:
+        raise HTTPException(status_code=404, detail=f"Unknown limiter '{limiter}'")
+    LIMITERS[limiter].configure(
+        rate_per_minute=update.rate_per_minute,
+        burst=update.burst,
+        max_wait=update.max_wait_seconds,
+        enabled=update.enabled,
+        key=update.key,
+    )
+    return LIMITERS[limiter].limits()
+
+# ==========================================
+# ADMIN: ONLINE MODEL TRAINING
+# ==========================================
+
+@app.post("/admin/model/labels")
+def admin_add_labels(batch: LabelBatch, request: Request, x_api_key: Optional[str] = Header(None)):
+    """Queue reviewed messages for the next incremental training round"""
+    require_admin(request, x_api_key)
+    bad = [item.label for item in batch.items if item.label not in LABEL_CLASSES]
+    if bad:
+        raise HTTPException(status_code=422, detail=f"label must be one of {list(LABEL_CLASSES)}")
+    for item in batch.items:
+        record_label(item.message, item.label)
+    return {"queued": len(batch.items)}
+
+
+@app.post("/admin/model/retrain")
+async def admin_retrain(request: Request, x_api_key: Optional[str] = Header(None)):
+    """Run one training round now (off the event loop; scoring continues on the old model)"""
+    require_admin(request, x_api_key)
+    result = await asyncio.to_thread(get_online_trainer().train_round)
+    return result or {"status": "no new labels", **get_online_trainer().stats()}
+
+
+@app.get("/admin/model/stats")
+def admin_model_stats(request: Request, x_api_key: Optional[str] = Header(None)):
+    """Model version, samples seen, last training time and swap latency"""
+    require_admin(request, x_api_key)
+    return {"online_training": ONLINE_TRAINING, **get_online_trainer().stats()}
+
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
@@ -109,19 +682,159 @@ def health_check():
         },
         "endpoints": {
             "detect_scam": "/analyze-text",
+            "detect_scam_hybrid": "/detect-scam",
+            "detect_scam_batch_stats": "/detect-scam/batch-stats",
             "honeypot_reply": "/honeypot/reply",
+            "honeypot_reply_stream": "/honeypot/reply/stream",
+            "honeypot_turn": "/honeypot/turn",
+            "honeypot_prompt_stats": "/honeypot/prompt-stats",
+            "honeypot_reply_pool_stats": "/honeypot/reply-pool/stats",
+            "honeypot_sessions": "/honeypot/sessions",
+            "honeypot_session": "/honeypot/session/{session_id}",
             "extract_intel": "/honeypot/extract",
+            "extract_intel_document": "/honeypot/extract/document",
+            "ingest_enqueue": "/ingest/enqueue",
+            "ingest_metrics": "/ingest/metrics",
+            "events": "/events?digest=true",
+            "events_stats": "/events/stats",
+            "rate_limit_stats": "/rate-limits/stats",
+            "admin_rate_limits": "/admin/rate-limits",
+            "admin_model_labels": "/admin/model/labels",
+            "admin_model_retrain": "/admin/model/retrain",
+            "admin_model_stats": "/admin/model/stats",
+            "links_check": "/links/check",
+            "links_stats": "/links/stats",
+            "admin_links_reload": "/admin/links/reload",
+            "transcribe": "/transcribe",
+            "transcribe_stats": "/transcribe/stats",
+            "ready": "/ready",
+            "metrics": "/metrics",
+            "debug_profile": "/debug/profile?seconds=N",
             "fingerprint_store": "/fingerprint/store",
             "fingerprint_lookup": "/fingerprint/lookup/{identifier}",
             "fingerprint_search": "/fingerprint/search",
             "fingerprint_all": "/fingerprint/all",
             "fingerprint_stats": "/fingerprint/stats",
+            "fingerprint_trends": "/fingerprint/trends?from=&to=&bucket=hour|day",
             "fingerprint_profile": "/fingerprint/{fingerprint_id}",
             "fingerprint_status": "/fingerprint/status",
-            "fingerprint_merge": "/fingerprint/merge"
+            "fingerprint_merge": "/fingerprint/merge",
+            "admin_fingerprint_retention": "/admin/fingerprint/retention",
+            "admin_fingerprint_retention_run": "/admin/fingerprint/retention/run",
+            "admin_fingerprint_rollups": "/admin/fingerprint/rollups",
+            "admin_fingerprint_rollups_backfill": "/admin/fingerprint/rollups/backfill"
         }
     }
 
+@app.get("/ready")
+def ready_check():
+    """503 until the classifier and fingerprint DB are loaded; per-subsystem detail either way"""
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+# ==========================================
+# METRICS (Prometheus text format)
+# ==========================================
+
+def _transcription_gauge(field: str):
+    def read():
+        service = transcriber._service    # don't start a worker pool just to scrape it
+        return service.stats()[field] if service else 0
+    return read
+
+
+metrics.gauge("hive_ingest_queue_depth", "Inbound messages waiting or in flight",
+              lambda: get_ingest_queue().metrics()["depth"])
+metrics.gauge("hive_rate_limit_waiting", "Gemini calls currently deferred by a rate limiter",
+              lambda: {(name,): stats["waiting_now"] for name, stats in get_rate_limit_stats().items()},
+              labelnames=("limiter",))
+metrics.gauge("hive_reply_pool_ready", "Pre-generated opening replies ready per persona/template",
+              lambda: {(key,): size for key, size in get_reply_pool().sizes().items()}, labelnames=("pool",))
+metrics.gauge("hive_fingerprint_db_bytes", "Size of the fingerprint DB files",
+              lambda: {(name,): get_retention().stats()[f"{name}_bytes"] for name in ("db", "wal", "archive")},
+              labelnames=("file",))
+metrics.gauge("hive_transcription_running", "Voice notes being transcribed", _transcription_gauge("running"))
+metrics.gauge("hive_transcription_queued", "Voice notes waiting for a worker", _transcription_gauge("queued"))
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """
+    Per-stage latency histograms (HTTP routes, classifier, extractors,
+    fingerprint DB, Gemini per model) and queue gauges for Prometheus.
+    Collection is off with METRICS_ENABLED=0.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# ==========================================
+# ADMIN: PROFILING
+# ==========================================
+
+@app.get("/debug/profile")
+async def debug_profile(
+    request: Request,
+    seconds: float = 10.0,
+    interval_ms: float = 5.0,
+    include_idle: bool = False,
+    x_api_key: Optional[str] = Header(None),
+):
+    """
+    Sample every thread's stack in this worker for `seconds` (max
+    PROFILE_MAX_SECONDS) and return collapsed stacks for flamegraph.pl or
+    speedscope. Sampling runs in a background thread, so the worker keeps
+    serving traffic meanwhile. With several uvicorn workers each call
+    profiles the one worker that received it.
+    """
+    require_admin(request, x_api_key)
+    try:
+        summary, collapsed = await asyncio.to_thread(sample_process, seconds, interval_ms, include_idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    headers = {f"X-Profile-{key.replace('_', '-').title()}": str(value) for key, value in summary.items()}
+    return PlainTextResponse(collapsed, headers=headers)
+
+
+@app.get("/debug/profile/requests/{profile_id}")
+def debug_request_profile(profile_id: str, request: Request, x_api_key: Optional[str] = Header(None)):
+    """cProfile report of one request sent with `X-Profile: 1` (see its X-Profile-Id header)."""
+    require_admin(request, x_api_key)
+    report = get_request_profile(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired profile id")
+    return PlainTextResponse(report)
+
+# ==========================================
+# PHISHING LINK REPUTATION
+# ==========================================
+
+@app.post("/links/check")
+async def links_check(request: LinkCheckRequest):
+    """
+    Check a batch of URLs against known phishing domains (stored link
+    identifiers plus blocklists). A link matches if its host or any parent
+    domain is listed.
+    """
+    # The first call builds the index; later ones are a few dict lookups per link
+    results = await asyncio.to_thread(lambda: get_domain_reputation().check(request.links))
+    return {
+        "count": len(results),
+        "malicious": sum(result["malicious"] for result in results),
+        "results": results,
+    }
+
+
+@app.get("/links/stats")
+def links_stats():
+    """Indexed domain count, reloads and checks served"""
+    return get_domain_reputation().stats()
+
+
+@app.post("/admin/links/reload")
+async def admin_links_reload(request: Request, x_api_key: Optional[str] = Header(None)):
+    """Rebuild the index from the fingerprint DB and blocklists; checks use the old one meanwhile"""
+    require_admin(request, x_api_key)
+    return await asyncio.to_thread(lambda: get_domain_reputation().reload())
+
 # ==========================================
 # SCAMMER FINGERPRINT DATABASE
 # ==========================================
@@ -170,6 +883,29 @@ def fingerprint_stats():
     return get_stats()
 
 
+@app.get("/fingerprint/trends")
+def fingerprint_trends(
+    from_: Optional[str] = Query(None, alias="from"),
+    to: Optional[str] = None,
+    bucket: str = "hour",
+    scam_type: Optional[str] = None,
+    status: Optional[str] = None,
+    identifier_type: Optional[str] = None,
+):
+    """
+    Sessions per hour or day between `from` and `to` (ISO dates or
+    datetimes, UTC by default; the last week if omitted), with breakdowns by
+    scam type, scammer status and identifier type. Answered from rollup
+    tables, never by scanning sessions.
+    """
+    try:
+        start = parse_time(from_) if from_ else None
+        end = parse_time(to) if to else None
+        return get_trends(start, end, bucket, scam_type, status, identifier_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.get("/fingerprint/{fingerprint_id}")
 def fingerprint_profile(fingerprint_id: str):
     """Get a specific scammer profile by fingerprint ID."""
@@ -195,3 +931,33 @@ def fingerprint_merge(request: MergeRequest):
     if not result:
         return {"success": False, "message": "One or both fingerprints not found."}
     return {"success": True, "merged_profile": result}
+
+
+@app.get("/admin/fingerprint/retention")
+def admin_fingerprint_retention(request: Request, x_api_key: Optional[str] = Header(None)):
+    """Sessions archived, space reclaimed and current hot / WAL / archive file sizes"""
+    require_admin(request, x_api_key)
+    return get_retention().stats()
+
+
+@app.post("/admin/fingerprint/retention/run")
+async def admin_fingerprint_retention_run(
+    request: Request, days: Optional[float] = None, x_api_key: Optional[str] = Header(None)
+):
+    """Run a retention pass now (archive sessions older than `days`, vacuum, checkpoint)"""
+    require_admin(request, x_api_key)
+    return await asyncio.to_thread(lambda: get_retention().run_once(days))
+
+
+@app.get("/admin/fingerprint/rollups")
+def admin_fingerprint_rollups(request: Request, x_api_key: Optional[str] = Header(None)):
+    """Whether sessions stored before the trend rollups still await the backfill"""
+    require_admin(request, x_api_key)
+    return backfill_status()
+
+
+@app.post("/admin/fingerprint/rollups/backfill")
+async def admin_fingerprint_rollups_backfill(request: Request, x_api_key: Optional[str] = Header(None)):
+    """Fold any sessions not yet in the trend rollups into them now"""
+    require_admin(request, x_api_key)
+    return await asyncio.to_thread(backfill_rollups)
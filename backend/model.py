@@ -1,13 +1,20 @@
 # backend/model.py
-import joblib
-import numpy as np
+import os
+import threading
 
-# Load trained components
-try:
-    model = joblib.load("model/scam_detector.joblib")
-    vectorizer = joblib.load("model/vectorizer.joblib")
-except Exception as e:
-    raise RuntimeError(f"❌ Failed to load model or vectorizer: {e}")
+from app.core.metrics import MODEL_SECONDS
+
+MODEL_PATH = "model/scam_detector.joblib"
+VECTORIZER_PATH = "model/vectorizer.joblib"
+
+# MODEL_MMAP_MODE=r memory-maps the numpy arrays inside the (uncompressed)
+# joblib files, so processes on one host share them through the page cache
+MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE") or None
+
+# Loaded on first use (or by backend.warmup) so importing the API doesn't
+# pay for scikit-learn + scipy before it can answer /health
+_components = None
+_load_lock = threading.Lock()
 
 # Label mapping
 LABELS = {
@@ -19,10 +26,47 @@ LABELS = {
     "safe": "Message appears legitimate"
 }
 
+
+def load_model():
+    """Load the trained classifier and vectorizer once; returns (model, vectorizer)."""
+    global _components
+    if _components is None:
+        with _load_lock:
+            if _components is None:
+                import joblib
+                try:
+                    model = joblib.load(MODEL_PATH, mmap_mode=MODEL_MMAP_MODE)
+                    vectorizer = joblib.load(VECTORIZER_PATH, mmap_mode=MODEL_MMAP_MODE)
+                except Exception as e:
+                    raise RuntimeError(f"❌ Failed to load model or vectorizer: {e}")
+                _components = (model, vectorizer)
+    return _components
+
+
+def is_loaded() -> bool:
+    return _components is not None
+
+
+def swap_model(model, vectorizer):
+    """
+    Serve a new (model, vectorizer) pair from the next prediction on; returns
+    the previous pair. Predictions read the pair once, so an in-flight one
+    finishes on the old model and nothing waits for the swap.
+    """
+    global _components
+    with _load_lock:
+        previous, _components = _components, (model, vectorizer)
+    return previous
+
+
 def predict_message(message: str):
-    vectorized = vectorizer.transform([message])
-    prediction = model.predict(vectorized)[0]
-    proba = np.max(model.predict_proba(vectorized))  # highest score among classes
+    model, vectorizer = load_model()
+    with MODEL_SECONDS.time("vectorize"):
+        vectorized = vectorizer.transform([message])
+    with MODEL_SECONDS.time("predict"):
+        prediction = model.predict(vectorized)[0]
+    with MODEL_SECONDS.time("predict_proba"):
+        proba = model.predict_proba(vectorized).max()  # highest score among classes
 
     # Define reason based on returned label
     reason = LABELS.get(prediction.lower(), "Result undefined by AI")
@@ -32,3 +76,26 @@ def predict_message(message: str):
         "confidence": round(proba, 2),
         "reason": reason
     }
+
+
+def predict_messages(messages: list) -> list:
+    """
+    predict_message() for a batch: one vectorizer and one predict_proba call
+    for all of `messages` (what bulk scans use; a forest's predict() is the
+    argmax of predict_proba, so the labels are the same).
+    """
+    model, vectorizer = load_model()
+    if not messages:
+        return []
+    with MODEL_SECONDS.time("vectorize"):
+        vectorized = vectorizer.transform(messages)
+    with MODEL_SECONDS.time("predict_proba"):
+        proba = model.predict_proba(vectorized)
+    results = []
+    for label, confidence in zip(model.classes_[proba.argmax(axis=1)], proba.max(axis=1)):
+        results.append({
+            "risk": label,
+            "confidence": round(confidence, 2),
+            "reason": LABELS.get(label.lower(), "Result undefined by AI"),
+        })
+    return results
@@ -0,0 +1,330 @@
+# backend/online_train.py
+"""
+Incremental training of the scam classifier.
+
+train_model.py refits TF-IDF + a random forest from scratch. This module
+keeps a HashingVectorizer (stateless, so new vocabulary needs no refit) and
+an SGD logistic regression that is updated with partial_fit() as labelled
+messages arrive:
+
+- record_label() appends {"message", "label", "source"} lines to a JSONL
+  spool (ONLINE_LABELS_PATH). POST /admin/model/labels adds reviewed ones
+  of either class. With ONLINE_SELF_LABELS the honeypot also records every
+  scammer message it answers; those are the model's own detections, so
+  they train at SELF_LABEL_WEIGHT rather than full weight.
+- OnlineTrainer.train_round() claims the spool, fits a copy of the current
+  classifier on it (plus a replay sample of data/messages.csv so a stream
+  of scam-only labels doesn't drift the model), and scores it on a holdout
+  of the CSV that is never trained on. Only if neither accuracy nor scam
+  recall is below the served model's is it saved and hot-swapped into
+  backend.model; rounds with no labels do nothing. Scoring keeps using the
+  old model until the swap.
+- In a multi-worker deployment only the ingest consumer trains; the other
+  workers follow the saved model file and swap it in when it changes.
+
+    python -m backend.online_train            # one round, e.g. from cron
+"""
+import copy
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+from backend import model as served_model
+
+ONLINE_TRAINING = os.getenv("ONLINE_TRAINING", "0").lower() in ("1", "true", "yes")
+ONLINE_TRAIN_INTERVAL = float(os.getenv("ONLINE_TRAIN_INTERVAL", "60"))
+ONLINE_LABELS_PATH = os.getenv("ONLINE_LABELS_PATH", "data/new_labels.jsonl")
+ONLINE_MODEL_PATH = os.getenv("ONLINE_MODEL_PATH", "model/online_scam_detector.joblib")
+# Base rows mixed into every round (the whole CSV while it is this small)
+ONLINE_REPLAY_SIZE = int(os.getenv("ONLINE_REPLAY_SIZE", "500"))
+BASE_DATASET_PATH = "data/messages.csv"
+# Passes over the base dataset when there is no saved online model yet
+BOOTSTRAP_EPOCHS = 20
+# Every Nth row of each class in the base dataset is held out to vet a new model before the swap
+HOLDOUT_EVERY = 4
+# The honeypot labels the messages it answers as scam (the model's own detections), off by default
+ONLINE_SELF_LABELS = os.getenv("ONLINE_SELF_LABELS", "0").lower() in ("1", "true", "yes")
+# Training weight of those self-labels, relative to reviewed ones
+SELF_LABEL_WEIGHT = float(os.getenv("ONLINE_SELF_LABEL_WEIGHT", "0.2"))
+
+CLASSES = ("legitimate", "scam")
+# Where a label came from: a reviewer (admin API) or the honeypot's own detection
+SOURCES = ("review", "honeypot")
+
+_spool_lock = threading.Lock()
+
+
+def new_vectorizer():
+    from sklearn.feature_extraction.text import HashingVectorizer
+    return HashingVectorizer(n_features=2 ** 18, ngram_range=(1, 2), alternate_sign=False)
+
+
+def new_classifier():
+    from sklearn.linear_model import SGDClassifier
+    return SGDClassifier(loss="log_loss", alpha=1e-4, random_state=42)
+
+
+def record_label(message: str, label: str, path: str = None, source: str = "review"):
+    """Queue one labelled message for the next training round."""
+    if label not in CLASSES:
+        raise ValueError(f"label must be one of {CLASSES}, got {label!r}")
+    if source not in SOURCES:
+        raise ValueError(f"source must be one of {SOURCES}, got {source!r}")
+    line = json.dumps({"message": message, "label": label, "source": source, "at": time.time()},
+                      ensure_ascii=False) + "\n"
+    path = path or ONLINE_LABELS_PATH
+    with _spool_lock:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:    # O_APPEND: whole lines from every worker
+            f.write(line)
+
+
+def _claim_labels(path: str):
+    """
+    Move the spool aside and read it; returns (records, claimed_path). A
+    claimed file left by a crashed round is picked up again first.
+    """
+    claimed = path + ".training"
+    with _spool_lock:
+        if not os.path.exists(claimed):
+            if not os.path.exists(path):
+                return [], None
+            os.replace(path, claimed)
+    records = []
+    with open(claimed, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue    # a torn line from a crash mid-append
+            if record.get("label") in CLASSES and record.get("message"):
+                records.append(record)
+    return records, claimed
+
+
+def _base_rows(path: str) -> tuple:
+    """(training rows, holdout rows) of the base dataset; the split is fixed, so the holdout stays unseen."""
+    import pandas as pd
+    df = pd.read_csv(path)
+    train, holdout, seen = [], [], {}
+    for row in zip(df["message"], df["label"]):
+        seen[row[1]] = seen.get(row[1], 0) + 1
+        (holdout if seen[row[1]] % HOLDOUT_EVERY == 0 else train).append(row)
+    return train, holdout
+
+
+def _weight(record: dict) -> float:
+    return SELF_LABEL_WEIGHT if record.get("source") == "honeypot" else 1.0
+
+
+def evaluate(classifier, vectorizer, rows: list) -> dict:
+    """Accuracy and scam recall of a (classifier, vectorizer) pair on labelled rows."""
+    texts, labels = zip(*rows)
+    predicted = classifier.predict(vectorizer.transform(texts))
+    scams = [p for p, label in zip(predicted, labels) if label == "scam"]
+    return {
+        "accuracy": round(sum(p == label for p, label in zip(predicted, labels)) / len(labels), 4),
+        "recall": round(sum(p == "scam" for p in scams) / len(scams), 4) if scams else 1.0,
+    }
+
+
+class OnlineTrainer:
+    def __init__(self, model_path: str = None, labels_path: str = None, dataset_path: str = BASE_DATASET_PATH):
+        self.model_path = model_path or ONLINE_MODEL_PATH
+        self.labels_path = labels_path or ONLINE_LABELS_PATH
+        self.dataset_path = dataset_path
+        self.vectorizer = new_vectorizer()
+        self._classifier = None
+        self._loaded_mtime = None
+        self._base = None
+        self._holdout = None
+        self._round_lock = threading.Lock()
+        self._stats = {
+            "version": 0,
+            "rounds": 0,
+            "rejected_rounds": 0,
+            "samples_seen": 0,
+            "last_round_samples": 0,
+            "last_train_seconds": None,
+            "last_swap_ms": None,
+            "last_round_at": None,
+            "last_holdout": None,
+        }
+
+    def _load_base(self):
+        if self._base is None:
+            self._base, self._holdout = _base_rows(self.dataset_path)
+
+    def _replay(self) -> list:
+        self._load_base()
+        if len(self._base) <= ONLINE_REPLAY_SIZE:
+            return list(self._base)
+        return random.sample(self._base, ONLINE_REPLAY_SIZE)
+
+    def _starting_point(self):
+        """Saved online model if there is one, else a fresh classifier fit on the base dataset."""
+        if os.path.exists(self.model_path):
+            import joblib
+            classifier, _ = joblib.load(self.model_path)
+            return classifier, 0
+        classifier = new_classifier()
+        rows = self._replay()
+        for epoch in range(BOOTSTRAP_EPOCHS):
+            random.Random(epoch).shuffle(rows)
+            texts, labels = zip(*rows)
+            classifier.partial_fit(self.vectorizer.transform(texts), labels, classes=CLASSES)
+        return classifier, len(rows)
+
+    def _save(self, classifier):
+        import joblib
+        os.makedirs(os.path.dirname(self.model_path) or ".", exist_ok=True)
+        tmp = f"{self.model_path}.{os.getpid()}.tmp"
+        joblib.dump((classifier, self.vectorizer), tmp)
+        os.replace(tmp, self.model_path)    # followers never see a half-written file
+        self._loaded_mtime = os.path.getmtime(self.model_path)
+
+    def _swap(self, classifier) -> float:
+        started = time.perf_counter()
+        served_model.swap_model(classifier, self.vectorizer)
+        return (time.perf_counter() - started) * 1000
+
+    def _vet(self, classifier) -> tuple:
+        """(accepted, holdout scores): the candidate may not score below the served model on either metric."""
+        self._load_base()
+        candidate = evaluate(classifier, self.vectorizer, self._holdout)
+        served = evaluate(*served_model.load_model(), self._holdout)
+        accepted = all(candidate[metric] >= served[metric] for metric in candidate)
+        return accepted, {"candidate": candidate, "served": served}
+
+    def train_round(self):
+        """
+        Fold the spooled labels into the model and hot-swap it if it holds
+        up on the holdout. Returns the round's stats (with "swapped"), or
+        None if there was nothing new to learn.
+        """
+        with self._round_lock:
+            records, claimed = _claim_labels(self.labels_path)
+            if not records:
+                if claimed:
+                    os.remove(claimed)
+                return None
+
+            started = time.perf_counter()
+            if self._classifier is None:
+                classifier, bootstrapped = self._starting_point()
+            else:
+                # Train a copy: the served classifier is being read by predictions
+                classifier, bootstrapped = copy.deepcopy(self._classifier), 0
+            rows = [(r["message"], r["label"], _weight(r)) for r in records]
+            rows += [(message, label, 1.0) for message, label in self._replay()]
+            random.shuffle(rows)
+            texts, labels, weights = zip(*rows)
+            classifier.partial_fit(self.vectorizer.transform(texts), labels, classes=CLASSES,
+                                   sample_weight=list(weights))
+            train_seconds = time.perf_counter() - started
+            accepted, holdout = self._vet(classifier)
+            if claimed:
+                os.remove(claimed)
+
+            self._stats.update(
+                rounds=self._stats["rounds"] + 1,
+                samples_seen=self._stats["samples_seen"] + len(records) + bootstrapped,
+                last_round_samples=len(records),
+                last_train_seconds=round(train_seconds, 4),
+                last_round_at=time.time(),
+                last_holdout=holdout,
+            )
+            if not accepted:
+                self._stats["rejected_rounds"] += 1
+                print(f"⚠️ Online model not swapped: holdout {holdout['candidate']} "
+                      f"is below the served model's {holdout['served']}")
+                return {**self.stats(), "swapped": False}
+
+            self._save(classifier)
+            swap_ms = self._swap(classifier)
+            self._classifier = classifier
+            self._stats.update(version=self._stats["version"] + 1, last_swap_ms=round(swap_ms, 4))
+            print(f"✅ Online model v{self._stats['version']}: {len(records)} new labels, "
+                  f"trained in {train_seconds:.3f}s, swapped in {swap_ms:.3f}ms")
+            return {**self.stats(), "swapped": True}
+
+    def follow(self):
+        """Swap in the saved model if another process has written a newer one."""
+        try:
+            mtime = os.path.getmtime(self.model_path)
+        except OSError:
+            return None
+        if mtime == self._loaded_mtime:
+            return None
+        import joblib
+        started = time.perf_counter()
+        classifier, _ = joblib.load(self.model_path)
+        load_seconds = time.perf_counter() - started
+        swap_ms = self._swap(classifier)
+        with self._round_lock:
+            self._classifier = classifier
+            self._loaded_mtime = mtime
+            self._stats.update(
+                version=self._stats["version"] + 1,
+                last_train_seconds=round(load_seconds, 4),
+                last_swap_ms=round(swap_ms, 4),
+                last_round_at=time.time(),
+            )
+        return self.stats()
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "model": type(self._classifier).__name__ if self._classifier is not None else None,
+            "pending_labels": _count_lines(self.labels_path),
+        }
+
+    def run(self, stop: threading.Event, trains: bool = True, interval: float = ONLINE_TRAIN_INTERVAL):
+        """Background loop: train (or follow) every `interval` seconds until `stop` is set."""
+        while not stop.is_set():
+            try:
+                self.train_round() if trains else self.follow()
+            except Exception as e:
+                print(f"⚠️ Online training round failed: {e}")
+            stop.wait(interval)
+
+
+def _count_lines(path: str) -> int:
+    try:
+        with open(path, "rb") as f:
+            return sum(1 for _ in f)
+    except OSError:
+        return 0
+
+
+_trainer = None
+_stop = threading.Event()
+
+
+def get_online_trainer() -> OnlineTrainer:
+    global _trainer
+    if _trainer is None:
+        _trainer = OnlineTrainer()
+    return _trainer
+
+
+def start_online_training(trains: bool):
+    """Run the trainer (or, with trains=False, the follower) in a daemon thread."""
+    _stop.clear()
+    thread = threading.Thread(target=get_online_trainer().run, args=(_stop, trains),
+                              name="online-trainer", daemon=True)
+    thread.start()
+    return thread
+
+
+def stop_online_training():
+    _stop.set()
+
+
+if __name__ == "__main__":
+    result = OnlineTrainer().train_round()
+    print(json.dumps(result or {"status": "no new labels"}, indent=2))
+    sys.exit(0)
@@ -0,0 +1,123 @@
+# backend/serve.py
+"""
+Pre-fork production launcher for the H.I.V.E. API.
+
+The parent process imports the app and runs backend.warmup once (scikit-learn
+model + vectorizer, Gemini SDKs, fingerprint DB schema), freezes the GC and
+binds the listening socket. It then forks the workers, which serve from the
+shared socket. Everything loaded before the fork is shared copy-on-write;
+gc.freeze() moves those objects out of the collector's reach so garbage
+collection in the workers doesn't write to (and so un-share) their pages.
+
+Only worker 0 runs the inbound queue consumers (INGEST_CONSUMER); the others
+only enqueue. Every worker serves the /honeypot/* session endpoints, so with
+more than one worker the session store is switched to write-through: reads
+go to SQLite and each change commits in its own locked transaction, instead
+of sitting in a per-process cache another worker can't see.
+
+    python -m backend.serve --workers 4 --port 8000
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+RESTART_DELAY_SECONDS = 1.0
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload():
+    """Import and initialise everything the workers share; returns the ASGI app."""
+    from backend import warmup
+    from backend.main import app
+
+    # Load everything lazy now, so the workers inherit it instead of each loading a copy
+    warmup.warm_up()
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def run_worker(app, sock: socket.socket, index: int, log_level: str):
+    import uvicorn
+
+    os.environ["INGEST_CONSUMER"] = "1" if index == 0 else "0"
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level))
+    try:
+        server.run(sockets=[sock])
+    finally:
+        os._exit(0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    app = preload()
+    if args.workers > 1:
+        from app.core.session_store import get_session_store
+
+        get_session_store().configure(write_through=True)
+    sock = bind_socket(args.host, args.port)
+    print(f"✅ Preloaded app in {time.perf_counter() - started:.2f}s; "
+          f"forking {args.workers} workers on {args.host}:{args.port}")
+
+    children = {}    # pid -> worker index
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(app, sock, index, args.log_level)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for index in range(max(1, args.workers)):
+        spawn(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        print(f"⚠️ Worker {index} (pid {pid}) exited with status {status}; restarting")
+        time.sleep(RESTART_DELAY_SECONDS)
+        if not stopping:
+            spawn(index)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+# backend/train_sweep.py
+"""
+Hyper-parameter sweep for the scam classifier: speed/size vs. recall.
+
+Every combination of forest size, tree depth and vocabulary size is scored
+with stratified k-fold CV in a process pool. Each candidate is then refit
+on the full dataset and measured, one at a time in the parent process, for
+single-message inference latency (the vectorize + predict_proba path of
+backend.model.predict_message), joblib size on disk and memory held once
+loaded. The report lists the Pareto front (no other candidate is at least
+as good on recall, latency and size and better on one) and picks the
+fastest candidate meeting --recall-floor.
+
+    python -m backend.train_sweep --recall-floor 0.9 --export
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+DATASET_PATH = "data/messages.csv"
+POSITIVE_LABEL = "scam"
+
+DEFAULT_GRID = {
+    "n_estimators": [10, 25, 50, 100],
+    "max_depth": [None, 8, 16],
+    "max_features": [None, 500, 2000],    # TF-IDF vocabulary size (None = all terms)
+}
+
+
+def _build(params: dict):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    vectorizer = TfidfVectorizer(max_features=params["max_features"])
+    model = RandomForestClassifier(
+        n_estimators=params["n_estimators"],
+        max_depth=params["max_depth"],
+        class_weight="balanced",
+        random_state=42,
+        n_jobs=1,    # parallelism comes from the sweep's process pool
+    )
+    return vectorizer, model
+
+
+def _cross_validate(params: dict, messages: list, labels: list, folds: int) -> dict:
+    from sklearn.metrics import accuracy_score, recall_score
+    from sklearn.model_selection import StratifiedKFold
+
+    accuracy, recall = [], []
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    for train_idx, test_idx in splitter.split(messages, labels):
+        vectorizer, model = _build(params)
+        model.fit(vectorizer.fit_transform([messages[i] for i in train_idx]), [labels[i] for i in train_idx])
+        predicted = model.predict(vectorizer.transform([messages[i] for i in test_idx]))
+        expected = [labels[i] for i in test_idx]
+        accuracy.append(accuracy_score(expected, predicted))
+        recall.append(recall_score(expected, predicted, pos_label=POSITIVE_LABEL, zero_division=0))
+    return {
+        "accuracy": round(statistics.mean(accuracy), 4),
+        "accuracy_std": round(statistics.pstdev(accuracy), 4),
+        "recall": round(statistics.mean(recall), 4),
+        "recall_std": round(statistics.pstdev(recall), 4),
+    }
+
+
+def _measure(vectorizer, model, messages: list, latency_samples: int) -> dict:
+    """Per-message latency, on-disk size and loaded-memory of a fitted candidate."""
+    import joblib
+
+    timings = []
+    for i in range(latency_samples):
+        message = messages[i % len(messages)]
+        started = time.perf_counter()
+        model.predict_proba(vectorizer.transform([message]))
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "model.joblib")
+        vectorizer_path = os.path.join(tmp, "vectorizer.joblib")
+        joblib.dump(model, model_path)
+        joblib.dump(vectorizer, vectorizer_path)
+        size = os.path.getsize(model_path) + os.path.getsize(vectorizer_path)
+        tracemalloc.start()
+        loaded = (joblib.load(model_path), joblib.load(vectorizer_path))
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del loaded
+
+    return {
+        "latency_p50_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "latency_p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+        "size_kb": round(size / 1024, 1),
+        "memory_kb": round(memory / 1024, 1),
+    }
+
+
+def evaluate(params: dict, messages: list, labels: list, folds: int) -> dict:
+    """CV scores of one candidate (runs in a pool worker)."""
+    return {"params": params, **_cross_validate(params, messages, labels, folds)}
+
+
+def measure(params: dict, messages: list, labels: list, latency_samples: int) -> dict:
+    """Serving cost of one candidate refit on all data (run serially so timings don't compete)."""
+    vectorizer, model = _build(params)
+    model.fit(vectorizer.fit_transform(messages), labels)
+    return _measure(vectorizer, model, messages, latency_samples)
+
+
+def pareto_front(results: list) -> list:
+    """Candidates not dominated on (higher recall, lower latency, smaller size)."""
+    def dominates(a, b):
+        no_worse = (a["recall"] >= b["recall"] and a["latency_p50_ms"] <= b["latency_p50_ms"]
+                    and a["size_kb"] <= b["size_kb"])
+        better = (a["recall"] > b["recall"] or a["latency_p50_ms"] < b["latency_p50_ms"]
+                  or a["size_kb"] < b["size_kb"])
+        return no_worse and better
+
+    front = [r for r in results if not any(dominates(other, r) for other in results if other is not r)]
+    return sorted(front, key=lambda r: (r["latency_p50_ms"], -r["recall"]))
+
+
+def choose(results: list, recall_floor: float):
+    """Fastest candidate meeting the recall floor (ties: higher accuracy, then smaller)."""
+    eligible = [r for r in results if r["recall"] >= recall_floor]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda r: (r["latency_p50_ms"], -r["accuracy"], r["size_kb"]))
+
+
+def sweep(messages: list, labels: list, grid: dict = None, folds: int = 5,
+          workers: int = None, latency_samples: int = 200) -> list:
+    """
+    Cross-validate every grid combination in a process pool (workers=1: in
+    this process), then measure each one's serving cost here, one at a time.
+    """
+    grid = grid or DEFAULT_GRID
+    keys = sorted(grid)
+    candidates = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    # Each fold needs at least one message of every class
+    folds = max(2, min(folds, *(labels.count(label) for label in set(labels))))
+    args = (messages, labels, folds)
+
+    if workers == 1:
+        results = [evaluate(params, *args) for params in candidates]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(evaluate, params, *args) for params in candidates]
+            results = [future.result() for future in futures]
+    for result in results:
+        result.update(measure(result["params"], messages, labels, latency_samples))
+    return results
+
+
+def export(params: dict, messages: list, labels: list, model_dir: str = "model"):
+    """Refit the chosen candidate on all data and save it where backend.model loads from."""
+    import joblib
+    vectorizer, model = _build(params)
+    model.fit(vectorizer.fit_transform(messages), labels)
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(model, os.path.join(model_dir, "scam_detector.joblib"))
+    joblib.dump(vectorizer, os.path.join(model_dir, "vectorizer.joblib"))
+
+
+def _describe(params: dict) -> str:
+    return f"trees={params['n_estimators']} depth={params['max_depth']} vocab={params['max_features']}"
+
+
+def print_report(results: list, front: list, chosen):
+    header = f"{'candidate':<36} {'acc':>6} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8} {'size KB':>8} {'mem KB':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in sorted(results, key=lambda r: r["latency_p50_ms"]):
+        mark = "*" if r in front else " "
+        print(f"{mark}{_describe(r['params']):<35} {r['accuracy']:>6} {r['recall']:>7} "
+              f"{r['latency_p50_ms']:>8} {r['latency_p95_ms']:>8} {r['size_kb']:>8} {r['memory_kb']:>8}")
+    print("\n* = Pareto front (recall vs. latency vs. size)")
+    if chosen:
+        print(f"✅ Chosen: {_describe(chosen['params'])}")
+    else:
+        print("⚠️ No candidate meets the recall floor")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=DEFAULT_GRID["n_estimators"])
+    parser.add_argument("--max-depth", type=int, nargs="+", default=None,
+                        help="tree depths to try, 0 = unlimited (default: 0 8 16)")
+    parser.add_argument("--max-features", type=int, nargs="+", default=None,
+                        help="vocabulary sizes to try, 0 = all terms (default: 0 500 2000)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="pool size (default: CPU count)")
+    parser.add_argument("--recall-floor", type=float, default=0.9)
+    parser.add_argument("--report", default="model/sweep_report.json")
+    parser.add_argument("--export", action="store_true", help="refit the chosen candidate and save it to model/")
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+    df = pd.read_csv(args.dataset)
+    messages, labels = list(df["message"]), list(df["label"])
+    grid = {
+        "n_estimators": args.n_estimators,
+        "max_depth": [d or None for d in args.max_depth] if args.max_depth else DEFAULT_GRID["max_depth"],
+        "max_features": [f or None for f in args.max_features] if args.max_features else DEFAULT_GRID["max_features"],
+    }
+
+    started = time.perf_counter()
+    results = sweep(messages, labels, grid, args.folds, args.workers)
+    front = pareto_front(results)
+    chosen = choose(results, args.recall_floor)
+    print_report(results, front, chosen)
+    print(f"Swept {len(results)} candidates in {time.perf_counter() - started:.1f}s")
+
+    with open(args.report, "w") as f:
+        json.dump({"recall_floor": args.recall_floor, "chosen": chosen, "pareto_front": front,
+                   "candidates": results}, f, indent=2)
+    print(f"Report saved to {args.report}")
+
+    if args.export:
+        if chosen is None:
+            return 1
+        export(chosen["params"], messages, labels)
+        print("✅ Chosen model saved to model/scam_detector.joblib and model/vectorizer.joblib")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+# backend/warmup.py
+"""
+Background warm-up of the API's heavy dependencies.
+
+Importing backend.main no longer loads scikit-learn, the Gemini SDKs or the
+fingerprint schema; each loads on first use. The startup hook runs warm_up()
+in a thread so they are usually loaded before the first request needs them,
+and GET /ready reports how far it got.
+"""
+import asyncio
+import threading
+import time
+
+from app.core import conversation_agent, domain_reputation, fingerprint_db, scam_detector
+from backend import model
+
+# name -> (loader, needed before /ready answers 200)
+SUBSYSTEMS = {
+    "model": (model.load_model, True),
+    "fingerprint_db": (fingerprint_db.init_db, True),
+    "domain_reputation": (domain_reputation.get_domain_reputation, False),
+    "reply_llm": (conversation_agent.warm_up, False),
+    "detect_llm": (scam_detector.warm_up, False),
+}
+
+_lock = threading.Lock()
+_state = {name: {"status": "cold", "seconds": None, "error": None} for name in SUBSYSTEMS}
+
+
+def _warm(name: str):
+    loader, _ = SUBSYSTEMS[name]
+    with _lock:
+        if _state[name]["status"] in ("loading", "ready"):
+            return
+        _state[name] = {"status": "loading", "seconds": None, "error": None}
+    started = time.perf_counter()
+    try:
+        loader()
+    except Exception as e:
+        print(f"⚠️ Warm-up of {name} failed: {e}")
+        state = {"status": "failed", "error": str(e)}
+    else:
+        state = {"status": "ready", "error": None}
+    state["seconds"] = round(time.perf_counter() - started, 3)
+    with _lock:
+        _state[name] = state
+
+
+def warm_up(names=None):
+    """Load each subsystem in turn (blocking); failures are recorded, not raised."""
+    for name in names or SUBSYSTEMS:
+        _warm(name)
+
+
+_task = None
+
+
+def start_warm_up():
+    """Schedule warm_up() in a worker thread from the running event loop."""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.get_running_loop().create_task(asyncio.to_thread(warm_up))
+    return _task
+
+
+def readiness() -> dict:
+    """Per-subsystem status; ready once every required subsystem has loaded."""
+    with _lock:
+        subsystems = {name: dict(state) for name, state in _state.items()}
+    ready = all(subsystems[name]["status"] == "ready" for name, (_, required) in SUBSYSTEMS.items() if required)
+    return {"ready": ready, "subsystems": subsystems}
@@ -0,0 +1,25 @@
+"""
+Diff two saved benchmark runs; exits 1 if any metric regressed past the threshold.
+
+    python -m benchmarks.compare benchmarks/results/replay-A.json benchmarks/results/replay-B.json
+"""
+import argparse
+import sys
+
+from benchmarks.results import compare, load_results, print_comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold as a fraction")
+    args = parser.parse_args(argv)
+
+    rows = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+    print_comparison(rows)
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
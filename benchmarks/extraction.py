@@ -0,0 +1,126 @@
+"""
+Streaming intelligence extraction on large documents: throughput, peak
+memory, and whether identifiers planted across window edges are found.
+
+A synthetic document (filler prose with a UPI id, phone number and
+phishing link every --every characters) is generated on the fly and fed to
+StreamExtractor in 64 KB pieces, so the document itself is never held in
+memory. --whole-mb also times extract_all_intelligence() on one string of
+that size for comparison.
+
+    python -m benchmarks.extraction --mb 100
+    python -m benchmarks.extraction --mb 10 --whole-mb 10
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+from benchmarks.results import print_summary, save_results, summarize
+
+FILLER = ("Dear customer, your account statement for this quarter is ready. Please review the "
+          "attached form carefully and reply before the due date to avoid any interruption. ")
+PIECE_CHARS = 64 * 1024
+
+
+def planted(i: int) -> tuple:
+    """The identifiers planted as the i-th sample."""
+    return f"refund{i}@ybl", f"+91{6000000000 + i * 7919 % 4000000000}", f"https://sbi-kyc{i}.com/verify"
+
+
+def document(total_chars: int, every: int):
+    """(pieces, planted count): pieces of about PIECE_CHARS until total_chars have been produced."""
+    filler = (FILLER * (every // len(FILLER) + 1))[:every]
+    count = total_chars // (every + 100)
+
+    def pieces():
+        buffer = []
+        size = 0
+        for i in range(count):
+            upi, phone, link = planted(i)
+            text = f"{filler} Pay {upi} or call {phone[3:]} at {link} "
+            buffer.append(text)
+            size += len(text)
+            if size >= PIECE_CHARS:
+                yield "".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield "".join(buffer)
+
+    return pieces(), count
+
+
+def run_stream(total_chars: int, every: int) -> dict:
+    from app.core.intelligence_extractor import StreamExtractor
+
+    pieces, count = document(total_chars, every)
+    extractor = StreamExtractor()
+    latencies = []
+    tracemalloc.start()
+    started = time.perf_counter()
+    for piece in pieces:
+        t0 = time.perf_counter()
+        extractor.feed(piece)
+        latencies.append(time.perf_counter() - t0)
+    found = extractor.finish()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    expected = [set(values) for values in zip(*(planted(i) for i in range(count)))]
+    recall = {
+        key: round(len(expected_values & set(found[key])) / len(expected_values), 4) if expected_values else 1.0
+        for key, expected_values in zip(("upiIds", "phoneNumbers", "phishingLinks"), expected)
+    }
+    return {
+        "summary": summarize(latencies, seconds),
+        "mb_per_s": round(extractor.chars / 1024 / 1024 / seconds, 2),
+        "seconds": round(seconds, 1),
+        "peak_mb": round(peak / 1024 / 1024, 1),
+        "windows": extractor.windows,
+        "truncated": extractor.truncated,
+        "recall": recall,
+    }
+
+
+def run_whole(total_chars: int, every: int) -> dict:
+    from app.core.intelligence_extractor import extract_all_intelligence
+
+    pieces, _ = document(total_chars, every)
+    text = "".join(pieces)
+    tracemalloc.start()
+    started = time.perf_counter()
+    extract_all_intelligence(text)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"mb_per_s": round(len(text) / 1024 / 1024 / seconds, 2), "seconds": round(seconds, 1),
+            "peak_mb": round(peak / 1024 / 1024, 1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, default=100, help="document size for the streaming run")
+    parser.add_argument("--every", type=int, default=20000, help="filler characters between planted identifiers")
+    parser.add_argument("--whole-mb", type=float, default=0, help="also extract from one string this big")
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/extraction-<time>.json)")
+    args = parser.parse_args(argv)
+
+    stream = run_stream(int(args.mb * 1024 * 1024), args.every)
+    print_summary({"stream_feed_64k": stream["summary"]})
+    print(f"\nstreamed {args.mb:g} MB: {stream['mb_per_s']} MB/s, peak {stream['peak_mb']} MB traced, "
+          f"{stream['windows']} windows, recall {stream['recall']}, truncated {stream['truncated']}")
+    results = {"stream_feed_64k": stream["summary"]}
+    extra = {"stream": {k: v for k, v in stream.items() if k != "summary"}}
+    if args.whole_mb:
+        whole = run_whole(int(args.whole_mb * 1024 * 1024), args.every)
+        print(f"one {args.whole_mb:g} MB string: {whole['mb_per_s']} MB/s, peak {whole['peak_mb']} MB traced")
+        extra["whole"] = whole
+
+    path = save_results("extraction", {**vars(args), **extra}, results, args.output)
+    print(f"\nSaved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Micro-benchmarks for the per-message hot paths:
+
+- predict_message           (vectorizer + classifier, one message)
+- extract_all_intelligence  (all regex extractors, one message)
+- store_fingerprint         (SQLite upsert on a throwaway DB; mix of new and repeat scammers)
+- check_link                (domain reputation lookup of one URL against 300k listed domains)
+
+    python -m benchmarks.micro --iterations 2000
+    python -m benchmarks.micro --compare benchmarks/results/micro-<stamp>.json
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+from benchmarks.results import compare, load_results, print_comparison, print_summary, save_results, summarize
+from benchmarks.workload import build_conversations, message_corpus
+
+
+def time_each(fn, inputs: list, warmup: int = 20) -> dict:
+    """Call fn once per input, timing every call individually."""
+    for item in inputs[:warmup]:
+        fn(item)
+    latencies = []
+    started = time.perf_counter()
+    for item in inputs:
+        t0 = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def bench_predict(messages: list) -> dict:
+    from backend.model import predict_message
+    return time_each(predict_message, messages)
+
+
+def bench_extract(messages: list) -> dict:
+    from app.core.intelligence_extractor import extract_all_intelligence
+    return time_each(extract_all_intelligence, messages)
+
+
+def bench_store_fingerprint(iterations: int, seed: int) -> dict:
+    from app.core import fingerprint_db
+    from app.core.intelligence_extractor import extract_all_intelligence, merge_intelligence
+
+    intel_batches = []
+    for conversation in build_conversations(iterations, seed=seed, legit_ratio=0.0):
+        intel = None
+        for message in conversation["messages"]:
+            found = extract_all_intelligence(message)
+            intel = merge_intelligence(intel, found) if intel else found
+        intel_batches.append((conversation["chat_id"], intel))
+
+    original = fingerprint_db.DB_PATH
+    with tempfile.TemporaryDirectory() as data_dir:
+        fingerprint_db.DB_PATH = os.path.join(data_dir, "fingerprints.db")
+        try:
+            fingerprint_db.init_db()
+            return time_each(
+                lambda item: fingerprint_db.store_fingerprint(intel=item[1], scam_type="default", chat_id=item[0]),
+                intel_batches,
+                warmup=0,
+            )
+        finally:
+            fingerprint_db.DB_PATH = original
+
+
+def bench_check_link(iterations: int, seed: int, domains: int = 300_000) -> dict:
+    from app.core.domain_reputation import DomainEntry, DomainReputation
+
+    rng = random.Random(seed)
+
+    def domain():
+        name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(6, 14)))
+        return f"{name}.{rng.choice(('com', 'in', 'net', 'xyz', 'top', 'co.in'))}"
+
+    listed = [domain() for _ in range(domains)]
+    reputation = DomainReputation(blocklists=[])
+    entry = DomainEntry("benchmark", None)
+    for host in listed:
+        reputation.trie.add(host, entry)
+    # Half the links are on (a subdomain of) a listed domain
+    links = [f"https://login.{rng.choice(listed)}/kyc" if i % 2 else f"https://{domain()}/kyc"
+             for i in range(iterations)]
+    return time_each(lambda link: reputation.check([link]), links)
+
+
+BENCHMARKS = ("predict_message", "extract_all_intelligence", "store_fingerprint", "check_link")
+
+
+def run_micro(iterations: int, seed: int = 7, only=None) -> dict:
+    messages = message_corpus(iterations, seed=seed)
+    selected = only or BENCHMARKS
+    results = {}
+    if "predict_message" in selected:
+        results["predict_message"] = bench_predict(messages)
+    if "extract_all_intelligence" in selected:
+        results["extract_all_intelligence"] = bench_extract(messages)
+    if "store_fingerprint" in selected:
+        results["store_fingerprint"] = bench_store_fingerprint(iterations, seed)
+    if "check_link" in selected:
+        results["check_link"] = bench_check_link(iterations, seed)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS)
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/micro-<time>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="diff against an earlier results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold as a fraction")
+    args = parser.parse_args(argv)
+
+    results = run_micro(args.iterations, args.seed, args.only)
+    print_summary(results)
+    config = {"iterations": args.iterations, "seed": args.seed}
+    path = save_results("micro", config, results, args.output)
+    print(f"\nSaved {path}")
+
+    if args.compare:
+        rows = compare(load_results(args.compare), load_results(path), args.threshold)
+        print()
+        print_comparison(rows)
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
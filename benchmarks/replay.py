@@ -0,0 +1,208 @@
+"""
+Replay load test for the H.I.V.E. API.
+
+Replays synthetic scam conversations (benchmarks/workload.py) through
+/analyze-text, /honeypot/extract, /honeypot/reply and the /fingerprint/*
+endpoints at a fixed concurrency, then reports throughput and p50/p95/p99
+per endpoint.
+
+By default the app runs in-process (httpx ASGI transport) against throwaway
+databases with the fake Gemini client, so runs are offline and
+repeatable. Pass --base-url to load-test a live server instead; that
+server's own Gemini configuration is used.
+
+    python -m benchmarks.replay --conversations 200 --concurrency 16
+    python -m benchmarks.replay --compare benchmarks/results/replay-<stamp>.json
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+import httpx
+
+from benchmarks.results import compare, load_results, print_comparison, print_summary, save_results, summarize
+from benchmarks.workload import build_conversations
+
+IDENTIFIER_KEYS = ("upiIds", "phoneNumbers", "bankAccounts", "phishingLinks")
+
+
+@contextmanager
+def in_process_client(data_dir: str, fake_latency: float, rate_limits: bool):
+    """
+    The FastAPI app on throwaway DBs with the fake Gemini client. Module
+    state is put back on exit so the process (e.g. a test run) is unaffected.
+    """
+    from app.core import conversation_agent, event_bus, fingerprint_db, rate_limiter, session_store
+    from app.core.fake_llm import FakeGenaiClient
+
+    saved = {
+        "db_path": fingerprint_db.DB_PATH,
+        "store": session_store._store,
+        "bus": event_bus._bus,
+        "client": (conversation_agent._client, conversation_agent._client_key),
+        "limiters": {name: limiter.enabled for name, limiter in rate_limiter.LIMITERS.items()},
+    }
+    try:
+        fingerprint_db.DB_PATH = os.path.join(data_dir, "fingerprints.db")
+        fingerprint_db.init_db()
+        session_store._store = session_store.SessionStore(db_path=os.path.join(data_dir, "sessions.db"))
+        event_bus._bus = event_bus.EventBus(db_path=os.path.join(data_dir, "events.db"))
+        conversation_agent.set_client(FakeGenaiClient(latency=fake_latency))
+        if not rate_limits:
+            for limiter in rate_limiter.LIMITERS.values():
+                limiter.configure(enabled=False)
+
+        from backend.main import app
+        yield httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay", timeout=120)
+    finally:
+        fingerprint_db.DB_PATH = saved["db_path"]
+        session_store._store = saved["store"]
+        event_bus._bus = saved["bus"]
+        conversation_agent._client, conversation_agent._client_key = saved["client"]
+        for name, enabled in saved["limiters"].items():
+            rate_limiter.LIMITERS[name].configure(enabled=enabled)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                self.errors[name] += 1
+                return None
+            self.latencies[name].append(elapsed)
+            return response.json()
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+
+
+async def replay_conversation(client, rec: Recorder, conversation: dict, rng: random.Random, fingerprints: list):
+    chat_id = conversation["chat_id"]
+    intel = {key: set() for key in IDENTIFIER_KEYS}
+
+    for message in conversation["messages"]:
+        await rec.call(client, "POST /analyze-text", "POST", "/analyze-text", json={"message": message})
+        found = await rec.call(client, "POST /honeypot/extract", "POST", "/honeypot/extract", json={"message": message})
+        for key in IDENTIFIER_KEYS:
+            intel[key].update((found or {}).get(key, []))
+        if conversation["scam"]:
+            await rec.call(client, "POST /honeypot/reply", "POST", "/honeypot/reply", json={
+                "session_id": chat_id, "scammer_message": message, "scam_type": "default",
+            })
+
+    identifiers = [value for key in IDENTIFIER_KEYS for value in intel[key]]
+    if not identifiers:
+        return
+
+    stored = await rec.call(client, "POST /fingerprint/store", "POST", "/fingerprint/store", json={
+        "intel": {key: sorted(values) for key, values in intel.items()},
+        "scam_type": "default",
+        "chat_id": chat_id,
+        "message_count": len(conversation["messages"]),
+    })
+    fingerprint = (stored or {}).get("fingerprint")
+    if fingerprint:
+        fingerprints.append(fingerprint)
+
+    # Links contain '/', which a path parameter can't carry; the bot looks up phones and UPI ids
+    lookups = [value for key in ("upiIds", "phoneNumbers", "bankAccounts") for value in intel[key]]
+    identifier = rng.choice(lookups or identifiers)
+    if lookups:
+        await rec.call(client, "GET /fingerprint/lookup/{identifier}", "GET", f"/fingerprint/lookup/{identifier}")
+    await rec.call(client, "POST /fingerprint/search", "POST", "/fingerprint/search", json={"query": identifier[:6]})
+    if fingerprint:
+        await rec.call(client, "GET /fingerprint/{fingerprint_id}", "GET", f"/fingerprint/{fingerprint}")
+        if rng.random() < 0.2:
+            await rec.call(client, "POST /fingerprint/status", "POST", "/fingerprint/status", json={
+                "fingerprint": fingerprint, "status": "flagged", "notes": "replay",
+            })
+    # Dashboard reads interleaved with the write traffic
+    if rng.random() < 0.25:
+        await rec.call(client, "GET /fingerprint/all", "GET", "/fingerprint/all", params={"limit": 50})
+        await rec.call(client, "GET /fingerprint/stats", "GET", "/fingerprint/stats")
+
+
+async def run_replay(client: httpx.AsyncClient, conversations: list, concurrency: int, merges: int, seed: int) -> dict:
+    rec = Recorder()
+    rng = random.Random(seed)
+    fingerprints = []
+    pending = list(conversations)
+
+    async def worker():
+        while pending:
+            await replay_conversation(client, rec, pending.pop(), rng, fingerprints)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    distinct = list(dict.fromkeys(fingerprints))
+    rng.shuffle(distinct)
+    for a, b in list(zip(distinct[::2], distinct[1::2]))[:merges]:
+        await rec.call(client, "POST /fingerprint/merge", "POST", "/fingerprint/merge",
+                       json={"fingerprint_a": a, "fingerprint_b": b})
+    wall = time.perf_counter() - started
+
+    results = {name: summarize(values, wall, rec.errors.get(name, 0)) for name, values in sorted(rec.latencies.items())}
+    for name, errors in rec.errors.items():
+        results.setdefault(name, summarize([], wall, errors))
+    results["ALL"] = summarize([v for values in rec.latencies.values() for v in values], wall, sum(rec.errors.values()))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=4, help="scammer messages per conversation")
+    parser.add_argument("--concurrency", type=int, default=8, help="conversations replayed at once")
+    parser.add_argument("--merges", type=int, default=5, help="/fingerprint/merge calls after the replay")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--base-url", help="replay against a running server instead of in-process")
+    parser.add_argument("--fake-latency", type=float, default=0.0, help="seconds per fake Gemini reply (in-process)")
+    parser.add_argument("--rate-limits", action="store_true", help="keep the Gemini rate limiters on (in-process)")
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/replay-<time>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="diff against an earlier results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold as a fraction")
+    args = parser.parse_args(argv)
+
+    conversations = build_conversations(args.conversations, turns=args.turns, seed=args.seed)
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare")}
+
+    async def run():
+        with tempfile.TemporaryDirectory() as data_dir:
+            if args.base_url:
+                target = nullcontext(httpx.AsyncClient(base_url=args.base_url, timeout=120))
+            else:
+                target = in_process_client(data_dir, args.fake_latency, args.rate_limits)
+            with target as client:
+                async with client:
+                    return await run_replay(client, conversations, args.concurrency, args.merges, args.seed)
+
+    results = asyncio.run(run())
+    print_summary(results)
+    path = save_results("replay", config, results, args.output)
+    print(f"\nSaved {path}")
+
+    if args.compare:
+        rows = compare(load_results(args.compare), load_results(path), args.threshold)
+        print()
+        print_comparison(rows)
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Latency summaries and JSON result files shared by the benchmark scripts.
+
+Every run is saved as {"kind", "started_at", "config", "results": {name: summary}}
+so two runs of the same kind can be diffed with compare().
+"""
+import json
+import math
+import os
+import platform
+from datetime import datetime
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Metrics where bigger is better; everything else is a latency (smaller is better)
+HIGHER_IS_BETTER = {"throughput_per_s"}
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies_s: list, wall_seconds: float, errors: int = 0) -> dict:
+    """Count, throughput and p50/p95/p99 (ms) for one endpoint or function."""
+    values = sorted(latencies_s)
+    count = len(values)
+    return {
+        "count": count,
+        "errors": errors,
+        "throughput_per_s": round(count / wall_seconds, 1) if wall_seconds else 0.0,
+        "mean_ms": round(sum(values) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+def save_results(kind: str, config: dict, results: dict, path: str = None) -> str:
+    """Write a run to `path` (default benchmarks/results/<kind>-<timestamp>.json)."""
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"{kind}-{stamp}.json")
+    payload = {
+        "kind": kind,
+        "started_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "config": config,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.10, min_count: int = 30) -> list:
+    """
+    Per-name, per-metric deltas between two runs. A row is a regression when
+    the metric moved the wrong way by more than `threshold` (fraction).
+    Names with fewer than `min_count` samples are listed but never flagged:
+    their tail percentiles are too noisy to gate on.
+    """
+    rows = []
+    for name, now in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+        enough = min(now["count"], before["count"]) >= min_count
+        for metric in ("throughput_per_s", "p50_ms", "p95_ms", "p99_ms"):
+            if metric not in now or metric not in before or not before[metric]:
+                continue
+            change = (now[metric] - before[metric]) / before[metric]
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            rows.append({
+                "name": name,
+                "metric": metric,
+                "baseline": before[metric],
+                "current": now[metric],
+                "change_pct": round(change * 100, 1),
+                "regression": enough and worse > threshold,
+            })
+    return rows
+
+
+def print_summary(results: dict):
+    header = f"{'name':<40}{'count':>8}{'thru/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'err':>6}"
+    print(header)
+    print("-" * len(header))
+    for name, s in results.items():
+        print(f"{name:<40}{s['count']:>8}{s['throughput_per_s']:>10}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}{s.get('errors', 0):>6}")
+
+
+def print_comparison(rows: list):
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['name']:<40}{row['metric']:<18}{row['baseline']:>10} -> {row['current']:<10}"
+              f"{row['change_pct']:>+7.1f}%{flag}")
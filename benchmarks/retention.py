@@ -0,0 +1,126 @@
+"""
+Fingerprint DB retention: file sizes, lookup latency and writer stalls
+around one retention pass.
+
+A throwaway DB is filled with --sessions sessions (intel snapshots of about
+--snapshot-bytes each) spread evenly over the last --span-days days. A
+retention pass with --days then archives the older ones and compacts the
+file while a writer thread keeps calling store_fingerprint(); the writer's
+latencies during the pass show how long it was ever blocked.
+
+    python -m benchmarks.retention --sessions 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.results import print_summary, save_results, summarize
+
+
+def populate(sessions: int, scammers: int, snapshot_bytes: int, span_days: float):
+    from app.core import fingerprint_db
+
+    padding = "x" * snapshot_bytes
+    items = ((
+        {"phoneNumbers": [f"+91{9000000000 + i % scammers}"], "upiIds": [f"s{i % scammers}@ybl"], "notes": padding},
+        "bank_fraud", f"chat-{i}", 8,
+    ) for i in range(sessions))
+    fingerprint_db.store_fingerprints(items)
+    conn = fingerprint_db._get_conn()
+    conn.execute(
+        "UPDATE sessions SET last_activity = strftime('%Y-%m-%dT%H:%M:%S+00:00', 'now', "
+        "'-' || ((1 - id * 1.0 / ?) * ?) || ' days')",    # ids grow with time, as in production
+        (sessions, span_days),
+    )
+    conn.commit()
+    conn.close()
+
+
+def lookups(scammers: int, count: int) -> list:
+    from app.core import fingerprint_db
+
+    latencies = []
+    for _ in range(count):
+        t0 = time.perf_counter()
+        fingerprint_db.find_scammer_by_identifier(f"s{random.randrange(scammers)}@ybl")
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def sizes(path: str) -> dict:
+    from app.core.fingerprint_retention import _file_bytes, archive_path
+
+    return {"db_mb": round(_file_bytes(path) / 1024 / 1024, 1),
+            "wal_mb": round(_file_bytes(path + "-wal") / 1024 / 1024, 1),
+            "archive_mb": round(_file_bytes(archive_path()) / 1024 / 1024, 1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--scammers", type=int, default=2_000)
+    parser.add_argument("--snapshot-bytes", type=int, default=1000)
+    parser.add_argument("--span-days", type=float, default=365)
+    parser.add_argument("--days", type=float, default=90, help="retention age")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/retention-<time>.json)")
+    args = parser.parse_args(argv)
+
+    from app.core import fingerprint_db
+    from app.core.fingerprint_retention import FingerprintRetention
+
+    workdir = tempfile.mkdtemp(prefix="hive-retention-")
+    fingerprint_db.DB_PATH = os.path.join(workdir, "fingerprints.db")
+    started = time.perf_counter()
+    populate(args.sessions, args.scammers, args.snapshot_bytes, args.span_days)
+    print(f"populated {args.sessions} sessions in {time.perf_counter() - started:.1f}s")
+
+    before = sizes(fingerprint_db.DB_PATH)
+    t0 = time.perf_counter()
+    lookup_before = summarize(lookups(args.scammers, args.lookups), time.perf_counter() - t0)
+
+    # A writer keeps storing while the pass runs
+    writes, stop = [], threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            t = time.perf_counter()
+            fingerprint_db.store_fingerprint({"phoneNumbers": [f"+91{8000000000 + i}"]}, chat_id=f"live-{i}")
+            writes.append(time.perf_counter() - t)
+            i += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    t0 = time.perf_counter()
+    result = FingerprintRetention(days=args.days).run_once()
+    pass_seconds = time.perf_counter() - t0
+    stop.set()
+    thread.join()
+    fingerprint_db.store_fingerprint({"upiIds": ["after@ybl"]})    # restarts (and truncates) the WAL
+
+    after = sizes(fingerprint_db.DB_PATH)
+    t0 = time.perf_counter()
+    lookup_after = summarize(lookups(args.scammers, args.lookups), time.perf_counter() - t0)
+    results = {
+        "lookup_before": lookup_before,
+        "lookup_after": lookup_after,
+        "store_during_pass": summarize(writes, pass_seconds),
+    }
+    print_summary(results)
+    print(f"\npass: {result['sessions_archived']} sessions archived in {result['batches']} batches, "
+          f"{result['bytes_reclaimed'] / 1024 / 1024:.1f} MB reclaimed, {result['seconds']}s")
+    print(f"files before: {before}\nfiles after:  {after}")
+
+    path = save_results("retention", {**vars(args), "pass": result, "before": before, "after": after},
+                        results, args.output)
+    print(f"\nSaved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
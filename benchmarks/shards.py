@@ -0,0 +1,92 @@
+"""
+Fingerprint write throughput against the shard count.
+
+For each --shards value, --writers processes call store_fingerprint()
+against one throwaway DB for --seconds: a new scammer every
+--new-every-th store, otherwise a repeat from a pool of --scammers, each
+with its own chat id. Reports stores/s summed over the writers and the
+per-store latency; SQLite's busy waits show up in the tail.
+
+    python -m benchmarks.shards --shards 1 2 4 8 --writers 8 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.results import print_summary, save_results, summarize
+
+
+def writer(args) -> tuple:
+    db_path, shards, worker, seconds, scammers, new_every = args
+    from app.core import fingerprint_db
+
+    fingerprint_db.DB_PATH = db_path
+    fingerprint_db.FINGERPRINT_SHARDS = shards
+    rng = random.Random(worker)
+    latencies, errors, i = [], 0, 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        if i % new_every == 0:
+            phone = f"+9170{worker:02d}{i:06d}"
+        else:
+            phone = f"+9190000{rng.randrange(scammers):05d}"
+        intel = {"phoneNumbers": [phone], "upiIds": [f"p{phone[-6:]}@ybl"]}
+        t0 = time.perf_counter()
+        try:
+            fingerprint_db.store_fingerprint(intel, "upi_fraud", chat_id=f"w{worker}-{i}", message_count=4)
+            latencies.append(time.perf_counter() - t0)
+        except Exception:
+            errors += 1
+        i += 1
+    return latencies, errors
+
+
+def run(shards: int, writers: int, seconds: float, scammers: int, new_every: int) -> dict:
+    from app.core import fingerprint_db
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="hive-shards-"), "fingerprints.db")
+    fingerprint_db.DB_PATH = db_path
+    fingerprint_db.FINGERPRINT_SHARDS = shards
+    fingerprint_db.init_db()    # schema once, before the writers race for it
+    # Seed the repeat pool so every writer starts from the same profiles
+    fingerprint_db.store_fingerprints(
+        ({"phoneNumbers": [f"+9190000{n:05d}"]}, "upi_fraud", f"seed-{n}", 1) for n in range(scammers)
+    )
+
+    jobs = [(db_path, shards, worker, seconds, scammers, new_every) for worker in range(writers)]
+    started = time.perf_counter()
+    with multiprocessing.get_context("fork").Pool(writers) as pool:
+        outcomes = pool.map(writer, jobs)
+    wall = time.perf_counter() - started
+    latencies = [latency for done, _ in outcomes for latency in done]
+    summary = summarize(latencies, wall, errors=sum(errors for _, errors in outcomes))
+    summary["sessions_stored"] = fingerprint_db.get_stats()["total_sessions"] - scammers
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--scammers", type=int, default=2_000)
+    parser.add_argument("--new-every", type=int, default=4, help="every Nth store is a new scammer")
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/shards-<time>.json)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for shards in args.shards:
+        results[f"shards={shards}"] = run(shards, args.writers, args.seconds, args.scammers, args.new_every)
+        print(f"shards={shards}: {results[f'shards={shards}']['throughput_per_s']} stores/s")
+    print_summary(results)
+    path = save_results("shards", {**vars(args), "cpus": os.cpu_count()}, results, args.output)
+    print(f"\nSaved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
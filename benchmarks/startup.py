@@ -0,0 +1,100 @@
+"""
+Cold-start cost of the API process: import time of backend.main, and time
+from launching uvicorn until /health, the first /analyze-text and /ready
+answer 200.
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --app-dir /path/to/other/checkout    # compare a revision
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.results import print_summary, save_results, summarize
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import backend.main; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def import_seconds(app_dir: str) -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=app_dir,
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _poll(client: httpx.Client, method: str, path: str, deadline: float, **kwargs) -> float:
+    """Retry until `path` answers 200; returns the time it first did."""
+    while time.perf_counter() < deadline:
+        try:
+            if client.request(method, path, **kwargs).status_code == 200:
+                return time.perf_counter()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"{path} did not answer 200 in time")
+
+
+def cold_start(app_dir: str, port: int, timeout: float = 120.0) -> dict:
+    """Seconds from process launch to the first 200 of each endpoint."""
+    launched = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=app_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = launched + timeout
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            health = _poll(client, "GET", "/health", deadline)
+            analyze = _poll(client, "POST", "/analyze-text", deadline,
+                            json={"message": "Your KYC is pending, share the OTP now"})
+            # Older revisions have no /ready; everything was loaded before /health anyway
+            try:
+                ready = _poll(client, "GET", "/ready", min(deadline, time.perf_counter() + 30))
+            except RuntimeError:
+                ready = health
+        return {
+            "health_s": health - launched,
+            "first_analyze_s": analyze - launched,
+            "ready_s": ready - launched,
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--app-dir", default=os.getcwd(), help="checkout to start (default: current directory)")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/startup-<time>.json)")
+    args = parser.parse_args(argv)
+
+    samples = {"import_backend_main": [], "health": [], "first_analyze": [], "ready": []}
+    for _ in range(args.runs):
+        samples["import_backend_main"].append(import_seconds(args.app_dir))
+        run = cold_start(args.app_dir, args.port)
+        samples["health"].append(run["health_s"])
+        samples["first_analyze"].append(run["first_analyze_s"])
+        samples["ready"].append(run["ready_s"])
+
+    # summarize() reports ms percentiles; "throughput" is meaningless here
+    results = {name: summarize(values, 0.0) for name, values in samples.items()}
+    print_summary(results)
+    path = save_results("startup", vars(args), results, args.output)
+    print(f"\nSaved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Trend queries from the rollup tables vs. scanning the sessions table.
+
+A throwaway DB is filled with --sessions sessions spread evenly over the
+last --span-days days, then rolled up from scratch by the backfill job
+(timed). The query is "UPI fraud sessions per hour this week": once via
+get_trends(), once the way it had to be answered before, by reading and
+JSON-decoding every session in range.
+
+    python -m benchmarks.trends --sessions 100000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.results import print_summary, save_results, summarize
+
+SCAM_TYPES = ("upi_fraud", "bank_fraud", "lottery", "phishing")
+
+
+def populate(sessions: int, scammers: int, span_days: float):
+    from app.core import fingerprint_db
+
+    items = ((
+        {"phoneNumbers": [f"+91{9000000000 + i % scammers}"], "upiIds": [f"s{i % scammers}@ybl"] if i % 3 else []},
+        SCAM_TYPES[i % len(SCAM_TYPES)], f"chat-{i}", 6,
+    ) for i in range(sessions))
+    fingerprint_db.store_fingerprints(items)
+    conn = fingerprint_db._get_conn()
+    conn.execute(
+        "UPDATE sessions SET started_at = strftime('%Y-%m-%dT%H:%M:%S+00:00', 'now', "
+        "'-' || ((1 - id * 1.0 / ?) * ?) || ' days')",
+        (sessions, span_days),
+    )
+    # Start the rollups over so the backfill job builds them from the rewritten timestamps
+    conn.executescript(f"""
+        DELETE FROM rollup_hourly; DELETE FROM rollup_daily;
+        UPDATE meta SET value = {sessions} WHERE key = 'rollup_backfill_through';
+        UPDATE meta SET value = 0 WHERE key = 'rollup_backfill_done';
+    """)
+    conn.close()
+
+
+def scan(start: datetime, end: datetime) -> dict:
+    """The pre-rollup answer: every session in range, decoded."""
+    from app.core import fingerprint_db
+
+    per_hour = {}
+    conn = fingerprint_db._get_conn()
+    try:
+        for row in conn.execute("SELECT started_at, scam_type, intel_snapshot FROM sessions "
+                                "WHERE started_at >= ? AND started_at < ?", (start.isoformat(), end.isoformat())):
+            if row["scam_type"] == "upi_fraud" and json.loads(row["intel_snapshot"]).get("upiIds"):
+                per_hour[row["started_at"][:13]] = per_hour.get(row["started_at"][:13], 0) + 1
+    finally:
+        conn.close()
+    return per_hour
+
+
+def timed_runs(fn, runs: int) -> list:
+    latencies = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--scammers", type=int, default=2_000)
+    parser.add_argument("--span-days", type=float, default=90)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/trends-<time>.json)")
+    args = parser.parse_args(argv)
+
+    from app.core import fingerprint_db
+    from app.core.fingerprint_trends import backfill_rollups, get_trends
+
+    fingerprint_db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix="hive-trends-"), "fingerprints.db")
+    started = time.perf_counter()
+    populate(args.sessions, args.scammers, args.span_days)
+    print(f"populated {args.sessions} sessions in {time.perf_counter() - started:.1f}s")
+    backfill = backfill_rollups()
+    print(f"backfill: {backfill['sessions']} sessions in {backfill['batches']} batches, {backfill['seconds']}s")
+
+    # Whole hours, so the scan and the hourly buckets cover the same sessions
+    end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    start = end - timedelta(days=7)
+    rollup = get_trends(start, end, "hour", scam_type="upi_fraud", identifier_type="upi")
+    scanned = scan(start, end)
+    assert sum(point["sessions"] for point in rollup["series"]) == sum(scanned.values())
+
+    results = {}
+    for name, fn in (("rollups", lambda: get_trends(start, end, "hour", "upi_fraud", identifier_type="upi")),
+                     ("session scan", lambda: scan(start, end))):
+        latencies = timed_runs(fn, args.runs)
+        results[name] = summarize(latencies, sum(latencies))
+    print_summary(results)
+    path = save_results("trends", {**vars(args), "backfill": backfill}, results, args.output)
+    print(f"\nSaved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
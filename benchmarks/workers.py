@@ -0,0 +1,160 @@
+"""
+Memory per worker and throughput scaling: backend.serve (pre-fork, shared
+pages) vs. `uvicorn --workers N` (every worker imports the app itself).
+
+Starts each launcher on a local port, waits for /health, reads RSS / PSS /
+USS of every worker from /proc/<pid>/smaps_rollup (Linux only), then drives
+POST /analyze-text at a fixed concurrency for a few seconds.
+
+    python -m benchmarks.workers --workers 1 2 4 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.results import print_summary, save_results, summarize
+from benchmarks.workload import message_corpus
+
+LAUNCHERS = {
+    "uvicorn": lambda port, workers: [sys.executable, "-m", "uvicorn", "backend.main:app",
+                                      "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+    "serve": lambda port, workers: [sys.executable, "-m", "backend.serve",
+                                    "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+}
+
+
+def _children(pid: int) -> list:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def _cmdline(pid: int) -> str:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode()
+    except OSError:
+        return ""
+
+
+def worker_pids(launcher_pid: int) -> list:
+    """Forked or spawned workers; `uvicorn --workers 1` serves from the launcher itself."""
+    pids = [pid for pid in _children(launcher_pid) if "resource_tracker" not in _cmdline(pid)]
+    return pids or [launcher_pid]
+
+
+def memory_mb(pid: int) -> dict:
+    """RSS, PSS (shared pages split between sharers) and USS (private) in MB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss_mb": round(fields.get("Rss", 0), 1),
+        "pss_mb": round(fields.get("Pss", 0), 1),
+        "uss_mb": round(fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0), 1),
+    }
+
+
+async def _wait_ready(base_url: str, timeout: float = 120.0):
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient(base_url=base_url, timeout=5) as client:
+        while time.time() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{base_url} did not come up")
+
+
+async def _drive(base_url: str, seconds: float, concurrency: int, messages: list) -> dict:
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(offset: int):
+        nonlocal errors
+        i = offset
+        async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                try:
+                    response = await client.post("/analyze-text", json={"message": messages[i % len(messages)]})
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - t0)
+                except httpx.HTTPError:
+                    errors += 1
+                i += concurrency
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def measure(launcher: str, workers: int, port: int, seconds: float, concurrency: int, messages: list) -> dict:
+    proc = subprocess.Popen(LAUNCHERS[launcher](port, workers),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        asyncio.run(_wait_ready(base_url))
+        time.sleep(1.0)
+        result = asyncio.run(_drive(base_url, seconds, concurrency, messages))
+        pids = worker_pids(proc.pid)
+        per_worker = [memory_mb(pid) for pid in pids]
+        for key in ("rss_mb", "pss_mb", "uss_mb"):
+            result[f"worker_{key}"] = round(sum(m[key] for m in per_worker) / max(1, len(per_worker)), 1)
+        total_pss = sum(m["pss_mb"] for m in per_worker)
+        if pids != [proc.pid]:
+            total_pss += memory_mb(proc.pid)["pss_mb"]
+        result["total_pss_mb"] = round(total_pss, 1)
+        result["workers_found"] = len(pids)
+        return result
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--launchers", nargs="+", choices=sorted(LAUNCHERS), default=["uvicorn", "serve"])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results/workers-<time>.json)")
+    args = parser.parse_args(argv)
+
+    messages = message_corpus(500)
+    results = {}
+    for launcher in args.launchers:
+        for workers in args.workers:
+            name = f"{launcher} x{workers}"
+            results[name] = measure(launcher, workers, args.port, args.seconds, args.concurrency, messages)
+            r = results[name]
+            print(f"{name:<14} {r['throughput_per_s']:>8} req/s  p50 {r['p50_ms']} ms  "
+                  f"worker RSS {r['worker_rss_mb']} MB  PSS {r['worker_pss_mb']} MB  "
+                  f"USS {r['worker_uss_mb']} MB  total PSS {r['total_pss_mb']} MB")
+
+    print()
+    print_summary(results)
+    path = save_results("workers", {**vars(args), "cpu_count": os.cpu_count()}, results, args.output)
+    print(f"\nSaved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Synthetic scam conversations for the replay benchmark.
+
+Seeded from data/messages.csv: every scam message is used as an opener and
+as a pool of follow-ups, with generated variants that carry fresh UPI ids,
+phone numbers, account numbers and links so the extractor and the
+fingerprint DB see a realistic mix of new and repeat scammers.
+"""
+import csv
+import os
+import random
+
+MESSAGES_CSV = os.path.join(os.path.dirname(__file__), "..", "data", "messages.csv")
+
+UPI_HANDLES = ["okhdfc", "oksbi", "ybl", "paytm", "okaxis", "ibl"]
+LINK_HOSTS = ["bit.ly", "tinyurl.com", "kyc-update-portal.in", "sbi-verify.co", "rbi-refund.net"]
+FOLLOW_UPS = [
+    "Sir please send Rs.{amount} to {upi} immediately, otherwise account will be blocked.",
+    "Call our helpdesk on {phone} right now to complete KYC.",
+    "Transfer to account number {account} IFSC SBIN0001234 today.",
+    "Click {link} and enter the OTP to verify.",
+    "Why are you not responding? This is urgent, pay to {upi} or call {phone}.",
+    "Final warning. Legal action will be taken. Verify at {link}",
+]
+
+
+def load_seed_messages(path: str = MESSAGES_CSV) -> tuple:
+    """(scam_messages, legit_messages) from the labelled CSV."""
+    scam, legit = [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            (scam if row["label"].strip().lower() == "scam" else legit).append(row["message"])
+    return scam, legit
+
+
+class ScammerIdentity:
+    """Identifiers one synthetic scammer reuses across its conversations."""
+
+    def __init__(self, rng: random.Random):
+        self.upi = f"{rng.choice(['verify', 'refund', 'kyc', 'help', 'pay'])}{rng.randrange(10_000)}@{rng.choice(UPI_HANDLES)}"
+        self.phone = f"9{rng.randrange(100_000_000, 999_999_999)}"
+        self.account = str(rng.randrange(10**11, 10**12))
+        self.link = f"https://{rng.choice(LINK_HOSTS)}/{rng.randrange(10**6):06d}"
+
+    def fill(self, template: str, rng: random.Random) -> str:
+        return template.format(
+            upi=self.upi, phone=self.phone, account=self.account,
+            link=self.link, amount=rng.choice([10, 99, 499, 1999, 5000]),
+        )
+
+
+def build_conversations(count: int, turns: int = 4, seed: int = 7, repeat_ratio: float = 0.3,
+                        legit_ratio: float = 0.1) -> list:
+    """
+    `count` conversations of up to `turns` scammer messages each:
+    [{"chat_id", "scam": bool, "messages": [...]}]. About `repeat_ratio` of
+    scam chats reuse an earlier scammer's identifiers (DB re-identification);
+    `legit_ratio` of chats are single legitimate messages.
+    """
+    rng = random.Random(seed)
+    scam_seeds, legit_seeds = load_seed_messages()
+    identities = []
+    conversations = []
+
+    for i in range(count):
+        chat_id = f"bench-{seed}-{i}@c.us"
+        if legit_seeds and rng.random() < legit_ratio:
+            conversations.append({"chat_id": chat_id, "scam": False, "messages": [rng.choice(legit_seeds)]})
+            continue
+
+        if identities and rng.random() < repeat_ratio:
+            identity = rng.choice(identities)
+        else:
+            identity = ScammerIdentity(rng)
+            identities.append(identity)
+
+        messages = [rng.choice(scam_seeds)]
+        for _ in range(turns - 1):
+            if rng.random() < 0.3:
+                messages.append(rng.choice(scam_seeds))
+            else:
+                messages.append(identity.fill(rng.choice(FOLLOW_UPS), rng))
+        conversations.append({"chat_id": chat_id, "scam": True, "messages": messages})
+
+    return conversations
+
+
+def message_corpus(count: int, seed: int = 7) -> list:
+    """Flat list of `count` messages (seeds + variants) for micro-benchmarks."""
+    rng = random.Random(seed)
+    corpus = []
+    for conversation in build_conversations(max(1, count // 3), seed=seed):
+        corpus.extend(conversation["messages"])
+    rng.shuffle(corpus)
+    while len(corpus) < count:
+        corpus.extend(corpus[: count - len(corpus)])
+    return corpus[:count]
@@ -0,0 +1,24 @@
+import pytest
+
+from app.core import event_bus, fingerprint_db, rate_limiter, session_store
+
+
+@pytest.fixture(autouse=True)
+def unlimited_llm_calls():
+    """Fakes answer instantly; pacing them would only slow the suite down."""
+    for limiter in rate_limiter.LIMITERS.values():
+        limiter.configure(enabled=False)
+    yield
+    for limiter in rate_limiter.LIMITERS.values():
+        limiter.configure(enabled=True)
+
+
+@pytest.fixture
+def isolated_stores(tmp_path, monkeypatch):
+    """Point the fingerprint DB, honeypot session store and event journal at throwaway files."""
+    monkeypatch.setattr(fingerprint_db, "DB_PATH", str(tmp_path / "fingerprints.db"))
+    fingerprint_db.init_db()
+    store = session_store.SessionStore(db_path=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(session_store, "_store", store)
+    monkeypatch.setattr(event_bus, "_bus", event_bus.EventBus(db_path=str(tmp_path / "events.db")))
+    return tmp_path
@@ -0,0 +1,44 @@
+import json
+
+from benchmarks import micro, replay
+from benchmarks.results import compare, load_results, summarize
+from benchmarks.workload import build_conversations
+
+
+def test_percentile_summary():
+    summary = summarize([i / 1000 for i in range(1, 101)], wall_seconds=2.0)
+    assert summary["count"] == 100
+    assert summary["throughput_per_s"] == 50.0
+    assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]) == (50.0, 95.0, 99.0)
+
+
+def test_workload_is_deterministic_and_reuses_scammers():
+    first = build_conversations(40, seed=3)
+    assert first == build_conversations(40, seed=3)
+    assert any(not c["scam"] for c in first)
+    joined = " ".join(m for c in first for m in c["messages"])
+    assert "@" in joined and "https://" in joined
+
+
+def test_replay_and_micro_write_comparable_results(isolated_stores):
+    out = isolated_stores / "replay.json"
+    assert replay.main(["--conversations", "6", "--concurrency", "3", "--output", str(out)]) == 0
+    results = json.loads(out.read_text())["results"]
+    assert results["POST /honeypot/reply"]["count"] > 0
+    assert results["POST /fingerprint/store"]["errors"] == 0
+    assert results["ALL"]["errors"] == 0
+
+    micro_out = isolated_stores / "micro.json"
+    assert micro.main(["--iterations", "30", "--output", str(micro_out)]) == 0
+    run = load_results(str(micro_out))
+    assert set(run["results"]) == set(micro.BENCHMARKS)
+    assert all(not row["regression"] for row in compare(run, run))
+
+
+def test_in_process_replay_restores_module_state(tmp_path):
+    from app.core import conversation_agent, fingerprint_db, session_store
+
+    before = (fingerprint_db.DB_PATH, session_store._store, conversation_agent._client)
+    with replay.in_process_client(str(tmp_path), 0.0, rate_limits=False):
+        assert fingerprint_db.DB_PATH.startswith(str(tmp_path))
+    assert (fingerprint_db.DB_PATH, session_store._store, conversation_agent._client) == before
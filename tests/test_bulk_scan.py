@@ -0,0 +1,46 @@
+import csv
+
+from app.core import fingerprint_db
+from backend import bulk_scan
+
+WHATSAPP_EXPORT = """12/03/2024, 10:14 - Messages and calls are end-to-end encrypted. No one outside of this chat can read them.
+12/03/2024, 10:15 - +91 98765 43210: URGENT your bank account will be blocked today.
+Send Rs.10 to verify@okhdfc and share the OTP to reactivate
+12/03/2024, 10:17 - Me: who is this?
+[12/03/24, 10:18:02 AM] +91 98765 43210: Verify your KYC immediately or face legal action
+"""
+
+
+def test_whatsapp_export_is_parsed_into_messages(tmp_path):
+    export = tmp_path / "Chat with +91 98765 43210.txt"
+    export.write_text(WHATSAPP_EXPORT, encoding="utf-8")
+    messages = list(bulk_scan.iter_messages([str(tmp_path)]))
+    assert [sender for _, sender, _ in messages] == ["+91 98765 43210", "Me", "+91 98765 43210"]
+    # The continuation line belongs to the first message
+    assert "verify@okhdfc" in messages[0][2]
+
+
+def test_scan_summarizes_chats_and_bulk_stores_fingerprints(isolated_stores, tmp_path):
+    (tmp_path / "scammer.txt").write_text(WHATSAPP_EXPORT, encoding="utf-8")
+    with open(tmp_path / "dump.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["chat", "from", "text"])
+        writer.writerow(["family", "Mom", "See you at dinner tonight"])
+        writer.writerow(["family", "Dad", "Happy birthday, enjoy your day"])
+
+    summaries, scanned, _ = bulk_scan.scan([str(tmp_path)], workers=1, batch_size=2, out=None)
+    assert scanned == 5
+    assert summaries["family"].scam_messages == 0
+    scammer = summaries["scammer"]
+    assert scammer.scam_messages >= 1
+    assert "+919876543210" in scammer.identifiers["phoneNumbers"]
+
+    fingerprints = bulk_scan.store_summaries(summaries)
+    assert list(fingerprints) == ["scammer"]
+    profile = fingerprint_db.find_scammer_by_identifier("9876543210")
+    assert profile["fingerprint"] == fingerprints["scammer"]
+
+    report = tmp_path / "report.csv"
+    bulk_scan.write_report(str(report), summaries, fingerprints)
+    rows = list(csv.DictReader(open(report)))
+    assert rows[0]["chat"] == "scammer" and rows[0]["fingerprint"] == fingerprints["scammer"]
@@ -0,0 +1,75 @@
+import time
+
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from app.core.intelligence_extractor import StreamExtractor, extract_all_intelligence, extract_stream
+
+
+def make_pdf(lines: list) -> bytes:
+    """A one-page PDF with a line of Helvetica text per item."""
+    escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines]
+    content = "BT /F1 12 Tf 72 720 Td 14 TL " + " ".join(f"({line}) '" for line in escaped) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(content)} >>\nstream\n{content}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out, offsets = "%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n" + "".join(f"{o:010d} 00000 n \n" for o in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+def test_identifiers_across_window_edges_are_found_whole():
+    text = "".join(f"{'x' * (i % 37)} pay scam{i}@ybl, call +91 98765{i:05d} or http://sbi-kyc{i}.com/a "
+                   for i in range(300))
+    # Tiny windows put many identifiers across an edge; feed in odd-sized pieces
+    extractor = StreamExtractor(window_chars=200, overlap_chars=64)
+    for start in range(0, len(text), 123):
+        extractor.feed(text[start:start + 123])
+    streamed = extractor.finish()
+    whole = extract_all_intelligence(text)
+    for key in ("upiIds", "phoneNumbers", "phishingLinks", "bankAccounts"):
+        assert streamed[key] == sorted(whole[key])
+    assert len(streamed["phoneNumbers"]) == 300 and extractor.windows > 100
+
+
+def test_pending_text_stays_bounded_for_one_huge_piece():
+    extractor = StreamExtractor(window_chars=4096, overlap_chars=128)
+    extractor.feed(("filler words " * 1000 + "call 9876543210 ") * 50)
+    assert len(extractor._pending) < 4096
+    assert extractor.finish()["phoneNumbers"] == ["+919876543210"]
+
+
+def test_pathological_inputs_stay_linear():
+    started = time.perf_counter()
+    for text in ("a-" * 50_000, "a" * 100_000 + "@", "bank" * 25_000, "account" + " " * 50_000, "ab." * 30_000):
+        extract_all_intelligence(text)
+    assert time.perf_counter() - started < 2
+
+
+def test_extract_stream_matches_bare_domain_rule():
+    found = extract_stream(["visit hdfc-verify.com ", "or https://hdfc-verify.com/login now"])
+    assert found["phishingLinks"] == ["https://hdfc-verify.com/login"]
+
+
+def test_document_endpoint_reads_pdf_and_text():
+    client = TestClient(main.app)
+    pdf = make_pdf(["Complete your KYC form", "Pay the fee to kyc.desk@okaxis", "Helpline +91 9123456780"])
+    found = client.post("/honeypot/extract/document", content=pdf).json()
+    assert found["upiIds"] == ["kyc.desk@okaxis"] and found["phoneNumbers"] == ["+919123456780"]
+
+    text = ("Forwarded message. " * 5000 + "Visit http://sbi-update.in/kyc").encode()
+    found = client.post("/honeypot/extract/document", content=text).json()
+    assert found["phishingLinks"] == ["https://sbi-update.in/kyc"] and not found["truncated"]
+
+    assert client.post("/honeypot/extract/document", content=b"%PDF-1.4 broken").status_code == 422
+    assert client.post("/honeypot/extract/document", content=b"").status_code == 400
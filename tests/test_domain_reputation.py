@@ -0,0 +1,84 @@
+import threading
+
+from app.core import domain_reputation, fingerprint_db
+from app.core.domain_reputation import DomainEntry, DomainReputation, DomainTrie, host_of, read_blocklist
+
+
+def test_trie_matches_host_and_parent_domains_only():
+    trie = DomainTrie()
+    entry = DomainEntry("test", None)
+    assert trie.add("sbi-kyc.com", entry)
+    assert trie.add("login.paytm-refund.in", entry)
+    assert not trie.add("com", entry)    # a bare TLD would match everything
+
+    assert trie.match("sbi-kyc.com") == ("sbi-kyc.com", entry)
+    assert trie.match("secure.login.sbi-kyc.com") == ("sbi-kyc.com", entry)
+    assert trie.match("a.login.paytm-refund.in")[0] == "login.paytm-refund.in"
+    assert trie.match("paytm-refund.in") is None
+    assert trie.match("notsbi-kyc.com") is None
+    assert trie.size == 2
+
+
+def test_more_specific_entry_wins_and_leaves_can_grow_children():
+    trie = DomainTrie()
+    trie.add("evil.com", DomainEntry("a", None))
+    trie.add("x.evil.com", DomainEntry("b", None))
+    assert trie.match("y.x.evil.com")[1].source == "b"
+    assert trie.match("z.evil.com")[1].source == "a"
+
+
+def test_host_of_and_hosts_file_blocklists(tmp_path):
+    assert host_of("HTTP://WWW.Fake-Bank.com:8080/kyc?x=1") == "fake-bank.com"
+    assert host_of("fake-bank.com/kyc") == "fake-bank.com"
+    path = tmp_path / "blocklist.txt"
+    path.write_text("# comment\n0.0.0.0 bad.example\n\nhttps://phish.example/login\nplain.example  # note\n")
+    assert list(read_blocklist(str(path))) == ["bad.example", "phish.example", "plain.example"]
+
+
+def test_stored_links_are_indexed_incrementally(isolated_stores, monkeypatch):
+    reputation = DomainReputation(blocklists=[])
+    reputation.reload()
+    monkeypatch.setattr(domain_reputation, "_reputation", reputation)
+    assert not reputation.check(["https://kyc.sbi-update.com/x"])[0]["malicious"]
+
+    stored = fingerprint_db.store_fingerprint({"phishingLinks": ["http://sbi-update.com/login"]})
+    result = reputation.check(["https://kyc.sbi-update.com/x"])[0]
+    assert result["malicious"] and result["matched_domain"] == "sbi-update.com"
+    assert result["fingerprint"] == stored["fingerprint"]
+
+
+def test_shared_hosts_are_not_listed_from_stored_links(isolated_stores):
+    fingerprint_db.store_fingerprint({"phishingLinks": ["https://bit.ly/AbC12", "https://sbi-kyc.in/x"]})
+    reputation = DomainReputation(blocklists=[])
+    assert reputation.reload()["domains"] == 1
+    assert [r["malicious"] for r in reputation.check(["bit.ly/other", "sbi-kyc.in"])] == [False, True]
+
+
+def test_reload_keeps_links_added_while_it_runs(isolated_stores, tmp_path, monkeypatch):
+    blocklist = tmp_path / "big.txt"
+    blocklist.write_text("".join(f"bad{i}.example\n" for i in range(20000)))
+    reputation = DomainReputation(blocklists=[str(blocklist)])
+    reputation.reload()
+
+    reloading = threading.Thread(target=reputation.reload)
+    reloading.start()
+    reputation.add_link("https://late-phish.example/pay")
+    # Checks keep answering from whichever trie is current
+    assert reputation.check(["bad19999.example"])[0]["malicious"]
+    reloading.join()
+
+    assert reputation.check(["late-phish.example"])[0]["malicious"]
+    assert reputation.stats()["domains"] == 20001
+
+
+def test_links_check_endpoint(isolated_stores, monkeypatch):
+    from fastapi.testclient import TestClient
+    import backend.main as main
+
+    reputation = DomainReputation(blocklists=[])
+    reputation.add_link("https://hdfc-kyc.in/login", "HIVE-TEST")
+    monkeypatch.setattr(domain_reputation, "_reputation", reputation)
+    response = TestClient(main.app).post("/links/check", json={"links": ["http://m.hdfc-kyc.in/a", "https://hdfc.com"]})
+    body = response.json()
+    assert body["count"] == 2 and body["malicious"] == 1
+    assert body["results"][0]["fingerprint"] == "HIVE-TEST"
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from app.core import conversation_agent, event_bus
+from app.core.event_bus import Digest, EventBus
+from app.core.fake_llm import FakeGenaiClient
+
+
+def _event(event_id: int, event_type: str, chat_id: str, data: dict) -> dict:
+    return {"id": event_id, "type": event_type, "chat_id": chat_id, "at": 1000.0 + event_id, "data": data}
+
+
+def test_events_are_journaled_in_order_and_filtered(tmp_path):
+    bus = EventBus(db_path=str(tmp_path / "events.db"))
+    bus.publish("detection", "chat-a", {"risk": "scam"})
+    bus.publish("intel", "chat-a", {"delta": {"upiIds": ["x@ybl"]}})
+    bus.publish("intel", "chat-b", {"delta": {"phoneNumbers": ["+919876543210"]}})
+
+    assert [e["type"] for e in bus.read_since(0)] == ["detection", "intel", "intel"]
+    assert [e["chat_id"] for e in bus.read_since(1, types=["intel"])] == ["chat-a", "chat-b"]
+    assert [e["id"] for e in bus.read_since(0, chat_id="chat-b")] == [3]
+    assert bus.last_id() == 3 and bus.stats()["published"]["intel"] == 2
+
+
+def test_digest_coalesces_each_chats_window_into_one_summary():
+    digest = Digest(window=30)
+    digest.add(_event(1, "intel", "chat-a", {"delta": {"upiIds": ["x@ybl"]}, "intel": {"upiIds": ["x@ybl"]}}), now=0)
+    digest.add(_event(2, "fingerprint", "chat-a", {"fingerprint": "fp1", "is_new_scammer": True}), now=1)
+    digest.add(_event(3, "intel", "chat-b", {"delta": {"phoneNumbers": ["+919876543210"]}}), now=10)
+    digest.add(_event(4, "intel", "chat-a", {"delta": {"upiIds": ["x@ybl", "y@ybl"]},
+                                             "intel": {"upiIds": ["x@ybl", "y@ybl"]}}), now=20)
+    digest.add(_event(5, "fingerprint", "chat-a", {"fingerprint": "fp1", "is_new_scammer": False}), now=21)
+
+    assert digest.due(now=29) == [] and digest.next_deadline() == 30
+    (summary,) = digest.due(now=30)
+    assert summary["chat_id"] == "chat-a" and summary["events"] == 4
+    assert summary["counts"] == {"intel": 2, "fingerprint": 2}
+    assert summary["new_intel"] == {"upiIds": ["x@ybl", "y@ybl"]}
+    assert summary["new_scammer"] and summary["fingerprint"]["is_new_scammer"] is False
+    # chat-b is still open, so a client resuming must replay from before its first event
+    assert digest.resume_id(consumed_id=5) == 2
+    assert [s["chat_id"] for s in digest.due(now=40)] == ["chat-b"] and digest.resume_id(5) == 5
+
+
+def test_stream_sends_one_digest_per_chat_window(tmp_path):
+    bus = EventBus(db_path=str(tmp_path / "events.db"))
+
+    async def collect():
+        stream = event_bus.stream(bus, after_id=0, digest=Digest(window=0.3))
+        publisher = threading.Timer(0.05, lambda: [
+            bus.publish("intel", chat, {"delta": {"upiIds": [f"{chat}@ybl"]}}) for chat in ("a", "b", "a")
+        ])
+        publisher.start()
+        received = []
+        async for name, data, event_id in stream:
+            if name:
+                received.append((name, data["chat_id"], data["events"], event_id))
+            if len(received) == 2:
+                return received
+
+    received = asyncio.run(asyncio.wait_for(collect(), 5))
+    assert sorted(received) == [("digest", "a", 2, 3), ("digest", "b", 1, 3)]
+
+
+def test_a_turn_publishes_intel_and_fingerprint_events(isolated_stores):
+    conversation_agent.set_client(FakeGenaiClient())
+    client = TestClient(main.app)
+    payload = {"session_id": "events-chat", "scam_type": "upi_fraud",
+               "scammer_message": "Send the fee to refund.desk@okaxis now"}
+    client.post("/honeypot/turn", json=payload)
+    client.post("/honeypot/turn", json={**payload, "scammer_message": "Hurry up"})    # nothing new
+
+    events = event_bus.get_event_bus().read_since(0)
+    assert [(e["type"], e["chat_id"]) for e in events] == [("intel", "events-chat"), ("fingerprint", "events-chat")]
+    assert events[0]["data"]["delta"] == {"upiIds": ["refund.desk@okaxis"]}
+    assert events[1]["data"]["is_new_scammer"] is True
+
+    assert client.get("/events", params={"types": "intel,bogus"}).status_code == 400
+    assert client.get("/events/stats").json()["published"]["fingerprint"] == 1
@@ -0,0 +1,109 @@
+import os
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from app.core import fingerprint_db, fingerprint_retention
+from app.core.fingerprint_retention import FingerprintRetention, _file_bytes, get_archived_sessions
+
+
+def _store_sessions(count: int, phone: str = "+919876543210", padding: int = 0):
+    for i in range(count):
+        intel = {"phoneNumbers": [phone], "notes": "x" * padding}
+        fingerprint_db.store_fingerprint(intel, scam_type="bank_fraud", chat_id=f"chat-{phone}-{i}", message_count=3)
+
+
+def _age_sessions(where: str = "1 = 1"):
+    conn = fingerprint_db._get_conn()
+    conn.execute(f"UPDATE sessions SET last_activity = '2020-01-01T00:00:00+00:00' WHERE {where}")
+    conn.commit()
+    conn.close()
+
+
+def test_old_sessions_move_to_the_archive_and_stay_counted(isolated_stores):
+    _store_sessions(7)
+    _age_sessions("id <= 5")
+    profile = fingerprint_db.find_scammer_by_identifier("9876543210")
+
+    result = FingerprintRetention(batch_size=2).run_once()
+    assert (result["sessions_archived"], result["batches"]) == (5, 3)
+
+    after = fingerprint_db.find_scammer_by_identifier("9876543210")
+    assert after["session_count"] == profile["session_count"] == 7
+    assert after["archived_sessions"] == 5
+    conn = fingerprint_db._get_conn()
+    assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 2
+    assert conn.execute("SELECT archived_messages FROM scammers").fetchone()[0] == 15
+    conn.close()
+    stats = fingerprint_db.get_stats()
+    assert (stats["total_sessions"], stats["archived_sessions"]) == (7, 5)
+
+    archived = get_archived_sessions(after["fingerprint"])
+    assert len(archived) == 5 and archived[0]["chat_id"].startswith("chat-")
+    # Nothing old is left, so a second pass is a no-op
+    assert FingerprintRetention().run_once()["sessions_archived"] == 0
+
+
+def test_compaction_reclaims_space_from_archived_snapshots(isolated_stores):
+    _store_sessions(300, padding=4000)
+    _age_sessions()
+    db_path = fingerprint_db.DB_PATH
+    before = _file_bytes(db_path) + _file_bytes(db_path + "-wal")
+
+    result = FingerprintRetention(vacuum_pages=64).run_once()
+    assert result["sessions_archived"] == 300
+    assert result["pages_freed"] > 250 and result["bytes_reclaimed"] > 1_000_000
+    assert result["wal_checkpoint_complete"]
+
+    fingerprint_db.store_fingerprint({"upiIds": ["new@ybl"]})
+    after = _file_bytes(db_path) + _file_bytes(db_path + "-wal")
+    assert after < before / 2 and os.path.getsize(fingerprint_retention.archive_path()) > 1_000_000
+
+
+def test_v1_database_is_migrated(tmp_path, monkeypatch):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE scammers (id TEXT PRIMARY KEY, first_seen TEXT NOT NULL, last_seen TEXT NOT NULL,
+            encounter_count INTEGER DEFAULT 1, scam_types TEXT DEFAULT '[]', threat_score REAL DEFAULT 0.0,
+            status TEXT DEFAULT 'active', notes TEXT DEFAULT '');
+        INSERT INTO scammers (id, first_seen, last_seen) VALUES ('abc', '2024-01-01', '2024-01-01');
+        PRAGMA user_version = 1;
+    """)
+    conn.close()
+    monkeypatch.setattr(fingerprint_db, "DB_PATH", path)
+    fingerprint_db.init_db()
+
+    conn = fingerprint_db._get_conn()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2    # incremental
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == fingerprint_db.SCHEMA_VERSION
+    assert conn.execute("SELECT archived_sessions FROM scammers").fetchone()[0] == 0
+    conn.close()
+
+
+def test_merge_carries_archived_counts_and_sessions(isolated_stores):
+    _store_sessions(2, phone="+919000000001")
+    _store_sessions(3, phone="+919000000002")
+    _age_sessions()
+    FingerprintRetention().run_once()
+    a = fingerprint_db.find_scammer_by_identifier("9000000001")["fingerprint"]
+    b = fingerprint_db.find_scammer_by_identifier("9000000002")["fingerprint"]
+
+    merged = fingerprint_db.merge_scammers(a, b)
+    assert merged["archived_sessions"] == merged["session_count"] == 5
+    assert len(get_archived_sessions(a)) == 5 and get_archived_sessions(b) == []
+
+
+def test_admin_endpoints_run_a_pass(isolated_stores, monkeypatch):
+    monkeypatch.setattr(fingerprint_retention, "_retention", FingerprintRetention())
+    _store_sessions(3)
+    _age_sessions()
+    monkeypatch.setattr(main, "API_KEY", "s3cret")
+    client = TestClient(main.app, headers={"X-API-Key": "s3cret"})
+
+    result = client.post("/admin/fingerprint/retention/run", params={"days": 30}).json()
+    assert result["sessions_archived"] == 3
+    stats = client.get("/admin/fingerprint/retention").json()
+    assert stats["runs"] == 1 and stats["sessions_archived"] == 3 and stats["archive_bytes"] > 0
+    assert 'hive_fingerprint_db_bytes{file="archive"}' in client.get("/metrics").text
@@ -0,0 +1,110 @@
+import os
+import threading
+
+import pytest
+
+from app.core import fingerprint_db
+from app.core.fingerprint_retention import FingerprintRetention, get_archived_sessions
+from app.core.fingerprint_shards import shard_of
+
+STORES = [
+    ({"phoneNumbers": ["+919876543210"], "upiIds": ["refund.desk@okaxis"]}, "upi_fraud", "chat-1", 4),
+    ({"upiIds": ["refund.desk@okaxis"], "bankAccounts": ["123456789012"]}, "bank_fraud", "chat-2", 2),
+    ({"phoneNumbers": ["+918888777766"]}, "lottery", "chat-3", 6),
+    ({"phishingLinks": ["http://kyc-update.example/verify"]}, "phishing", "chat-4", 1),
+    ({"phoneNumbers": ["08888777766"], "upiIds": ["prize.claim@ybl"]}, "lottery", "chat-5", 3),
+    ({}, "unknown", None, 0),
+]
+
+
+@pytest.fixture
+def sharded(isolated_stores, monkeypatch):
+    monkeypatch.setattr(fingerprint_db, "FINGERPRINT_SHARDS", 4)
+    monkeypatch.setattr(fingerprint_db, "DB_PATH", str(isolated_stores / "sharded.db"))
+    fingerprint_db.init_db()
+    return isolated_stores
+
+
+def _replay():
+    profiles = [fingerprint_db.store_fingerprint(*store) for store in STORES]
+    return [(p.get("fingerprint"), p.get("is_new_scammer"), p.get("encounter_count")) for p in profiles]
+
+
+def _lookups():
+    keys = ("9876543210", "refund.desk@okaxis", "123456789012", "+91 88887 77766", "prize.claim@ybl", "nobody@ybl")
+    return [(p or {}).get("fingerprint") for p in map(fingerprint_db.find_scammer_by_identifier, keys)]
+
+
+def test_sharded_mode_answers_like_a_single_file(isolated_stores, sharded, monkeypatch):
+    stored, lookups, stats = _replay(), _lookups(), fingerprint_db.get_stats()
+
+    monkeypatch.setattr(fingerprint_db, "FINGERPRINT_SHARDS", 1)
+    monkeypatch.setattr(fingerprint_db, "DB_PATH", str(isolated_stores / "single.db"))
+    assert _replay() == stored and _lookups() == lookups
+    assert fingerprint_db.get_stats() == stats
+
+    # Identifiers really are spread over the shard files
+    monkeypatch.setattr(fingerprint_db, "FINGERPRINT_SHARDS", 4)
+    monkeypatch.setattr(fingerprint_db, "DB_PATH", str(sharded / "sharded.db"))
+    counts = []
+    for path in fingerprint_db.db_paths():
+        conn = fingerprint_db._connect(path)
+        counts.append(conn.execute("SELECT COUNT(*) FROM identifiers").fetchone()[0])
+        conn.close()
+    assert sum(counts) == stats["total_identifiers"] and sum(1 for count in counts if count) > 1
+
+
+def test_merge_routes_the_merged_profiles_identifiers(sharded):
+    _replay()
+    a = fingerprint_db.find_scammer_by_identifier("9876543210")
+    b = fingerprint_db.find_scammer_by_identifier("+918888777766")
+    merged = fingerprint_db.merge_scammers(a["fingerprint"], b["fingerprint"])
+
+    assert merged["encounter_count"] == a["encounter_count"] + b["encounter_count"]
+    assert merged["session_count"] == a["session_count"] + b["session_count"]
+    assert {i["value"] for i in merged["identifiers"]} >= {"+918888777766", "prize.claim@ybl"}
+    assert fingerprint_db.get_scammer_by_fingerprint(b["fingerprint"]) is None
+    assert fingerprint_db.find_scammer_by_identifier("prize.claim@ybl")["fingerprint"] == a["fingerprint"]
+    # A later message from B's number lands on the merged profile
+    after = fingerprint_db.store_fingerprint({"phoneNumbers": ["+918888777766"]}, "lottery", "chat-6")
+    assert after["fingerprint"] == a["fingerprint"] and not after["is_new_scammer"]
+    assert fingerprint_db.get_stats()["total_scammers"] == 2
+
+
+def test_concurrent_writers_sharing_an_identifier_end_in_one_profile(sharded):
+    barrier = threading.Barrier(6)
+
+    def write(i):
+        barrier.wait()
+        fingerprint_db.store_fingerprint({"upiIds": ["shared.mule@ybl"]}, "upi_fraud", f"race-{i}")
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = fingerprint_db.get_stats()
+    assert (stats["total_scammers"], stats["total_sessions"], stats["total_identifiers"]) == (1, 6, 7)
+    profile = fingerprint_db.find_scammer_by_identifier("race-5")
+    assert profile["encounter_count"] == 6 and len(profile["identifiers"]) == 7
+
+
+def test_top_scammers_merge_across_shards_and_retention_covers_each_shard(sharded):
+    for i in range(12):
+        for turn in range(i % 4 + 1):
+            fingerprint_db.store_fingerprint({"phoneNumbers": [f"+9190000000{i:02d}"]}, "bank_fraud", f"c{i}-{turn}")
+    assert len({shard_of(p["fingerprint"], 4) for p in fingerprint_db.get_all_scammers(limit=50)}) > 1
+    top = fingerprint_db.get_all_scammers(limit=5)
+    scores = [p["threat_score"] for p in top]
+    assert len(top) == 5 and scores == sorted(scores, reverse=True) and scores[0] == 52.0
+
+    for path in fingerprint_db.db_paths():
+        conn = fingerprint_db._connect(path)
+        conn.execute("UPDATE sessions SET last_activity = '2020-01-01T00:00:00+00:00'")
+        conn.commit()
+        conn.close()
+    assert FingerprintRetention().run_once()["sessions_archived"] == 30
+    assert fingerprint_db.get_stats()["total_sessions"] == 30
+    assert len(get_archived_sessions(top[0]["fingerprint"])) == 4
+    assert sum(os.path.exists(path.replace(".db", "_archive.db")) for path in fingerprint_db.db_paths()) > 1
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from app.core import fingerprint_db
+from app.core.fingerprint_retention import FingerprintRetention
+from app.core.fingerprint_trends import backfill_rollups, backfill_status, get_trends, parse_time
+
+STORES = [
+    ({"upiIds": ["refund.desk@okaxis"], "phoneNumbers": ["+919876543210"]}, "upi_fraud", "chat-1", 4),
+    ({"upiIds": ["refund.desk@okaxis"]}, "upi_fraud", "chat-2", 2),
+    ({"phoneNumbers": ["+918888777766"]}, "lottery", "chat-3", 6),
+    ({"upiIds": ["prize.claim@ybl", "prize.desk@ybl"]}, "upi_fraud", "chat-4", 1),
+]
+
+
+def _store_all():
+    for store in STORES:
+        fingerprint_db.store_fingerprint(*store)
+
+
+def _day():
+    now = datetime.now(timezone.utc)
+    return now - timedelta(days=1), now + timedelta(hours=1)
+
+
+def test_stores_roll_up_by_scam_type_status_and_identifier_type(isolated_stores):
+    _store_all()
+    fingerprint_db.update_scammer_status(fingerprint_db.find_scammer_by_identifier("+918888777766")["fingerprint"],
+                                         "flagged")
+    fingerprint_db.store_fingerprint({"phoneNumbers": ["+918888777766"]}, "lottery", "chat-5", 3)
+
+    totals = get_trends(*_day())["totals"]
+    assert (totals["sessions"], totals["messages"], totals["new_scammers"]) == (5, 16, 3)
+    assert totals["scam_types"] == {"upi_fraud": 3, "lottery": 2}
+    assert totals["statuses"] == {"active": 4, "flagged": 1}
+    assert totals["identifier_types"] == {"upi": {"sessions": 3, "identifiers": 4},
+                                          "phone": {"sessions": 3, "identifiers": 3}}
+
+    upi = get_trends(*_day(), bucket="day", scam_type="upi_fraud", identifier_type="upi")
+    assert (upi["totals"]["sessions"], upi["totals"]["messages"]) == (3, 7)
+    assert sum(point["sessions"] for point in upi["series"]) == 3 and upi["backfill_pending"] == 0
+
+
+def test_backfill_rolls_up_sessions_stored_before_v3_including_archived(isolated_stores):
+    _store_all()
+    conn = fingerprint_db._get_conn()
+    conn.execute("UPDATE sessions SET started_at = '2020-03-01T10:15:00+00:00', "
+                 "last_activity = '2020-03-01T10:15:00+00:00' WHERE id <= 2")
+    # Back to a v2 file: no rollups, no progress marker
+    conn.executescript("DELETE FROM rollup_hourly; DELETE FROM rollup_daily; DROP TABLE meta; PRAGMA user_version = 2;")
+    conn.close()
+    FingerprintRetention(days=365).run_once()    # sessions 1-2 now live only in the archive
+    fingerprint_db._initialized_path = None
+    fingerprint_db.init_db()
+    assert backfill_status()["pending_sessions"] == 4 and get_trends(*_day())["totals"]["sessions"] == 0
+
+    fingerprint_db.store_fingerprint({"upiIds": ["late@ybl"]}, "upi_fraud", "chat-6")    # rolled up as stored
+    result = backfill_rollups(batch_size=3)
+    assert (result["sessions"], result["batches"]) == (4, 2) and backfill_status()["complete"]
+
+    march = get_trends(parse_time("2020-03-01"), parse_time("2020-03-02"))
+    assert [(point["start"], point["sessions"]) for point in march["series"]] == [("2020-03-01T10:00", 2)]
+    assert march["totals"]["new_scammers"] == 1
+    assert get_trends(*_day())["totals"]["sessions"] == 3
+    assert backfill_rollups()["sessions"] == 0    # idempotent once done
+
+
+def test_trends_endpoint_and_sharded_rollups(isolated_stores, monkeypatch):
+    _store_all()
+    single = get_trends(*_day())["totals"]
+
+    monkeypatch.setattr(fingerprint_db, "FINGERPRINT_SHARDS", 4)
+    monkeypatch.setattr(fingerprint_db, "DB_PATH", str(isolated_stores / "sharded.db"))
+    _store_all()
+    assert get_trends(*_day())["totals"] == single
+
+    client = TestClient(main.app)
+    start, end = _day()
+    body = client.get("/fingerprint/trends", params={"from": start.isoformat(), "to": end.isoformat(),
+                                                     "bucket": "day"}).json()
+    assert body["totals"]["sessions"] == 4 and body["bucket"] == "day"
+    assert client.get("/fingerprint/trends", params={"bucket": "week"}).status_code == 400
+    assert client.get("/fingerprint/trends", params={"from": "yesterday"}).status_code == 400
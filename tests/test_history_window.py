@@ -0,0 +1,63 @@
+from app.core.history_window import HistoryWindow, HistoryWindowRegistry
+from app.core.persona_manager import PERSONAS, get_cached_system_prompt, get_persona_system_prompt
+
+
+def _turns(n, text="send the money to verify@okhdfc right now"):
+    return [
+        {"sender": "scammer" if i % 2 == 0 else "victim", "text": f"{text} #{i}"}
+        for i in range(n)
+    ]
+
+
+def test_window_keeps_most_recent_turns_within_budget():
+    window = HistoryWindow(token_budget=60)
+    for msg in _turns(20):
+        window.append(msg)
+    assert window.tokens <= 60
+    assert window.render().endswith("#19")
+    assert window.dropped_turns == 20 - window.turns
+
+
+def test_sync_only_appends_new_entries_and_resets_on_shrink():
+    history = _turns(4)
+    window = HistoryWindow(token_budget=1000)
+    window.sync(history)
+    window.sync(history + _turns(2, text="new"))
+    assert window.consumed == 6
+    assert window.render().count("\n") == 5
+
+    window.sync(_turns(1))
+    assert window.consumed == 1 and window.turns == 1
+
+
+def test_sync_with_offset_follows_a_trimmed_history():
+    full = _turns(10)
+    window = HistoryWindow(token_budget=1000)
+    window.sync(full[:4])
+    window.sync(full[:6])
+    # The caller now keeps only the last 3 turns; nothing is replayed twice
+    window.sync(full[7:], offset=7)
+    assert window.consumed == 10
+    assert window.turns == 9 and window.render().endswith("#9")
+
+
+def test_stateless_window_matches_incremental_window():
+    history = _turns(15)
+    incremental = HistoryWindow(token_budget=80)
+    incremental.sync(history)
+    assert HistoryWindow.from_history(history, token_budget=80).render() == incremental.render()
+
+
+def test_registry_evicts_least_recently_used_chat():
+    registry = HistoryWindowRegistry(max_chats=2)
+    first = registry.get("a")
+    registry.get("b")
+    registry.get("a")
+    registry.get("c")
+    assert registry.get("a") is first
+    assert len(registry) == 2
+
+
+def test_system_prompts_are_precomputed_per_persona():
+    for persona in PERSONAS.values():
+        assert get_cached_system_prompt(persona) == get_persona_system_prompt(persona)
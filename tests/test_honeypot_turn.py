@@ -0,0 +1,64 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from app.core import conversation_agent
+from app.core.fake_llm import FakeGenaiClient
+
+
+def _turn(client, message, **extra):
+    return client.post("/honeypot/turn", json={
+        "session_id": "chat-1",
+        "scammer_message": message,
+        "scam_type": "upi_fraud",
+        **extra,
+    })
+
+
+def test_turn_returns_reply_intel_and_fingerprint(isolated_stores):
+    conversation_agent.set_client(FakeGenaiClient())
+    client = TestClient(main.app)
+
+    first = _turn(client, "Send Rs.10 to verify@okhdfc now").json()
+    assert first["reply"]
+    assert first["intel_delta"]["upiIds"] == ["verify@okhdfc"]
+    assert first["fingerprint"]["is_new_scammer"] is True
+    assert {"reply_ms", "extract_ms", "fingerprint_ms", "total_ms"} <= set(first["timings"])
+
+    # Same identifier again: nothing new, so no fingerprint write
+    second = _turn(client, "Did you send it to verify@okhdfc?").json()
+    assert second["intel_delta"]["upiIds"] == []
+    assert second["fingerprint"] is None
+    assert second["turn"] == 4
+
+
+def test_streamed_turn_ends_with_full_result(isolated_stores):
+    conversation_agent.set_client(FakeGenaiClient(chunk_chars=4))
+    client = TestClient(main.app)
+
+    body = _turn(client, "Call 9876543210 to claim", stream=True).text
+    blocks = [b for b in body.strip().split("\n\n")]
+    assert blocks[0].startswith("event: token")
+    done = json.loads(blocks[-1].split("data: ", 1)[1])
+    assert done["intel_delta"]["phoneNumbers"]
+    assert done["fingerprint"]["fingerprint"]
+    assert "first_token_ms" in done["timings"]
+
+
+def test_streamed_reply_is_recorded_even_if_extraction_fails(isolated_stores, monkeypatch):
+    from backend import honeypot_turn
+
+    def broken(*args):
+        raise RuntimeError("extractor crashed")
+
+    monkeypatch.setattr(honeypot_turn, "_collect_intel", broken)
+    conversation_agent.set_client(FakeGenaiClient(chunk_chars=4))
+    client = TestClient(main.app)
+
+    body = _turn(client, "Call 9876543210 to claim", stream=True).text
+    done = json.loads(body.strip().split("\n\n")[-1].split("data: ", 1)[1])
+    assert done["reply"] and done["turn"] == 2
+    assert done["timings"]["intel_error"] == "extractor crashed"
+    session = main.get_session_store().get("chat-1")
+    assert [m["sender"] for m in session["history"]] == ["scammer", "victim"]
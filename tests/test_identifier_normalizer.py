@@ -0,0 +1,64 @@
+import sqlite3
+
+from app.core import fingerprint_db
+from app.core.identifier_normalizer import candidate_keys, normalize_phone, normalize_url
+from app.core.intelligence_extractor import extract_all_intelligence
+
+
+def test_phone_variants_share_one_e164_key():
+    variants = ["+91 9876543210", "+91-9876543210", "919876543210", "09876543210", "9876543210"]
+    assert {normalize_phone(v) for v in variants} == {"+919876543210"}
+
+
+def test_url_variants_share_one_key():
+    variants = ["http://www.Fake-Bank.com/kyc/?ref=1", "https://fake-bank.com/kyc.", "www.fake-bank.com/kyc"]
+    assert {normalize_url(v) for v in variants} == {"https://fake-bank.com/kyc"}
+    # Short-link codes are case-sensitive
+    assert normalize_url("bit.ly/AbC") != normalize_url("bit.ly/abc")
+
+
+def test_extraction_returns_canonical_values():
+    intel = extract_all_intelligence(
+        "Call +91 9876543210 or 9876543210, pay Verify@OKHDFC, open http://www.sbi-kyc.com/login. now"
+    )
+    assert intel["phoneNumbers"] == ["+919876543210"]
+    assert intel["upiIds"] == ["verify@okhdfc"]
+    assert intel["phishingLinks"] == ["https://sbi-kyc.com/login"]
+
+
+def test_variants_link_to_the_same_scammer(isolated_stores):
+    first = fingerprint_db.store_fingerprint({"phoneNumbers": ["9876543210"]}, scam_type="upi_fraud")
+    second = fingerprint_db.store_fingerprint({"phoneNumbers": ["+91 98765-43210"], "upiIds": ["Pay@YBL"]})
+    assert second["fingerprint"] == first["fingerprint"] and not second["is_new_scammer"]
+    assert sorted(i["value"] for i in second["identifiers"]) == ["+919876543210", "pay@ybl"]
+    assert fingerprint_db.find_scammer_by_identifier("919876543210")["fingerprint"] == first["fingerprint"]
+    assert "+919876543210" in candidate_keys("98765 43210")
+
+
+def test_migration_canonicalizes_rows_and_merges_duplicates(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    monkeypatch.setattr(fingerprint_db, "DB_PATH", path)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    fingerprint_db._create_schema(conn)    # v0 schema, rows stored as extracted
+    for scammer in ("aaa", "bbb"):
+        conn.execute("INSERT INTO scammers (id, first_seen, last_seen, scam_types) VALUES (?, '2026-01-01', '2026-01-02', '[\"upi_fraud\"]')", (scammer,))
+    rows = [("aaa", "phone", "9876543210"), ("aaa", "link", "http://www.sbi-kyc.com/login"),
+            ("bbb", "phone", "+919876543210"), ("bbb", "upi", "Pay@YBL")]
+    conn.executemany("INSERT INTO identifiers (scammer_id, type, value, first_seen) VALUES (?, ?, ?, '2026-01-01')", rows)
+    conn.execute("INSERT INTO sessions (scammer_id, started_at, last_activity) VALUES ('bbb', '2026-01-01', '2026-01-01')")
+    conn.commit()
+    conn.close()
+
+    fingerprint_db.init_db()
+
+    profile = fingerprint_db.get_scammer_by_fingerprint("aaa")
+    assert fingerprint_db.get_scammer_by_fingerprint("bbb") is None
+    assert sorted(i["value"] for i in profile["identifiers"]) == [
+        "+919876543210", "https://sbi-kyc.com/login", "pay@ybl",
+    ]
+    assert profile["session_count"] == 1 and profile["encounter_count"] == 2
+    # Runs once: user_version is bumped
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == fingerprint_db.SCHEMA_VERSION
+    conn.close()
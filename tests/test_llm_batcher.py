@@ -0,0 +1,107 @@
+import asyncio
+
+from app.core import scam_detector
+from app.core.fake_llm import FakeGenerativeModel
+from app.core.llm_batcher import LLMMicroBatcher
+
+UNCERTAIN = [
+    "Please verify your details at the link",
+    "Your parcel is waiting, click to update address",
+    "Quick reminder to update your kyc",
+]
+
+
+def _batcher(model, **kwargs):
+    scam_detector.set_llm_model(model)
+    return LLMMicroBatcher(
+        batch_fn=scam_detector.llm_detect_batch,
+        fallback_fn=scam_detector.llm_detect,
+        **kwargs,
+    )
+
+
+def test_concurrent_messages_share_one_llm_call():
+    model = FakeGenerativeModel()
+
+    async def run():
+        batcher = _batcher(model, max_items=8, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(m) for m in UNCERTAIN))
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(run())
+    assert model.calls == 1
+    assert all(r["is_scam"] for r in results)
+    assert stats["batches"] == 1
+    assert stats["items"] == 3
+    assert stats["calls_saved"] == 2
+
+
+def test_max_items_triggers_flush_before_wait_expires():
+    model = FakeGenerativeModel()
+
+    async def run():
+        batcher = _batcher(model, max_items=2, max_wait_ms=10_000)
+        await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(m) for m in UNCERTAIN[:2])), timeout=2
+        )
+        return batcher.stats()
+
+    assert asyncio.run(run())["max_batch_size"] == 2
+
+
+def test_missing_batch_items_fall_back_individually():
+    model = FakeGenerativeModel(drop_ids={1})
+
+    async def run():
+        batcher = _batcher(model, max_items=8, max_wait_ms=5)
+        results = await asyncio.gather(*(batcher.submit(m) for m in UNCERTAIN))
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(run())
+    assert len(results) == 3 and all("is_scam" in r for r in results)
+    assert stats["fallback_calls"] == 1
+    assert model.calls == 2
+
+
+def test_detect_scam_async_uses_batcher_only_for_uncertain():
+    model = FakeGenerativeModel()
+
+    async def run():
+        batcher = _batcher(model, max_items=8, max_wait_ms=5)
+        clear = await scam_detector.detect_scam_async("See you at dinner tonight", batcher)
+        unsure = await scam_detector.detect_scam_async(UNCERTAIN[0], batcher)
+        return clear, unsure
+
+    clear, unsure = asyncio.run(run())
+    assert clear["method"] == "rule_based"
+    assert unsure["method"] == "llm_based"
+    assert model.calls == 1
+
+
+def test_parse_batch_verdicts_tolerates_garbage():
+    assert scam_detector.parse_batch_verdicts("not json", 2) == [None, None]
+    parsed = scam_detector.parse_batch_verdicts('[{"id": 1, "is_scam": true}]', 2)
+    assert parsed == [None, {"is_scam": True}]
+
+
+def test_failed_batch_is_retried_whole_then_fails_callers():
+    calls = {"batch": 0, "single": 0}
+
+    def flaky_batch(messages):
+        calls["batch"] += 1
+        raise RuntimeError("429 quota exceeded")
+
+    def single(message):
+        calls["single"] += 1
+        return {"is_scam": False}
+
+    async def run():
+        batcher = LLMMicroBatcher(flaky_batch, single, max_items=8, max_wait_ms=5,
+                                  retries=2, retry_backoff_ms=1)
+        results = await asyncio.gather(*(batcher.submit(m) for m in UNCERTAIN), return_exceptions=True)
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert calls == {"batch": 3, "single": 0}
+    assert stats["batch_retries"] == 2 and stats["batch_errors"] == 1
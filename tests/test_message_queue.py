@@ -0,0 +1,198 @@
+import asyncio
+import time
+
+from app.core.message_queue import MessageQueue
+from backend import ingest
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_per_chat_order_with_chats_in_parallel(tmp_path):
+    handled = []
+    running = set()
+    overlap = []
+
+    async def handler(job):
+        if running:
+            overlap.append(job.chat_id)
+        running.add(job.chat_id)
+        await asyncio.sleep(0.01)
+        handled.append((job.chat_id, job.payload["n"]))
+        running.discard(job.chat_id)
+
+    async def scenario():
+        queue = MessageQueue(handler, db_path=str(tmp_path / "q.db"), workers=4)
+        for n in range(5):
+            for chat in ("a", "b", "c"):
+                queue.enqueue(chat, {"n": n})
+        queue.start()
+        assert await queue.drain(timeout=5)
+        metrics = queue.metrics()
+        await queue.stop()
+        return metrics
+
+    metrics = _run(scenario())
+    for chat in ("a", "b", "c"):
+        assert [n for c, n in handled if c == chat] == list(range(5))
+    assert overlap, "different chats should be processed concurrently"
+    assert metrics["processed"] == 15 and metrics["depth"] == 0
+
+
+def test_failed_message_is_retried_and_holds_back_its_chat(tmp_path):
+    handled = []
+
+    async def handler(job):
+        if job.payload["n"] == 0 and job.attempts < 3:
+            job.state["partial"] = job.attempts
+            await asyncio.to_thread(queue.save_state, job)
+            raise RuntimeError("bot unreachable")
+        handled.append((job.payload["n"], job.state.get("partial")))
+
+    queue = MessageQueue(handler, db_path=str(tmp_path / "q.db"), workers=2, retry_base=0.01)
+
+    async def scenario():
+        queue.enqueue("a", {"n": 0})
+        queue.enqueue("a", {"n": 1})
+        queue.start()
+        assert await queue.drain(timeout=5)
+        await queue.stop()
+
+    _run(scenario())
+    # Checkpointed state survives the retries and order is preserved
+    assert handled == [(0, 2), (1, None)]
+    assert queue.metrics()["retries"] == 2
+
+
+def test_gives_up_after_max_attempts(tmp_path):
+    async def handler(job):
+        raise RuntimeError("boom")
+
+    queue = MessageQueue(handler, db_path=str(tmp_path / "q.db"), max_attempts=2, retry_base=0.01)
+
+    async def scenario():
+        queue.enqueue("a", {"n": 0})
+        queue.start()
+        assert await queue.drain(timeout=5)
+        await queue.stop()
+
+    _run(scenario())
+    assert queue.metrics()["failed_total"] == 1
+
+
+def test_unfinished_messages_survive_a_restart(tmp_path):
+    db = str(tmp_path / "q.db")
+
+    async def never(job):
+        raise AssertionError("not started")
+
+    first = MessageQueue(never, db_path=db)
+    first.enqueue("a", {"n": 0})
+    first._claim()    # simulate a crash mid-processing
+
+    seen = []
+
+    async def handler(job):
+        seen.append(job.payload["n"])
+
+    async def scenario():
+        queue = MessageQueue(handler, db_path=db)
+        queue.start()
+        assert await queue.drain(timeout=5)
+        await queue.stop()
+
+    _run(scenario())
+    assert seen == [0]
+
+
+def test_ingest_outcome_is_delivered_once_computed(isolated_stores, monkeypatch):
+    from app.core import conversation_agent
+    from app.core.fake_llm import FakeGenaiClient
+
+    fake = FakeGenaiClient()
+    conversation_agent.set_client(fake)
+    delivered = []
+    attempts = {"n": 0}
+
+    def flaky_deliver(chat_id, text, outcome, queue_id):
+        attempts["n"] += 1
+        if attempts["n"] == 1:
+            raise ConnectionError("bot restarting")
+        delivered.append(outcome)
+
+    monkeypatch.setattr(ingest, "deliver", flaky_deliver)
+    monkeypatch.setattr(ingest, "predict_message", lambda text: {"risk": "scam", "confidence": 0.9, "reason": "x"})
+    queue = MessageQueue(ingest.handle_inbound, db_path=str(isolated_stores / "q.db"), retry_base=0.01)
+    monkeypatch.setattr(ingest, "_queue", queue)
+
+    async def scenario():
+        queue.enqueue("chat-9", {"text": "Send Rs.10 to verify@okhdfc now"})
+        queue.start()
+        assert await queue.drain(timeout=5)
+        await queue.stop()
+
+    _run(scenario())
+    assert [o["action"] for o in delivered] == ["honeypot_started"]
+    assert delivered[0]["scam_type"] == "upi_fraud"
+    # The redelivery reused the checkpointed turn instead of asking Gemini again
+    assert len(fake.calls) == 1
+
+
+def test_stop_returns_promptly_with_idle_workers(tmp_path):
+    async def handler(job):
+        pass
+
+    async def scenario():
+        queue = MessageQueue(handler, db_path=str(tmp_path / "q.db"), workers=8, poll_interval=0.01)
+        for _ in range(20):
+            queue.start()
+            await asyncio.sleep(0.005)
+            await asyncio.wait_for(queue.stop(), timeout=2)
+
+    _run(scenario())
+
+
+def test_enqueue_only_process_leaves_claimed_rows_alone(tmp_path):
+    db = str(tmp_path / "q.db")
+
+    async def never(job):
+        raise AssertionError("not started")
+
+    consumer = MessageQueue(never, db_path=db)
+    consumer.enqueue("a", {"n": 0})
+    consumer._claim()    # the consumer is working on it
+
+    MessageQueue(never, db_path=db, recover=False)
+    status = consumer._conn.execute("SELECT status FROM inbound_messages").fetchone()[0]
+    assert status == "processing"
+
+
+def test_journal_writes_stay_off_the_event_loop(tmp_path):
+    async def handler(job):
+        pass
+
+    queue = MessageQueue(handler, db_path=str(tmp_path / "q.db"), workers=2, poll_interval=0.01)
+    complete = queue._complete
+
+    def slow_complete(job):
+        time.sleep(0.2)    # a commit stuck behind a busy disk
+        complete(job)
+
+    queue._complete = slow_complete
+
+    async def scenario():
+        queue.enqueue("a", {"n": 0})
+        queue.start()
+        ticks = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < 0.15:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert await queue.drain(timeout=5)
+        await queue.stop()
+        return ticks
+
+    # The loop kept ticking while the commit was blocked
+    assert _run(scenario()) >= 5
+    assert queue.metrics()["processed"] == 1
@@ -0,0 +1,44 @@
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from app.core import metrics
+from app.core.metrics import Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("t_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        hist.observe(value, "x")
+    lines = hist.collect()
+    assert 't_seconds_bucket{stage="x",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{stage="x",le="1.0"} 3' in lines
+    assert 't_seconds_bucket{stage="x",le="+Inf"} 4' in lines
+    assert 't_seconds_count{stage="x"} 4' in lines
+
+
+def test_disabled_metrics_record_nothing():
+    hist = Histogram("off_seconds", "test")
+    metrics.set_enabled(False)
+    try:
+        with hist.time():
+            pass
+        hist.observe(1.0)
+    finally:
+        metrics.set_enabled(True)
+    assert hist.count() == 0
+
+
+def test_metrics_endpoint_reports_routes_and_stages(isolated_stores):
+    client = TestClient(main.app)
+    client.post("/analyze-text", json={"message": "Send OTP to verify@okhdfc now"})
+    client.post("/honeypot/extract", json={"message": "Call 9876543210"})
+    client.get("/fingerprint/abc123")
+
+    body = client.get("/metrics").text
+    assert "# TYPE hive_http_request_seconds histogram" in body
+    # Path templates, not raw paths, are used as labels
+    assert 'route="/fingerprint/{fingerprint_id}"' in body
+    assert 'hive_model_seconds_count{stage="predict_proba"}' in body
+    assert 'hive_extractor_seconds_count{extractor="upiIds"}' in body
+    assert 'hive_sqlite_seconds_count{operation="get_scammer_by_fingerprint"}' in body
+    assert "hive_ingest_queue_depth" in body
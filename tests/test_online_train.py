@@ -0,0 +1,102 @@
+import os
+import threading
+
+import pytest
+
+from backend import model, online_train
+from backend.online_train import OnlineTrainer, record_label
+
+
+@pytest.fixture
+def trainer(tmp_path, monkeypatch):
+    # Whatever the test swaps in is put back afterwards
+    monkeypatch.setattr(model, "_components", model._components)
+    return OnlineTrainer(model_path=str(tmp_path / "online.joblib"), labels_path=str(tmp_path / "labels.jsonl"))
+
+
+def _first_round(trainer):
+    record_label("Your KYC is pending, share the OTP to keep your account", "scam", path=trainer.labels_path)
+    return trainer.train_round()
+
+
+def test_rounds_without_labels_keep_the_served_model(trainer):
+    served = model.load_model()
+    assert trainer.train_round() is None
+    assert model.load_model() is served and not os.path.exists(trainer.model_path)
+
+
+def test_first_round_bootstraps_and_hot_swaps(trainer):
+    stats = _first_round(trainer)
+    assert stats["swapped"] and stats["version"] == 1 and stats["model"] == "SGDClassifier"
+    assert os.path.exists(trainer.model_path)
+    served, _ = model.load_model()
+    assert type(served).__name__ == "SGDClassifier"
+    assert model.predict_message("Your account is blocked, send OTP to verify now")["risk"] == "scam"
+    # Nothing new to learn afterwards
+    assert trainer.train_round() is None
+
+
+def test_spooled_labels_are_consumed_once(trainer):
+    _first_round(trainer)
+    for _ in range(5):
+        record_label("Claim your lottery prize at winbig.example now", "scam", path=trainer.labels_path)
+    assert trainer.stats()["pending_labels"] == 5
+
+    stats = trainer.train_round()
+    assert stats["last_round_samples"] == 5 and stats["version"] == 2
+    assert stats["pending_labels"] == 0
+    assert not os.path.exists(trainer.labels_path + ".training")
+    with pytest.raises(ValueError):
+        record_label("hi", "spam", path=trainer.labels_path)
+
+
+def test_scoring_continues_while_a_round_trains(trainer, monkeypatch):
+    _first_round(trainer)
+    record_label("Pay the customs fee to release your parcel", "scam", path=trainer.labels_path)
+    entered, release = threading.Event(), threading.Event()
+    partial_fit = online_train.new_classifier().__class__.partial_fit
+
+    def slow_partial_fit(self, *args, **kwargs):
+        entered.set()
+        release.wait(5)
+        return partial_fit(self, *args, **kwargs)
+
+    monkeypatch.setattr(online_train.new_classifier().__class__, "partial_fit", slow_partial_fit)
+    worker = threading.Thread(target=trainer.train_round)
+    worker.start()
+    assert entered.wait(5)
+    # The round is stuck mid-fit, yet predictions are served by the current model
+    assert model.predict_message("See you at dinner tonight")["risk"] == "legitimate"
+    release.set()
+    worker.join(5)
+    assert trainer.stats()["version"] == 2
+
+
+def test_follower_swaps_in_a_model_saved_by_another_process(trainer, tmp_path):
+    _first_round(trainer)
+    follower = OnlineTrainer(model_path=trainer.model_path, labels_path=str(tmp_path / "other.jsonl"))
+    stats = follower.follow()
+    assert stats["version"] == 1 and stats["last_swap_ms"] is not None
+    assert follower.follow() is None
+
+
+def test_a_round_that_loses_holdout_recall_is_not_swapped(trainer):
+    _first_round(trainer)
+    served = model.load_model()
+    _, holdout = online_train._base_rows(trainer.dataset_path)
+    for message, label in holdout * 30:
+        if label == "scam":
+            record_label(message, "legitimate", path=trainer.labels_path)
+
+    stats = trainer.train_round()
+    assert not stats["swapped"] and stats["rejected_rounds"] == 1 and stats["version"] == 1
+    assert stats["last_holdout"]["candidate"]["recall"] < stats["last_holdout"]["served"]["recall"]
+    assert model.load_model() is served and stats["pending_labels"] == 0
+
+
+def test_honeypot_self_labels_are_marked_and_down_weighted(trainer):
+    record_label("Send the processing fee to claim your refund", "scam", path=trainer.labels_path,
+                 source="honeypot")
+    records, _ = online_train._claim_labels(trainer.labels_path)
+    assert records[0]["source"] == "honeypot"
+    assert online_train._weight(records[0]) == online_train.SELF_LABEL_WEIGHT < online_train._weight({})
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from app.core.profiler import sample_process
+
+
+def _spin_until(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_sees_busy_threads_as_collapsed_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin_until, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        summary, collapsed = sample_process(0.3, interval_ms=2)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert summary["samples"] > 10
+    busy = [line for line in collapsed.splitlines() if line.startswith("busy-worker;")]
+    assert busy and "test_profiler.py:_spin_until" in busy[0]
+    assert int(busy[0].rsplit(" ", 1)[1]) > 0
+
+
+def test_profile_endpoints_are_admin_only(isolated_stores, monkeypatch):
+    client = TestClient(main.app)
+    # Closed without API_KEY, even to localhost, unless explicitly opted in
+    assert client.get("/debug/profile", params={"seconds": 0.1}).status_code == 403
+    monkeypatch.setattr(main, "LOCAL_HOSTS", main.LOCAL_HOSTS | {"testclient"})
+    assert client.get("/debug/profile", params={"seconds": 0.1}).status_code == 403
+    monkeypatch.setattr(main, "ADMIN_ALLOW_LOCALHOST", True)
+    assert client.get("/debug/profile", params={"seconds": 0.1}).status_code == 200
+
+    monkeypatch.setattr(main, "API_KEY", "s3cret")
+    assert client.get("/debug/profile", params={"seconds": 0.1}).status_code == 401
+    # Without the key the profiling header is ignored
+    plain = client.post("/honeypot/extract", json={"message": "hi"}, headers={"X-Profile": "1"})
+    assert "x-profile-id" not in plain.headers
+
+    headers = {"X-API-Key": "s3cret"}
+    profiled = client.post("/honeypot/extract", json={"message": "Call 9876543210"},
+                           headers={**headers, "X-Profile": "1"})
+    assert profiled.status_code == 200
+    report = client.get(f"/debug/profile/requests/{profiled.headers['x-profile-id']}", headers=headers)
+    assert report.status_code == 200
+    assert "POST /honeypot/extract" in report.text and "cumulative" in report.text
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from app.core import conversation_agent, rate_limiter
+from app.core.fake_llm import FakeGenaiClient
+from app.core.persona_manager import select_persona
+from app.core.rate_limiter import RateLimiter, RateLimitExceeded
+
+
+def test_over_budget_calls_are_deferred_in_order():
+    limiter = RateLimiter("chat", rate_per_minute=600, burst=2)    # 10/s
+    waits = [limiter.reserve("chat-1") for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.01)
+    assert waits[3] == pytest.approx(0.2, abs=0.01)
+    # Other chats have their own bucket
+    assert limiter.reserve("chat-2") == 0.0
+
+    started = time.perf_counter()
+    limiter.acquire("chat-3")
+    limiter.acquire("chat-3")
+    limiter.acquire("chat-3")
+    assert time.perf_counter() - started >= 0.09
+    stats = limiter.stats()
+    assert stats["deferred"] == 3 and stats["rejected"] == 0
+
+
+def test_waits_beyond_max_wait_are_refused_without_using_a_token():
+    limiter = RateLimiter("model", rate_per_minute=60, burst=1, max_wait=0.5)
+    limiter.reserve("m")
+    with pytest.raises(RateLimitExceeded) as err:
+        limiter.reserve("m")
+    assert err.value.retry_after > 0.5
+    # The refused call left the balance where it was: one token short, not two
+    assert limiter._buckets["m"].tokens == pytest.approx(0.0, abs=0.05)
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_limits_change_at_runtime():
+    limiter = RateLimiter("chat", rate_per_minute=6, burst=1)
+    limiter.reserve("chat-1")
+    assert limiter.reserve("chat-1") > 5
+    limiter.configure(rate_per_minute=6000, key="chat-1")
+    time.sleep(0.02)
+    assert limiter.reserve("chat-1") < 0.05
+    assert limiter.limits()["overrides"]["chat-1"]["rate_per_minute"] == 6000
+
+
+def test_reply_skips_a_model_that_is_out_of_budget(monkeypatch):
+    limiter = RateLimiter("model", rate_per_minute=0, burst=1, max_wait=1)
+    limiter.configure(rate_per_minute=600, key="gemini-2.0-flash")
+    monkeypatch.setattr(conversation_agent, "model_limiter", limiter)
+    fake = FakeGenaiClient()
+    conversation_agent.set_client(fake)
+
+    persona = select_persona("upi_fraud")
+    conversation_agent.generate_reply(persona, "send money now")    # uses the one burst token
+    conversation_agent.generate_reply(persona, "send money now")
+    assert fake.calls == ["gemini-2.5-flash", "gemini-2.0-flash"]
+
+
+def test_admin_endpoints_and_429(isolated_stores, monkeypatch):
+    client = TestClient(main.app)
+    monkeypatch.setattr(main, "API_KEY", "s3cret")
+    assert client.get("/admin/rate-limits").status_code == 401
+
+    headers = {"X-API-Key": "s3cret"}
+    limits = client.get("/admin/rate-limits", headers=headers).json()["limits"]
+    assert set(limits) == {"chat", "model"}
+
+    chat = RateLimiter("chat", rate_per_minute=1, burst=1, max_wait=0)
+    monkeypatch.setattr(conversation_agent, "chat_limiter", chat)
+    monkeypatch.setitem(rate_limiter.LIMITERS, "chat", chat)
+    updated = client.put("/admin/rate-limits/chat", json={"burst": 1, "max_wait_seconds": 0}, headers=headers)
+    assert updated.json()["max_wait_seconds"] == 0
+
+    conversation_agent.set_client(FakeGenaiClient())
+    body = {"session_id": "chat-429", "scammer_message": "hello", "scam_type": "default"}
+    assert client.post("/honeypot/reply", json=body).status_code == 200
+    refused = client.post("/honeypot/reply", json=body)
+    assert refused.status_code == 429
+    assert int(refused.headers["Retry-After"]) >= 1
+
+
+def test_refused_reply_leaves_no_unanswered_turn(isolated_stores, monkeypatch):
+    chat = RateLimiter("chat", rate_per_minute=60, burst=1, max_wait=0)
+    monkeypatch.setattr(conversation_agent, "chat_limiter", chat)
+    conversation_agent.set_client(FakeGenaiClient())
+    client = TestClient(main.app)
+
+    body = {"session_id": "chat-retry", "scammer_message": "pay now", "scam_type": "default"}
+    assert client.post("/honeypot/reply", json=body).status_code == 200
+    assert client.post("/honeypot/reply", json=body).status_code == 429
+    chat.configure(rate_per_minute=60000)
+    time.sleep(0.01)
+    assert client.post("/honeypot/reply", json=body).json()["turn"] == 4
+
+    history = main.get_session_store().get("chat-retry")["history"]
+    assert [m["sender"] for m in history] == ["scammer", "victim", "scammer", "victim"]
@@ -0,0 +1,96 @@
+import itertools
+
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from app.core import conversation_agent, reply_pool
+from app.core.fake_llm import FakeGenaiClient
+from app.core.reply_pool import ReplyPool, classify_opening
+
+
+def _numbered_replies():
+    # Spelled-out numbers: a reply containing digits is rejected as too specific
+    counter = itertools.count()
+
+    def generate(persona, sample):
+        return f"{persona['name']} reply " + "".join("abcdefghij"[int(d)] for d in str(next(counter)))
+    return generate
+
+
+def test_openings_are_matched_to_templates():
+    assert classify_opening("Your KYC expired, update your PAN card now") == "kyc_update"
+    assert classify_opening("Account BLOCKED, call now") == "account_blocked"
+    assert classify_opening("Police case filed against you. Pay the fine today") == "legal_threat"
+    assert classify_opening("What time is it?") is None
+
+
+def test_a_new_persona_template_pair_starts_filling_on_first_use():
+    pool = ReplyPool(size=1, generate=_numbered_replies())
+    pool.refill()
+    message = "You won the lottery! Claim your prize"
+    assert pool.take("bank_fraud", message, "chat-a") is None    # not a home template of Ramesh
+    assert pool.stats()["misses_empty"] == 1
+    pool.refill()
+    assert pool.take("bank_fraud", message, "chat-a").startswith("Ramesh")
+
+
+def test_pool_rotates_never_repeats_to_a_chat_and_retires_replies():
+    pool = ReplyPool(size=2, max_uses=2, generate=_numbered_replies())
+    assert pool.refill() == 2 * len(pool.sizes())
+    message = "Your KYC has expired"
+
+    first = pool.take("bank_fraud", message, "chat-a")
+    second = pool.take("bank_fraud", message, "chat-b")
+    assert first and second and first != second    # rotated
+
+    # chat-a never sees its opening again, even after a reset
+    assert pool.take("bank_fraud", message, "chat-a") == second
+    assert pool.take("bank_fraud", message, "chat-c") == first
+    # Both replies have now opened two chats and are retired
+    assert pool.take("bank_fraud", message, "chat-d") is None
+    assert pool.sizes()["bank_fraud/kyc_update"] == 0
+
+    pool.refill()
+    assert pool.take("bank_fraud", message, "chat-d") not in (None, first, second)
+    stats = pool.stats()
+    assert (stats["hits"], stats["misses_empty"], stats["retired"]) == (5, 1, 2)
+    assert stats["hit_rate"] == round(5 / 6, 4)
+
+
+def test_duplicate_generations_are_not_pooled():
+    pool = ReplyPool(size=3, generate=lambda persona, sample: "same reply")
+    pool.refill()
+    assert set(pool.sizes().values()) == {1}
+    assert pool.stats()["duplicates"] > 0
+
+
+def test_pooled_replies_never_carry_specific_details():
+    for _, samples in reply_pool.OPENING_TEMPLATES.values():
+        assert not any(reply_pool.SPECIFIC_DETAIL.search(sample) for sample in samples)
+
+    replies = iter(["Which SBI account, sir?", "Why do I owe Rs 4,999?", "Oh no, what should I do?"])
+    pool = ReplyPool(size=1, generate=lambda persona, sample: next(replies, ""))
+    pool.refill()
+    assert pool.stats()["too_specific"] == 2
+    assert [size for size in pool.sizes().values() if size] == [1]
+
+
+def test_first_turn_is_served_from_the_pool(isolated_stores, monkeypatch):
+    client_fake = FakeGenaiClient()
+    conversation_agent.set_client(client_fake)
+    pool = ReplyPool(size=2, generate=_numbered_replies())
+    pool.refill()
+    monkeypatch.setattr(reply_pool, "_pool", pool)
+    client = TestClient(main.app)
+
+    payload = {"session_id": "pool-chat", "scam_type": "upi_fraud",
+               "scammer_message": "A refund of Rs 4999 is pending, approve it"}
+    first = client.post("/honeypot/turn", json=payload).json()
+    assert first["reply"].startswith("Priya") and first["timings"]["reply_source"] == "pool"
+    assert client_fake.calls == []
+
+    second = client.post("/honeypot/turn", json=payload).json()
+    assert second["timings"]["reply_source"] == "llm" and len(client_fake.calls) == 1
+
+    stats = client.get("/honeypot/reply-pool/stats").json()
+    assert stats["hits"] == 1 and stats["pools"]["upi_fraud/refund"] == 2
@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core import conversation_agent
+from app.core.conversation_agent import QuoteStripper, SentenceBuffer, clean_reply
+from app.core.fake_llm import FakeGenaiClient
+from app.core.persona_manager import select_persona
+
+
+@pytest.mark.parametrize("raw", [
+    '"Oh dear. Who is this?"',
+    '  "Quoted with trailing space"  ',
+    'No quotes at all.',
+    'Ends with a quote "like this"',
+    '"Double closing""',
+])
+@pytest.mark.parametrize("size", [1, 3, 7, 100])
+def test_quote_stripper_matches_clean_reply(raw, size):
+    stripper = QuoteStripper()
+    out = "".join(stripper.feed(raw[i:i + size]) for i in range(0, len(raw), size))
+    out += stripper.finish()
+    assert out == clean_reply(raw)
+
+
+def test_sentence_buffer_emits_complete_sentences():
+    buf = SentenceBuffer()
+    got = buf.feed("Oh dear. Who is") + buf.feed(" this? I am") + buf.finish()
+    assert got == ["Oh dear.", "Who is this?", "I am"]
+
+
+def test_stream_falls_back_until_first_token():
+    fake = FakeGenaiClient(failing_models=[conversation_agent.GEMINI_MODELS[0]])
+    conversation_agent.set_client(fake)
+
+    async def collect():
+        return [piece async for piece in conversation_agent.generate_reply_stream(select_persona("bank_fraud"), "send otp")]
+
+    pieces = asyncio.run(collect())
+    assert len(pieces) > 1
+    assert not "".join(pieces).startswith('"')
+    assert fake.calls == conversation_agent.GEMINI_MODELS[:2]
+
+
+def test_sse_endpoint_streams_tokens_and_records_turn(isolated_stores):
+    from fastapi.testclient import TestClient
+    import backend.main as main
+
+    conversation_agent.set_client(FakeGenaiClient(chunk_chars=5))
+
+    client = TestClient(main.app)
+    resp = client.post("/honeypot/reply/stream", json={
+        "scammer_message": "Your account is blocked",
+        "scam_type": "bank_fraud",
+        "session_id": "chat-1",
+    })
+    events = [
+        (block.split("\n")[0][len("event: "):], json.loads(block.split("\n")[1][len("data: "):]))
+        for block in resp.text.strip().split("\n\n")
+    ]
+    kinds = [kind for kind, _ in events]
+    assert kinds[0] == "token" and kinds[-1] == "done"
+    assert "sentence" in kinds
+
+    done = events[-1][1]
+    tokens = "".join(data["text"] for kind, data in events if kind == "token")
+    assert done["reply"] == tokens
+    assert done["turn"] == 2
@@ -0,0 +1,88 @@
+import multiprocessing
+import time
+
+from app.core.session_store import SessionStore, history_offset
+
+
+def test_sessions_survive_a_restart(tmp_path):
+    db = str(tmp_path / "sessions.db")
+    store = SessionStore(db_path=db)
+    store.get_or_create("chat-1", "upi_fraud")
+    store.append_turn("chat-1", "scammer", "send 10 rs to verify@okhdfc")
+    store.append_turn("chat-1", "victim", "which app do I use?")
+    store.stop()
+
+    restarted = SessionStore(db_path=db)
+    session = restarted.get("chat-1")
+    assert session["scam_type"] == "upi_fraud"
+    assert [m["sender"] for m in session["history"]] == ["scammer", "victim"]
+
+
+def test_writes_are_cached_until_flush(tmp_path):
+    db = str(tmp_path / "sessions.db")
+    store = SessionStore(db_path=db, flush_batch=100)
+    store.append_turn("chat-1", "scammer", "hello")
+    assert SessionStore(db_path=db).get("chat-1") is None
+
+    store.flush()
+    assert SessionStore(db_path=db).get("chat-1") is not None
+
+
+def test_idle_sessions_expire(tmp_path):
+    db = str(tmp_path / "sessions.db")
+    store = SessionStore(db_path=db, ttl_seconds=0.05)
+    store.get_or_create("chat-1")
+    store.flush()
+    time.sleep(0.1)
+    assert store.evict_idle() == 1
+    assert store.get("chat-1") is None
+    assert SessionStore(db_path=db).get("chat-1") is None
+
+
+def test_delete_is_persisted(tmp_path):
+    db = str(tmp_path / "sessions.db")
+    store = SessionStore(db_path=db)
+    store.get_or_create("chat-1")
+    store.flush()
+    assert store.delete("chat-1")
+    store.flush()
+    assert SessionStore(db_path=db).get("chat-1") is None
+
+
+def test_history_keeps_a_bounded_tail_but_counts_every_turn(tmp_path):
+    db = str(tmp_path / "sessions.db")
+    store = SessionStore(db_path=db, history_limit=4)
+    for i in range(10):
+        store.append_turn("chat-1", "scammer" if i % 2 == 0 else "victim", f"msg {i}")
+    store.stop()
+
+    session = SessionStore(db_path=db).get("chat-1")
+    assert [m["text"] for m in session["history"]] == ["msg 6", "msg 7", "msg 8", "msg 9"]
+    assert session["turns"] == 10
+    assert history_offset(session) == 6
+
+
+def _append_from_process(db, worker, turns):
+    store = SessionStore(db_path=db, history_limit=1000, write_through=True)
+    for i in range(turns):
+        store.append_turn("chat-1", "scammer", f"w{worker}-{i}")
+
+
+def test_write_through_keeps_turns_from_two_processes(tmp_path):
+    db = str(tmp_path / "sessions.db")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_append_from_process, args=(db, worker, 50)) for worker in range(2)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    session = SessionStore(db_path=db, history_limit=1000, write_through=True).get("chat-1")
+    assert session["turns"] == 100
+    assert sorted(m["text"] for m in session["history"]) == sorted(f"w{w}-{i}" for w in range(2) for i in range(50))
+
+    a, b = (SessionStore(db_path=db, write_through=True) for _ in range(2))
+    a.update("chat-1", active=False)
+    assert b.get("chat-1")["active"] is False
+    assert b.delete("chat-1") and a.get("chat-1") is None
@@ -0,0 +1,31 @@
+from backend.train_sweep import choose, pareto_front, sweep
+
+
+def _candidate(recall, latency, size, accuracy=0.9):
+    return {"params": {}, "recall": recall, "latency_p50_ms": latency, "size_kb": size, "accuracy": accuracy}
+
+
+def test_pareto_front_drops_dominated_candidates():
+    fast_small = _candidate(0.8, 1.0, 10)
+    accurate = _candidate(0.95, 5.0, 100)
+    dominated = _candidate(0.8, 2.0, 50)    # slower and bigger than fast_small, no better recall
+    front = pareto_front([fast_small, accurate, dominated])
+    assert front == [fast_small, accurate]
+
+
+def test_choose_picks_the_fastest_above_the_recall_floor():
+    candidates = [_candidate(0.8, 1.0, 10), _candidate(0.92, 3.0, 60), _candidate(0.97, 6.0, 120)]
+    assert choose(candidates, 0.9) is candidates[1]
+    assert choose(candidates, 0.99) is None
+
+
+def test_sweep_scores_and_measures_each_candidate():
+    scam = ["Send OTP now to unblock your bank account", "Pay Rs.10 to verify@okhdfc urgently",
+            "Your KYC expired, click bit.ly/kyc to update"]
+    legit = ["See you at dinner tonight", "Meeting moved to 3pm", "Happy birthday, enjoy your day"]
+    grid = {"n_estimators": [5], "max_depth": [None, 4], "max_features": [None]}
+    results = sweep(scam + legit, ["scam"] * 3 + ["legitimate"] * 3, grid, folds=3, workers=1, latency_samples=5)
+    assert len(results) == 2
+    for result in results:
+        assert 0.0 <= result["recall"] <= 1.0
+        assert result["latency_p50_ms"] > 0 and result["size_kb"] > 0 and result["memory_kb"] > 0
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from app.core.transcriber import TranscriptionQueueFull, TranscriptionService, TranscriptionUnavailable
+
+
+def test_stub_pool_transcribes_raw_bytes():
+    service = TranscriptionService(backend="stub", workers=2, queue_size=4)
+    try:
+        async def run():
+            return await asyncio.gather(
+                service.transcribe(b"send otp to 9876543210"),
+                service.transcribe(b"\xff\xfe\x00binary-audio"),
+            )
+
+        text_result, binary_result = asyncio.run(run())
+        assert text_result["text"] == "send otp to 9876543210"
+        assert binary_result["text"].startswith("[audio ")
+        assert text_result["transcribe_ms"] >= 0
+
+        stats = service.stats()
+        assert stats["completed"] == 2 and stats["failed"] == 0
+    finally:
+        service.shutdown()
+
+
+def test_full_queue_rejects_instead_of_piling_up():
+    service = TranscriptionService(backend="stub", workers=1, queue_size=1, stub_delay=0.3)
+    service.warm_up()
+    try:
+        async def run():
+            return await asyncio.gather(
+                *(service.transcribe(b"voice note") for _ in range(3)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        rejected = [r for r in results if isinstance(r, TranscriptionQueueFull)]
+        assert len(rejected) == 1
+        assert service.stats()["rejected"] == 1
+        # The queued job waited for the single worker
+        assert max(r["queue_ms"] for r in results if isinstance(r, dict)) > 0
+    finally:
+        service.shutdown()
+
+
+def test_timed_out_job_keeps_its_worker_until_it_finishes():
+    service = TranscriptionService(backend="stub", workers=1, queue_size=2, timeout=0.2, stub_delay=0.5)
+    service.warm_up()
+    try:
+        async def run():
+            with pytest.raises(asyncio.TimeoutError):
+                await service.transcribe(b"slow note")
+            during, held = service.stats(), service._slots.locked()
+            await asyncio.sleep(0.5)
+            return during, held, service.stats(), service._slots.locked()
+
+        during, held, after, still_held = asyncio.run(run())
+        # The worker is still busy with the abandoned job, so its slot stays taken
+        assert held and during["running"] == 1 and during["abandoned"] == 1
+        assert not still_held
+        assert after["running"] == 0 and after["abandoned"] == 0 and after["queued"] == 0
+    finally:
+        service.shutdown()
+
+
+def test_broken_pool_is_rebuilt():
+    # The whisper backend fails to start when whisper isn't installed
+    service = TranscriptionService(backend="stub", workers=1)
+    service._initargs = ("whisper", "no-such-model", 0.0)
+    service._pool = service._new_pool()
+    try:
+        with pytest.raises(TranscriptionUnavailable):
+            asyncio.run(service.transcribe(b"voice note"))
+        assert service.stats()["pool_restarts"] == 1
+
+        service._initargs = ("stub", "base", 0.0)
+        service._pool = service._new_pool()
+        assert asyncio.run(service.transcribe(b"hello"))["text"] == "hello"
+        assert service.stats()["running"] == 0
+    finally:
+        service.shutdown()
@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from backend import warmup
+
+
+def test_importing_the_api_loads_no_heavy_dependencies():
+    code = (
+        "import sys, backend.main; "
+        "heavy = [m for m in ('sklearn', 'joblib', 'google.genai', 'google.generativeai') if m in sys.modules]; "
+        "print(','.join(heavy))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_ready_reports_each_subsystem(isolated_stores, monkeypatch):
+    monkeypatch.setattr(warmup, "_state", {name: {"status": "cold", "seconds": None, "error": None}
+                                           for name in warmup.SUBSYSTEMS})
+    client = TestClient(main.app)
+    cold = client.get("/ready")
+    assert cold.status_code == 503 and cold.json()["subsystems"]["model"]["status"] == "cold"
+
+    def broken():
+        raise RuntimeError("no SDK")
+
+    monkeypatch.setitem(warmup.SUBSYSTEMS, "detect_llm", (broken, False))
+    warmup.warm_up()
+    state = client.get("/ready")
+    assert state.status_code == 200
+    subsystems = state.json()["subsystems"]
+    assert subsystems["model"]["status"] == "ready"
+    # Optional subsystems report their failure without holding back readiness
+    assert subsystems["detect_llm"] == {"status": "failed", "error": "no SDK", "seconds": subsystems["detect_llm"]["seconds"]}
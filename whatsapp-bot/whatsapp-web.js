@@ -3,27 +3,25 @@ const { Client, LocalAuth } = require("whatsapp-web.js");
 const qrTerminal = require("qrcode-terminal");
 const QRCode = require("qrcode");
 const axios = require("axios");
-const fs = require("fs");
 const path = require("path");
-const mime = require("mime-types");
+const fs = require("fs");
 const express = require("express");
-const { exec } = require("child_process");
 
 const API_BASE = "http://localhost:8000";
 
+// "queue": text messages are handed to the backend's durable inbound queue
+// and the outcome comes back on POST /ingest/result. "direct": handle each
+// message inline (one backend round trip per step, streamed replies).
+const INGEST_MODE = process.env.INGEST_MODE || "queue";
+
 console.log("Initializing SafeTalk-AI + H.I.V.E. Honeypot bot...");
 
-// Per-chat state: tracks active honeypot sessions
+// Per-chat state: local mirror of the backend honeypot sessions
 // Key = chat id, Value = { active, scamType, persona, history, intel }
+// The backend (/honeypot/session/*) is the source of truth and survives restarts.
 const honeypotSessions = {};
 let latestQR = null;
 
-// Audio folder
-const audioDir = path.resolve(__dirname, "audios");
-if (!fs.existsSync(audioDir)) {
-  fs.mkdirSync(audioDir, { recursive: true });
-}
-
 // WhatsApp client
 const client = new Client({
   authStrategy: new LocalAuth(),
@@ -73,6 +71,7 @@ client.on("ready", async () => {
     BOT_NUMBER,
     "[SafeTalk-AI + H.I.V.E.] Bot started.\nCommands:\n!status - check bot status\n!honeypot on/off - toggle auto-engage\n!intel - show extracted intelligence\n!reset - clear session\n!block <number> - block a contact\n!db stats - fingerprint DB overview\n!db list - top scammers\n!db lookup <id> - search by phone/UPI\n!db flag <fp> - flag a scammer\n!db report <fp> - mark as reported\n\nAuto-block: ON (triggers after 2+ identifiers collected)",
   );
+  subscribeOwnerDigest();
 });
 
 // ── Helpers ──────────────────────────────────────────────
@@ -104,6 +103,16 @@ function guessScamType(text) {
 // Whether honeypot auto-engage is globally on (default: on)
 let honeypotEnabled = true;
 
+// Owner notifications for new intel and fingerprints arrive as one digest per
+// chat per window (EVENT_DIGEST_WINDOW on the backend) from GET /events,
+// instead of up to three WhatsApp sends per scammer turn. While the stream
+// is down, applyTurn() falls back to notifying on every turn.
+let ownerDigestStarted = false;
+let ownerDigestConnected = false;
+let lastDigestEventId = null;
+let ownerSends = Promise.resolve();
+const DIGEST_RECONNECT_MS = 5000;
+
 // Auto-block: block scammer after collecting enough intel
 const AUTO_BLOCK_THRESHOLD = 4; // minimum unique identifiers (phone, UPI, bank) to trigger block
 
@@ -124,6 +133,13 @@ async function blockScammer(chatId, reason) {
       session.active = false;
       session.blockedAt = Date.now();
     }
+    try {
+      await axios.post(
+        `${API_BASE}/honeypot/session/${encodeURIComponent(chatId)}/close`,
+      );
+    } catch (e) {
+      console.error("Session close error:", e.message);
+    }
 
     // Update DB status to reported
     if (session?.fingerprint) {
@@ -160,6 +176,81 @@ async function blockScammer(chatId, reason) {
   }
 }
 
+function formatDigest(digest) {
+  const lines = [`[Honeypot Update - ${digest.chat_id}]`];
+  const fp = digest.fingerprint;
+  if (fp) {
+    lines.push(
+      digest.new_scammer
+        ? `New scammer fingerprinted: ${fp.fingerprint}`
+        : `[DB Match] Known scammer: ${fp.fingerprint} (${fp.encounter_count} encounters, ${fp.scam_types?.join(", ") || "-"})`,
+    );
+    lines.push(`Threat Score: ${fp.threat_score}/100`);
+  }
+  const fresh = digest.new_intel || {};
+  const labels = {
+    upiIds: "UPI",
+    phoneNumbers: "Phones",
+    bankAccounts: "Accounts",
+    phishingLinks: "Links",
+  };
+  for (const [key, label] of Object.entries(labels)) {
+    if (fresh[key]?.length) lines.push(`New ${label}: ${fresh[key].join(", ")}`);
+  }
+  const intel = digest.intel || {};
+  lines.push(
+    `Totals - UPI: ${intel.upiIds?.length || 0}, Phones: ${intel.phoneNumbers?.length || 0}, Links: ${intel.phishingLinks?.length || 0}`,
+  );
+  const seconds = Math.round(digest.ended_at - digest.started_at);
+  lines.push(`(${digest.events} updates over ${seconds}s)`);
+  return lines.join("\n");
+}
+
+// Follows the backend's digest stream for as long as the bot runs,
+// resuming after the last digest (Last-Event-ID) whenever it reconnects.
+async function subscribeOwnerDigest() {
+  if (ownerDigestStarted) return; // "ready" fires again after a WhatsApp reconnect
+  ownerDigestStarted = true;
+  for (;;) {
+    try {
+      const headers =
+        lastDigestEventId !== null ? { "Last-Event-ID": String(lastDigestEventId) } : {};
+      const response = await axios.get(`${API_BASE}/events`, {
+        params: { digest: true, types: "intel,fingerprint" },
+        headers,
+        responseType: "stream",
+      });
+      response.data.setEncoding("utf8");
+      ownerDigestConnected = true;
+      console.log("Owner notifications: digest stream connected");
+
+      await new Promise((resolve, reject) => {
+        let buffer = "";
+        response.data.on("data", (chunk) => {
+          buffer += chunk;
+          let sep;
+          while ((sep = buffer.indexOf("\n\n")) !== -1) {
+            const block = buffer.slice(0, sep);
+            buffer = buffer.slice(sep + 2);
+            if (/^event: (.+)$/m.exec(block)?.[1] !== "digest") continue;
+            const digest = JSON.parse(/^data: (.+)$/m.exec(block)?.[1] || "{}");
+            lastDigestEventId = Number(/^id: (.+)$/m.exec(block)?.[1]);
+            ownerSends = ownerSends
+              .then(() => client.sendMessage(BOT_NUMBER, formatDigest(digest)))
+              .catch((err) => console.error("Digest send error:", err.message));
+          }
+        });
+        response.data.on("end", resolve);
+        response.data.on("error", reject);
+      });
+    } catch (err) {
+      console.error("Digest stream error:", err.message);
+    }
+    ownerDigestConnected = false;
+    await new Promise((resolve) => setTimeout(resolve, DIGEST_RECONNECT_MS));
+  }
+}
+
 // ── Message handler ──────────────────────────────────────
 
 client.on("message", async (msg) => {
@@ -227,6 +318,13 @@ client.on("message", async (msg) => {
 
     if (cmd === "!reset") {
       delete honeypotSessions[chatId];
+      try {
+        await axios.delete(
+          `${API_BASE}/honeypot/session/${encodeURIComponent(chatId)}`,
+        );
+      } catch (e) {
+        console.error("Session reset error:", e.message);
+      }
       await client.sendMessage(
         chatId,
         "[SafeTalk-AI] Honeypot session reset for this chat.",
@@ -376,30 +474,14 @@ client.on("message", async (msg) => {
     try {
       const media = await msg.downloadMedia();
       if (media && media.mimetype?.startsWith("audio")) {
-        const extension = mime.extension(media.mimetype) || "ogg";
-        const filename = `audio_${Date.now()}.${extension}`;
-        const filepath = path.join(audioDir, filename);
+        const audio = Buffer.from(media.data, "base64");
+        console.log(`Voice note received (${audio.length} bytes), transcribing...`);
 
-        fs.writeFileSync(filepath, Buffer.from(media.data, "base64"));
-        console.log(`Audio saved: ${filename}`);
-
-        const transcribePath = path.resolve(__dirname, "../transcribe.py");
-        const command = `python "${transcribePath}" "${filepath}"`;
-
-        console.log("Starting transcription...");
-        exec(command, async (error, stdout, stderr) => {
-          if (error) {
-            console.error("Transcription error:", error.message);
-            return;
-          }
-          // Extract transcribed text and process it like a normal message
-          const match = stdout.match(/Transcription:\s*(.+)/);
-          if (match) {
-            const transcribed = match[1].trim();
-            console.log("Transcribed:", transcribed);
-            await processTextMessage(transcribed, chatId);
-          }
-        });
+        const transcribed = await transcribeAudio(audio, media.mimetype);
+        if (transcribed) {
+          console.log("Transcribed:", transcribed);
+          await handleInbound(transcribed, chatId);
+        }
       }
     } catch (err) {
       console.error("Error processing media:", err.message);
@@ -409,14 +491,139 @@ client.on("message", async (msg) => {
 
   // ── Regular text messages ──
   if (msg.body) {
-    await processTextMessage(msg.body, chatId);
+    await handleInbound(msg.body, chatId);
   }
 });
 
 // ── Core logic ──────────────────────────────────────────
 
+// Queue mode: one fast, durable enqueue per message. The backend processes
+// each chat in order and posts the outcome back (see POST /ingest/result),
+// so a slow Gemini reply no longer holds up every other chat and nothing is
+// lost if either side restarts. Falls back to inline handling if the
+// backend can't accept the message.
+async function handleInbound(text, chatId) {
+  if (INGEST_MODE !== "queue") {
+    await processTextMessage(text, chatId);
+    return;
+  }
+  try {
+    const { data } = await axios.post(`${API_BASE}/ingest/enqueue`, {
+      chat_id: chatId,
+      text,
+      honeypot_enabled: honeypotEnabled,
+    });
+    console.log(`Queued message ${data.id} (queue depth ${data.depth})`);
+  } catch (err) {
+    console.error("Enqueue failed, handling inline:", err.message);
+    await processTextMessage(text, chatId);
+  }
+}
+
+// Outcome of a queued message, posted by the backend worker.
+async function applyIngestResult(result) {
+  const chatId = result.chat_id;
+  const text = result.text;
+  const detection = result.detection;
+
+  if (result.action === "alert") {
+    await client.sendMessage(
+      chatId,
+      `[SCAM ALERT]\nMessage: "${text}"\nRisk: ${detection.risk}\nConfidence: ${detection.confidence}\nReason: ${detection.reason}`,
+    );
+    return;
+  }
+
+  if (result.action === "honeypot_started") {
+    console.log("SCAM DETECTED — Honeypot session started for", chatId);
+    await client.sendMessage(
+      BOT_NUMBER,
+      `[SCAM DETECTED]\nFrom: ${chatId}\nMessage: "${text}"\nRisk: ${detection.risk}\nConfidence: ${detection.confidence}\nAction: Honeypot engaged (${result.scam_type})`,
+    );
+    honeypotSessions[chatId] = {
+      active: true,
+      scamType: result.scam_type,
+      history: [],
+      intel: null,
+      startTime: Date.now(),
+    };
+  }
+
+  if (!honeypotSessions[chatId]) {
+    honeypotSessions[chatId] = {
+      active: true,
+      scamType: result.turn.scam_type,
+      history: [],
+      intel: null,
+      startTime: Date.now(),
+    };
+  }
+
+  await client.sendMessage(chatId, result.turn.reply);
+  await applyTurn(chatId, text, result.turn);
+}
+
+// Voice notes go straight to the backend's transcription pool as raw bytes.
+// A 503 means the pool's queue is full: wait as told and retry a few times.
+async function transcribeAudio(audio, mimetype, attempts = 5) {
+  for (let attempt = 1; attempt <= attempts; attempt++) {
+    try {
+      const { data } = await axios.post(`${API_BASE}/transcribe`, audio, {
+        headers: { "Content-Type": mimetype || "application/octet-stream" },
+        maxBodyLength: Infinity,
+      });
+      console.log(
+        `Transcription took ${data.transcribe_ms}ms (queued ${data.queue_ms}ms)`,
+      );
+      return data.text?.trim();
+    } catch (err) {
+      if (err.response?.status !== 503 || attempt === attempts) {
+        console.error("Transcription error:", err.response?.data?.error || err.message);
+        return null;
+      }
+      const retryAfter = Number(err.response.headers["retry-after"]) || 2;
+      await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+    }
+  }
+  return null;
+}
+
+// After a bot restart the local map is empty; pick up any live session the
+// backend still holds for this chat so the engagement continues seamlessly.
+const restoreChecked = new Set();
+
+async function restoreSession(chatId) {
+  if (honeypotSessions[chatId]) return honeypotSessions[chatId];
+  if (restoreChecked.has(chatId)) return null;
+  restoreChecked.add(chatId);
+  try {
+    const { data } = await axios.get(
+      `${API_BASE}/honeypot/session/${encodeURIComponent(chatId)}`,
+      { params: { include_history: true } },
+    );
+    if (!data.found) return null;
+    const s = data.session;
+    honeypotSessions[chatId] = {
+      active: s.active,
+      scamType: s.scam_type,
+      history: s.history || [],
+      intel: s.intel,
+      fingerprint: s.fingerprint,
+      threatScore: s.threat_score,
+      startTime: Date.now() - s.duration_seconds * 1000,
+    };
+    console.log(`Restored honeypot session for ${chatId} (${s.turns} turns)`);
+    return honeypotSessions[chatId];
+  } catch (e) {
+    console.error("Session restore error:", e.message);
+    return null;
+  }
+}
+
 async function processTextMessage(text, chatId) {
   try {
+    await restoreSession(chatId);
+
     // If there's already an active honeypot session for this chat, continue it
     if (honeypotSessions[chatId]?.active) {
       await continueHoneypot(text, chatId);
@@ -469,79 +676,145 @@ async function processTextMessage(text, chatId) {
   }
 }
 
+// Reads the streamed /honeypot/turn SSE feed. "typing…" is shown right away
+// and every completed sentence is sent immediately instead of waiting for
+// the whole reply. Resolves with the final `done` payload (reply, intel,
+// intel_delta, fingerprint, timings).
+async function streamHoneypotTurn(chatId, scammerText, scamType) {
+  const chat = await client.getChatById(chatId);
+  await chat.sendStateTyping();
+
+  const response = await axios.post(
+    `${API_BASE}/honeypot/turn`,
+    {
+      session_id: chatId,
+      scammer_message: scammerText,
+      scam_type: scamType,
+      stream: true,
+    },
+    { responseType: "stream" },
+  );
+  response.data.setEncoding("utf8");
+
+  return new Promise((resolve, reject) => {
+    let buffer = "";
+    let sending = Promise.resolve();
+    let done = null;
+    let failed = null;
+
+    response.data.on("data", (chunk) => {
+      buffer += chunk;
+      let sep;
+      while ((sep = buffer.indexOf("\n\n")) !== -1) {
+        const block = buffer.slice(0, sep);
+        buffer = buffer.slice(sep + 2);
+        const event = /^event: (.+)$/m.exec(block)?.[1];
+        const data = JSON.parse(/^data: (.+)$/m.exec(block)?.[1] || "{}");
+
+        if (event === "sentence") {
+          sending = sending.then(async () => {
+            await client.sendMessage(chatId, data.text);
+            await chat.sendStateTyping();
+          });
+        } else if (event === "done") {
+          done = data;
+        } else if (event === "error") {
+          failed = new Error(data.message);
+        }
+      }
+    });
+
+    response.data.on("end", async () => {
+      try {
+        await sending;
+        await chat.clearState();
+      } catch (e) {
+        console.error("Send error:", e.message);
+      }
+      if (done) resolve(done);
+      else reject(failed || new Error("Turn stream ended without a result"));
+    });
+
+    response.data.on("error", reject);
+  });
+}
+
 async function continueHoneypot(scammerText, chatId) {
   const session = honeypotSessions[chatId];
 
-  // Add scammer message to history
-  session.history.push({ sender: "scammer", text: scammerText });
-
   try {
-    // Generate AI honeypot reply
-    const { data: honeypot } = await axios.post(`${API_BASE}/honeypot/reply`, {
-      scammer_message: scammerText,
-      scam_type: session.scamType,
-      conversation_history: session.history,
-    });
+    // One backend call per turn: the persona reply is streamed (sentences are
+    // sent as they complete) while the backend extracts intel from the
+    // scammer's message and updates the fingerprint DB concurrently.
+    const turn = await streamHoneypotTurn(chatId, scammerText, session.scamType);
+    await applyTurn(chatId, scammerText, turn);
+  } catch (error) {
+    console.error("Honeypot reply error:", error.message);
+  }
+}
 
-    const reply = honeypot.reply;
-    console.log(`Honeypot [${honeypot.persona_name}]: ${reply}`);
+// Bookkeeping after a turn's reply has been sent: local history, owner
+// notifications for new intel / fingerprints, and the auto-block check.
+async function applyTurn(chatId, scammerText, turn) {
+  const session = honeypotSessions[chatId];
 
-    // Add our reply to history
-    session.history.push({ sender: "victim", text: reply });
+  try {
+    const reply = turn.reply;
+    console.log(
+      `Honeypot [${turn.persona_name}] ${JSON.stringify(turn.timings)}: ${reply}`,
+    );
 
-    // Send the honeypot reply to the scammer
-    await client.sendMessage(chatId, reply);
+    session.history.push({ sender: "scammer", text: scammerText });
+    session.history.push({ sender: "victim", text: reply });
 
-    // Extract intelligence from the full conversation so far
-    const fullText = session.history.map((m) => m.text).join(" ");
-    const { data: intel } = await axios.post(`${API_BASE}/honeypot/extract`, {
-      message: fullText,
-    });
+    const intel = turn.intel;
     session.intel = intel;
 
     // Log intel if anything new found
-    const hasIntel =
-      intel.upiIds?.length ||
-      intel.phoneNumbers?.length ||
-      intel.phishingLinks?.length;
-    if (hasIntel) {
+    const delta = turn.intel_delta || {};
+    const hasNewIntel =
+      delta.upiIds?.length ||
+      delta.phoneNumbers?.length ||
+      delta.bankAccounts?.length ||
+      delta.phishingLinks?.length;
+    if (hasNewIntel) {
       console.log("Intelligence update:", JSON.stringify(intel, null, 2));
 
-      // Store fingerprint in database
-      try {
-        const { data: fp } = await axios.post(`${API_BASE}/fingerprint/store`, {
-          intel: intel,
-          scam_type: session.scamType,
-          chat_id: chatId,
-          message_count: session.history.length,
-        });
-
-        if (fp.fingerprint) {
-          session.fingerprint = fp.fingerprint;
-          session.threatScore = fp.threat_score;
-          session.encounterCount = fp.encounter_count;
-          session.scammerStatus = fp.status;
+      // Fingerprint was stored by the backend during the same call
+      const fp = turn.fingerprint;
+      if (fp) {
+        session.fingerprint = fp.fingerprint;
+        session.threatScore = fp.threat_score;
+        session.encounterCount = fp.encounter_count;
+        session.scammerStatus = fp.status;
 
-          const isKnown = !fp.is_new_scammer;
-          const fpMsg = isKnown
-            ? `[DB Match] Known scammer re-identified!\nFingerprint: ${fp.fingerprint}\nThreat Score: ${fp.threat_score}/100\nEncounters: ${fp.encounter_count}\nScam Types: ${fp.scam_types?.join(", ")}`
-            : `[New Scammer Fingerprinted]\nFingerprint: ${fp.fingerprint}\nThreat Score: ${fp.threat_score}/100`;
+        const isKnown = !fp.is_new_scammer;
+        const fpMsg = isKnown
+          ? `[DB Match] Known scammer re-identified!\nFingerprint: ${fp.fingerprint}\nThreat Score: ${fp.threat_score}/100\nEncounters: ${fp.encounter_count}\nScam Types: ${fp.scam_types?.join(", ")}`
+          : `[New Scammer Fingerprinted]\nFingerprint: ${fp.fingerprint}\nThreat Score: ${fp.threat_score}/100`;
 
-          console.log(fpMsg);
+        console.log(fpMsg);
 
-          // Notify bot owner about fingerprint
+        // Notify bot owner about fingerprint (the digest stream covers it when connected)
+        if (!ownerDigestConnected) {
           await client.sendMessage(BOT_NUMBER, `${fpMsg}\nChat: ${chatId}`);
         }
-      } catch (fpErr) {
-        console.error("Fingerprint store error:", fpErr.message);
       }
 
       // Notify bot owner about new intel
-      await client.sendMessage(
-        BOT_NUMBER,
-        `[Intel Update - ${chatId}]\nUPI: ${intel.upiIds?.join(", ") || "-"}\nPhones: ${intel.phoneNumbers?.join(", ") || "-"}\nLinks: ${intel.phishingLinks?.join(", ") || "-"}`,
-      );
+      if (!ownerDigestConnected) {
+        await client.sendMessage(
+          BOT_NUMBER,
+          `[Intel Update - ${chatId}]\nUPI: ${intel.upiIds?.join(", ") || "-"}\nPhones: ${intel.phoneNumbers?.join(", ") || "-"}\nLinks: ${intel.phishingLinks?.join(", ") || "-"}`,
+        );
+      }
+    }
 
+    const hasIntel =
+      intel.upiIds?.length ||
+      intel.phoneNumbers?.length ||
+      intel.phishingLinks?.length;
+    if (hasIntel) {
       // Auto-block check: count unique hard identifiers (phone, UPI, bank account)
       const uniqueIdentifiers = new Set([
         ...(intel.upiIds || []),
@@ -601,6 +874,78 @@ app.post("/alert", (req, res) => {
   }
 });
 
+// Outcomes of queued messages. Delivery from the backend is at-least-once:
+// a result is acknowledged only after its WhatsApp messages are sent, so a
+// crash or a failed send gets it redelivered. Applied queue ids are saved
+// to disk, so a redelivery after a restart is not applied twice; one that
+// arrives while the first copy is still being applied waits for it.
+// Results for one chat are applied in arrival order.
+const APPLIED_IDS_PATH = path.resolve(__dirname, "applied-queue-ids.json");
+const MAX_APPLIED_IDS = 5000;
+const appliedQueueIds = loadAppliedIds();
+const applying = new Map();    // queue id -> promise of its apply
+const chatChains = new Map();
+
+function loadAppliedIds() {
+  try {
+    return new Set(JSON.parse(fs.readFileSync(APPLIED_IDS_PATH, "utf8")));
+  } catch (err) {
+    if (err.code !== "ENOENT") console.error("Could not read applied queue ids:", err.message);
+    return new Set();
+  }
+}
+
+function markApplied(queueId) {
+  appliedQueueIds.add(queueId);
+  if (appliedQueueIds.size > MAX_APPLIED_IDS) {
+    appliedQueueIds.delete(appliedQueueIds.values().next().value);
+  }
+  // Write then rename, so a crash never leaves a torn file
+  const tmp = `${APPLIED_IDS_PATH}.tmp`;
+  fs.writeFileSync(tmp, JSON.stringify([...appliedQueueIds]));
+  fs.renameSync(tmp, APPLIED_IDS_PATH);
+}
+
+app.post("/ingest/result", async (req, res) => {
+  const result = req.body;
+  if (!result?.chat_id || result.queue_id === undefined) {
+    res.status(400).send({ error: "Missing chat_id or queue_id." });
+    return;
+  }
+  if (appliedQueueIds.has(result.queue_id)) {
+    res.send({ status: "duplicate" });
+    return;
+  }
+  const inFlight = applying.get(result.queue_id);
+  if (inFlight) {
+    try {
+      await inFlight;
+      res.send({ status: "duplicate" });
+    } catch (err) {
+      res.status(500).send({ error: err.message });
+    }
+    return;
+  }
+
+  const chatId = result.chat_id;
+  const next = (chatChains.get(chatId) || Promise.resolve())
+    .catch(() => {})    // an earlier result's failure is reported to its own request
+    .then(() => applyIngestResult(result))
+    .then(() => markApplied(result.queue_id));
+  chatChains.set(chatId, next);
+  applying.set(result.queue_id, next);
+  try {
+    await next;
+    res.send({ status: "applied" });
+  } catch (err) {
+    console.error("Ingest result error:", err.message);
+    res.status(500).send({ error: err.message });    // the backend retries it
+  } finally {
+    applying.delete(result.queue_id);
+    if (chatChains.get(chatId) === next) chatChains.delete(chatId);
+  }
+});
+
 app.get("/sessions", (req, res) => {
   const summary = {};
   for (const [chatId, session] of Object.entries(honeypotSessions)) {
@@ -643,5 +988,6 @@ app.listen(3000, () => {
   console.log("Express server at http://localhost:3000");
   console.log("  GET  /qr       — scan QR code in browser");
   console.log("  POST /alert    — send external alerts");
+  console.log("  POST /ingest/result — outcomes of queued messages");
   console.log("  GET  /sessions — view active honeypot sessions");
 });